@@ -17,6 +17,7 @@ describe('AuthController', () => {
   const mockTokenService = {
     refreshAccessToken: jest.fn(),
     verifyAccessToken: jest.fn(),
+    verifyAccessTokens: jest.fn(),
     logoutByAccessToken: jest.fn(),
   } as unknown as TokenService;
 
@@ -164,6 +165,16 @@ describe('AuthController', () => {
     expect(res).toEqual({ guid: 'G4' });
   });
 
+  it('verifyTokens delegates to TokenService.verifyAccessTokens', async () => {
+    const dto = { access_tokens: ['A.G4.a', 'A.G4.b'], app_id: 'jiuweihu' } as any;
+    const payload = { results: [{ ok: true, guid: 'G4' }, { ok: false, code: 'ERR_ACCESS_INVALID' }] };
+    (mockTokenService.verifyAccessTokens as jest.Mock).mockResolvedValue(payload);
+
+    const res = await controller.verifyTokens(dto);
+    expect(mockTokenService.verifyAccessTokens).toHaveBeenCalledWith(dto);
+    expect(res).toEqual(payload);
+  });
+
   it('logout should use body access_token when provided', async () => {
     await controller.logout({ access_token: 'A.token' } as any, undefined);
     expect(mockTokenService.logoutByAccessToken).toHaveBeenCalledWith('A.token');
@@ -5,13 +5,14 @@ import { TokenService } from './token.service';
 import { LoginByPhoneDto } from './dto/login-by-phone.dto';
 import { RefreshTokenDto } from './dto/refresh-token.dto';
 import { VerifyTokenDto } from './dto/verify-token.dto';
+import { VerifyTokensDto } from './dto/verify-tokens.dto';
 import { LoginResponseDto } from './dto/login-response.dto';
 import { VerificationCodeService } from './verification-code.service';
 import { SendCodeDto } from './dto/send-code.dto';
 import { LogoutDto } from './dto/logout.dto';
 import { MetricsService } from './metrics.service';
 import { AuthErrorCode, AuthException } from './auth-error';
-import { ErrorResponse } from '../contracts/contracts';
+import { ErrorResponse, VerifyAccessTokensResponse } from '../contracts/contracts';
 import { AuditLogService } from './audit-log.service';
 import { RateLimitService } from './rate-limit.service';
 
@@ -134,6 +135,13 @@ export class AuthController {
     return this.tokenService.verifyAccessToken(dto);
   }
 
+  @Post('verify-tokens')
+  @ApiOperation({ summary: '批量校验 Access Token（网关用，按顺序逐个返回结果或错误码）' })
+  @ApiBody({ type: VerifyTokensDto })
+  async verifyTokens(@Body() dto: VerifyTokensDto): Promise<VerifyAccessTokensResponse> {
+    return this.tokenService.verifyAccessTokens(dto);
+  }
+
   @Post('logout')
   @ApiOperation({ summary: '退出登录（幂等）' })
   async logout(
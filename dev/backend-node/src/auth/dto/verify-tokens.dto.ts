@@ -0,0 +1,22 @@
+import { ArrayMaxSize, ArrayNotEmpty, IsArray, IsString } from 'class-validator';
+import { ApiProperty } from '@nestjs/swagger';
+import { VerifyAccessTokensRequest } from '../../contracts/contracts';
+
+export const VERIFY_TOKENS_MAX_BATCH = 500;
+
+export class VerifyTokensDto implements VerifyAccessTokensRequest {
+  @ApiProperty({
+    example: ['A.GUID.xxx', 'A.GUID.yyy'],
+    description: `待校验的 Access Token 列表（最多 ${VERIFY_TOKENS_MAX_BATCH} 个）`,
+    type: [String],
+  })
+  @IsArray()
+  @ArrayNotEmpty()
+  @ArrayMaxSize(VERIFY_TOKENS_MAX_BATCH)
+  @IsString({ each: true })
+  access_tokens: string[];
+
+  @ApiProperty({ example: 'jiuweihu', description: '调用方应用 ID' })
+  @IsString()
+  app_id: string;
+}
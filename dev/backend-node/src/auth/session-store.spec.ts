@@ -4,6 +4,7 @@ import { Session } from './session.types';
 class FakeRedis {
   public readonly data = new Map<string, string>();
   public readonly setCalls: Array<{ key: string; value: string; flag: string; ttl: number }> = [];
+  public readonly mgetCalls: string[][] = [];
 
   async set(key: string, value: string, flag: string, ttl: number): Promise<void> {
     this.setCalls.push({ key, value, flag, ttl });
@@ -14,6 +15,11 @@ class FakeRedis {
     return this.data.get(key) ?? null;
   }
 
+  async mget(...keys: string[]): Promise<Array<string | null>> {
+    this.mgetCalls.push(keys);
+    return keys.map((k) => this.data.get(k) ?? null);
+  }
+
   async del(key: string): Promise<void> {
     this.data.delete(key);
   }
@@ -88,4 +94,26 @@ describe('SessionStore', () => {
     const none = await store.findByAccessToken('A.none');
     expect(none).toBeNull();
   });
+
+  it('findManyByAccessTokens uses one MGET over distinct guids', async () => {
+    const redis = new FakeRedis();
+    const store = new SessionStore(redis as any);
+
+    const app = (token: string) => ({
+      accessToken: token,
+      accessTokenExpiresAt: new Date().toISOString(),
+      lastActiveAt: new Date().toISOString(),
+    });
+    const s3: Session = {
+      guid: 'G3',
+      refreshToken: 'R.token',
+      refreshTokenExpiresAt: new Date().toISOString(),
+      apps: { jiuweihu: app('A.G3.a'), youlishe: app('A.G3.b') },
+    };
+    redis.data.set('passport:session:G3', JSON.stringify(s3));
+
+    const found = await store.findManyByAccessTokens(['A.G3.a', 'A.G3.b', 'A.G3.stale', 'A.G9.x', 'bogus']);
+    expect(found.map((s) => s?.guid ?? null)).toEqual(['G3', 'G3', null, null, null]);
+    expect(redis.mgetCalls).toEqual([['passport:session:G3', 'passport:session:G9']]);
+  });
 });
@@ -77,20 +77,48 @@ export class SessionStore {
   }
 
   async findByAccessToken(accessToken: string): Promise<Session | null> {
+    const guid = this.guidOf(accessToken);
+    if (!guid) return null;
+    const session = await this.get(guid);
+    return session && this.holdsToken(session, accessToken) ? session : null;
+  }
+
+  /**
+   * 批量反查：对去重后的 guid 做一次 MGET，结果与入参一一对应。
+   */
+  async findManyByAccessTokens(accessTokens: string[]): Promise<Array<Session | null>> {
+    const guids = Array.from(
+      new Set(accessTokens.map((t) => this.guidOf(t)).filter((g): g is string => g !== null)),
+    );
+    const sessions = new Map<string, Session>();
+    if (guids.length > 0) {
+      const raws = await this.redis.mget(...guids.map((g) => this.key(g)));
+      raws.forEach((raw, i) => {
+        if (raw) sessions.set(guids[i], JSON.parse(raw) as Session);
+      });
+    }
+    return accessTokens.map((token) => {
+      const guid = this.guidOf(token);
+      const session = guid ? sessions.get(guid) : undefined;
+      return session && this.holdsToken(session, token) ? session : null;
+    });
+  }
+
+  private guidOf(accessToken: string): string | null {
     const parts = accessToken.split('.');
     // 期望格式：A.{guid}.{random}
     if (parts.length < 3 || parts[0] !== 'A') {
       return null;
     }
-    const guid = parts[1];
-    const session = await this.get(guid);
-    if (!session) return null;
+    return parts[1];
+  }
 
+  private holdsToken(session: Session, accessToken: string): boolean {
     for (const app of Object.values(session.apps)) {
       if (app.accessToken === accessToken) {
-        return session;
+        return true;
       }
     }
-    return null;
+    return false;
   }
 }
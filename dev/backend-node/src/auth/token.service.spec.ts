@@ -36,6 +36,10 @@ class InMemorySessionStore {
     }
     return null;
   }
+
+  async findManyByAccessTokens(accessTokens: string[]): Promise<Array<Session | null>> {
+    return Promise.all(accessTokens.map((t) => this.findByAccessToken(t)));
+  }
 }
 
 class FakeLoginLogService extends LoginLogService {
@@ -284,6 +288,49 @@ describe('TokenService', () => {
     ).rejects.toMatchObject({ code: AuthErrorCode.ERR_APP_ID_MISMATCH } as Partial<AuthException>);
   });
 
+  it('verifyAccessTokens returns per-token results in input order', async () => {
+    const store = new InMemorySessionStore();
+    const svc = new TokenService(store as any, new FakeLoginLogService(), new FakeAuditLogService());
+
+    const now = new Date();
+    const app = (token: string, offsetMs: number): AppSession => ({
+      accessToken: token,
+      accessTokenExpiresAt: new Date(now.getTime() + offsetMs).toISOString(),
+      lastActiveAt: now.toISOString(),
+    });
+    await store.put({
+      guid: 'G7',
+      refreshToken: 'R',
+      refreshTokenExpiresAt: new Date(now.getTime() + 1000).toISOString(),
+      apps: { jiuweihu: app('A.G7.good', 1000), youlishe: app('A.G7.other', 1000), mall: app('A.G7.old', -1000) },
+    });
+
+    const res = await svc.verifyAccessTokens({
+      access_tokens: ['A.G7.good', 'A.missing', 'A.G7.old', 'A.G7.other', 'A.G7.good'],
+      app_id: 'jiuweihu',
+    });
+
+    expect(res.results).toEqual([
+      { ok: true, guid: 'G7', app_id: 'jiuweihu', expires_at: expect.any(String) },
+      { ok: false, code: AuthErrorCode.ERR_ACCESS_INVALID },
+      { ok: false, code: AuthErrorCode.ERR_ACCESS_EXPIRED },
+      { ok: false, code: AuthErrorCode.ERR_APP_ID_MISMATCH },
+      { ok: true, guid: 'G7', app_id: 'jiuweihu', expires_at: expect.any(String) },
+    ]);
+  });
+
+  it('verifyAccessTokens maps store failures to ERR_INTERNAL', async () => {
+    const store = new InMemorySessionStore();
+    store.findManyByAccessTokens = async () => {
+      throw new Error('redis down');
+    };
+    const svc = new TokenService(store as any, new FakeLoginLogService(), new FakeAuditLogService());
+
+    await expect(
+      svc.verifyAccessTokens({ access_tokens: ['A.G1.x'], app_id: 'jiuweihu' }),
+    ).rejects.toMatchObject({ code: AuthErrorCode.ERR_INTERNAL } as Partial<AuthException>);
+  });
+
   it('does not log raw tokens in refreshAccessToken success path', async () => {
     const store = new InMemorySessionStore();
     const loginLog = new FakeLoginLogService();
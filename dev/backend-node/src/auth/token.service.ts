@@ -4,6 +4,8 @@ import { AuthErrorCode, AuthException } from './auth-error';
 import { SessionStore } from './session-store';
 import { RefreshTokenDto } from './dto/refresh-token.dto';
 import { VerifyTokenDto } from './dto/verify-token.dto';
+import { VerifyTokensDto } from './dto/verify-tokens.dto';
+import { VerifyAccessTokenResult, VerifyAccessTokensResponse } from '../contracts/contracts';
 import { LoginResponseDto } from './dto/login-response.dto';
 import { Session, AppSession } from './session.types';
 import { LoginLogService } from './login-log.service';
@@ -12,6 +14,12 @@ import { resolveAdminRoles, resolveUserTypeLabel } from './user-role.util';
 
 const ACCESS_TTL_HOURS = 4;
 
+const VERIFY_ERROR_MESSAGES: Partial<Record<AuthErrorCode, string>> = {
+  [AuthErrorCode.ERR_ACCESS_INVALID]: 'invalid access token',
+  [AuthErrorCode.ERR_ACCESS_EXPIRED]: 'access expired',
+  [AuthErrorCode.ERR_APP_ID_MISMATCH]: 'app id mismatch',
+};
+
 function addHours(d: Date, hours: number): Date {
   return new Date(d.getTime() + hours * 3600 * 1000);
 }
@@ -165,38 +173,19 @@ export class TokenService {
     const now = new Date();
     try {
       const session = await this.sessions.findByAccessToken(dto.access_token);
-      if (!session) {
-        throw new AuthException(AuthErrorCode.ERR_ACCESS_INVALID, 'invalid access token');
-      }
-
-      const apps = session.apps ?? ({} as any);
-      let matchedAppId: string | null = null;
-      let appSession: AppSession | null = null;
-      for (const [appId, s] of Object.entries(apps)) {
-        if (s && (s as AppSession).accessToken === dto.access_token) {
-          matchedAppId = appId;
-          appSession = s as AppSession;
-          break;
-        }
-      }
-      if (!matchedAppId || !appSession) {
-        throw new AuthException(AuthErrorCode.ERR_ACCESS_INVALID, 'invalid access token');
-      }
-
-      if (new Date(appSession.accessTokenExpiresAt) <= now) {
-        throw new AuthException(AuthErrorCode.ERR_ACCESS_EXPIRED, 'access expired');
-      }
-      if (matchedAppId !== dto.app_id) {
-        throw new AuthException(AuthErrorCode.ERR_APP_ID_MISMATCH, 'app id mismatch');
+      const matched = this.matchAccessToken(session, dto.access_token, dto.app_id, now);
+      if (typeof matched === 'string') {
+        throw new AuthException(matched, VERIFY_ERROR_MESSAGES[matched]);
       }
+      const { session: matchedSession, appId: matchedAppId, appSession } = matched;
 
-      const roles = session.roles ?? resolveAdminRoles(session.userType);
-      const userTypeLabel = resolveUserTypeLabel(session.userType);
-      const accountSource = session.accountSource ?? 'phone';
+      const roles = matchedSession.roles ?? resolveAdminRoles(matchedSession.userType);
+      const userTypeLabel = resolveUserTypeLabel(matchedSession.userType);
+      const accountSource = matchedSession.accountSource ?? 'phone';
 
-      this.logger.log(`verifyAccessToken success for guid=${session.guid}, app_id=${matchedAppId}`);
+      this.logger.log(`verifyAccessToken success for guid=${matchedSession.guid}, app_id=${matchedAppId}`);
       return {
-        guid: session.guid,
+        guid: matchedSession.guid,
         app_id: matchedAppId,
         expires_at: appSession.accessTokenExpiresAt,
         roles,
@@ -212,4 +201,69 @@ export class TokenService {
       throw new AuthException(AuthErrorCode.ERR_INTERNAL, 'service temporarily unavailable');
     }
   }
+
+  /**
+   * 批量校验：一次读时钟、一次 MGET，逐个 token 返回结果或错误码，单个失败不影响整批。
+   * 只有存储层异常才让整个请求失败（ERR_INTERNAL）。
+   */
+  async verifyAccessTokens(dto: VerifyTokensDto): Promise<VerifyAccessTokensResponse> {
+    const now = new Date();
+    let sessions: Array<Session | null>;
+    try {
+      sessions = await this.sessions.findManyByAccessTokens(dto.access_tokens);
+    } catch (e) {
+      this.logger.error('verifyAccessTokens redis error', (e as Error).stack);
+      throw new AuthException(AuthErrorCode.ERR_INTERNAL, 'service temporarily unavailable');
+    }
+
+    let failed = 0;
+    const results = dto.access_tokens.map((token, i): VerifyAccessTokenResult => {
+      const matched = this.matchAccessToken(sessions[i], token, dto.app_id, now);
+      if (typeof matched === 'string') {
+        failed += 1;
+        return { ok: false, code: matched };
+      }
+      return {
+        ok: true,
+        guid: matched.session.guid,
+        app_id: matched.appId,
+        expires_at: matched.appSession.accessTokenExpiresAt,
+      };
+    });
+    this.logger.log(`verifyAccessTokens app_id=${dto.app_id}, total=${results.length}, failed=${failed}`);
+    return { results };
+  }
+
+  private matchAccessToken(
+    session: Session | null,
+    accessToken: string,
+    appId: string,
+    now: Date,
+  ): { session: Session; appId: string; appSession: AppSession } | AuthErrorCode {
+    if (!session) {
+      return AuthErrorCode.ERR_ACCESS_INVALID;
+    }
+
+    const apps = session.apps ?? ({} as any);
+    let matchedAppId: string | null = null;
+    let appSession: AppSession | null = null;
+    for (const [id, s] of Object.entries(apps)) {
+      if (s && (s as AppSession).accessToken === accessToken) {
+        matchedAppId = id;
+        appSession = s as AppSession;
+        break;
+      }
+    }
+    if (!matchedAppId || !appSession) {
+      return AuthErrorCode.ERR_ACCESS_INVALID;
+    }
+
+    if (new Date(appSession.accessTokenExpiresAt) <= now) {
+      return AuthErrorCode.ERR_ACCESS_EXPIRED;
+    }
+    if (matchedAppId !== appId) {
+      return AuthErrorCode.ERR_APP_ID_MISMATCH;
+    }
+    return { session, appId: matchedAppId, appSession };
+  }
 }
@@ -58,6 +58,20 @@ export type VerifyAccessTokenResponse = {
   expires_at: string;
 };
 
+export type VerifyAccessTokensRequest = {
+  access_tokens: string[];
+  app_id: string;
+};
+
+// 批量校验：results 与 access_tokens 一一对应，单个 token 失败不影响整批。
+export type VerifyAccessTokenResult =
+  | ({ ok: true } & VerifyAccessTokenResponse)
+  | { ok: false; code: ContractAuthErrorCode | string };
+
+export type VerifyAccessTokensResponse = {
+  results: VerifyAccessTokenResult[];
+};
+
 export type ErrorResponse = {
   code: ContractAuthErrorCode | string;
   message: string;
@@ -0,0 +1,355 @@
+"""asyncio 版服务层：供异步 HTTP 服务器在单进程内并发处理大量登录/刷新/校验请求。
+
+与 `services.py` / `token_validator.py` 一一对应：
+
+- `AsyncVerificationCodeService` ↔ VerificationCodeService
+- `AsyncAuthService`             ↔ AuthService
+- `AsyncTokenService`            ↔ TokenService
+- `AsyncLogoutService`           ↔ LogoutService
+- `AsyncBanService`              ↔ BanService
+- `AsyncTokenValidator`          ↔ TokenValidator
+
+业务规则与同步版本共用 `session_ops`（登录/刷新会话）与 `token_rules`（token 判定）中的
+纯函数，两套实现的判定与错误码保持一致；这里只负责在存储访问处 `await`，不在事件循环上做阻塞 IO。
+
+仓储按 `AsyncUserRepo` / `AsyncSessionStore` / `AsyncCodeStore` 协议注入：
+
+- Redis：`redis_store.AsyncRedisSessionStore` / `AsyncRedisVerificationCodeStore`（原生异步）；
+- 内存：`Async*Adapter(InMemory...)`，不传 executor，直接内联调用（纯字典操作，不会阻塞）；
+- SQLite：`Async*Adapter(Sqlite..., executor=...)`，调用转到线程池执行。`SqliteDatabase`
+  本身用一把锁串行化，单线程 `ThreadPoolExecutor(1)` 即可，多线程只会在锁上排队。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Protocol, Sequence, Union
+
+from .domain import ERR_ACCESS_INVALID, ERR_PHONE_INVALID, AuthError, Session, User, UserStatus, now_utc
+from .rate_limit import CodeRateLimiter
+from .services import CODE_TTL, PHONE_REGEX, GuidGenerator
+from .session_ops import LoginResult, check_code, new_code, open_session, refresh_session, resolve_login_user
+from .signed_tokens import AccessTokenSigner, RevocationFilter, is_signed_token, revoke_session_tokens
+from .token_rules import MESSAGES, ValidationResult, evaluate_lookup, evaluate_signed
+
+if TYPE_CHECKING:
+    from .sqlite_repos import SqliteCodeRateLimiter
+
+
+class AsyncUserRepo(Protocol):
+    async def find_by_phone(self, phone: str) -> Optional[User]: ...
+
+    async def find_by_guid(self, guid: str) -> Optional[User]: ...
+
+    async def save(self, user: User) -> User: ...
+
+
+class AsyncSessionStore(Protocol):
+    """会话存储协议；可选实现 `find_many_by_access_token`，批量校验时整批查询。"""
+
+    async def put(self, session: Session) -> None: ...
+
+    async def get(self, guid: str) -> Optional[Session]: ...
+
+    async def delete(self, guid: str) -> None: ...
+
+    async def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], Any]) -> Any: ...
+
+    async def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]: ...
+
+
+class AsyncCodeStore(Protocol):
+    async def save(self, phone: str, code: str, expires_at: datetime) -> None: ...
+
+    async def get(self, phone: str) -> Optional[tuple[str, datetime]]: ...
+
+    async def delete(self, phone: str) -> None: ...
+
+
+async def run_blocking(executor: Optional[Executor], fn: Callable[..., Any], *args: Any) -> Any:
+    """executor 为 None 时直接调用（内存实现），否则放到线程池执行，不阻塞事件循环。"""
+
+    if executor is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+class _SyncAdapter:
+    def __init__(self, inner, executor: Optional[Executor] = None) -> None:
+        self._inner = inner
+        self._executor = executor
+
+    async def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await run_blocking(self._executor, fn, *args)
+
+
+class AsyncUserRepoAdapter(_SyncAdapter):
+    """把同步用户仓储（InMemoryUserRepo / SqliteUserRepo）包装为 AsyncUserRepo。"""
+
+    async def find_by_phone(self, phone: str) -> Optional[User]:
+        return await self._call(self._inner.find_by_phone, phone)
+
+    async def find_by_guid(self, guid: str) -> Optional[User]:
+        return await self._call(self._inner.find_by_guid, guid)
+
+    async def save(self, user: User) -> User:
+        return await self._call(self._inner.save, user)
+
+
+class AsyncSessionStoreAdapter(_SyncAdapter):
+    """把同步会话存储（InMemorySessionStore / SqliteSessionStore 等）包装为 AsyncSessionStore。"""
+
+    async def put(self, session: Session) -> None:
+        await self._call(self._inner.put, session)
+
+    async def get(self, guid: str) -> Optional[Session]:
+        return await self._call(self._inner.get, guid)
+
+    async def delete(self, guid: str) -> None:
+        await self._call(self._inner.delete, guid)
+
+    async def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], Any]) -> Any:
+        return await self._call(self._inner.update_app, guid, app_id, fn)
+
+    async def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]:
+        return await self._call(self._inner.find_by_access_token, access_token)
+
+    async def find_many_by_access_token(self, access_tokens: list[str]) -> list[Optional[tuple[Session, str]]]:
+        find_many = getattr(self._inner, "find_many_by_access_token", None)
+        if find_many is not None:
+            return await self._call(find_many, access_tokens)
+        find = self._inner.find_by_access_token
+        return await self._call(lambda: [find(token) for token in access_tokens])
+
+
+class AsyncCodeStoreAdapter(_SyncAdapter):
+    """把同步验证码存储（VerificationCodeStore / SqliteVerificationCodeStore）包装为 AsyncCodeStore。"""
+
+    async def save(self, phone: str, code: str, expires_at: datetime) -> None:
+        await self._call(self._inner.save, phone, code, expires_at)
+
+    async def get(self, phone: str) -> Optional[tuple[str, datetime]]:
+        return await self._call(self._inner.get, phone)
+
+    async def delete(self, phone: str) -> None:
+        await self._call(self._inner.delete, phone)
+
+
+class AsyncVerificationCodeService:
+    """验证码服务（BR-09）的异步版本；`sender` 为协程函数 sender(phone, code)。
+
+    `limiter` 为 CodeRateLimiter（进程内）或 SqliteCodeRateLimiter（共享库，需经 `executor` 调用）。
+    """
+
+    def __init__(
+        self,
+        store: AsyncCodeStore,
+        *,
+        limiter: Optional[Union[CodeRateLimiter, SqliteCodeRateLimiter]] = None,
+        sender: Optional[Callable[[str, str], Awaitable[None]]] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self._store = store
+        self._limiter = limiter
+        self._sender = sender
+        self._executor = executor
+
+    async def send_code(self, phone: str, ip: Optional[str] = None, now: Optional[datetime] = None) -> None:
+        if not PHONE_REGEX.match(phone):
+            raise AuthError(ERR_PHONE_INVALID, "invalid phone format")
+        if self._limiter is not None:
+            # 进程内频控 executor 为 None，直接调用；共享库频控放到存储的执行器上。
+            await run_blocking(self._executor, self._limiter.check, phone, ip)
+        now = now or now_utc()
+        code = new_code()
+        await self._store.save(phone, code, now + CODE_TTL)
+        if self._sender is not None:
+            await self._sender(phone, code)
+
+    async def validate_code(self, phone: str, code: str, now: Optional[datetime] = None) -> None:
+        check_code(await self._store.get(phone), code, now or now_utc())
+
+
+class AsyncAuthService:
+    """手机号登录/注册主流程（FL-01，BR-02）的异步版本。"""
+
+    def __init__(
+        self,
+        user_repo: AsyncUserRepo,
+        session_store: AsyncSessionStore,
+        vc_service: AsyncVerificationCodeService,
+        guid_gen: GuidGenerator,
+        token_signer: Optional[AccessTokenSigner] = None,
+    ) -> None:
+        self._users = user_repo
+        self._sessions = session_store
+        self._vc = vc_service
+        self._guid_gen = guid_gen
+        self._signer = token_signer
+
+    async def login_with_phone(self, phone: str, code: str, app_id: str) -> LoginResult:
+        if not PHONE_REGEX.match(phone):
+            raise AuthError(ERR_PHONE_INVALID, "invalid phone format")
+        await self._vc.validate_code(phone, code)
+
+        now = now_utc()
+        user, created = resolve_login_user(await self._users.find_by_phone(phone), phone, now, self._guid_gen)
+        if created:
+            await self._users.save(user)
+
+        session, result = open_session(user, app_id, now, self._signer)
+        await self._sessions.put(session)
+        return result
+
+
+class AsyncTokenService:
+    """Token 刷新服务（FL-02 / BR-03/04）的异步版本。"""
+
+    def __init__(
+        self,
+        session_store: AsyncSessionStore,
+        token_signer: Optional[AccessTokenSigner] = None,
+        revocations: Optional[RevocationFilter] = None,
+    ) -> None:
+        self._sessions = session_store
+        self._signer = token_signer
+        self._revocations = revocations
+
+    async def refresh_access_token(self, guid: str, refresh_token: str, app_id: str) -> LoginResult:
+        now = now_utc()
+        return await self._sessions.update_app(
+            guid,
+            app_id,
+            lambda session: refresh_session(session, guid, refresh_token, app_id, now, self._signer, self._revocations),
+        )
+
+
+class AsyncLogoutService:
+    """会话销毁服务（FL-05）的异步版本，语义同 LogoutService。"""
+
+    def __init__(self, session_store: AsyncSessionStore, revocations: Optional[RevocationFilter] = None) -> None:
+        self._sessions = session_store
+        self._revocations = revocations
+
+    async def logout(self, guid: str) -> None:
+        if self._revocations is not None:
+            revoke_session_tokens(self._revocations, await self._sessions.get(guid))
+        await self._sessions.delete(guid)
+
+    async def logout_by_access_token(self, access_token: str) -> Optional[str]:
+        found = await self._sessions.find_by_access_token(access_token)
+        if found is None:
+            return None
+        guid = found[0].guid
+        await self.logout(guid)
+        return guid
+
+
+class AsyncBanService:
+    """封禁服务的异步版本，语义同 BanService。"""
+
+    def __init__(
+        self,
+        user_repo: AsyncUserRepo,
+        session_store: Optional[AsyncSessionStore],
+        revocations: Optional[RevocationFilter] = None,
+    ) -> None:
+        self._users = user_repo
+        self._sessions = session_store
+        self._revocations = revocations
+
+    async def ban_by_phone(self, phone: str) -> None:
+        user = await self._users.find_by_phone(phone)
+        if user is None:
+            return
+        user.status = UserStatus.BANNED
+        await self._users.save(user)
+        if self._sessions is not None:
+            if self._revocations is not None:
+                revoke_session_tokens(self._revocations, await self._sessions.get(user.guid))
+            await self._sessions.delete(user.guid)
+
+    async def unban_by_phone(self, phone: str) -> None:
+        user = await self._users.find_by_phone(phone)
+        if user is None:
+            return
+        user.status = UserStatus.ACTIVE
+        await self._users.save(user)
+
+
+class AsyncTokenValidator:
+    """Access Token 校验的异步版本。
+
+    签名 token 的验签与吊销检查是纯 CPU 操作，直接调用 `token_rules.evaluate_signed`；
+    只有不透明 token 需要 `await` 存储反查。
+    """
+
+    def __init__(
+        self,
+        session_store: Optional[AsyncSessionStore],
+        *,
+        signer: Optional[AccessTokenSigner] = None,
+        revocations: Optional[RevocationFilter] = None,
+    ) -> None:
+        self._sessions = session_store
+        self._signer = signer
+        self._revocations = revocations
+
+    async def validate_access_token(self, access_token: str, app_id: str, now: Optional[datetime] = None) -> ValidationResult:
+        now = now or now_utc()
+        if self._signer is not None and is_signed_token(access_token):
+            outcome = evaluate_signed(self._signer, self._revocations, access_token, app_id, now)
+        elif self._sessions is None:
+            outcome = ERR_ACCESS_INVALID
+        else:
+            outcome = evaluate_lookup(await self._sessions.find_by_access_token(access_token), app_id, now)
+        if isinstance(outcome, str):
+            raise AuthError(outcome, MESSAGES[outcome])
+        return outcome
+
+    async def validate_many(
+        self,
+        access_tokens: Sequence[str],
+        app_id: str,
+        now: Optional[datetime] = None,
+    ) -> list[Union[ValidationResult, str]]:
+        """批量校验，语义同 TokenValidator.validate_many（不抛异常，按输入顺序返回）。"""
+
+        now = now or now_utc()
+        unique = list(dict.fromkeys(access_tokens))
+        outcomes: dict[str, Union[ValidationResult, str]] = {}
+        if self._signer is not None:
+            for token in unique:
+                if is_signed_token(token):
+                    outcomes[token] = evaluate_signed(self._signer, self._revocations, token, app_id, now)
+            unique = [token for token in unique if token not in outcomes]
+        if self._sessions is None or not unique:
+            found: list = [None] * len(unique)
+        else:
+            find_many = getattr(self._sessions, "find_many_by_access_token", None)
+            if find_many is not None:
+                found = await find_many(unique)
+            else:
+                found = list(await asyncio.gather(*(self._sessions.find_by_access_token(token) for token in unique)))
+        for token, f in zip(unique, found):
+            outcomes[token] = evaluate_lookup(f, app_id, now)
+        return [outcomes[token] for token in access_tokens]
+
+
+__all__ = [
+    "AsyncUserRepo",
+    "AsyncSessionStore",
+    "AsyncCodeStore",
+    "AsyncUserRepoAdapter",
+    "AsyncSessionStoreAdapter",
+    "AsyncCodeStoreAdapter",
+    "AsyncVerificationCodeService",
+    "AsyncAuthService",
+    "AsyncTokenService",
+    "AsyncLogoutService",
+    "AsyncBanService",
+    "AsyncTokenValidator",
+    "run_blocking",
+]
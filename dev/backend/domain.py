@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, TypeVar
 
 
 UTC = timezone.utc
 
+_T = TypeVar("_T")
+
 
 class UserStatus(int, Enum):
     ACTIVE = 1      # 正常
@@ -55,6 +60,7 @@ class AuthError(Exception):
 # 错误码常量（需与 PRD 第 13 章保持一致）
 ERR_CODE_INVALID = "ERR_CODE_INVALID"
 ERR_CODE_EXPIRED = "ERR_CODE_EXPIRED"
+ERR_CODE_TOO_FREQUENT = "ERR_CODE_TOO_FREQUENT"
 ERR_PHONE_INVALID = "ERR_PHONE_INVALID"
 ERR_USER_BANNED = "ERR_USER_BANNED"
 ERR_REFRESH_EXPIRED = "ERR_REFRESH_EXPIRED"
@@ -79,43 +85,243 @@ class VerificationCodeStore:
     def get(self, phone: str) -> Optional[tuple[str, datetime]]:
         return self._data.get(phone)
 
+    def delete(self, phone: str) -> None:
+        self._data.pop(phone, None)
+
+
+UserSortKey = tuple[datetime, str]
+
 
 class InMemoryUserRepo:
-    """极简 User 仓储实现，仅用于本仓库内的开发与单测。"""
+    """极简 User 仓储实现，仅用于本仓库内的开发与单测。
+
+    额外维护按 (created_at, phone) 有序的键列表以及按状态划分的同序索引，
+    供后台列表做 keyset 分页与流式遍历；状态或 created_at 变更需经 save() 才会反映到索引。
+    """
 
     def __init__(self) -> None:
         self._by_phone: Dict[str, User] = {}
+        self._by_guid: Dict[str, User] = {}
+        self._sorted: list[UserSortKey] = []
+        self._sorted_by_status: Dict[int, list[UserSortKey]] = {}
+        self._indexed: Dict[str, tuple[UserSortKey, int]] = {}
 
     def find_by_phone(self, phone: str) -> Optional[User]:
         return self._by_phone.get(phone)
 
+    def find_by_guid(self, guid: str) -> Optional[User]:
+        return self._by_guid.get(guid)
+
     def save(self, user: User) -> User:
         user.updated_at = datetime.now(UTC)
+        prev = self._by_phone.get(user.phone)
+        if prev is not None and self._by_guid.get(prev.guid) is prev:
+            del self._by_guid[prev.guid]  # 注销后重新注册会换 guid
         self._by_phone[user.phone] = user
+        self._by_guid[user.guid] = user
+        self._reindex(user)
         return user
 
     def all(self) -> Dict[str, User]:
         return dict(self._by_phone)
 
+    def scan(
+        self,
+        status: Optional[UserStatus] = None,
+        after: Optional[UserSortKey] = None,
+        limit: Optional[int] = None,
+    ) -> list[User]:
+        """按 (created_at, phone) 升序返回 `after` 之后的最多 `limit` 个用户。"""
+
+        keys = self._sorted if status is None else self._sorted_by_status.get(status, [])
+        lo = 0 if after is None else bisect_right(keys, after)
+        hi = len(keys) if limit is None else lo + limit
+        return [self._by_phone[phone] for _, phone in keys[lo:hi]]
+
+    def _reindex(self, user: User) -> None:
+        key = (user.created_at, user.phone)
+        status = int(user.status)
+        prev = self._indexed.get(user.phone)
+        if prev == (key, status):
+            return
+        if prev is not None:
+            prev_key, prev_status = prev
+            self._remove_key(self._sorted, prev_key)
+            self._remove_key(self._sorted_by_status[prev_status], prev_key)
+        insort(self._sorted, key)
+        insort(self._sorted_by_status.setdefault(status, []), key)
+        self._indexed[user.phone] = (key, status)
+
+    @staticmethod
+    def _remove_key(keys: list[UserSortKey], key: UserSortKey) -> None:
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
 
 class InMemorySessionStore:
-    """极简 Session 存储实现，仅用于单元测试。"""
+    """极简 Session 存储实现，仅用于单元测试。
+
+    额外维护 access_token → (guid, app_id) 反向索引，供 TokenValidator 以 O(1) 定位会话；
+    索引在 put/delete 时整体重建该 guid 的条目，因此刷新（原地修改后 put）与封禁（delete）均可保持同步。
+
+    `update_app(guid, app_id, fn)` 是所有会话存储共有的单 app 原子更新：读出会话交给 `fn`
+    （会话不存在时为 None），`fn` 可新增/替换/删除 `session.apps[app_id]`，或抛异常放弃；
+    存储只写回这一项，期间其它写入者不能插入，因此同一 guid 上不同 app 的并发刷新不会互相覆盖。
+    """
 
     def __init__(self) -> None:
         self._by_guid: Dict[str, Session] = {}
+        self._by_access_token: Dict[str, tuple[str, str]] = {}
+        self._tokens_by_guid: Dict[str, list[str]] = {}
+        self._lock = threading.RLock()
 
     def put(self, session: Session) -> None:
-        self._by_guid[session.guid] = session
+        with self._lock:
+            self._unindex(session.guid)
+            self._by_guid[session.guid] = session
+            tokens = []
+            for app_id, app_session in session.apps.items():
+                self._by_access_token[app_session.access_token] = (session.guid, app_id)
+                tokens.append(app_session.access_token)
+            self._tokens_by_guid[session.guid] = tokens
+
+    def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], _T]) -> _T:
+        with self._lock:
+            session = self._by_guid.get(guid)
+            result = fn(session)
+            if session is not None:
+                self.put(session)
+            return result
 
     def get(self, guid: str) -> Optional[Session]:
         return self._by_guid.get(guid)
 
     def delete(self, guid: str) -> None:
-        self._by_guid.pop(guid, None)
+        with self._lock:
+            self._unindex(guid)
+            self._by_guid.pop(guid, None)
 
     def items(self):
         return self._by_guid.items()
 
+    def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]:
+        """按 Access Token 反查 (session, app_id)；未命中或索引已过期时返回 None。"""
+
+        ref = self._by_access_token.get(access_token)
+        if ref is None:
+            return None
+        guid, app_id = ref
+        session = self._by_guid.get(guid)
+        if session is None:
+            return None
+        app_session = session.apps.get(app_id)
+        # 调用方可能绕过 put 直接修改 AppSession，这里以会话中的实际 token 为准。
+        if app_session is None or app_session.access_token != access_token:
+            return None
+        return session, app_id
+
+    def _unindex(self, guid: str) -> None:
+        for token in self._tokens_by_guid.pop(guid, ()):
+            if self._by_access_token.get(token, (None,))[0] == guid:
+                del self._by_access_token[token]
+
+
+class ShardedSessionStore:
+    """按 guid 哈希分片、分段加锁的 Session 存储，接口与 InMemorySessionStore 保持一致。
+
+    - 会话按 hash(guid) 落入 shard_count 个分片，每个分片一把锁，不同 guid 的刷新/校验互不阻塞；
+    - access_token 反向索引按 hash(token) 另行分段加锁；加锁顺序固定为「会话分片 → 索引分段」，
+      find_by_access_token 不嵌套持锁，避免死锁；
+    - items() 返回各分片加锁拷贝后的快照列表，迭代期间其它线程写入不会触发
+      “dictionary changed size during iteration”。
+    """
+
+    def __init__(self, shard_count: int = 16) -> None:
+        if shard_count <= 0:
+            raise ValueError("shard_count must be positive")
+        self._shard_count = shard_count
+        self._locks = [threading.Lock() for _ in range(shard_count)]
+        self._sessions: list[Dict[str, Session]] = [{} for _ in range(shard_count)]
+        self._tokens_by_guid: list[Dict[str, list[str]]] = [{} for _ in range(shard_count)]
+        self._index_locks = [threading.Lock() for _ in range(shard_count)]
+        self._by_access_token: list[Dict[str, tuple[str, str]]] = [{} for _ in range(shard_count)]
+
+    def put(self, session: Session) -> None:
+        i = self._shard_of(session.guid)
+        with self._locks[i]:
+            self._put_locked(i, session)
+
+    def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], _T]) -> _T:
+        """语义同 InMemorySessionStore.update_app；`fn` 在 guid 所在分片的锁内执行。"""
+
+        i = self._shard_of(guid)
+        with self._locks[i]:
+            session = self._sessions[i].get(guid)
+            result = fn(session)
+            if session is not None:
+                self._put_locked(i, session)
+            return result
+
+    def get(self, guid: str) -> Optional[Session]:
+        i = self._shard_of(guid)
+        with self._locks[i]:
+            return self._sessions[i].get(guid)
+
+    def delete(self, guid: str) -> None:
+        i = self._shard_of(guid)
+        with self._locks[i]:
+            self._sessions[i].pop(guid, None)
+            self._unindex(guid, self._tokens_by_guid[i].pop(guid, ()))
+
+    def items(self) -> list[tuple[str, Session]]:
+        snapshot: list[tuple[str, Session]] = []
+        for i in range(self._shard_count):
+            with self._locks[i]:
+                snapshot.extend(self._sessions[i].items())
+        return snapshot
+
+    def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]:
+        j = self._shard_of(access_token)
+        with self._index_locks[j]:
+            ref = self._by_access_token[j].get(access_token)
+        if ref is None:
+            return None
+        guid, app_id = ref
+        session = self.get(guid)
+        if session is None:
+            return None
+        app_session = session.apps.get(app_id)
+        if app_session is None or app_session.access_token != access_token:
+            return None
+        return session, app_id
+
+    def _shard_of(self, key: str) -> int:
+        return hash(key) % self._shard_count
+
+    def _put_locked(self, i: int, session: Session) -> None:
+        # 调用方需已持有会话分片 i 的锁。
+        guid = session.guid
+        # dict(...) 在 GIL 下一次性完成拷贝，调用方后续再替换 apps 也不会影响本次索引。
+        apps = dict(session.apps)
+        old_tokens = self._tokens_by_guid[i].pop(guid, ())
+        self._sessions[i][guid] = session
+        self._tokens_by_guid[i][guid] = [a.access_token for a in apps.values()]
+        self._unindex(guid, old_tokens)
+        for app_id, app_session in apps.items():
+            j = self._shard_of(app_session.access_token)
+            with self._index_locks[j]:
+                self._by_access_token[j][app_session.access_token] = (guid, app_id)
+
+    def _unindex(self, guid: str, tokens) -> None:
+        # 调用方需已持有 guid 所在会话分片的锁。
+        for token in tokens:
+            j = self._shard_of(token)
+            with self._index_locks[j]:
+                index = self._by_access_token[j]
+                if index.get(token, (None,))[0] == guid:
+                    del index[token]
+
 
 @dataclass
 class LoginLog:
@@ -129,6 +335,43 @@ class LoginLog:
     ip: Optional[str] = None
     success: bool = True
     error_code: Optional[str] = None
+    id: Optional[int] = None  # 持久化仓储分配的主键；内存仓储不使用
+
+
+class _OpenLoginIndex:
+    """未登出（logout_at 为 None）登录记录的索引：按 guid 与 (guid, phone) 各维护一个写入顺序的栈。
+
+    登出后不立即从栈中移除，查询时从栈顶惰性弹出已登出的记录，整体摊还 O(1)。
+    """
+
+    __slots__ = ("_by_guid", "_by_guid_phone")
+
+    def __init__(self) -> None:
+        self._by_guid: Dict[str, list[LoginLog]] = {}
+        self._by_guid_phone: Dict[tuple[str, str], list[LoginLog]] = {}
+
+    def add(self, log: LoginLog) -> None:
+        if log.logout_at is not None:
+            return
+        self._by_guid.setdefault(log.guid, []).append(log)
+        self._by_guid_phone.setdefault((log.guid, log.phone), []).append(log)
+
+    def latest(self, guid: str, phone: Optional[str] = None) -> Optional[LoginLog]:
+        if phone is None:
+            return self._top(self._by_guid, guid)
+        return self._top(self._by_guid_phone, (guid, phone))
+
+    @staticmethod
+    def _top(index: Dict, key) -> Optional[LoginLog]:
+        stack = index.get(key)
+        if stack is None:
+            return None
+        while stack and stack[-1].logout_at is not None:
+            stack.pop()
+        if not stack:
+            del index[key]
+            return None
+        return stack[-1]
 
 
 class InMemoryLoginLogRepo:
@@ -136,13 +379,36 @@ class InMemoryLoginLogRepo:
 
     def __init__(self) -> None:
         self._logs: list[LoginLog] = []
+        self._open = _OpenLoginIndex()
 
     def append(self, log: LoginLog) -> None:
         self._logs.append(log)
+        self._open.add(log)
 
     def all(self) -> list[LoginLog]:
         return list(self._logs)
 
+    def find_open(self, guid: str, phone: Optional[str] = None) -> Optional[LoginLog]:
+        """返回 guid（及可选 phone）下最近写入且尚未登出的记录。"""
+
+        return self._open.latest(guid, phone)
+
+    def mark_logout(
+        self,
+        log: LoginLog,
+        when: datetime,
+        *,
+        channel: Optional[str] = None,
+        ip: Optional[str] = None,
+    ) -> None:
+        """为指定登录记录补齐登出信息；经由仓储修改，便于带索引的实现同步更新。"""
+
+        log.logout_at = when
+        if channel:
+            log.channel = channel
+        if ip is not None:
+            log.ip = ip
+
     def query(
         self,
         phone: Optional[str] = None,
@@ -162,6 +428,127 @@ class InMemoryLoginLogRepo:
         return sorted(rows, key=lambda r: r.login_at)
 
 
+class _TimeColumn:
+    """按 (login_at, 写入序号) 有序的一列：紧凑的时间戳/序号数组 + 对应 LoginLog 引用。"""
+
+    __slots__ = ("ts", "seq", "rows")
+
+    def __init__(self) -> None:
+        self.ts = array("d")
+        self.seq = array("q")
+        self.rows: list[LoginLog] = []
+
+    def insert(self, ts: float, seq: int, row: LoginLog) -> None:
+        if not self.ts or (ts, seq) >= (self.ts[-1], self.seq[-1]):
+            self.ts.append(ts)
+            self.seq.append(seq)
+            self.rows.append(row)
+            return
+        # 乱序写入（补录历史日志）或跨 channel 迁移：同一时间戳内按写入序号排列，与稳定排序一致。
+        i = bisect_right(self.ts, ts)
+        while i > 0 and self.ts[i - 1] == ts and self.seq[i - 1] > seq:
+            i -= 1
+        self.ts.insert(i, ts)
+        self.seq.insert(i, seq)
+        self.rows.insert(i, row)
+
+    def remove(self, ts: float, row: LoginLog) -> int:
+        i = bisect_left(self.ts, ts)
+        while i < len(self.rows) and self.ts[i] == ts:
+            if self.rows[i] is row:
+                seq = self.seq[i]
+                del self.ts[i]
+                del self.seq[i]
+                del self.rows[i]
+                return seq
+            i += 1
+        raise ValueError("row not in column")
+
+    def bounds(self, start: Optional[datetime], end: Optional[datetime]) -> tuple[int, int]:
+        lo = 0 if start is None else bisect_left(self.ts, start.timestamp())
+        hi = len(self.ts) if end is None else bisect_right(self.ts, end.timestamp())
+        return lo, hi
+
+
+class TimeIndexedLoginLogRepo:
+    """按 login_at 有序存放的 LoginLog 仓储，接口与 InMemoryLoginLogRepo 一致。
+
+    - 主列与 phone/channel 二级索引均按 login_at 有序，时间范围用 bisect 定位；
+    - query 直接切片返回，不再做全表过滤与排序；
+    - channel 会在登出时被改写，因此登出需经由 `mark_logout` 以同步 channel 索引；
+    - all() 仍按写入顺序返回，与 InMemoryLoginLogRepo 语义一致。
+    """
+
+    def __init__(self) -> None:
+        self._appended: list[LoginLog] = []
+        self._all = _TimeColumn()
+        self._by_phone: Dict[str, _TimeColumn] = {}
+        self._by_channel: Dict[str, _TimeColumn] = {}
+        self._open = _OpenLoginIndex()
+
+    def append(self, log: LoginLog) -> None:
+        ts = log.login_at.timestamp()
+        seq = len(self._appended)
+        self._appended.append(log)
+        self._all.insert(ts, seq, log)
+        self._column(self._by_phone, log.phone).insert(ts, seq, log)
+        self._column(self._by_channel, log.channel).insert(ts, seq, log)
+        self._open.add(log)
+
+    def all(self) -> list[LoginLog]:
+        return list(self._appended)
+
+    def find_open(self, guid: str, phone: Optional[str] = None) -> Optional[LoginLog]:
+        """返回 guid（及可选 phone）下最近写入且尚未登出的记录。"""
+
+        return self._open.latest(guid, phone)
+
+    def mark_logout(
+        self,
+        log: LoginLog,
+        when: datetime,
+        *,
+        channel: Optional[str] = None,
+        ip: Optional[str] = None,
+    ) -> None:
+        if channel and channel != log.channel:
+            ts = log.login_at.timestamp()
+            seq = self._by_channel[log.channel].remove(ts, log)
+            log.channel = channel
+            self._column(self._by_channel, channel).insert(ts, seq, log)
+        log.logout_at = when
+        if ip is not None:
+            log.ip = ip
+
+    def query(
+        self,
+        phone: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        channel: Optional[str] = None,
+    ) -> list[LoginLog]:
+        if phone is not None:
+            column = self._by_phone.get(phone)
+        elif channel is not None:
+            column = self._by_channel.get(channel)
+        else:
+            column = self._all
+        if column is None:
+            return []
+        lo, hi = column.bounds(start, end)
+        rows = column.rows[lo:hi]
+        if phone is not None and channel is not None:
+            rows = [r for r in rows if r.channel == channel]
+        return rows
+
+    @staticmethod
+    def _column(index: Dict[str, _TimeColumn], key: str) -> _TimeColumn:
+        column = index.get(key)
+        if column is None:
+            column = index[key] = _TimeColumn()
+        return column
+
+
 REFRESH_TOKEN_TTL_DAYS = 2
 ACCESS_TOKEN_TTL_HOURS = 4
 
@@ -0,0 +1,318 @@
+"""会话与验证码的 TTL 驱逐（分层时间轮）。
+
+内存存储本身只在读取时判断过期（`Session.is_refresh_valid`、验证码 `expires_at` 比较），
+长时间运行的节点上过期数据会一直占用内存。本模块提供：
+
+- `TimingWheel`：分层时间轮，schedule/cancel 为 O(1)，advance 按 tick 摊还 O(1)；
+- `ExpiringSessionStore`：包装任意 Session 存储，在 refresh_token_expires_at 驱逐整个会话，
+  在 access_token_expires_at 移除对应 app 的子会话；
+- `ExpiringCodeStore`：包装 VerificationCodeStore，在验证码过期时删除记录。
+
+写入路径（put/save）会顺带推进时间轮；也可以由后台定时器周期性调用 `sweep()`。
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional, TypeVar
+
+from .domain import Session, VerificationCodeStore, now_utc
+
+_T = TypeVar("_T")
+
+
+class TimingWheel:
+    """分层时间轮：level 0 每格一个 tick，第 l 层每格 slots^l 个 tick。
+
+    到期时间超过最高层跨度的条目先放在最高层末格，级联时再按真实到期时间重新落格；
+    单层时间轮没有级联，这类条目在 level 0 末格触发时若仍未到期，同样重新落格而不是提前触发。
+    cancel/重复 schedule 采用惰性失效：旧条目留在格子里，触发时与 `_deadlines` 比对后丢弃。
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4, start: float = 0.0) -> None:
+        if slots < 2 or slots & (slots - 1):
+            raise ValueError("slots must be a power of two")
+        self._tick = tick
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._levels = levels
+        self._span = 1 << (self._bits * levels)
+        self._wheels: list[list[list[tuple[Hashable, int]]]] = [[[] for _ in range(slots)] for _ in range(levels)]
+        self._current = math.floor(start / tick)
+        self._deadlines: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._deadlines
+
+    def schedule(self, key: Hashable, when: float) -> None:
+        """在 epoch 秒 `when` 到期；同一 key 再次 schedule 会覆盖之前的到期时间。"""
+
+        due = max(math.ceil(when / self._tick), self._current + 1)
+        self._deadlines[key] = due
+        self._place(key, due)
+
+    def cancel(self, key: Hashable) -> None:
+        self._deadlines.pop(key, None)
+
+    def advance(self, now: float) -> list[Hashable]:
+        """推进到 `now`（epoch 秒），返回期间到期的 key 列表。"""
+
+        target = math.floor(now / self._tick)
+        if target <= self._current:
+            return []
+        if not self._deadlines:
+            # 没有有效条目时直接跳转，并清掉惰性失效留下的残余条目。
+            for wheel in self._wheels:
+                for slot in wheel:
+                    slot.clear()
+            self._current = target
+            return []
+
+        fired: list[Hashable] = []
+        while self._current < target:
+            self._current += 1
+            for level in range(self._levels - 1, 0, -1):
+                if self._current & ((1 << (self._bits * level)) - 1) == 0:
+                    self._cascade(level)
+            idx = self._current & self._mask
+            slot = self._wheels[0][idx]
+            if not slot:
+                continue
+            self._wheels[0][idx] = []
+            for key, due in slot:
+                if self._deadlines.get(key) != due:
+                    continue
+                if due > self._current:
+                    self._place(key, due)
+                    continue
+                del self._deadlines[key]
+                fired.append(key)
+        return fired
+
+    def _cascade(self, level: int) -> None:
+        idx = (self._current >> (self._bits * level)) & self._mask
+        entries = self._wheels[level][idx]
+        if not entries:
+            return
+        self._wheels[level][idx] = []
+        for key, due in entries:
+            if self._deadlines.get(key) == due:
+                self._place(key, due)
+
+    def _place(self, key: Hashable, due: int) -> None:
+        delta = due - self._current
+        slot_at = due
+        if delta >= self._span:
+            slot_at = self._current + self._span - 1
+            delta = self._span - 1
+        level = 0
+        while level < self._levels - 1 and delta >= 1 << (self._bits * (level + 1)):
+            level += 1
+        idx = (max(slot_at, self._current) >> (self._bits * level)) & self._mask
+        self._wheels[level][idx].append((key, due))
+
+
+@dataclass
+class ExpiryMetrics:
+    live: int
+    evicted: int
+
+
+class ExpiringSessionStore:
+    """为任意 Session 存储叠加 TTL 驱逐，接口与 InMemorySessionStore 一致。
+
+    被驱逐的 app 子会话会从 `session.apps` 中移除（copy-on-write），此后该 Access Token
+    的校验结果为 ERR_ACCESS_INVALID；客户端按既有契约走刷新流程即可重新获得 token。
+    """
+
+    def __init__(
+        self,
+        inner,
+        *,
+        now_provider: Callable[[], datetime] = now_utc,
+        tick_seconds: float = 1.0,
+    ) -> None:
+        self._inner = inner
+        self.now = now_provider
+        self._lock = threading.Lock()
+        self._wheel = TimingWheel(tick=tick_seconds, start=now_provider().timestamp())
+        self._apps_by_guid: Dict[str, set[str]] = {}
+        self._live_access_tokens = 0
+        self._evicted_sessions = 0
+        self._evicted_access_tokens = 0
+
+    def put(self, session: Session) -> None:
+        self._inner.put(session)
+        with self._lock:
+            self._track(session)
+        self.sweep()
+
+    def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], _T]) -> _T:
+        applied: list[Optional[Session]] = [None]
+
+        def apply(session: Optional[Session]) -> _T:
+            applied[0] = session  # 内层重试时保留最后一次（即实际写入的）会话
+            return fn(session)
+
+        result = self._inner.update_app(guid, app_id, apply)
+        if applied[0] is not None:
+            with self._lock:
+                self._track(applied[0])
+        self.sweep()
+        return result
+
+    def get(self, guid: str) -> Optional[Session]:
+        return self._inner.get(guid)
+
+    def delete(self, guid: str) -> None:
+        self._inner.delete(guid)
+        with self._lock:
+            self._untrack(guid)
+
+    def items(self):
+        return self._inner.items()
+
+    def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]:
+        return self._inner.find_by_access_token(access_token)
+
+    def find_many_by_access_token(self, access_tokens: list[str]) -> list[Optional[tuple[Session, str]]]:
+        find_many = getattr(self._inner, "find_many_by_access_token", None)
+        if find_many is not None:
+            return find_many(access_tokens)
+        return [self._inner.find_by_access_token(token) for token in access_tokens]
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """驱逐已到期的会话与 app 子会话，返回本次驱逐条目数。"""
+
+        now = now or self.now()
+        evicted = 0
+        with self._lock:
+            for key in self._wheel.advance(now.timestamp()):
+                if key[0] == "session":
+                    evicted += self._expire_session(key[1], now)
+                else:
+                    evicted += self._expire_access(key[1], key[2], now)
+        return evicted
+
+    def metrics(self) -> Dict[str, ExpiryMetrics]:
+        with self._lock:
+            return {
+                "sessions": ExpiryMetrics(live=len(self._apps_by_guid), evicted=self._evicted_sessions),
+                "access_tokens": ExpiryMetrics(live=self._live_access_tokens, evicted=self._evicted_access_tokens),
+            }
+
+    # --- Internal（调用方需持有 self._lock） ---
+    def _track(self, session: Session) -> None:
+        guid = session.guid
+        apps = dict(session.apps)
+        self._wheel.schedule(("session", guid), session.refresh_token_expires_at.timestamp())
+        old = self._apps_by_guid.get(guid, set())
+        for app_id in old - apps.keys():
+            self._wheel.cancel(("access", guid, app_id))
+        for app_id, app_session in apps.items():
+            self._wheel.schedule(("access", guid, app_id), app_session.access_token_expires_at.timestamp())
+        self._apps_by_guid[guid] = set(apps)
+        self._live_access_tokens += len(apps) - len(old)
+
+    def _untrack(self, guid: str) -> None:
+        self._wheel.cancel(("session", guid))
+        apps = self._apps_by_guid.pop(guid, set())
+        for app_id in apps:
+            self._wheel.cancel(("access", guid, app_id))
+        self._live_access_tokens -= len(apps)
+
+    def _expire_session(self, guid: str, now: datetime) -> int:
+        session = self._inner.get(guid)
+        if session is None:
+            self._untrack(guid)
+            return 0
+        if session.is_refresh_valid(now):
+            self._wheel.schedule(("session", guid), session.refresh_token_expires_at.timestamp())
+            return 0
+        self._inner.delete(guid)
+        self._untrack(guid)
+        self._evicted_sessions += 1
+        return 1
+
+    def _expire_access(self, guid: str, app_id: str, now: datetime) -> int:
+        def evict(session: Optional[Session]):
+            # 在 inner 的单 app 原子更新内判断并移除，只删这一项：同一会话上其它 app 的并发刷新不受影响。
+            app_session = session.apps.get(app_id) if session is not None else None
+            if app_session is None or app_session.access_token_expires_at > now:
+                return app_session, False
+            apps = dict(session.apps)
+            del apps[app_id]
+            session.apps = apps
+            return app_session, True
+
+        app_session, evicted = self._inner.update_app(guid, app_id, evict)
+        if app_session is None:
+            if app_id in self._apps_by_guid.get(guid, ()):
+                self._apps_by_guid[guid].discard(app_id)
+                self._live_access_tokens -= 1
+            return 0
+        if not evicted:
+            self._wheel.schedule(("access", guid, app_id), app_session.access_token_expires_at.timestamp())
+            return 0
+        self._apps_by_guid[guid].discard(app_id)
+        self._live_access_tokens -= 1
+        self._evicted_access_tokens += 1
+        return 1
+
+
+class ExpiringCodeStore:
+    """为 VerificationCodeStore 叠加 TTL 驱逐，接口与 VerificationCodeStore 一致。"""
+
+    def __init__(
+        self,
+        inner: VerificationCodeStore,
+        *,
+        now_provider: Callable[[], datetime] = now_utc,
+        tick_seconds: float = 1.0,
+    ) -> None:
+        self._inner = inner
+        self.now = now_provider
+        self._lock = threading.Lock()
+        self._wheel = TimingWheel(tick=tick_seconds, start=now_provider().timestamp())
+        self._evicted = 0
+
+    def save(self, phone: str, code: str, expires_at: datetime) -> None:
+        self._inner.save(phone, code, expires_at)
+        with self._lock:
+            self._wheel.schedule(phone, expires_at.timestamp())
+        self.sweep()
+
+    def get(self, phone: str) -> Optional[tuple[str, datetime]]:
+        return self._inner.get(phone)
+
+    def delete(self, phone: str) -> None:
+        self._inner.delete(phone)
+        with self._lock:
+            self._wheel.cancel(phone)
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        now = now or self.now()
+        evicted = 0
+        with self._lock:
+            for phone in self._wheel.advance(now.timestamp()):
+                record = self._inner.get(phone)
+                if record is not None and record[1] > now:
+                    self._wheel.schedule(phone, record[1].timestamp())
+                    continue
+                self._inner.delete(phone)
+                evicted += 1
+            self._evicted += evicted
+        return evicted
+
+    def metrics(self) -> Dict[str, ExpiryMetrics]:
+        with self._lock:
+            return {"codes": ExpiryMetrics(live=len(self._wheel), evicted=self._evicted)}
+
+
+__all__ = ["TimingWheel", "ExpiryMetrics", "ExpiringSessionStore", "ExpiringCodeStore"]
@@ -0,0 +1,557 @@
+"""Passport HTTP 接口：把异步服务层挂到 `http_server.HttpServer` 上，可脱离 Nest 后端单独压测。
+
+路由、字段与状态码与 Nest 后端（dev/backend-node，全局前缀 /api）对齐：
+
+- `GET  /health`、`GET /api/health`
+- `POST /api/passport/send-code`            {phone}
+- `POST /api/passport/login-by-phone`       {phone, code, app_id}
+- `POST /api/passport/refresh-token`        {guid, refresh_token, app_id}
+- `POST /api/passport/{guid}/refresh-token` {refresh_token, app_id}
+- `POST /api/passport/verify-token`         {access_token, app_id}
+- `POST /api/passport/verify-tokens`        {access_tokens[], app_id}（最多 500 个）
+- `POST /api/passport/logout`               {access_token} 或 Authorization: Bearer
+- `POST /api/admin/login-by-phone`          {phone, code}
+- `POST /api/admin/refresh-token`           {guid, refresh_token}
+- 后台（需 Bearer + `x-app-id` 为后台应用 ID）：
+  `GET /api/admin/users?status=&limit=&cursor=`、`POST /api/admin/users/{guid}/logout`、
+  `GET /api/admin/activity?phone=&start=&end=&channel=`、
+  `POST /api/admin/users/ban` / `unban` {phone}
+
+后台授权：后台应用 ID 的 token 只能经 `/api/admin/login-by-phone` / `refresh-token` 签发，公开的
+登录/刷新接口拒绝该 app_id；签发前与每次后台请求都按 guid 查用户，要求 `user_type` 属于
+`admin_user_types`（默认 {9}，同 Nest `ADMIN_USER_TYPES`）且状态正常，否则 403。
+
+与 Nest 的差异：Python 领域模型只有 user_type，没有细分角色，后台接口不区分 OPERATOR/SUPPORT/TECH；
+BanService 以手机号为键，封禁/解封接口因此按 phone 而不是 guid；用户列表为 keyset 分页（额外返回 next_cursor）。
+
+AuthError 按 Nest `AuthExceptionFilter` 的规则映射状态码，响应体为 `{"code", "message"}`。
+
+本地运行（在 dev/ 目录下）：
+
+    python -m backend.http_api --store memory --port 8080 --print-codes
+    python -m backend.http_api --store sqlite --sqlite passport.db
+    python -m backend.http_api --store redis --redis 127.0.0.1:6379
+    python -m backend.http_api --store sqlite --sqlite passport.db --workers 4   # 见 prefork.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import inspect
+import os
+import signal
+import sys
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Collection, Optional, Sequence
+
+from .async_services import (
+    AsyncAuthService,
+    AsyncBanService,
+    AsyncCodeStoreAdapter,
+    AsyncLogoutService,
+    AsyncSessionStoreAdapter,
+    AsyncTokenService,
+    AsyncTokenValidator,
+    AsyncUserRepo,
+    AsyncUserRepoAdapter,
+    AsyncVerificationCodeService,
+    run_blocking,
+)
+from .domain import (
+    UTC,
+    AuthError,
+    ERR_ACCESS_EXPIRED,
+    ERR_ACCESS_INVALID,
+    ERR_APP_ID_MISMATCH,
+    ERR_CODE_TOO_FREQUENT,
+    ERR_REFRESH_EXPIRED,
+    ERR_REFRESH_MISMATCH,
+    ERR_USER_BANNED,
+    InMemoryLoginLogRepo,
+    InMemorySessionStore,
+    InMemoryUserRepo,
+    LoginLog,
+    User,
+    UserStatus,
+    VerificationCodeStore,
+    now_utc,
+)
+from .http_server import HttpError, HttpRequest, HttpResponse, HttpServer, Router, error_response
+from .rate_limit import CodeRateLimiter
+from .services import GuidGenerator, LoginLogService, LoginResult, UserQueryService
+from .token_validator import ValidationResult
+
+
+VERIFY_TOKENS_MAX_BATCH = 500
+ADMIN_USER_TYPES = frozenset({9})
+
+_UNAUTHORIZED = {ERR_ACCESS_EXPIRED, ERR_ACCESS_INVALID, ERR_REFRESH_EXPIRED, ERR_REFRESH_MISMATCH, "ERR_SESSION_NOT_FOUND"}
+_FORBIDDEN = {ERR_USER_BANNED, ERR_APP_ID_MISMATCH}
+
+
+def status_for(code: str) -> int:
+    """错误码 → HTTP 状态码，规则同 Nest AuthExceptionFilter。"""
+
+    if code in _UNAUTHORIZED:
+        return 401
+    if code in _FORBIDDEN:
+        return 403
+    if code == ERR_CODE_TOO_FREQUENT:
+        return 429
+    if code == "ERR_INTERNAL":
+        return 500
+    return 400
+
+
+def _iso(dt: Optional[datetime]) -> Optional[str]:
+    if dt is None:
+        return None
+    return dt.astimezone(UTC).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    # 与 Nest 一致：无法解析的时间参数直接忽略。
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=UTC)
+
+
+def _field(body: Any, name: str) -> str:
+    value = body.get(name) if isinstance(body, dict) else None
+    if not isinstance(value, str) or not value:
+        raise HttpError(400, "ERR_BAD_REQUEST", f"{name} must be a non-empty string")
+    return value
+
+
+def _bearer(request: HttpRequest) -> Optional[str]:
+    scheme, _, token = request.headers.get("authorization", "").strip().partition(" ")
+    token = token.strip()
+    return token if scheme.lower() == "bearer" and token else None
+
+
+def login_payload(result: LoginResult) -> dict:
+    return {
+        "guid": result.guid,
+        "access_token": result.access_token,
+        "refresh_token": result.refresh_token,
+        "user_status": int(result.user_status),
+        "account_source": result.account_source,
+        "access_token_expires_at": _iso(result.access_token_expires_at),
+        "refresh_token_expires_at": _iso(result.refresh_token_expires_at),
+        "expires_in": max(0, int((result.access_token_expires_at - now_utc()).total_seconds())),
+    }
+
+
+def _validation_payload(result: ValidationResult) -> dict:
+    return {"guid": result.guid, "app_id": result.app_id, "expires_at": _iso(result.expires_at)}
+
+
+def _user_payload(user: User) -> dict:
+    return {
+        "guid": user.guid,
+        "phone": user.phone,
+        "status": UserStatus(user.status).name,
+        "account_source": user.account_source,
+        "user_type": user.user_type,
+        "created_at": _iso(user.created_at),
+    }
+
+
+def _log_payload(log: LoginLog) -> dict:
+    return {
+        "guid": log.guid,
+        "phone": log.phone,
+        "login_at": _iso(log.login_at),
+        "logout_at": _iso(log.logout_at),
+        "channel": log.channel,
+        "ip": log.ip,
+        "success": log.success,
+        "error_code": log.error_code,
+    }
+
+
+class PassportHttpApi:
+    """路由表 + 处理函数；实例本身即 HttpServer 的 handler。
+
+    `user_query` / `login_logs` 为同步服务（后台查询，非热路径），经 `executor` 调用；
+    未提供时对应的后台接口不注册。`users` 用于后台授权的角色检查，未提供时后台接口一律 403。
+    `closers` 在 `aclose()` 时依次调用（可为协程函数）。
+    """
+
+    def __init__(
+        self,
+        *,
+        auth: AsyncAuthService,
+        tokens: AsyncTokenService,
+        validator: AsyncTokenValidator,
+        logout: AsyncLogoutService,
+        codes: AsyncVerificationCodeService,
+        ban: Optional[AsyncBanService] = None,
+        user_query: Optional[UserQueryService] = None,
+        login_logs: Optional[LoginLogService] = None,
+        executor: Optional[Executor] = None,
+        users: Optional[AsyncUserRepo] = None,
+        admin_app_id: str = "admin",
+        admin_user_types: Collection[int] = ADMIN_USER_TYPES,
+        closers: Sequence[Callable[[], Any]] = (),
+    ) -> None:
+        self._auth = auth
+        self._tokens = tokens
+        self._validator = validator
+        self._logout = logout
+        self._codes = codes
+        self._ban = ban
+        self._user_query = user_query
+        self._login_logs = login_logs
+        self._executor = executor
+        self._users = users
+        self.admin_app_id = admin_app_id
+        self.admin_user_types = frozenset(admin_user_types)
+        self._closers = list(closers)
+        self._started = time.monotonic()
+        self.router = self._build_router()
+
+    async def __call__(self, request: HttpRequest) -> HttpResponse:
+        try:
+            return await self.router(request)
+        except AuthError as exc:
+            return error_response(status_for(exc.code), exc.code, str(exc))
+
+    async def aclose(self) -> None:
+        for close in self._closers:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+
+    def _build_router(self) -> Router:
+        router = Router()
+        router.get("/health")(self.health)
+        router.get("/api/health")(self.health)
+        router.post("/api/passport/send-code")(self.send_code)
+        router.post("/api/passport/login-by-phone")(self.login_by_phone)
+        router.post("/api/passport/refresh-token")(self.refresh_token)
+        router.post("/api/passport/{guid}/refresh-token")(self.refresh_token)
+        router.post("/api/passport/verify-token")(self.verify_token)
+        router.post("/api/passport/verify-tokens")(self.verify_tokens)
+        router.post("/api/passport/logout")(self.logout)
+        router.post("/api/admin/login-by-phone")(self.admin_login_by_phone)
+        router.post("/api/admin/refresh-token")(self.admin_refresh_token)
+        router.post("/api/admin/users/{guid}/logout")(self.admin_logout)
+        if self._ban is not None:
+            router.post("/api/admin/users/ban")(self.admin_ban)
+            router.post("/api/admin/users/unban")(self.admin_unban)
+        if self._user_query is not None:
+            router.get("/api/admin/users")(self.admin_users)
+        if self._login_logs is not None:
+            router.get("/api/admin/activity")(self.admin_activity)
+        return router
+
+    async def health(self, request: HttpRequest) -> dict:
+        return {"status": "ok", "timestamp": _iso(now_utc()), "uptime": round(time.monotonic() - self._started, 3), "pid": os.getpid()}
+
+    async def send_code(self, request: HttpRequest) -> dict:
+        await self._codes.send_code(_field(request.json(), "phone"), request.client)
+        return {"success": True}
+
+    async def login_by_phone(self, request: HttpRequest) -> dict:
+        body = request.json()
+        phone = _field(body, "phone")
+        result = await self._auth.login_with_phone(phone, _field(body, "code"), self._public_app_id(body))
+        await self._record_login(result, phone, request)
+        return login_payload(result)
+
+    async def refresh_token(self, request: HttpRequest) -> dict:
+        body = request.json()
+        guid = request.params.get("guid") or _field(body, "guid")
+        result = await self._tokens.refresh_access_token(guid, _field(body, "refresh_token"), self._public_app_id(body))
+        return login_payload(result)
+
+    async def admin_login_by_phone(self, request: HttpRequest) -> dict:
+        body = request.json()
+        phone, code = _field(body, "phone"), _field(body, "code")
+        # 先校验验证码（不消耗），避免未持有验证码的人借 403/200 的差异探测哪些手机号是后台账号。
+        await self._codes.validate_code(phone, code)
+        self._ensure_admin(await self._users.find_by_phone(phone) if self._users is not None else None)
+        result = await self._auth.login_with_phone(phone, code, self.admin_app_id)
+        await self._record_login(result, phone, request)
+        return login_payload(result)
+
+    async def admin_refresh_token(self, request: HttpRequest) -> dict:
+        body = request.json()
+        guid, refresh_token = _field(body, "guid"), _field(body, "refresh_token")
+        self._ensure_admin(await self._users.find_by_guid(guid) if self._users is not None else None)
+        return login_payload(await self._tokens.refresh_access_token(guid, refresh_token, self.admin_app_id))
+
+    async def verify_token(self, request: HttpRequest) -> dict:
+        body = request.json()
+        result = await self._validator.validate_access_token(_field(body, "access_token"), _field(body, "app_id"))
+        return _validation_payload(result)
+
+    async def verify_tokens(self, request: HttpRequest) -> dict:
+        body = request.json()
+        tokens = body.get("access_tokens") if isinstance(body, dict) else None
+        if (
+            not isinstance(tokens, list)
+            or not tokens
+            or len(tokens) > VERIFY_TOKENS_MAX_BATCH
+            or not all(isinstance(t, str) for t in tokens)
+        ):
+            raise HttpError(400, "ERR_BAD_REQUEST", f"access_tokens must be 1..{VERIFY_TOKENS_MAX_BATCH} strings")
+        outcomes = await self._validator.validate_many(tokens, _field(body, "app_id"))
+        return {
+            "results": [
+                {"ok": False, "code": o} if isinstance(o, str) else {"ok": True, **_validation_payload(o)} for o in outcomes
+            ]
+        }
+
+    async def logout(self, request: HttpRequest) -> dict:
+        body = request.json()
+        token = (body.get("access_token") if isinstance(body, dict) else None) or _bearer(request)
+        if token:
+            guid = await self._logout.logout_by_access_token(token)
+            if guid is not None:
+                await self._record_logout(guid, request.client)
+        # 无 token 或 token 未知时视为本地清理态的退出，幂等成功。
+        return {"success": True}
+
+    def _public_app_id(self, body: Any) -> str:
+        app_id = _field(body, "app_id")
+        if app_id == self.admin_app_id:
+            raise HttpError(403, "ERR_FORBIDDEN", "admin app tokens are issued by /api/admin/login-by-phone only")
+        return app_id
+
+    async def _record_login(self, result: LoginResult, phone: str, request: HttpRequest) -> None:
+        if self._login_logs is not None:
+            await run_blocking(self._executor, lambda: self._login_logs.record_login(result.guid, phone, True, ip=request.client))  # type: ignore[union-attr]
+
+    async def _record_logout(self, guid: str, ip: Optional[str]) -> None:
+        if self._login_logs is not None:
+            await run_blocking(self._executor, lambda: self._login_logs.record_logout(guid, ip=ip))  # type: ignore[union-attr]
+
+    def _ensure_admin(self, user: Optional[User]) -> User:
+        if user is None or user.user_type not in self.admin_user_types or user.status != UserStatus.ACTIVE:
+            raise HttpError(403, "ERR_FORBIDDEN", "admin role required")
+        return user
+
+    async def _require_admin(self, request: HttpRequest) -> ValidationResult:
+        token = _bearer(request)
+        app_id = request.headers.get("x-app-id", "").strip()
+        if not token or not app_id:
+            raise HttpError(401, ERR_ACCESS_INVALID, "bearer token and x-app-id required")
+        claims = await self._validator.validate_access_token(token, app_id)
+        if app_id != self.admin_app_id:
+            raise HttpError(403, "ERR_FORBIDDEN", "admin app required")
+        # 每次都查角色：降级或封禁立即生效，不依赖 token 过期。
+        self._ensure_admin(await self._users.find_by_guid(claims.guid) if self._users is not None else None)
+        return claims
+
+    async def admin_users(self, request: HttpRequest) -> dict:
+        await self._require_admin(request)
+        query = request.query
+        status = UserStatus[query["status"]] if query.get("status") in UserStatus.__members__ else None
+        try:
+            limit = int(query.get("limit", "50"))
+            page = await run_blocking(
+                self._executor,
+                lambda: self._user_query.list_users_page(status, limit=limit, cursor=query.get("cursor")),  # type: ignore[union-attr]
+            )
+        except ValueError as exc:
+            raise HttpError(400, "ERR_BAD_REQUEST", str(exc)) from None
+        return {"users": [_user_payload(u) for u in page.items], "next_cursor": page.next_cursor}
+
+    async def admin_ban(self, request: HttpRequest) -> dict:
+        await self._require_admin(request)
+        await self._ban.ban_by_phone(_field(request.json(), "phone"))  # type: ignore[union-attr]
+        return {"success": True}
+
+    async def admin_unban(self, request: HttpRequest) -> dict:
+        await self._require_admin(request)
+        await self._ban.unban_by_phone(_field(request.json(), "phone"))  # type: ignore[union-attr]
+        return {"success": True}
+
+    async def admin_logout(self, request: HttpRequest) -> dict:
+        await self._require_admin(request)
+        guid = request.params["guid"]
+        await self._logout.logout(guid)
+        # 后台强制退出同样补齐登出记录；不传 ip，保留用户登录时的地址而不是管理员的。
+        await self._record_logout(guid, None)
+        return {"success": True}
+
+    async def admin_activity(self, request: HttpRequest) -> dict:
+        await self._require_admin(request)
+        query = request.query
+        logs = await run_blocking(
+            self._executor,
+            lambda: self._login_logs.query_logs(  # type: ignore[union-attr]
+                phone=query.get("phone") or None,
+                start=_parse_time(query.get("start")),
+                end=_parse_time(query.get("end")),
+                channel=query.get("channel") or None,
+            ),
+        )
+        return {"activities": [_log_payload(log) for log in logs]}
+
+
+def build_api(
+    store: str = "memory",
+    *,
+    sqlite_path: str = ":memory:",
+    redis_address: Optional[tuple[str, int]] = None,
+    code_sender: Optional[Callable[[str, str], Awaitable[None]]] = None,
+    rate_limit: bool = True,
+    admin_app_id: str = "admin",
+    admin_user_types: Collection[int] = ADMIN_USER_TYPES,
+) -> PassportHttpApi:
+    """按存储类型装配服务：
+
+    - memory：全部内存实现，内联调用；
+    - sqlite：全部落在 `sqlite_path`，经单线程执行器访问；
+    - redis：会话与验证码在 Redis（`redis_address`），用户与登录记录在 `sqlite_path`。
+
+    `rate_limit=True` 时 memory 用进程内的 `CodeRateLimiter`；sqlite/redis 用 `sqlite_path` 里的
+    `SqliteCodeRateLimiter`，多个 worker 进程共用同一份频控状态。
+    """
+
+    executor: Optional[Executor] = None
+    closers: list[Callable[[], Any]] = []
+    limiter: Any = CodeRateLimiter() if rate_limit else None
+    if store == "memory":
+        user_repo, log_repo = InMemoryUserRepo(), InMemoryLoginLogRepo()
+        users = AsyncUserRepoAdapter(user_repo)
+        sessions: Any = AsyncSessionStoreAdapter(InMemorySessionStore())
+        code_store: Any = AsyncCodeStoreAdapter(VerificationCodeStore())
+    elif store in ("sqlite", "redis"):
+        from .sqlite_repos import (
+            SqliteCodeRateLimiter,
+            SqliteDatabase,
+            SqliteLoginLogRepo,
+            SqliteSessionStore,
+            SqliteUserRepo,
+            SqliteVerificationCodeStore,
+        )
+
+        db = SqliteDatabase(sqlite_path)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        closers += [lambda: executor.shutdown(wait=True), db.close]  # type: ignore[union-attr]
+        user_repo, log_repo = SqliteUserRepo(db), SqliteLoginLogRepo(db)
+        users = AsyncUserRepoAdapter(user_repo, executor)
+        # 频控状态放在库文件里：pre-fork 的各 worker 打开同一个文件，共用一份额度。
+        limiter = SqliteCodeRateLimiter(db) if rate_limit else None
+        if store == "sqlite":
+            sessions = AsyncSessionStoreAdapter(SqliteSessionStore(db), executor)
+            code_store = AsyncCodeStoreAdapter(SqliteVerificationCodeStore(db), executor)
+        else:
+            from .redis_store import AsyncRedisSessionStore, AsyncRedisVerificationCodeStore
+            from .resp import AsyncRespClient
+
+            client = AsyncRespClient(*(redis_address or ("127.0.0.1", 6379)), max_connections=32)
+            closers.insert(0, client.close)
+            sessions = AsyncRedisSessionStore(client)
+            code_store = AsyncRedisVerificationCodeStore(client)
+    else:
+        raise ValueError(f"unknown store: {store}")
+
+    codes = AsyncVerificationCodeService(code_store, limiter=limiter, sender=code_sender, executor=executor if limiter else None)
+    return PassportHttpApi(
+        auth=AsyncAuthService(users, sessions, codes, GuidGenerator()),
+        tokens=AsyncTokenService(sessions),
+        validator=AsyncTokenValidator(sessions),
+        logout=AsyncLogoutService(sessions),
+        codes=codes,
+        ban=AsyncBanService(users, sessions),
+        user_query=UserQueryService(user_repo),
+        login_logs=LoginLogService(log_repo),
+        executor=executor,
+        users=users,
+        admin_app_id=admin_app_id,
+        admin_user_types=admin_user_types,
+        closers=closers,
+    )
+
+
+async def serve(api: PassportHttpApi, server: HttpServer, *, grace: float = 10.0, announce: bool = True) -> None:
+    """运行直到收到 SIGINT/SIGTERM，然后优雅停机并释放存储资源。"""
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # pragma: no cover - Windows
+            pass
+    await server.start()
+    if announce:
+        host, port = server.address
+        print(f"listening on http://{host}:{port}", file=sys.stderr, flush=True)
+    await stop.wait()
+    await server.shutdown(grace)
+    await api.aclose()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Passport Python HTTP API（asyncio）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--store", choices=["memory", "sqlite", "redis"], default="memory")
+    parser.add_argument("--sqlite", default=":memory:", help="SQLite 路径（sqlite/redis 模式）")
+    parser.add_argument("--redis", default="127.0.0.1:6379", help="host:port（redis 模式）")
+    parser.add_argument("--workers", type=int, default=1, help="预派生的 worker 进程数（>1 时需 sqlite 文件或 redis 存储）")
+    parser.add_argument("--max-workers", type=int, default=256)
+    parser.add_argument("--max-pipeline", type=int, default=16)
+    parser.add_argument("--keep-alive", type=float, default=15.0)
+    parser.add_argument("--grace", type=float, default=10.0)
+    parser.add_argument("--print-codes", action="store_true", help="把验证码打印到 stderr（本地联调用，不发短信）")
+    args = parser.parse_args(argv)
+
+    async def print_code(phone: str, code: str) -> None:
+        print(f"verification code for {phone}: {code}", file=sys.stderr, flush=True)
+
+    redis_host, _, redis_port = args.redis.rpartition(":")
+    factory = functools.partial(
+        build_api,
+        args.store,
+        sqlite_path=args.sqlite,
+        redis_address=(redis_host, int(redis_port)),
+        code_sender=print_code if args.print_codes else None,
+    )
+    options = dict(max_workers=args.max_workers, max_pipeline=args.max_pipeline, keep_alive_timeout=args.keep_alive)
+
+    if args.workers > 1:
+        if args.store == "memory" or args.sqlite == ":memory:":
+            parser.error("--workers > 1 需要进程间共享的存储：--store sqlite/redis 且 --sqlite 为文件路径")
+        from .prefork import PreforkServer
+        from .sqlite_repos import SqliteDatabase
+
+        # 在 fork 之前建好表并切到 WAL，避免多个 worker 同时初始化。
+        SqliteDatabase(args.sqlite).close()
+        PreforkServer(factory, workers=args.workers, host=args.host, port=args.port, grace=args.grace, **options).run()
+        return 0
+
+    async def run() -> None:
+        api = factory()
+        await serve(api, HttpServer(api, host=args.host, port=args.port, **options), grace=args.grace)
+
+    asyncio.run(run())
+    return 0
+
+
+__all__ = [
+    "ADMIN_USER_TYPES",
+    "PassportHttpApi",
+    "build_api",
+    "login_payload",
+    "serve",
+    "status_for",
+]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
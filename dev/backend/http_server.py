@@ -0,0 +1,401 @@
+"""基于 asyncio 的极简 HTTP/1.1 服务器：keep-alive、请求管线化、有界并发与优雅停机。
+
+只实现 JSON API 所需的子集：
+
+- 请求体只支持 Content-Length（chunked 请求返回 501）；响应总是带 Content-Length；
+- HTTP/1.1 默认长连接，`Connection: close` 或 HTTP/1.0（未带 keep-alive）时回完即关；
+- 同一连接上的管线化请求并发执行、按到达顺序写回，每连接最多 `max_pipeline` 个在途请求；
+- 全局最多 `max_workers` 个请求同时执行处理函数，超出的排队等待；
+- 连接数超过 `max_connections` 时直接回 503 并关闭；
+- 空闲连接 `keep_alive_timeout` 秒内没有收到完整请求即关闭（同时限制慢速请求头/请求体）；
+- `shutdown(grace)`：停止 accept，空闲连接立即关闭，忙碌连接写完在途响应
+  （最后一个响应带 `Connection: close`）后关闭，超过 grace 仍未结束的连接被取消。
+
+路由见 `Router`；业务接口见 `http_api.py`。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from urllib.parse import parse_qsl, unquote
+
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {s.value: s.phrase for s in HTTPStatus}
+
+
+class HttpError(Exception):
+    """由处理函数抛出，转换为 `{"code", "message"}` 形式的错误响应。"""
+
+    def __init__(self, status: int, code: str, message: str = "") -> None:
+        super().__init__(message or code)
+        self.status = status
+        self.code = code
+        self.message = message or code
+
+
+@dataclass
+class HttpRequest:
+    method: str
+    path: str
+    version: str
+    headers: Dict[str, str]
+    body: bytes = b""
+    query_string: str = ""
+    client: Optional[str] = None
+    params: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    @property
+    def query(self) -> Dict[str, str]:
+        return dict(parse_qsl(self.query_string))
+
+    def json(self) -> Any:
+        if not self.body:
+            return {}
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HttpError(400, "ERR_BAD_REQUEST", "request body is not valid JSON") from None
+
+
+class HttpResponse:
+    __slots__ = ("status", "body", "content_type")
+
+    def __init__(self, status: int, body: bytes = b"", content_type: str = "application/json") -> None:
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+
+    @classmethod
+    def json(cls, status: int, payload: Any) -> "HttpResponse":
+        return cls(status, json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+    def encode(self, keep_alive: bool) -> bytes:
+        head = (
+            f"HTTP/1.1 {self.status} {_REASONS.get(self.status, '')}\r\n"
+            f"Content-Type: {self.content_type}\r\n"
+            f"Content-Length: {len(self.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        return head.encode("latin-1") + self.body
+
+
+def error_response(status: int, code: str, message: str = "") -> HttpResponse:
+    return HttpResponse.json(status, {"code": code, "message": message or code})
+
+
+Handler = Callable[[HttpRequest], Awaitable[Union[HttpResponse, Any]]]
+
+
+class Router:
+    """按 (method, path) 分发；路径段 `{name}` 匹配任意单段并写入 request.params。
+
+    处理函数返回 HttpResponse，或可 JSON 序列化的对象（以 200 返回）。
+    """
+
+    def __init__(self) -> None:
+        self._exact: Dict[tuple[str, str], Handler] = {}
+        self._patterns: list[tuple[str, list[str], Handler]] = []
+
+    def add(self, method: str, pattern: str, handler: Handler) -> None:
+        if "{" in pattern:
+            self._patterns.append((method.upper(), pattern.strip("/").split("/"), handler))
+        else:
+            self._exact[(method.upper(), pattern)] = handler
+
+    def get(self, pattern: str) -> Callable[[Handler], Handler]:
+        return self._decorator("GET", pattern)
+
+    def post(self, pattern: str) -> Callable[[Handler], Handler]:
+        return self._decorator("POST", pattern)
+
+    def _decorator(self, method: str, pattern: str) -> Callable[[Handler], Handler]:
+        def register(handler: Handler) -> Handler:
+            self.add(method, pattern, handler)
+            return handler
+
+        return register
+
+    def resolve(self, method: str, path: str) -> tuple[Optional[Handler], bool]:
+        """返回 (handler, 路径是否存在)；路径存在但方法不匹配时 handler 为 None。"""
+
+        handler = self._exact.get((method, path))
+        if handler is not None:
+            return handler, True
+        path_known = False
+        segments = path.strip("/").split("/")
+        for m, pattern, h in self._patterns:
+            if len(pattern) != len(segments):
+                continue
+            params = {}
+            for want, got in zip(pattern, segments):
+                if want.startswith("{"):
+                    params[want[1:-1]] = unquote(got)
+                elif want != got:
+                    break
+            else:
+                if m == method:
+                    return _bind(h, params), True
+                path_known = True
+        return None, path_known or any(p == path for _, p in self._exact)
+
+    async def __call__(self, request: HttpRequest) -> HttpResponse:
+        handler, path_known = self.resolve(request.method, request.path)
+        if handler is None:
+            if path_known:
+                return error_response(405, "ERR_METHOD_NOT_ALLOWED")
+            return error_response(404, "NOT_FOUND")
+        result = await handler(request)
+        return result if isinstance(result, HttpResponse) else HttpResponse.json(200, result)
+
+
+def _bind(handler: Handler, params: Dict[str, str]) -> Handler:
+    async def bound(request: HttpRequest) -> Any:
+        request.params = params
+        return await handler(request)
+
+    return bound
+
+
+class _Connection:
+    __slots__ = ("writer", "task", "in_flight", "reading", "window")
+
+    def __init__(self, writer: asyncio.StreamWriter, max_pipeline: int) -> None:
+        self.writer = writer
+        self.task: Optional[asyncio.Task] = None
+        self.in_flight = 0
+        self.reading = False
+        self.window = asyncio.Semaphore(max_pipeline)
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class HttpServer:
+    def __init__(
+        self,
+        handler: Handler,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_workers: int = 256,
+        max_connections: int = 10_000,
+        max_pipeline: int = 16,
+        max_header_bytes: int = 16 * 1024,
+        max_body_bytes: int = 1024 * 1024,
+        keep_alive_timeout: float = 15.0,
+        sock=None,
+    ) -> None:
+        self._handler = handler
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.max_pipeline = max_pipeline
+        self.max_header_bytes = max_header_bytes
+        self.max_body_bytes = max_body_bytes
+        self.keep_alive_timeout = keep_alive_timeout
+        self._sock = sock
+        self._workers = asyncio.Semaphore(max_workers)
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._connections: set[_Connection] = set()
+        self._closing = False
+
+    @property
+    def address(self) -> tuple[str, int]:
+        assert self._server is not None, "server not started"
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self) -> "HttpServer":
+        limit = self.max_header_bytes
+        if self._sock is not None:
+            self._server = await asyncio.start_server(self._serve_connection, sock=self._sock, limit=limit)
+        else:
+            self._server = await asyncio.start_server(
+                self._serve_connection, self.host, self.port, limit=limit, reuse_address=True
+            )
+        return self
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()  # type: ignore[union-attr]
+        except asyncio.CancelledError:
+            pass
+
+    async def shutdown(self, grace: float = 10.0) -> None:
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+        for conn in list(self._connections):
+            if conn.reading and conn.in_flight == 0:
+                conn.writer.close()
+        tasks = [conn.task for conn in self._connections if conn.task is not None]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=grace)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    async def __aenter__(self) -> "HttpServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.shutdown()
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self._closing or len(self._connections) >= self.max_connections:
+            writer.write(error_response(503, "ERR_OVERLOADED").encode(keep_alive=False))
+            writer.close()
+            return
+        conn = _Connection(writer, self.max_pipeline)
+        conn.task = asyncio.current_task()
+        self._connections.add(conn)
+        peer = writer.get_extra_info("peername")
+        client = peer[0] if peer else None
+        loop = asyncio.get_running_loop()
+        pending: asyncio.Queue = asyncio.Queue()
+        writer_task = asyncio.create_task(self._write_responses(conn, pending))
+        try:
+            while not writer_task.done():
+                await conn.window.acquire()
+                conn.reading = True
+                if self._closing and conn.in_flight == 0:
+                    break
+                timer = loop.call_later(self.keep_alive_timeout, writer.close)
+                try:
+                    request = await self._read_request(reader, client)
+                except _BadRequest as exc:
+                    conn.in_flight += 1
+                    await pending.put((_ready(loop, error_response(exc.status, "ERR_BAD_REQUEST", str(exc))), False))
+                    break
+                finally:
+                    timer.cancel()
+                    conn.reading = False
+                if request is None:
+                    break
+                keep = request.keep_alive and not self._closing
+                conn.in_flight += 1
+                await pending.put((asyncio.ensure_future(self._dispatch(request)), keep))
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await pending.put(None)
+            try:
+                await writer_task
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            finally:
+                self._connections.discard(conn)
+                writer.close()
+
+    async def _write_responses(self, conn: _Connection, pending: asyncio.Queue) -> None:
+        writer = conn.writer
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                future, keep = item
+                response = await future
+                conn.in_flight -= 1
+                if self._closing and conn.in_flight == 0 and conn.reading:
+                    keep = False
+                writer.write(response.encode(keep))
+                conn.window.release()
+                await writer.drain()
+                if not keep:
+                    return
+        finally:
+            # 无论正常结束还是对端断开，都关闭连接并放行可能卡在窗口上的读循环。
+            writer.close()
+            conn.window.release()
+
+    async def _read_request(self, reader: asyncio.StreamReader, client: Optional[str]) -> Optional[HttpRequest]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as exc:
+            if exc.partial.strip():
+                raise _BadRequest(400, "incomplete request head") from None
+            return None
+        except (asyncio.LimitOverrunError, ValueError):
+            raise _BadRequest(431, "request head too large") from None
+
+        lines = head[:-4].decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise _BadRequest(400, "malformed request line") from None
+        if version not in ("HTTP/1.1", "HTTP/1.0"):
+            raise _BadRequest(505, "unsupported HTTP version")
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if not sep:
+                raise _BadRequest(400, "malformed header")
+            headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise _BadRequest(501, "chunked request bodies are not supported")
+        body = b""
+        length = headers.get("content-length")
+        if length:
+            try:
+                n = int(length)
+            except ValueError:
+                raise _BadRequest(400, "invalid content-length") from None
+            if n < 0 or n > self.max_body_bytes:
+                raise _BadRequest(413, "request body too large")
+            body = await reader.readexactly(n)
+
+        path, _, query_string = target.partition("?")
+        return HttpRequest(method.upper(), path, version, headers, body, query_string, client)
+
+    async def _dispatch(self, request: HttpRequest) -> HttpResponse:
+        async with self._workers:
+            try:
+                return await self._handler(request)
+            except HttpError as exc:
+                return error_response(exc.status, exc.code, exc.message)
+            except Exception:  # noqa: BLE001
+                logger.exception("unhandled error for %s %s", request.method, request.path)
+                return error_response(500, "ERR_INTERNAL", "internal error")
+
+
+def _ready(loop: asyncio.AbstractEventLoop, value: Any) -> asyncio.Future:
+    future = loop.create_future()
+    future.set_result(value)
+    return future
+
+
+__all__ = [
+    "HttpError",
+    "HttpRequest",
+    "HttpResponse",
+    "HttpServer",
+    "Router",
+    "error_response",
+]
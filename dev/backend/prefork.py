@@ -0,0 +1,173 @@
+"""预派生（pre-fork）多进程模式：父进程绑定监听套接字后 fork 出 N 个 worker，各自运行一个
+asyncio `HttpServer`，共同在同一个套接字上 accept，绕开单个解释器的 GIL。
+
+约定：
+- 每个 worker 在 fork 之后才调用 `api_factory()` 装配服务，不继承父进程的数据库连接；
+- 会话、token 索引与验证码必须放在进程间共享的存储里（`build_api("sqlite", sqlite_path=文件)`
+  走 SQLite WAL，或 `build_api("redis", ...)` 走 RESP），内存存储在多 worker 下各自为政；
+- 刷新只经 `update_app` 写回单个 app（SQLite 为 BEGIN IMMEDIATE 事务，Redis 为 WATCH/MULTI/EXEC），
+  不同 worker 并发刷新同一 guid 的不同 app 时不会互相覆盖；
+- 验证码频控同样放在共享存储里（`build_api` 在 sqlite/redis 模式下使用库文件中的
+  `SqliteCodeRateLimiter`），同一手机号的请求落到哪个 worker 都消耗同一份额度；
+- 父进程只做监督：worker 异常退出时按原参数重新派生；SIGINT/SIGTERM 时向所有 worker 发送
+  SIGTERM，由各自的 `serve()` 优雅停机，超过 `grace` 仍未退出的直接 SIGKILL。
+
+依赖 fork，仅支持 POSIX。命令行入口见 `python -m backend.http_api --workers N`。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from multiprocessing.connection import wait
+from typing import Any, Callable, Optional
+
+from .http_server import HttpServer
+
+
+def bind_socket(host: str = "127.0.0.1", port: int = 8080, *, backlog: int = 1024) -> socket.socket:
+    """创建供多个 worker 共享的监听套接字（SO_REUSEADDR，port=0 时由系统分配端口）。"""
+
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+        sock.setblocking(False)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _worker_main(sock: socket.socket, api_factory: Callable[[], Any], options: dict, grace: float) -> None:
+    from .http_api import serve
+
+    # 父进程可能装过信号处理器；worker 里交给 serve() 重新安装。
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    async def run() -> None:
+        api = api_factory()
+        await serve(api, HttpServer(api, sock=sock, **options), grace=grace, announce=False)
+
+    asyncio.run(run())
+
+
+class PreforkServer:
+    """监督 N 个共享监听套接字的 worker 进程。
+
+    用法：`PreforkServer(factory, workers=4, port=8080).run()`（阻塞到收到信号）；测试或基准里可用
+    `start()` / `stop()` 或 with 语句，并按需调用 `supervise()` 回收、重启退出的 worker。
+    """
+
+    def __init__(
+        self,
+        api_factory: Callable[[], Any],
+        *,
+        workers: int = 2,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        grace: float = 10.0,
+        **server_options: Any,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        self._factory = api_factory
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.grace = grace
+        self._options = server_options
+        self._ctx = multiprocessing.get_context("fork")
+        self._sock: Optional[socket.socket] = None
+        self._procs: list[Any] = []
+        self._stopping = False
+
+    @property
+    def address(self) -> tuple[str, int]:
+        assert self._sock is not None, "server not started"
+        return self._sock.getsockname()[:2]
+
+    @property
+    def pids(self) -> list[int]:
+        return [proc.pid for proc in self._procs if proc.is_alive()]
+
+    def start(self) -> "PreforkServer":
+        self._sock = bind_socket(self.host, self.port)
+        self._procs = [self._spawn() for _ in range(self.workers)]
+        return self
+
+    def supervise(self, timeout: Optional[float] = None) -> int:
+        """等待至多 `timeout` 秒，重新派生期间退出的 worker，返回重启的个数。"""
+
+        ready = wait([proc.sentinel for proc in self._procs], timeout)
+        if not ready or self._stopping:
+            return 0
+        restarted = 0
+        for i, proc in enumerate(self._procs):
+            if proc.sentinel in ready:
+                proc.join()
+                self._procs[i] = self._spawn()
+                restarted += 1
+        return restarted
+
+    def run(self) -> None:
+        """前台运行直到 SIGINT/SIGTERM，然后停止全部 worker。"""
+
+        def request_stop(signum, frame) -> None:
+            self._stopping = True
+
+        previous = {sig: signal.signal(sig, request_stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            if self._sock is None:
+                self.start()
+            host, port = self.address
+            print(f"listening on http://{host}:{port} ({self.workers} workers)", file=sys.stderr, flush=True)
+            while not self._stopping:
+                self.supervise(0.5)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+            self.stop()
+
+    def stop(self) -> None:
+        self._stopping = True
+        for proc in self._procs:
+            if proc.is_alive():
+                os.kill(proc.pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.grace + 1.0
+        for proc in self._procs:
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+        self._procs = []
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> "PreforkServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _spawn(self) -> Any:
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self._sock, self._factory, self._options, self.grace),
+            name="http-worker",
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+
+__all__ = ["PreforkServer", "bind_socket"]
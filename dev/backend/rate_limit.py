@@ -0,0 +1,190 @@
+"""验证码发送频控：令牌桶 + 滑动窗口计数器，按 key 常数内存并自动淘汰。
+
+规则与 Nest 侧 `VerificationCodeService.sendCode` 保持一致（默认值）：
+
+- 同一手机号 60 秒内最多 1 次（令牌桶：容量 1，每 60 秒补 1 个）；
+- 同一手机号 24 小时内最多 10 次（滑动窗口计数器）；
+- 同一 IP 60 秒内最多 30 次（滑动窗口计数器）。
+
+每个 key 的状态只有两三个数字。淘汰采用“两代字典”：每隔 `idle_seconds` 把当前代降为旧代、
+丢弃更早的一代，连续两代未被访问的 key 自然消失。`idle_seconds` 取状态回到初始值所需的时间
+（令牌桶补满 / 窗口完全滑出），因此被淘汰的 key 与全新 key 等价，不改变限流结果。
+
+时间统一使用单调时钟秒数（`time.monotonic`），可注入以便测试。
+
+单个 key 的状态推进（`advance`）与状态的存放位置分离：本模块的实现把状态放在进程内，
+`sqlite_repos.SqliteCodeRateLimiter` 用同样的规则把状态放在共享的 SQLite 里，供多进程（pre-fork）共用。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from .domain import ERR_CODE_TOO_FREQUENT, AuthError
+
+
+class _TwoGenerationMap:
+    """按代轮换的字典：get 命中旧代时提升到当前代；超过两代未访问的 key 被整体丢弃。"""
+
+    __slots__ = ("_young", "_old", "_idle", "_rotated_at")
+
+    def __init__(self, idle_seconds: float, now: float) -> None:
+        self._young: Dict[str, list] = {}
+        self._old: Dict[str, list] = {}
+        self._idle = idle_seconds
+        self._rotated_at = now
+
+    def get(self, key: str, now: float) -> Optional[list]:
+        if now - self._rotated_at >= self._idle:
+            self._rotate(now)
+        state = self._young.get(key)
+        if state is None:
+            state = self._old.pop(key, None)
+            if state is not None:
+                self._young[key] = state
+        return state
+
+    def put(self, key: str, state: list) -> None:
+        self._young[key] = state
+
+    def __len__(self) -> int:
+        return len(self._young) + len(self._old)
+
+    def _rotate(self, now: float) -> None:
+        if now - self._rotated_at >= 2 * self._idle:
+            self._old = {}
+        else:
+            self._old = self._young
+        self._young = {}
+        self._rotated_at = now
+
+
+class TokenBucketLimiter:
+    """令牌桶：容量 `capacity`，每秒补充 `refill_per_second` 个令牌；状态为 [tokens, last_ts]。"""
+
+    def __init__(self, capacity: float, refill_per_second: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("capacity and refill rate must be positive")
+        self._capacity = float(capacity)
+        self._rate = float(refill_per_second)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.idle_seconds = capacity / refill_per_second
+        self._states = _TwoGenerationMap(self.idle_seconds, clock())
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        now = self._clock() if now is None else now
+        with self._lock:
+            state = self._states.get(key, now)
+            if state is None:
+                self._states.put(key, self.initial(now))
+                return True
+            return self.advance(state, now)
+
+    def initial(self, now: float) -> list:
+        """新 key 第一次请求（总是放行）之后的状态。"""
+
+        return [self._capacity - 1.0, now]
+
+    def advance(self, state: list, now: float) -> bool:
+        """按一次请求原地推进已有 key 的状态，返回是否放行。"""
+
+        tokens = min(self._capacity, state[0] + (now - state[1]) * self._rate)
+        state[1] = now
+        if tokens < 1.0:
+            state[0] = tokens
+            return False
+        state[0] = tokens - 1.0
+        return True
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class SlidingWindowLimiter:
+    """滑动窗口计数器：用上一窗口计数按重叠比例加权估算，状态为 [window_index, prev, curr]。"""
+
+    def __init__(self, limit: int, window_seconds: float, *, clock: Callable[[], float] = time.monotonic) -> None:
+        if limit <= 0 or window_seconds <= 0:
+            raise ValueError("limit and window must be positive")
+        self._limit = limit
+        self._window = float(window_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.idle_seconds = 2 * window_seconds
+        self._states = _TwoGenerationMap(self.idle_seconds, clock())
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        now = self._clock() if now is None else now
+        with self._lock:
+            state = self._states.get(key, now)
+            if state is None:
+                self._states.put(key, self.initial(now))
+                return True
+            return self.advance(state, now)
+
+    def initial(self, now: float) -> list:
+        """新 key 第一次请求（总是放行）之后的状态。"""
+
+        return [now // self._window, 0, 1]
+
+    def advance(self, state: list, now: float) -> bool:
+        """按一次请求原地推进已有 key 的状态，返回是否放行。"""
+
+        index, offset = divmod(now, self._window)
+        if state[0] != index:
+            state[1] = state[2] if index - state[0] == 1 else 0
+            state[2] = 0
+            state[0] = index
+        if state[1] * (1.0 - offset / self._window) + state[2] + 1 > self._limit:
+            return False
+        state[2] += 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+@dataclass(frozen=True)
+class CodeIssueLimits:
+    phone_cooldown_seconds: float = 60.0
+    phone_daily_limit: int = 10
+    ip_limit: int = 30
+    ip_window_seconds: float = 60.0
+
+
+class CodeRateLimiter:
+    """组合验证码发送的各项频控；任一项超限抛出 AuthError(ERR_CODE_TOO_FREQUENT)。
+
+    先检查 IP，再检查手机号冷却，最后检查每日次数：被 IP 拦截的请求不会消耗该手机号的额度。
+    """
+
+    def __init__(self, limits: CodeIssueLimits = CodeIssueLimits(), *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.limits = limits
+        self._clock = clock
+        self._ip = SlidingWindowLimiter(limits.ip_limit, limits.ip_window_seconds, clock=clock)
+        self._cooldown = TokenBucketLimiter(1, 1.0 / limits.phone_cooldown_seconds, clock=clock)
+        self._daily = SlidingWindowLimiter(limits.phone_daily_limit, 24 * 3600, clock=clock)
+
+    def check(self, phone: str, ip: Optional[str] = None, now: Optional[float] = None) -> None:
+        now = self._clock() if now is None else now
+        if ip and not self._ip.allow(ip, now):
+            raise AuthError(ERR_CODE_TOO_FREQUENT, "too many requests from this ip")
+        if not self._cooldown.allow(phone, now):
+            raise AuthError(ERR_CODE_TOO_FREQUENT, "too frequent")
+        if not self._daily.allow(phone, now):
+            raise AuthError(ERR_CODE_TOO_FREQUENT, "too frequent today")
+
+    def tracked_keys(self) -> Dict[str, int]:
+        return {"ip": len(self._ip), "phone_cooldown": len(self._cooldown), "phone_daily": len(self._daily)}
+
+
+__all__ = [
+    "TokenBucketLimiter",
+    "SlidingWindowLimiter",
+    "CodeIssueLimits",
+    "CodeRateLimiter",
+]
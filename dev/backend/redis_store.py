@@ -0,0 +1,341 @@
+"""基于 Redis（RESP 协议）的 Session / 验证码存储，供多个后端进程共享会话。
+
+与 `domain.py` 中的内存实现保持相同接口：
+
+- `RedisSessionStore`          ↔ InMemorySessionStore
+- `RedisVerificationCodeStore` ↔ VerificationCodeStore
+
+键布局（`prefix` 默认为 "passport:"）：
+
+- `{prefix}session:{guid}`  → Session JSON，PXAT = refresh_token_expires_at；
+- `{prefix}at:{token}`      → "{guid}\\t{app_id}"，PXAT = access_token_expires_at + grace；
+- `{prefix}code:{phone}`    → "{code}\\t{expires_at_us}"，PXAT = expires_at + grace。
+
+过期完全交给 Redis 原生 TTL。Access Token 反查键不做显式清理：查找时会与会话中当前的
+token 比对，刷新/登出后遗留的旧键在各自 TTL 到期后由 Redis 回收。`grace` 让刚过期的
+记录再保留一段时间，以便调用方仍能区分 ERR_ACCESS_EXPIRED / ERR_CODE_EXPIRED 与“不存在”。
+
+`put` 的全部写入在一个管道里发出（一次往返）；`pipelined=False` 时逐条发送，
+仅用于基准对比。
+
+`update_app`（单 app 刷新/驱逐）用 WATCH 会话键 + MULTI/EXEC 的乐观事务：读出会话、交给回调修改、
+整体写回；期间若有其它进程改动了该会话（如另一个 app 的刷新），EXEC 不执行，重读后重试，
+因此同一 guid 上不同 app 的并发刷新不会互相覆盖。
+
+`AsyncRedisSessionStore` / `AsyncRedisVerificationCodeStore` 是基于 `AsyncRespClient`
+的协程版本，键布局与编码完全相同，可与同步版本混用同一个 Redis。
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional, TypeVar
+
+from .domain import UTC, AppSession, Session
+from .resp import AsyncRespClient, RespClient
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_US = timedelta(microseconds=1)
+DEFAULT_GRACE = timedelta(minutes=10)
+_T = TypeVar("_T")
+
+
+def _to_us(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return (dt - EPOCH) // _US
+
+
+def _from_us(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+def _deadline_ms(dt: datetime, grace: timedelta = timedelta(0)) -> int:
+    # PXAT 必须为正数；已过期的记录给一个过去的时间点，Redis 会立即删除。
+    return max(1, (_to_us(dt + grace)) // 1000)
+
+
+def encode_session(session: Session) -> bytes:
+    payload = {
+        "guid": session.guid,
+        "rt": session.refresh_token,
+        "rt_exp": _to_us(session.refresh_token_expires_at),
+        "apps": {
+            app_id: [a.access_token, _to_us(a.access_token_expires_at), _to_us(a.last_active_at)]
+            for app_id, a in dict(session.apps).items()
+        },
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def decode_session(raw: bytes) -> Session:
+    payload = json.loads(raw)
+    return Session(
+        guid=payload["guid"],
+        refresh_token=payload["rt"],
+        refresh_token_expires_at=_from_us(payload["rt_exp"]),
+        apps={
+            app_id: AppSession(
+                access_token=token,
+                access_token_expires_at=_from_us(expires_us),
+                last_active_at=_from_us(active_us),
+            )
+            for app_id, (token, expires_us, active_us) in payload["apps"].items()
+        },
+    )
+
+
+def _parse_ref(raw: Optional[bytes]) -> Optional[tuple[str, str]]:
+    if raw is None:
+        return None
+    guid, app_id = raw.decode("utf-8").split("\t", 1)
+    return guid, app_id
+
+
+def _match(session: Optional[Session], app_id: str, access_token: str) -> Optional[tuple[Session, str]]:
+    app_session = session.apps.get(app_id) if session is not None else None
+    if app_session is None or app_session.access_token != access_token:
+        return None
+    return session, app_id  # type: ignore[return-value]
+
+
+class _SessionLayout:
+    """会话键布局与写入命令，同步/异步存储共用。"""
+
+    def __init__(self, prefix: str, grace: timedelta) -> None:
+        self._prefix = prefix
+        self._grace = grace
+
+    def _session_key(self, guid: str) -> str:
+        return f"{self._prefix}session:{guid}"
+
+    def _token_key(self, access_token: str) -> str:
+        return f"{self._prefix}at:{access_token}"
+
+    def _put_commands(self, session: Session) -> list[tuple]:
+        apps = dict(session.apps)
+        return [self._session_command(session)] + [self._ref_command(session, app_id, a) for app_id, a in apps.items()]
+
+    def _app_commands(self, session: Session, app_id: str) -> list[tuple]:
+        """update_app 的写回：会话本体 + 该 app 的反查键（app 被删除时只写会话本体）。"""
+
+        commands = [self._session_command(session)]
+        a = session.apps.get(app_id)
+        if a is not None:
+            commands.append(self._ref_command(session, app_id, a))
+        return commands
+
+    def _session_command(self, session: Session) -> tuple:
+        return (
+            "SET",
+            self._session_key(session.guid),
+            encode_session(session),
+            "PXAT",
+            _deadline_ms(session.refresh_token_expires_at),
+        )
+
+    def _ref_command(self, session: Session, app_id: str, a: AppSession) -> tuple:
+        return (
+            "SET",
+            self._token_key(a.access_token),
+            f"{session.guid}\t{app_id}",
+            "PXAT",
+            _deadline_ms(min(a.access_token_expires_at, session.refresh_token_expires_at), self._grace),
+        )
+
+    @staticmethod
+    def _pair(
+        access_tokens: list[str], refs: list[Optional[tuple[str, str]]], sessions: dict[str, Session]
+    ) -> list[Optional[tuple[Session, str]]]:
+        return [
+            _match(sessions.get(ref[0]), ref[1], token) if ref is not None else None
+            for token, ref in zip(access_tokens, refs)
+        ]
+
+
+class RedisSessionStore(_SessionLayout):
+    def __init__(
+        self,
+        client: RespClient,
+        *,
+        prefix: str = "passport:",
+        grace: timedelta = DEFAULT_GRACE,
+        pipelined: bool = True,
+    ) -> None:
+        super().__init__(prefix, grace)
+        self._client = client
+        self._pipelined = pipelined
+
+    def put(self, session: Session) -> None:
+        commands = self._put_commands(session)
+        if self._pipelined:
+            pipe = self._client.pipeline()
+            for command in commands:
+                pipe.command(*command)
+            pipe.execute()
+        else:
+            for command in commands:
+                self._client.execute(*command)
+
+    def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], _T]) -> _T:
+        """语义同 InMemorySessionStore.update_app；并发改动时 `fn` 会对重读的会话再次执行。"""
+
+        key = self._session_key(guid)
+        while True:
+            with self._client.watch(key) as tx:
+                raw = tx.execute("GET", key)
+                session = decode_session(raw) if raw is not None else None
+                result = fn(session)
+                if session is None or tx.commit(self._app_commands(session, app_id)) is not None:
+                    return result
+
+    def get(self, guid: str) -> Optional[Session]:
+        raw = self._client.execute("GET", self._session_key(guid))
+        return decode_session(raw) if raw is not None else None
+
+    def delete(self, guid: str) -> None:
+        self._client.execute("DEL", self._session_key(guid))
+
+    def items(self) -> list[tuple[str, Session]]:
+        sessions = [decode_session(raw) for raw in self._scan_values(f"{self._prefix}session:*")]
+        return [(s.guid, s) for s in sessions]
+
+    def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]:
+        ref = _parse_ref(self._client.execute("GET", self._token_key(access_token)))
+        if ref is None:
+            return None
+        return _match(self.get(ref[0]), ref[1], access_token)
+
+    def find_many_by_access_token(self, access_tokens: list[str]) -> list[Optional[tuple[Session, str]]]:
+        """批量反查：一次 MGET 取反查键、一次 MGET 取会话，共两个往返。"""
+
+        if not access_tokens:
+            return []
+        refs = [_parse_ref(raw) for raw in self._client.execute("MGET", *(self._token_key(t) for t in access_tokens))]
+        guids = list(dict.fromkeys(ref[0] for ref in refs if ref is not None))
+        sessions: dict[str, Session] = {}
+        if guids:
+            raws = self._client.execute("MGET", *(self._session_key(g) for g in guids))
+            sessions = {guid: decode_session(raw) for guid, raw in zip(guids, raws) if raw is not None}
+        return self._pair(access_tokens, refs, sessions)
+
+    def _scan_values(self, pattern: str, count: int = 1000) -> Iterator[bytes]:
+        cursor = b"0"
+        while True:
+            cursor, keys = self._client.execute("SCAN", cursor, "MATCH", pattern, "COUNT", count)
+            if keys:
+                for raw in self._client.execute("MGET", *keys):
+                    if raw is not None:
+                        yield raw
+            if cursor == b"0":
+                return
+
+
+def _encode_code(code: str, expires_at: datetime) -> str:
+    return f"{code}\t{_to_us(expires_at)}"
+
+
+def _decode_code(raw: Optional[bytes]) -> Optional[tuple[str, datetime]]:
+    if raw is None:
+        return None
+    code, expires_us = raw.decode("utf-8").split("\t", 1)
+    return code, _from_us(int(expires_us))
+
+
+class RedisVerificationCodeStore:
+    def __init__(self, client: RespClient, *, prefix: str = "passport:", grace: timedelta = DEFAULT_GRACE) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._grace = grace
+
+    def _key(self, phone: str) -> str:
+        return f"{self._prefix}code:{phone}"
+
+    def save(self, phone: str, code: str, expires_at: datetime) -> None:
+        self._client.execute("SET", self._key(phone), _encode_code(code, expires_at), "PXAT", _deadline_ms(expires_at, self._grace))
+
+    def get(self, phone: str) -> Optional[tuple[str, datetime]]:
+        return _decode_code(self._client.execute("GET", self._key(phone)))
+
+    def delete(self, phone: str) -> None:
+        self._client.execute("DEL", self._key(phone))
+
+
+class AsyncRedisSessionStore(_SessionLayout):
+    """RedisSessionStore 的协程版本：put 为一次管道往返，批量反查为两次 MGET。"""
+
+    def __init__(self, client: AsyncRespClient, *, prefix: str = "passport:", grace: timedelta = DEFAULT_GRACE) -> None:
+        super().__init__(prefix, grace)
+        self._client = client
+
+    async def put(self, session: Session) -> None:
+        pipe = self._client.pipeline()
+        for command in self._put_commands(session):
+            pipe.command(*command)
+        await pipe.execute()
+
+    async def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], _T]) -> _T:
+        key = self._session_key(guid)
+        while True:
+            async with self._client.watch(key) as tx:
+                raw = await tx.execute("GET", key)
+                session = decode_session(raw) if raw is not None else None
+                result = fn(session)
+                if session is None or await tx.commit(self._app_commands(session, app_id)) is not None:
+                    return result
+
+    async def get(self, guid: str) -> Optional[Session]:
+        raw = await self._client.execute("GET", self._session_key(guid))
+        return decode_session(raw) if raw is not None else None
+
+    async def delete(self, guid: str) -> None:
+        await self._client.execute("DEL", self._session_key(guid))
+
+    async def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]:
+        ref = _parse_ref(await self._client.execute("GET", self._token_key(access_token)))
+        if ref is None:
+            return None
+        return _match(await self.get(ref[0]), ref[1], access_token)
+
+    async def find_many_by_access_token(self, access_tokens: list[str]) -> list[Optional[tuple[Session, str]]]:
+        if not access_tokens:
+            return []
+        raws = await self._client.execute("MGET", *(self._token_key(t) for t in access_tokens))
+        refs = [_parse_ref(raw) for raw in raws]
+        guids = list(dict.fromkeys(ref[0] for ref in refs if ref is not None))
+        sessions: dict[str, Session] = {}
+        if guids:
+            raws = await self._client.execute("MGET", *(self._session_key(g) for g in guids))
+            sessions = {guid: decode_session(raw) for guid, raw in zip(guids, raws) if raw is not None}
+        return self._pair(access_tokens, refs, sessions)
+
+
+class AsyncRedisVerificationCodeStore:
+    def __init__(self, client: AsyncRespClient, *, prefix: str = "passport:", grace: timedelta = DEFAULT_GRACE) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._grace = grace
+
+    def _key(self, phone: str) -> str:
+        return f"{self._prefix}code:{phone}"
+
+    async def save(self, phone: str, code: str, expires_at: datetime) -> None:
+        await self._client.execute("SET", self._key(phone), _encode_code(code, expires_at), "PXAT", _deadline_ms(expires_at, self._grace))
+
+    async def get(self, phone: str) -> Optional[tuple[str, datetime]]:
+        return _decode_code(await self._client.execute("GET", self._key(phone)))
+
+    async def delete(self, phone: str) -> None:
+        await self._client.execute("DEL", self._key(phone))
+
+
+__all__ = [
+    "RedisSessionStore",
+    "RedisVerificationCodeStore",
+    "AsyncRedisSessionStore",
+    "AsyncRedisVerificationCodeStore",
+    "encode_session",
+    "decode_session",
+]
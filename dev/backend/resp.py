@@ -0,0 +1,451 @@
+"""极简 RESP（Redis 序列化协议）客户端：连接池 + 管道。
+
+只实现本仓库用到的能力：发送命令数组、解析 RESP2 回复、按需批量（pipeline）发送。
+不依赖 redis-py，可直接连接真实 Redis 或 `resp_standin.RespStandInServer`。
+
+`RespClient` 为阻塞式（线程安全）；`AsyncRespClient` 为 asyncio 版本，供异步服务层使用。
+
+乐观事务：`client.watch(*keys)` 独占一条连接并 WATCH 这些键，产出的事务对象上 `execute` 立即执行
+（通常是读取），`commit(commands)` 以 MULTI/EXEC 提交；键在此期间被其它客户端改动时 EXEC 不执行，
+`commit` 返回 None，由调用方重读重试。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import socket
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional, Sequence, Union
+
+
+Arg = Union[str, bytes, int, float]
+
+
+class RespError(Exception):
+    """服务端返回的错误回复（`-ERR ...`）。"""
+
+
+def encode_command(*args: Arg) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        else:
+            data = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _transaction_payload(commands: Sequence[Sequence[Arg]]) -> bytes:
+    return encode_command("MULTI") + b"".join(encode_command(*c) for c in commands) + encode_command("EXEC")
+
+
+def _exec_result(replies: list[Any]) -> Optional[list[Any]]:
+    # replies = MULTI 的 OK、每条命令的 QUEUED、EXEC 的结果（WATCH 失效时为 nil）
+    for reply in replies[:-1]:
+        if isinstance(reply, RespError):
+            raise reply
+    result = replies[-1]
+    if isinstance(result, RespError):
+        raise result
+    if result is not None:
+        for reply in result:
+            if isinstance(reply, RespError):
+                raise reply
+    return result
+
+
+def read_reply(reader) -> Any:
+    """从缓冲读取器解析一个 RESP2 回复；错误回复以 RespError 实例返回而不抛出。"""
+
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("connection closed by server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode("utf-8")
+    if kind == b"-":
+        return RespError(body.decode("utf-8"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(body)
+        if count < 0:
+            return None
+        return [read_reply(reader) for _ in range(count)]
+    raise ConnectionError(f"unexpected RESP reply: {line!r}")
+
+
+async def read_reply_async(reader: asyncio.StreamReader) -> Any:
+    """`read_reply` 的 asyncio 版本。"""
+
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed by server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode("utf-8")
+    if kind == b"-":
+        return RespError(body.decode("utf-8"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(body)
+        if count < 0:
+            return None
+        return [await read_reply_async(reader) for _ in range(count)]
+    raise ConnectionError(f"unexpected RESP reply: {line!r}")
+
+
+class RespConnection:
+    def __init__(self, host: str, port: int, *, timeout: Optional[float] = 5.0) -> None:
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+
+    def send(self, payload: bytes) -> None:
+        self._sock.sendall(payload)
+
+    def read(self) -> Any:
+        return read_reply(self._reader)
+
+    def close(self) -> None:
+        try:
+            self._reader.close()
+        finally:
+            self._sock.close()
+
+
+class RespConnectionPool:
+    """有界 LIFO 连接池：优先复用最近归还的连接，超过 max_size 时阻塞等待。
+
+    `connection()` 正常退出时归还连接，因异常退出时丢弃连接并释放名额。
+    """
+
+    def __init__(self, host: str, port: int, *, max_size: int = 8, timeout: Optional[float] = 5.0) -> None:
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._max_size = max_size
+        self._idle: "queue.LifoQueue[RespConnection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[RespConnection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        except BaseException:
+            # 任何异常（断连、协议解析失败、调用方中断等）都可能残留未读回复，
+            # 连接状态未知，直接丢弃而不是归还。
+            self._discard(conn)
+            raise
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+    def _acquire(self) -> RespConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self._max_size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return RespConnection(self.host, self.port, timeout=self.timeout)
+            except BaseException:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=self.timeout)
+
+    def _discard(self, conn: RespConnection) -> None:
+        with self._lock:
+            self._created -= 1
+        conn.close()
+
+
+class RespPipeline:
+    """收集多条命令，一次写出、按序读回，仅占用一个往返。"""
+
+    def __init__(self, pool: RespConnectionPool) -> None:
+        self._pool = pool
+        self._commands: list[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def command(self, *args: Arg) -> "RespPipeline":
+        self._commands.append(encode_command(*args))
+        return self
+
+    def execute(self, *, raise_on_error: bool = True) -> list[Any]:
+        if not self._commands:
+            return []
+        with self._pool.connection() as conn:
+            conn.send(b"".join(self._commands))
+            replies = [conn.read() for _ in self._commands]
+        self._commands = []
+        if raise_on_error:
+            for reply in replies:
+                if isinstance(reply, RespError):
+                    raise reply
+        return replies
+
+
+class RespTransaction:
+    """`RespClient.watch` 产出的乐观事务，绑定在一条独占连接上。"""
+
+    def __init__(self, conn: RespConnection) -> None:
+        self._conn = conn
+        # 请求已发出、回复未读完：此时异常意味着连接状态未知
+        self.pending = False
+        self.done = False
+
+    def execute(self, *args: Arg) -> Any:
+        self.pending = True
+        self._conn.send(encode_command(*args))
+        reply = self._conn.read()
+        self.pending = False
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def commit(self, commands: Sequence[Sequence[Arg]]) -> Optional[list[Any]]:
+        """MULTI/EXEC 一次往返提交；WATCH 的键被改动时不执行并返回 None。"""
+
+        self.pending = True
+        self._conn.send(_transaction_payload(commands))
+        replies = [self._conn.read() for _ in range(len(commands) + 2)]
+        self.pending = False
+        self.done = True
+        return _exec_result(replies)
+
+
+class RespClient:
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, *, max_connections: int = 8, timeout: Optional[float] = 5.0) -> None:
+        self.pool = RespConnectionPool(host, port, max_size=max_connections, timeout=timeout)
+
+    def execute(self, *args: Arg) -> Any:
+        with self.pool.connection() as conn:
+            conn.send(encode_command(*args))
+            reply = conn.read()
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def pipeline(self) -> RespPipeline:
+        return RespPipeline(self.pool)
+
+    @contextmanager
+    def watch(self, *keys: Arg) -> Iterator[RespTransaction]:
+        """WATCH `keys` 并产出事务；未 commit 就退出时 UNWATCH 后归还连接。
+
+        with 块内的业务异常（如校验失败）不影响连接，照常归还；只有往返中途的异常才丢弃连接。
+        """
+
+        failure: Optional[Exception] = None
+        with self.pool.connection() as conn:
+            tx = RespTransaction(conn)
+            tx.execute("WATCH", *keys)
+            try:
+                yield tx
+            except Exception as exc:
+                if tx.pending:
+                    raise
+                failure = exc
+            if not tx.done:
+                tx.execute("UNWATCH")
+        if failure is not None:
+            raise failure
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class AsyncRespConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> "AsyncRespConnection":
+        reader, writer = await asyncio.open_connection(host, port)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(reader, writer)
+
+    async def roundtrip(self, payload: bytes, count: int) -> list[Any]:
+        self._writer.write(payload)
+        await self._writer.drain()
+        return [await read_reply_async(self._reader) for _ in range(count)]
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class AsyncRespTransaction:
+    """`AsyncRespClient.watch` 产出的乐观事务，语义同 RespTransaction。"""
+
+    def __init__(self, client: "AsyncRespClient", conn: AsyncRespConnection) -> None:
+        self._client = client
+        self._conn = conn
+        self.pending = False
+        self.done = False
+
+    async def execute(self, *args: Arg) -> Any:
+        (reply,) = await self._send(encode_command(*args), 1)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    async def commit(self, commands: Sequence[Sequence[Arg]]) -> Optional[list[Any]]:
+        replies = await self._send(_transaction_payload(commands), len(commands) + 2)
+        self.done = True
+        return _exec_result(replies)
+
+    async def _send(self, payload: bytes, count: int) -> list[Any]:
+        self.pending = True
+        replies = await self._client._timed(self._conn.roundtrip(payload, count))
+        self.pending = False
+        return replies
+
+
+class AsyncRespPipeline:
+    def __init__(self, client: "AsyncRespClient") -> None:
+        self._client = client
+        self._commands: list[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def command(self, *args: Arg) -> "AsyncRespPipeline":
+        self._commands.append(encode_command(*args))
+        return self
+
+    async def execute(self, *, raise_on_error: bool = True) -> list[Any]:
+        if not self._commands:
+            return []
+        commands, self._commands = self._commands, []
+        replies = await self._client._roundtrip(b"".join(commands), len(commands))
+        if raise_on_error:
+            for reply in replies:
+                if isinstance(reply, RespError):
+                    raise reply
+        return replies
+
+
+class AsyncRespClient:
+    """asyncio 版 RESP 客户端：最多 `max_connections` 条连接，LIFO 复用，协程间共享。
+
+    每次往返独占一条连接（`watch` 则独占到退出）；超时、断连或协程被取消时连接状态未知，直接丢弃。
+    连接在首次使用时按需建立，因此可以在事件循环启动前构造。
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, *, max_connections: int = 8, timeout: Optional[float] = 5.0) -> None:
+        if max_connections <= 0:
+            raise ValueError("max_connections must be positive")
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: list[AsyncRespConnection] = []
+
+    async def execute(self, *args: Arg) -> Any:
+        (reply,) = await self._roundtrip(encode_command(*args), 1)
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def pipeline(self) -> AsyncRespPipeline:
+        return AsyncRespPipeline(self)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    @asynccontextmanager
+    async def watch(self, *keys: Arg) -> AsyncIterator[AsyncRespTransaction]:
+        """WATCH `keys` 并产出事务，语义同 RespClient.watch。"""
+
+        failure: Optional[Exception] = None
+        async with self._connection() as conn:
+            tx = AsyncRespTransaction(self, conn)
+            await tx.execute("WATCH", *keys)
+            try:
+                yield tx
+            except Exception as exc:
+                if tx.pending:
+                    raise
+                failure = exc
+            if not tx.done:
+                await tx.execute("UNWATCH")
+        if failure is not None:
+            raise failure
+
+    async def _roundtrip(self, payload: bytes, count: int) -> list[Any]:
+        async with self._connection() as conn:
+            return await self._timed(conn.roundtrip(payload, count))
+
+    async def _timed(self, roundtrip: Awaitable[list[Any]]) -> list[Any]:
+        if self.timeout is None:
+            return await roundtrip
+        return await asyncio.wait_for(roundtrip, self.timeout)
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[AsyncRespConnection]:
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await AsyncRespConnection.open(self.host, self.port)
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            self._idle.append(conn)
+
+
+__all__ = [
+    "RespError",
+    "RespConnection",
+    "RespConnectionPool",
+    "RespPipeline",
+    "RespTransaction",
+    "RespClient",
+    "AsyncRespConnection",
+    "AsyncRespPipeline",
+    "AsyncRespTransaction",
+    "AsyncRespClient",
+    "encode_command",
+    "read_reply",
+    "read_reply_async",
+]
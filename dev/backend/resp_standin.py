@@ -0,0 +1,419 @@
+"""纯 Python 的进程内 RESP 替身服务器，供离线测试与基准使用。
+
+只覆盖 `redis_store.py` 用到的命令子集（字符串键 + 原生过期）：
+PING / ECHO / GET / MGET / SET [EX|PX|EXAT|PXAT] [NX|XX] [GET] / DEL / EXISTS /
+EXPIRE / PEXPIRE / PEXPIREAT / TTL / PTTL / SCAN [MATCH] [COUNT] / DBSIZE / FLUSHALL，
+以及按连接的乐观事务 WATCH / UNWATCH / MULTI / EXEC / DISCARD。
+
+过期语义与 Redis 一致：访问时惰性删除 + 后台周期性抽样清理。也可独立运行：
+
+    python -m backend.resp_standin --port 6399
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import random
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from .resp import RespError, read_reply
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+def _encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode("utf-8")
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode("utf-8")
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode_reply(v) for v in value)
+    raise TypeError(f"cannot encode {type(value).__name__}")
+
+
+class WatchState:
+    """一个连接的 WATCH 状态：被监视的键在 EXEC 之前被改动（含过期删除）即置 dirty。"""
+
+    def __init__(self) -> None:
+        self.keys: Set[bytes] = set()
+        self.dirty = False
+
+
+class RespKeyspace:
+    """线程安全的键空间：bytes → bytes，附带毫秒级绝对过期时间。"""
+
+    def __init__(self, clock_ms: Callable[[], int] = _now_ms) -> None:
+        self._clock_ms = clock_ms
+        self._data: Dict[bytes, bytes] = {}
+        self._expires: Dict[bytes, int] = {}
+        # 带 TTL 的键另存一份列表（及其下标），purge_expired 可以 O(sample) 随机抽样、O(1) 删除。
+        self._expiring: list[bytes] = []
+        self._expiring_index: Dict[bytes, int] = {}
+        self._watchers: Dict[bytes, Set[WatchState]] = {}
+        self._lock = threading.Lock()
+
+    def execute(self, args: list[bytes]) -> Any:
+        with self._lock:
+            return self._dispatch(args)
+
+    def watch(self, state: WatchState, keys: list[bytes]) -> None:
+        with self._lock:
+            for key in keys:
+                self._watchers.setdefault(key, set()).add(state)
+                state.keys.add(key)
+
+    def unwatch(self, state: WatchState) -> None:
+        with self._lock:
+            self._unwatch(state)
+
+    def exec_transaction(self, state: WatchState, commands: list[list[bytes]]) -> Optional[list[Any]]:
+        """原子执行排队的命令；WATCH 的键已被改动时不执行，返回 None。执行后解除 WATCH。"""
+
+        with self._lock:
+            try:
+                if state.dirty:
+                    return None
+                return [self._dispatch(command) for command in commands]
+            finally:
+                self._unwatch(state)
+
+    def purge_expired(self, sample: int = 200) -> int:
+        """随机抽样清理已过期键（与 Redis 的主动过期类似），返回删除数量。"""
+
+        now = self._clock_ms()
+        removed = 0
+        with self._lock:
+            for key in random.sample(self._expiring, min(sample, len(self._expiring))):
+                if self._expires[key] <= now:
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    # --- Internal（调用方需持有 self._lock） ---
+    def _dispatch(self, args: list[bytes]) -> Any:
+        if not args:
+            return RespError("ERR empty command")
+        name = args[0].upper().decode("ascii", "replace")
+        handler = getattr(self, f"_cmd_{name.lower()}", None)
+        if handler is None:
+            return RespError(f"ERR unknown command '{name}'")
+        try:
+            return handler(args[1:])
+        except (ValueError, IndexError):
+            return RespError(f"ERR syntax error in '{name}'")
+
+    def _unwatch(self, state: WatchState) -> None:
+        for key in state.keys:
+            watchers = self._watchers.get(key)
+            if watchers is not None:
+                watchers.discard(state)
+                if not watchers:
+                    del self._watchers[key]
+        state.keys.clear()
+        state.dirty = False
+
+    def _touch(self, key: bytes) -> None:
+        for state in self._watchers.get(key, ()):
+            state.dirty = True
+
+    def _alive(self, key: bytes) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= self._clock_ms():
+            self._remove(key)
+            return False
+        return key in self._data
+
+    def _remove(self, key: bytes) -> bool:
+        self._persist(key)
+        removed = self._data.pop(key, None) is not None
+        if removed:
+            self._touch(key)
+        return removed
+
+    def _set_deadline(self, key: bytes, deadline_ms: int) -> None:
+        if deadline_ms <= self._clock_ms():
+            self._remove(key)
+        else:
+            if key not in self._expires:
+                self._expiring_index[key] = len(self._expiring)
+                self._expiring.append(key)
+            self._expires[key] = deadline_ms
+            self._touch(key)
+
+    def _persist(self, key: bytes) -> None:
+        if self._expires.pop(key, None) is None:
+            return
+        # 与末尾元素交换后弹出，保持列表紧凑
+        i = self._expiring_index.pop(key)
+        last = self._expiring.pop()
+        if last != key:
+            self._expiring[i] = last
+            self._expiring_index[last] = i
+
+    # --- Commands ---
+    def _cmd_ping(self, args: list[bytes]) -> Any:
+        return args[0] if args else "PONG"
+
+    def _cmd_echo(self, args: list[bytes]) -> Any:
+        return args[0]
+
+    def _cmd_get(self, args: list[bytes]) -> Any:
+        key = args[0]
+        return self._data[key] if self._alive(key) else None
+
+    def _cmd_mget(self, args: list[bytes]) -> Any:
+        return [self._data[key] if self._alive(key) else None for key in args]
+
+    def _cmd_set(self, args: list[bytes]) -> Any:
+        key, value = args[0], args[1]
+        deadline: Optional[int] = None
+        nx = xx = want_old = False
+        i = 2
+        while i < len(args):
+            opt = args[i].upper()
+            if opt in (b"EX", b"PX", b"EXAT", b"PXAT"):
+                amount = int(args[i + 1])
+                i += 1
+                if opt == b"EX":
+                    deadline = self._clock_ms() + amount * 1000
+                elif opt == b"PX":
+                    deadline = self._clock_ms() + amount
+                elif opt == b"EXAT":
+                    deadline = amount * 1000
+                else:
+                    deadline = amount
+            elif opt == b"NX":
+                nx = True
+            elif opt == b"XX":
+                xx = True
+            elif opt == b"GET":
+                want_old = True
+            else:
+                raise ValueError(opt)
+            i += 1
+        exists = self._alive(key)
+        old = self._data.get(key) if exists else None
+        if (nx and exists) or (xx and not exists):
+            return old if want_old else None
+        self._data[key] = value
+        self._persist(key)
+        self._touch(key)
+        if deadline is not None:
+            self._set_deadline(key, deadline)
+        return old if want_old else "OK"
+
+    def _cmd_del(self, args: list[bytes]) -> Any:
+        return sum(1 for key in args if self._alive(key) and self._remove(key))
+
+    def _cmd_exists(self, args: list[bytes]) -> Any:
+        return sum(1 for key in args if self._alive(key))
+
+    def _expire_at(self, key: bytes, deadline_ms: int) -> int:
+        if not self._alive(key):
+            return 0
+        self._set_deadline(key, deadline_ms)
+        return 1
+
+    def _cmd_expire(self, args: list[bytes]) -> Any:
+        return self._expire_at(args[0], self._clock_ms() + int(args[1]) * 1000)
+
+    def _cmd_pexpire(self, args: list[bytes]) -> Any:
+        return self._expire_at(args[0], self._clock_ms() + int(args[1]))
+
+    def _cmd_pexpireat(self, args: list[bytes]) -> Any:
+        return self._expire_at(args[0], int(args[1]))
+
+    def _cmd_pttl(self, args: list[bytes]) -> Any:
+        key = args[0]
+        if not self._alive(key):
+            return -2
+        deadline = self._expires.get(key)
+        return -1 if deadline is None else deadline - self._clock_ms()
+
+    def _cmd_ttl(self, args: list[bytes]) -> Any:
+        pttl = self._cmd_pttl(args)
+        return pttl if pttl < 0 else (pttl + 999) // 1000
+
+    def _cmd_scan(self, args: list[bytes]) -> Any:
+        # 游标即排序后键列表中的偏移量；两次 SCAN 之间的增删可能导致重复或遗漏（Redis 同样不保证）。
+        cursor = int(args[0])
+        pattern: Optional[str] = None
+        count = 10
+        i = 1
+        while i < len(args):
+            opt = args[i].upper()
+            if opt == b"MATCH":
+                pattern = args[i + 1].decode("utf-8")
+            elif opt == b"COUNT":
+                count = int(args[i + 1])
+            else:
+                raise ValueError(opt)
+            i += 2
+        keys = sorted(self._data)
+        batch = keys[cursor : cursor + count]
+        next_cursor = cursor + count if cursor + count < len(keys) else 0
+        out = [
+            key
+            for key in batch
+            if self._alive(key) and (pattern is None or fnmatch.fnmatchcase(key.decode("utf-8"), pattern))
+        ]
+        return [str(next_cursor).encode("ascii"), out]
+
+    def _cmd_dbsize(self, args: list[bytes]) -> Any:
+        return len(self._data)
+
+    def _cmd_flushall(self, args: list[bytes]) -> Any:
+        for key in list(self._watchers):
+            self._touch(key)
+        self._data.clear()
+        self._expires.clear()
+        self._expiring.clear()
+        self._expiring_index.clear()
+        return "OK"
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    # 管道回复逐条写出，关闭 Nagle 以免与客户端的延迟 ACK 叠加出数十毫秒的停顿。
+    disable_nagle_algorithm = True
+
+    def handle(self) -> None:
+        keyspace: RespKeyspace = self.server.keyspace  # type: ignore[attr-defined]
+        watch = WatchState()
+        queued: Optional[list[list[bytes]]] = None  # MULTI 之后排队的命令
+        try:
+            while True:
+                try:
+                    command = read_reply(self.rfile)
+                except (ConnectionError, OSError, ValueError):
+                    return
+                if not isinstance(command, list):
+                    return
+                name = command[0].upper() if command else b""
+                if name == b"MULTI":
+                    reply: Any = RespError("ERR MULTI calls can not be nested") if queued is not None else "OK"
+                    if queued is None:
+                        queued = []
+                elif name == b"EXEC":
+                    if queued is None:
+                        reply = RespError("ERR EXEC without MULTI")
+                    else:
+                        reply = keyspace.exec_transaction(watch, queued)
+                        queued = None
+                elif name == b"DISCARD":
+                    if queued is None:
+                        reply = RespError("ERR DISCARD without MULTI")
+                    else:
+                        keyspace.unwatch(watch)
+                        queued, reply = None, "OK"
+                elif name == b"WATCH":
+                    if queued is not None:
+                        reply = RespError("ERR WATCH inside MULTI is not allowed")
+                    else:
+                        keyspace.watch(watch, command[1:])
+                        reply = "OK"
+                elif name == b"UNWATCH":
+                    keyspace.unwatch(watch)
+                    reply = "OK"
+                elif queued is not None:
+                    queued.append(command)
+                    reply = "QUEUED"
+                else:
+                    reply = keyspace.execute(command)
+                try:
+                    self.wfile.write(_encode_reply(reply))
+                except OSError:
+                    return
+        finally:
+            keyspace.unwatch(watch)
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RespStandInServer:
+    """在后台线程中运行的 RESP 服务器；port=0 时由系统分配端口，见 `address`。"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        keyspace: Optional[RespKeyspace] = None,
+        purge_interval: float = 0.1,
+    ) -> None:
+        self.keyspace = keyspace if keyspace is not None else RespKeyspace()
+        self._server = _ThreadingServer((host, port), _RespHandler)
+        self._server.keyspace = self.keyspace  # type: ignore[attr-defined]
+        self._purge_interval = purge_interval
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self._server.server_address[:2]
+        return host, port
+
+    def start(self) -> "RespStandInServer":
+        serve = threading.Thread(target=self._server.serve_forever, args=(0.05,), name="resp-standin", daemon=True)
+        purge = threading.Thread(target=self._purge_loop, name="resp-standin-purge", daemon=True)
+        self._threads = [serve, purge]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+
+    def __enter__(self) -> "RespStandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _purge_loop(self) -> None:
+        while not self._stopped.wait(self._purge_interval):
+            self.keyspace.purge_expired()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="In-process RESP stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6399)
+    args = parser.parse_args(argv)
+    server = RespStandInServer(args.host, args.port).start()
+    print(f"RESP stand-in listening on {server.address[0]}:{server.address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
+
+
+__all__ = ["RespKeyspace", "RespStandInServer", "WatchState"]
@@ -1,35 +1,29 @@
 from __future__ import annotations
 
+import base64
 import random
 import re
-import secrets
 import string
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
 
 from .domain import (
-    AppSession,
     AuthError,
     ERR_APP_ID_MISMATCH,
-    ERR_CODE_EXPIRED,
-    ERR_CODE_INVALID,
     ERR_PHONE_INVALID,
-    ERR_REFRESH_EXPIRED,
-    ERR_REFRESH_MISMATCH,
-    ERR_USER_BANNED,
     InMemoryLoginLogRepo,
     InMemorySessionStore,
     InMemoryUserRepo,
     LoginLog,
-    Session,
     User,
     UserStatus,
     VerificationCodeStore,
-    calc_access_expires,
-    calc_refresh_expires,
     now_utc,
 )
+from .rate_limit import CodeRateLimiter
+from .session_ops import LoginResult, check_code, new_code, open_session, refresh_session, resolve_login_user
+from .signed_tokens import AccessTokenSigner, RevocationFilter, revoke_session_tokens
 
 
 PHONE_REGEX = re.compile(r"^1[3-9][0-9]{9}$")
@@ -47,33 +41,40 @@ class GuidGenerator:
         return f"{date_part}{type_part}{rand_part}"
 
 
+CODE_TTL = timedelta(minutes=5)
+
+
 class VerificationCodeService:
-    """验证码服务（BR-09）。当前仅实现验证逻辑，发送逻辑后续在验证码迭代补充。"""
+    """验证码服务（BR-09）：发送（带频控）与校验。
+
+    `send_code` 需要注入 `limiter`（CodeRateLimiter）与 `sender`（短信网关回调，签名为
+    sender(phone, code)）；未注入 limiter 时不做频控，仅用于本地开发。
+    """
 
-    def __init__(self, store: VerificationCodeStore) -> None:
+    def __init__(
+        self,
+        store: VerificationCodeStore,
+        *,
+        limiter: Optional[CodeRateLimiter] = None,
+        sender: Optional[Callable[[str, str], None]] = None,
+    ) -> None:
         self._store = store
+        self._limiter = limiter
+        self._sender = sender
 
-    def validate_code(self, phone: str, code: str, now: Optional[datetime] = None) -> None:
+    def send_code(self, phone: str, ip: Optional[str] = None, now: Optional[datetime] = None) -> None:
+        if not PHONE_REGEX.match(phone):
+            raise AuthError(ERR_PHONE_INVALID, "invalid phone format")
+        if self._limiter is not None:
+            self._limiter.check(phone, ip)
         now = now or now_utc()
-        record = self._store.get(phone)
-        if record is None:
-            raise AuthError(ERR_PHONE_INVALID, "no code for phone")
-        saved_code, expires_at = record
-        if now >= expires_at:
-            raise AuthError(ERR_CODE_EXPIRED, "code expired")
-        if code != saved_code:
-            raise AuthError(ERR_CODE_INVALID, "code mismatch")
-
+        code = new_code()
+        self._store.save(phone, code, now + CODE_TTL)
+        if self._sender is not None:
+            self._sender(phone, code)
 
-@dataclass
-class LoginResult:
-    guid: str
-    access_token: str
-    refresh_token: str
-    user_status: UserStatus
-    account_source: str
-    access_token_expires_at: datetime
-    refresh_token_expires_at: datetime
+    def validate_code(self, phone: str, code: str, now: Optional[datetime] = None) -> None:
+        check_code(self._store.get(phone), code, now or now_utc())
 
 
 class AuthService:
@@ -85,11 +86,13 @@ class AuthService:
         session_store: InMemorySessionStore,
         vc_service: VerificationCodeService,
         guid_gen: GuidGenerator,
+        token_signer: Optional[AccessTokenSigner] = None,
     ) -> None:
         self._users = user_repo
         self._sessions = session_store
         self._vc = vc_service
         self._guid_gen = guid_gen
+        self._signer = token_signer
 
     def _validate_phone(self, phone: str) -> None:
         if not PHONE_REGEX.match(phone):
@@ -101,55 +104,13 @@ class AuthService:
         self._vc.validate_code(phone, code)
 
         now = now_utc()
-        user = self._users.find_by_phone(phone)
-
-        if user is None:
-            # 新用户注册（BR-02 + BR-01）
-            guid = self._guid_gen.generate(user_type=1, now=now)
-            user = User(guid=guid, phone=phone)
-            self._users.save(user)
-        elif user.status == UserStatus.BANNED:
-            # 封禁用户不得登录（BR-08）
-            raise AuthError(ERR_USER_BANNED, "user banned")
-        elif user.status == UserStatus.DELETED:
-            # 注销用户视为新用户（C-01）
-            guid = self._guid_gen.generate(user_type=user.user_type, now=now)
-            user = User(guid=guid, phone=phone, user_type=user.user_type, account_source=user.account_source)
+        user, created = resolve_login_user(self._users.find_by_phone(phone), phone, now, self._guid_gen)
+        if created:
             self._users.save(user)
 
-        # 创建/更新会话（BR-03/BR-07）
-        refresh_token = self._generate_token(prefix="R")
-        access_token = self._generate_token(prefix="A")
-        rt_exp = calc_refresh_expires(now)
-        at_exp = calc_access_expires(now)
-
-        app_session = AppSession(
-            access_token=access_token,
-            access_token_expires_at=at_exp,
-            last_active_at=now,
-        )
-        session = Session(
-            guid=user.guid,
-            refresh_token=refresh_token,
-            refresh_token_expires_at=rt_exp,
-            apps={app_id: app_session},
-        )
+        session, result = open_session(user, app_id, now, self._signer)
         self._sessions.put(session)
-
-        return LoginResult(
-            guid=user.guid,
-            access_token=access_token,
-            refresh_token=refresh_token,
-            user_status=user.status,
-            account_source=user.account_source,
-            access_token_expires_at=at_exp,
-            refresh_token_expires_at=rt_exp,
-        )
-
-    @staticmethod
-    def _generate_token(prefix: str) -> str:
-        rand = secrets.token_hex(16)
-        return f"{prefix}.{rand}"
+        return result
 
 
 class TokenService:
@@ -157,40 +118,28 @@ class TokenService:
 
     支持多 app_id 子会话结构：同一 GUID 在不同 app 上可以拥有各自的 Access Token，
     用于 SSO 场景下的多客户端共享 Refresh Token。
+    配置了吊销过滤器时，被换下的签名 Access Token 同时写入过滤器：会话里只保留最新一枚，
+    否则之后的退出/封禁吊销不到刷新前签发的 token。
     """
 
-    def __init__(self, session_store: InMemorySessionStore) -> None:
+    def __init__(
+        self,
+        session_store: InMemorySessionStore,
+        token_signer: Optional[AccessTokenSigner] = None,
+        revocations: Optional[RevocationFilter] = None,
+    ) -> None:
         self._sessions = session_store
+        self._signer = token_signer
+        self._revocations = revocations
 
     def refresh_access_token(self, guid: str, refresh_token: str, app_id: str) -> LoginResult:
+        # 只写回 app_id 这一个子会话，且读改写在存储内原子完成：
+        # 同一 guid 上其它 app 的并发刷新不会被整份会话的写回覆盖。
         now = now_utc()
-        session = self._sessions.get(guid)
-        if session is None or not session.is_refresh_valid(now):
-            raise AuthError(ERR_REFRESH_EXPIRED, "refresh token expired or session missing")
-        if session.refresh_token != refresh_token:
-            raise AuthError(ERR_REFRESH_MISMATCH, "refresh token mismatch")
-
-        access_token = AuthService._generate_token(prefix="A")
-        at_exp = calc_access_expires(now)
-        app_session = session.apps.get(app_id)
-        if app_session is None:
-            app_session = AppSession(access_token=access_token, access_token_expires_at=at_exp, last_active_at=now)
-        else:
-            app_session.access_token = access_token
-            app_session.access_token_expires_at = at_exp
-            app_session.last_active_at = now
-        session.apps[app_id] = app_session
-        self._sessions.put(session)
-
-        # LoginResult 主要用于前端复用数据结构，这里只返回部分字段。
-        return LoginResult(
-            guid=guid,
-            access_token=access_token,
-            refresh_token=session.refresh_token,
-            user_status=UserStatus.ACTIVE,
-            account_source="phone",
-            access_token_expires_at=at_exp,
-            refresh_token_expires_at=session.refresh_token_expires_at,
+        return self._sessions.update_app(
+            guid,
+            app_id,
+            lambda session: refresh_session(session, guid, refresh_token, app_id, now, self._signer, self._revocations),
         )
 
 
@@ -199,23 +148,43 @@ class LogoutService:
 
     在当前 Python 骨架中，退出仅根据 guid 删除 Session，
     由上层（API/壳层）保证 guid 来源于有效的 Access Token。
+    配置了吊销过滤器时，会话中现存的签名 Access Token 同时写入过滤器。
     """
 
-    def __init__(self, session_store: InMemorySessionStore) -> None:
+    def __init__(self, session_store: InMemorySessionStore, revocations: Optional[RevocationFilter] = None) -> None:
         self._sessions = session_store
+        self._revocations = revocations
 
     def logout(self, guid: str) -> None:
         """按 guid 销毁会话，幂等处理。"""
 
+        if self._revocations is not None:
+            revoke_session_tokens(self._revocations, self._sessions.get(guid))
         self._sessions.delete(guid)
 
+    def logout_by_access_token(self, access_token: str) -> Optional[str]:
+        """按 Access Token 反查会话并销毁，返回被退出的 guid；token 未知时幂等返回 None。"""
+
+        found = self._sessions.find_by_access_token(access_token)
+        if found is None:
+            return None
+        guid = found[0].guid
+        self.logout(guid)
+        return guid
+
 
 class BanService:
     """封禁服务：更新用户状态并清理会话。"""
 
-    def __init__(self, user_repo: InMemoryUserRepo, session_store: Optional[InMemorySessionStore]) -> None:
+    def __init__(
+        self,
+        user_repo: InMemoryUserRepo,
+        session_store: Optional[InMemorySessionStore],
+        revocations: Optional[RevocationFilter] = None,
+    ) -> None:
         self._users = user_repo
         self._sessions = session_store
+        self._revocations = revocations
 
     def ban_by_phone(self, phone: str) -> None:
         user = self._users.find_by_phone(phone)
@@ -224,6 +193,8 @@ class BanService:
         user.status = UserStatus.BANNED
         self._users.save(user)
         if self._sessions is not None:
+            if self._revocations is not None:
+                revoke_session_tokens(self._revocations, self._sessions.get(user.guid))
             self._sessions.delete(user.guid)
 
     def unban_by_phone(self, phone: str) -> None:
@@ -234,18 +205,64 @@ class BanService:
         self._users.save(user)
 
 
+@dataclass
+class UserPage:
+    items: list[User]
+    next_cursor: Optional[str]
+
+
 class UserQueryService:
-    """后台用户查询服务 PoC，实现简单的按状态过滤与排序。"""
+    """后台用户查询服务 PoC，实现按状态过滤、排序与 keyset 分页。"""
+
+    STREAM_CHUNK = 500
 
     def __init__(self, user_repo: InMemoryUserRepo) -> None:
         self._users = user_repo
 
     def list_users(self, status: Optional[UserStatus] = None) -> list[User]:
-        users = list(self._users.all().values())
-        if status is not None:
-            users = [u for u in users if u.status == status]
-        users.sort(key=lambda u: (u.created_at, u.phone))
-        return users
+        # 仓储索引已按 (created_at, phone) 有序，无需再排序。
+        return self._users.scan(status)
+
+    def list_users_page(
+        self,
+        status: Optional[UserStatus] = None,
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> UserPage:
+        """keyset 分页：cursor 为上一页返回的 next_cursor，最后一页 next_cursor 为 None。"""
+
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        after = self._decode_cursor(cursor) if cursor else None
+        rows = self._users.scan(status, after, limit + 1)
+        items = rows[:limit]
+        next_cursor = self._encode_cursor(items[-1]) if len(rows) > limit else None
+        return UserPage(items=items, next_cursor=next_cursor)
+
+    def iter_users(self, status: Optional[UserStatus] = None) -> Iterator[User]:
+        """按排序流式产出用户，每次只从索引取一小段，不物化全量列表。"""
+
+        after = None
+        while True:
+            chunk = self._users.scan(status, after, self.STREAM_CHUNK)
+            yield from chunk
+            if len(chunk) < self.STREAM_CHUNK:
+                return
+            after = (chunk[-1].created_at, chunk[-1].phone)
+
+    @staticmethod
+    def _encode_cursor(user: User) -> str:
+        raw = f"{user.created_at.isoformat()}|{user.phone}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+        try:
+            created_at, phone = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+            return datetime.fromisoformat(created_at), phone
+        except Exception as exc:  # noqa: BLE001
+            raise ValueError("invalid cursor") from exc
 
 
 class LoginLogService:
@@ -288,27 +305,18 @@ class LoginLogService:
     ) -> None:
         """记录用户登出事件。
 
-        策略：从最近到最早遍历日志，找到第一个满足以下条件的记录并补齐 logout_at：
+        策略：找到最近写入的、满足以下条件的记录并补齐 logout_at：
         - guid 相同；
         - 若提供 phone，则 phone 也需匹配；
         - 当前尚未设置 logout_at。
+
+        候选记录由仓储的未登出索引（find_open）直接给出，不再遍历全部日志。
         """
 
         when = when or now_utc()
-        logs = self._repo.all()
-        for log in reversed(logs):
-            if log.guid != guid:
-                continue
-            if phone is not None and log.phone != phone:
-                continue
-            if log.logout_at is not None:
-                continue
-            log.logout_at = when
-            if channel:
-                log.channel = channel
-            if ip is not None:
-                log.ip = ip
-            break
+        log = self._repo.find_open(guid, phone)
+        if log is not None:
+            self._repo.mark_logout(log, when, channel=channel, ip=ip)
 
     def query_logs(
         self,
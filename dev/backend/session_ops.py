@@ -0,0 +1,174 @@
+"""登录/刷新会话的纯逻辑：同步 `services` 与异步 `async_services` 共用。
+
+这里的函数只处理内存中的对象（验证码记录、User、Session），不读写存储；
+查询与写回由调用方完成，因此同一套规则可以分别用同步存储或 `await` 存储驱动。
+"""
+
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+from .domain import (
+    AppSession,
+    AuthError,
+    ERR_CODE_EXPIRED,
+    ERR_CODE_INVALID,
+    ERR_PHONE_INVALID,
+    ERR_REFRESH_EXPIRED,
+    ERR_REFRESH_MISMATCH,
+    ERR_USER_BANNED,
+    Session,
+    User,
+    UserStatus,
+    calc_access_expires,
+    calc_refresh_expires,
+)
+from .signed_tokens import AccessTokenSigner, RevocationFilter, is_signed_token
+
+if TYPE_CHECKING:
+    from .services import GuidGenerator
+
+
+@dataclass
+class LoginResult:
+    guid: str
+    access_token: str
+    refresh_token: str
+    user_status: UserStatus
+    account_source: str
+    access_token_expires_at: datetime
+    refresh_token_expires_at: datetime
+
+
+def new_code() -> str:
+    return f"{secrets.randbelow(1_000_000):06d}"
+
+
+def check_code(record: Optional[tuple[str, datetime]], code: str, now: datetime) -> None:
+    if record is None:
+        raise AuthError(ERR_PHONE_INVALID, "no code for phone")
+    saved_code, expires_at = record
+    if now >= expires_at:
+        raise AuthError(ERR_CODE_EXPIRED, "code expired")
+    if code != saved_code:
+        raise AuthError(ERR_CODE_INVALID, "code mismatch")
+
+
+def generate_token(prefix: str) -> str:
+    rand = secrets.token_hex(16)
+    return f"{prefix}.{rand}"
+
+
+def resolve_login_user(user: Optional[User], phone: str, now: datetime, guid_gen: GuidGenerator) -> tuple[User, bool]:
+    """按手机号查到的用户决定本次登录的账号，返回 (user, 是否新建需保存)。"""
+
+    if user is None:
+        # 新用户注册（BR-02 + BR-01）
+        guid = guid_gen.generate(user_type=1, now=now)
+        return User(guid=guid, phone=phone), True
+    if user.status == UserStatus.BANNED:
+        # 封禁用户不得登录（BR-08）
+        raise AuthError(ERR_USER_BANNED, "user banned")
+    if user.status == UserStatus.DELETED:
+        # 注销用户视为新用户（C-01）
+        guid = guid_gen.generate(user_type=user.user_type, now=now)
+        return User(guid=guid, phone=phone, user_type=user.user_type, account_source=user.account_source), True
+    return user, False
+
+
+def open_session(
+    user: User, app_id: str, now: datetime, signer: Optional[AccessTokenSigner]
+) -> tuple[Session, LoginResult]:
+    """创建/更新会话（BR-03/BR-07）：签发新的 Refresh Token 与该 app 的 Access Token。"""
+
+    refresh_token = generate_token(prefix="R")
+    rt_exp = calc_refresh_expires(now)
+    at_exp = calc_access_expires(now)
+    access_token = issue_access_token(signer, user.guid, app_id, at_exp)
+
+    app_session = AppSession(
+        access_token=access_token,
+        access_token_expires_at=at_exp,
+        last_active_at=now,
+    )
+    session = Session(
+        guid=user.guid,
+        refresh_token=refresh_token,
+        refresh_token_expires_at=rt_exp,
+        apps={app_id: app_session},
+    )
+    result = LoginResult(
+        guid=user.guid,
+        access_token=access_token,
+        refresh_token=refresh_token,
+        user_status=user.status,
+        account_source=user.account_source,
+        access_token_expires_at=at_exp,
+        refresh_token_expires_at=rt_exp,
+    )
+    return session, result
+
+
+def issue_access_token(signer: Optional[AccessTokenSigner], guid: str, app_id: str, expires_at: datetime) -> str:
+    """未配置签名器时签发不透明 token（`A.<hex>`），否则签发自包含的签名 token。"""
+
+    if signer is None:
+        return generate_token(prefix="A")
+    return signer.issue(guid, app_id, expires_at)
+
+
+def refresh_session(
+    session: Optional[Session],
+    guid: str,
+    refresh_token: str,
+    app_id: str,
+    now: datetime,
+    signer: Optional[AccessTokenSigner],
+    revocations: Optional[RevocationFilter] = None,
+) -> LoginResult:
+    """校验 Refresh Token 并为 app_id 换发 Access Token，原地更新 session.apps（调用方负责写回）。
+
+    被替换的签名 token 写入 `revocations`（不透明 token 随 apps 替换即从索引中失效）。
+    """
+
+    if session is None or not session.is_refresh_valid(now):
+        raise AuthError(ERR_REFRESH_EXPIRED, "refresh token expired or session missing")
+    if session.refresh_token != refresh_token:
+        raise AuthError(ERR_REFRESH_MISMATCH, "refresh token mismatch")
+
+    at_exp = calc_access_expires(now)
+    access_token = issue_access_token(signer, guid, app_id, at_exp)
+    # copy-on-write 替换 apps：并发的读取方（校验/索引）看到的要么是旧字典要么是新字典，
+    # 不会在迭代过程中遇到原地修改。
+    apps = dict(session.apps)
+    replaced = apps.get(app_id)
+    apps[app_id] = AppSession(access_token=access_token, access_token_expires_at=at_exp, last_active_at=now)
+    session.apps = apps
+    if revocations is not None and replaced is not None and is_signed_token(replaced.access_token):
+        revocations.revoke(replaced.access_token)
+
+    # LoginResult 主要用于前端复用数据结构，这里只返回部分字段。
+    return LoginResult(
+        guid=guid,
+        access_token=access_token,
+        refresh_token=session.refresh_token,
+        user_status=UserStatus.ACTIVE,
+        account_source="phone",
+        access_token_expires_at=at_exp,
+        refresh_token_expires_at=session.refresh_token_expires_at,
+    )
+
+
+__all__ = [
+    "LoginResult",
+    "check_code",
+    "generate_token",
+    "issue_access_token",
+    "new_code",
+    "open_session",
+    "refresh_session",
+    "resolve_login_user",
+]
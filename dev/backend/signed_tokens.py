@@ -0,0 +1,259 @@
+"""可选的自包含签名 Access Token（HMAC-SHA256，支持密钥轮换）与吊销布隆过滤器。
+
+默认的 `A.<hex>` 不透明 token 每次校验都要查 Session 存储。启用签名模式后，
+token 自带 guid / app_id / 过期时间：
+
+    S.<kid>.<payload>.<sig>
+    payload = base64url("{guid}\\t{app_id}\\t{exp_epoch_s}\\t{nonce}")
+    sig     = base64url(HMAC-SHA256(key[kid], "S.<kid>.<payload>"))
+
+下游服务只需持有密钥（和可选的 `RevocationFilter`）即可本地校验，零 I/O。
+
+轮换：`rotate()` 让新密钥成为签发密钥，旧密钥继续参与验签，待旧 token 全部过期
+（至少一个 Access Token 有效期）后再 `retire()`。
+
+吊销：`LogoutService.logout` / `BanService.ban_by_phone` 把会话中现存的 Access Token
+写入布隆过滤器。过滤器按 Access Token 有效期分两代轮换，超过两个有效期的条目
+连同已过期的 token 一起自然淘汰。布隆过滤器存在小概率误判（把未吊销的 token 判为已吊销），
+此时客户端按 ERR_ACCESS_INVALID 契约刷新即可。
+
+刷新：`session_ops.refresh_session`（TokenService / AsyncTokenService 的刷新路径）签发新 token 时，
+把被替换的旧签名 token 写入同一个过滤器，旧 token 随即校验失败，与不透明模式一致；
+未配置过滤器的部署中，旧签名 token 在自身过期前仍然有效。
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import math
+import secrets
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+from .domain import ACCESS_TOKEN_TTL_HOURS, UTC, now_utc
+
+
+SIGNED_PREFIX = "S."
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(SIGNED_PREFIX)
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    secret: bytes
+
+    @classmethod
+    def generate(cls, kid: str) -> "SigningKey":
+        return cls(kid=kid, secret=secrets.token_bytes(32))
+
+
+@dataclass(frozen=True)
+class SignedClaims:
+    guid: str
+    app_id: str
+    expires_at: datetime
+
+
+class AccessTokenSigner:
+    """签发与验签。`keys[0]` 为当前签发密钥，其余密钥仅用于验签。
+
+    验签通过的 token 缓存在有界字典中（同一 token 通常在有效期内被反复校验），
+    `retire()` 时清空缓存，被下线密钥签发的 token 随即失效。
+    """
+
+    def __init__(self, keys: Sequence[SigningKey], *, cache_size: int = 4096) -> None:
+        if not keys:
+            raise ValueError("at least one signing key is required")
+        self._lock = threading.Lock()
+        self._active = keys[0]
+        self._keys = {key.kid: key.secret for key in keys}
+        self._cache_size = cache_size
+        self._verified: Dict[str, SignedClaims] = {}
+
+    @property
+    def active_kid(self) -> str:
+        return self._active.kid
+
+    def rotate(self, key: SigningKey) -> None:
+        with self._lock:
+            keys = dict(self._keys)
+            keys[key.kid] = key.secret
+            # 整体替换字典，验签路径无需加锁。
+            self._keys = keys
+            self._active = key
+
+    def retire(self, kid: str) -> None:
+        with self._lock:
+            if kid == self._active.kid:
+                raise ValueError("cannot retire the active signing key")
+            keys = dict(self._keys)
+            keys.pop(kid, None)
+            self._keys = keys
+            self._verified = {}
+
+    def issue(self, guid: str, app_id: str, expires_at: datetime) -> str:
+        key = self._active
+        nonce = secrets.token_hex(8)
+        payload = _b64encode(f"{guid}\t{app_id}\t{int(expires_at.timestamp())}\t{nonce}".encode("utf-8"))
+        signing_input = f"{SIGNED_PREFIX}{key.kid}.{payload}"
+        sig = hmac.digest(key.secret, signing_input.encode("ascii"), "sha256")
+        return f"{signing_input}.{_b64encode(sig)}"
+
+    def decode(self, token: str) -> Optional[SignedClaims]:
+        """验签并解析；格式错误、未知 kid 或签名不符时返回 None（不检查过期）。"""
+
+        cached = self._verified.get(token)
+        if cached is not None:
+            return cached
+        if not token.startswith(SIGNED_PREFIX):
+            return None
+        parts = token.split(".")
+        if len(parts) != 4:
+            return None
+        _, kid, payload, sig = parts
+        secret = self._keys.get(kid)
+        if secret is None:
+            return None
+        expected = _b64encode(hmac.digest(secret, f"{SIGNED_PREFIX}{kid}.{payload}".encode("ascii"), "sha256"))
+        if not hmac.compare_digest(expected, sig):
+            return None
+        try:
+            guid, app_id, exp, _nonce = _b64decode(payload).decode("utf-8").split("\t")
+            claims = SignedClaims(guid=guid, app_id=app_id, expires_at=datetime.fromtimestamp(int(exp), UTC))
+        except ValueError:
+            return None
+        with self._lock:
+            if len(self._verified) >= self._cache_size:
+                # 按插入顺序淘汰最早的一半，摊还淘汰开销。
+                for stale in list(self._verified)[: self._cache_size // 2 or 1]:
+                    del self._verified[stale]
+            self._verified[token] = claims
+        return claims
+
+
+def _bloom_hashes(item: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class _BloomBits:
+    __slots__ = ("bits", "m", "k", "count")
+
+    def __init__(self, m: int, k: int) -> None:
+        self.bits = bytearray((m + 7) // 8)
+        self.m = m
+        self.k = k
+        self.count = 0
+
+    def add(self, h1: int, h2: int) -> None:
+        bits, m = self.bits, self.m
+        for i in range(self.k):
+            pos = (h1 + i * h2) % m
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains(self, h1: int, h2: int) -> bool:
+        if not self.count:
+            return False
+        bits, m = self.bits, self.m
+        for i in range(self.k):
+            pos = (h1 + i * h2) % m
+            if not (bits[pos >> 3] >> (pos & 7)) & 1:
+                return False
+        return True
+
+
+class RevocationFilter:
+    """按代轮换的布隆过滤器：每代存活 `generation_ttl`，查询同时检查当前代和上一代。
+
+    `capacity` 为单代预期条目数，`error_rate` 为满载时的目标误判率。
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 100_000,
+        error_rate: float = 1e-3,
+        generation_ttl: timedelta = timedelta(hours=ACCESS_TOKEN_TTL_HOURS),
+        now_provider: Callable[[], datetime] = now_utc,
+    ) -> None:
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and error_rate within (0, 1)")
+        self._m = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._k = max(1, round(self._m / capacity * math.log(2)))
+        self._ttl = generation_ttl
+        self.now = now_provider
+        self._lock = threading.Lock()
+        self._current = _BloomBits(self._m, self._k)
+        self._previous = _BloomBits(self._m, self._k)
+        self._started = now_provider()
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._maybe_rotate()
+            self._current.add(*_bloom_hashes(token))
+
+    def revoke_many(self, tokens: Iterable[str]) -> None:
+        with self._lock:
+            self._maybe_rotate()
+            for token in tokens:
+                self._current.add(*_bloom_hashes(token))
+
+    def is_revoked(self, token: str) -> bool:
+        current, previous = self._current, self._previous
+        if self.now() - self._started >= self._ttl:
+            with self._lock:
+                self._maybe_rotate()
+                current, previous = self._current, self._previous
+        h1, h2 = _bloom_hashes(token)
+        return current.contains(h1, h2) or previous.contains(h1, h2)
+
+    def __len__(self) -> int:
+        return self._current.count + self._previous.count
+
+    def _maybe_rotate(self) -> None:
+        # 调用方需持有 self._lock。
+        now = self.now()
+        elapsed = now - self._started
+        if elapsed < self._ttl:
+            return
+        if elapsed >= 2 * self._ttl:
+            self._previous = _BloomBits(self._m, self._k)
+        else:
+            self._previous = self._current
+        self._current = _BloomBits(self._m, self._k)
+        self._started = now
+
+
+def revoke_session_tokens(revocations: Optional[RevocationFilter], session) -> None:
+    """把会话中现存的签名 Access Token 写入吊销过滤器（不透明 token 由存储删除即失效）。"""
+
+    if revocations is None or session is None:
+        return
+    revocations.revoke_many(a.access_token for a in dict(session.apps).values() if is_signed_token(a.access_token))
+
+
+__all__ = [
+    "SIGNED_PREFIX",
+    "SigningKey",
+    "SignedClaims",
+    "AccessTokenSigner",
+    "RevocationFilter",
+    "is_signed_token",
+    "revoke_session_tokens",
+]
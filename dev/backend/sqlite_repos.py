@@ -0,0 +1,648 @@
+"""基于 SQLite（标准库 sqlite3，WAL 模式）的持久化仓储实现。
+
+与 `domain.py` 中的内存实现保持相同接口，可直接注入 AuthService/TokenService/TokenValidator/
+LogoutService/BanService/UserQueryService/LoginLogService：
+
+- `SqliteUserRepo`          ↔ InMemoryUserRepo
+- `SqliteSessionStore`      ↔ InMemorySessionStore
+- `SqliteLoginLogRepo`      ↔ InMemoryLoginLogRepo
+- `SqliteVerificationCodeStore` ↔ VerificationCodeStore
+- `SqliteCodeRateLimiter`   ↔ rate_limit.CodeRateLimiter（状态在库里，pre-fork 的各 worker 共用一份额度）
+
+约定：
+- 多个仓储共享一个 `SqliteDatabase`（单连接 + 可重入锁），SQL 语句均为模块级常量，
+  借助 sqlite3 连接内置的语句缓存复用预编译结果；
+- `SqliteDatabase.batch()` 将多次写入合并为一个事务（一次 WAL 提交）；
+- 时间统一存为 UTC 微秒整数，读回为带 UTC 时区的 datetime；
+- 索引沿用 `deploy/sql/01_schema.sql`，并补充本地查询路径所需的索引。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar, Union
+
+from .domain import (
+    ERR_CODE_TOO_FREQUENT,
+    UTC,
+    AppSession,
+    AuthError,
+    LoginLog,
+    Session,
+    User,
+    UserStatus,
+)
+from .rate_limit import CodeIssueLimits, SlidingWindowLimiter, TokenBucketLimiter
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_US = timedelta(microseconds=1)
+_T = TypeVar("_T")
+
+
+def _to_us(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return (dt - EPOCH) // _US
+
+
+def _from_us(value: Optional[int]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return EPOCH + timedelta(microseconds=value)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+  guid TEXT PRIMARY KEY,
+  phone TEXT UNIQUE NOT NULL,
+  user_type INTEGER NOT NULL DEFAULT 1,
+  account_source TEXT NOT NULL DEFAULT 'phone',
+  status INTEGER NOT NULL DEFAULT 1,
+  created_at INTEGER NOT NULL,
+  updated_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_phone ON users (phone);
+CREATE INDEX IF NOT EXISTS idx_users_created_at_phone ON users (created_at, phone);
+CREATE INDEX IF NOT EXISTS idx_users_status_created_at_phone ON users (status, created_at, phone);
+
+CREATE TABLE IF NOT EXISTS sessions (
+  guid TEXT PRIMARY KEY,
+  refresh_token TEXT NOT NULL,
+  refresh_token_expires_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS app_sessions (
+  guid TEXT NOT NULL,
+  app_id TEXT NOT NULL,
+  access_token TEXT NOT NULL,
+  access_token_expires_at INTEGER NOT NULL,
+  last_active_at INTEGER NOT NULL,
+  PRIMARY KEY (guid, app_id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_app_sessions_access_token ON app_sessions (access_token);
+
+CREATE TABLE IF NOT EXISTS login_logs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  guid TEXT NOT NULL,
+  phone TEXT NOT NULL,
+  login_at INTEGER NOT NULL,
+  logout_at INTEGER NULL,
+  channel TEXT NULL,
+  ip TEXT NULL,
+  success INTEGER NOT NULL,
+  error_code TEXT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_login_logs_phone_login_at ON login_logs (phone, login_at);
+CREATE INDEX IF NOT EXISTS idx_login_logs_guid_login_at ON login_logs (guid, login_at);
+CREATE INDEX IF NOT EXISTS idx_login_logs_login_at ON login_logs (login_at);
+CREATE INDEX IF NOT EXISTS idx_login_logs_channel_login_at ON login_logs (channel, login_at);
+CREATE INDEX IF NOT EXISTS idx_login_logs_open ON login_logs (guid, phone, id) WHERE logout_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS verification_codes (
+  phone TEXT PRIMARY KEY,
+  code TEXT NOT NULL,
+  expires_at INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rate_limits (
+  key TEXT PRIMARY KEY,
+  s0 REAL NOT NULL,
+  s1 REAL NOT NULL,
+  s2 REAL NULL,
+  expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rate_limits_expires_at ON rate_limits (expires_at);
+"""
+
+
+class SqliteDatabase:
+    """共享的 SQLite 连接：WAL + busy_timeout，所有仓储操作经由同一把可重入锁串行化。"""
+
+    def __init__(self, path: str = ":memory:", *, busy_timeout_ms: int = 5000) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, cached_statements=256)
+        self._lock = threading.RLock()
+        self._depth = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+            self._conn.executescript(SCHEMA)
+
+    @contextmanager
+    def batch(self) -> Iterator[sqlite3.Connection]:
+        """事务上下文：可嵌套，只有最外层提交；异常时整体回滚。"""
+
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    @contextmanager
+    def reading(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            yield self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# --- Users ---
+
+_USER_COLUMNS = "guid, phone, user_type, account_source, status, created_at, updated_at"
+_SQL_USER_UPSERT = (
+    f"INSERT INTO users ({_USER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(phone) DO UPDATE SET guid=excluded.guid, user_type=excluded.user_type, "
+    "account_source=excluded.account_source, status=excluded.status, "
+    "created_at=excluded.created_at, updated_at=excluded.updated_at"
+)
+_SQL_USER_BY_PHONE = f"SELECT {_USER_COLUMNS} FROM users WHERE phone = ?"
+_SQL_USER_BY_GUID = f"SELECT {_USER_COLUMNS} FROM users WHERE guid = ?"
+_SQL_USER_ALL = f"SELECT {_USER_COLUMNS} FROM users"
+
+
+def _user_row(user: User) -> tuple:
+    return (
+        user.guid,
+        user.phone,
+        user.user_type,
+        user.account_source,
+        int(user.status),
+        _to_us(user.created_at),
+        _to_us(user.updated_at),
+    )
+
+
+def _user_from_row(row: tuple) -> User:
+    return User(
+        guid=row[0],
+        phone=row[1],
+        user_type=row[2],
+        account_source=row[3],
+        status=UserStatus(row[4]),
+        created_at=_from_us(row[5]),
+        updated_at=_from_us(row[6]),
+    )
+
+
+class SqliteUserRepo:
+    def __init__(self, db: SqliteDatabase) -> None:
+        self._db = db
+
+    def find_by_phone(self, phone: str) -> Optional[User]:
+        with self._db.reading() as conn:
+            row = conn.execute(_SQL_USER_BY_PHONE, (phone,)).fetchone()
+        return _user_from_row(row) if row else None
+
+    def find_by_guid(self, guid: str) -> Optional[User]:
+        with self._db.reading() as conn:
+            row = conn.execute(_SQL_USER_BY_GUID, (guid,)).fetchone()
+        return _user_from_row(row) if row else None
+
+    def save(self, user: User) -> User:
+        user.updated_at = datetime.now(UTC)
+        with self._db.batch() as conn:
+            conn.execute(_SQL_USER_UPSERT, _user_row(user))
+        return user
+
+    def save_many(self, users: Iterable[User]) -> None:
+        now = datetime.now(UTC)
+        rows = []
+        for user in users:
+            user.updated_at = now
+            rows.append(_user_row(user))
+        with self._db.batch() as conn:
+            conn.executemany(_SQL_USER_UPSERT, rows)
+
+    def all(self) -> Dict[str, User]:
+        with self._db.reading() as conn:
+            rows = conn.execute(_SQL_USER_ALL).fetchall()
+        return {row[1]: _user_from_row(row) for row in rows}
+
+    def scan(
+        self,
+        status: Optional[UserStatus] = None,
+        after: Optional[tuple[datetime, str]] = None,
+        limit: Optional[int] = None,
+    ) -> list[User]:
+        sql = f"SELECT {_USER_COLUMNS} FROM users"
+        where, params = [], []
+        if status is not None:
+            where.append("status = ?")
+            params.append(int(status))
+        if after is not None:
+            where.append("(created_at, phone) > (?, ?)")
+            params.extend((_to_us(after[0]), after[1]))
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at, phone"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._db.reading() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_user_from_row(row) for row in rows]
+
+
+# --- Sessions ---
+
+_SQL_SESSION_UPSERT = (
+    "INSERT INTO sessions (guid, refresh_token, refresh_token_expires_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(guid) DO UPDATE SET refresh_token=excluded.refresh_token, "
+    "refresh_token_expires_at=excluded.refresh_token_expires_at"
+)
+_SQL_SESSION_GET = "SELECT guid, refresh_token, refresh_token_expires_at FROM sessions WHERE guid = ?"
+_SQL_SESSION_ALL = "SELECT guid, refresh_token, refresh_token_expires_at FROM sessions"
+_SQL_SESSION_DELETE = "DELETE FROM sessions WHERE guid = ?"
+_SQL_APPS_DELETE = "DELETE FROM app_sessions WHERE guid = ?"
+_SQL_APPS_INSERT = (
+    "INSERT OR REPLACE INTO app_sessions (guid, app_id, access_token, access_token_expires_at, last_active_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_APP_UPSERT = (
+    "INSERT INTO app_sessions (guid, app_id, access_token, access_token_expires_at, last_active_at) "
+    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(guid, app_id) DO UPDATE SET access_token=excluded.access_token, "
+    "access_token_expires_at=excluded.access_token_expires_at, last_active_at=excluded.last_active_at"
+)
+_SQL_APP_DELETE = "DELETE FROM app_sessions WHERE guid = ? AND app_id = ?"
+_SQL_APPS_BY_GUID = (
+    "SELECT app_id, access_token, access_token_expires_at, last_active_at FROM app_sessions WHERE guid = ?"
+)
+_SQL_APPS_ALL = "SELECT guid, app_id, access_token, access_token_expires_at, last_active_at FROM app_sessions"
+_SQL_APP_BY_TOKEN = "SELECT guid, app_id FROM app_sessions WHERE access_token = ?"
+# 按一批 token 取回命中会话的全部 app 子会话（同一会话的多个 token 只返回一份）。
+_SQL_SESSIONS_BY_TOKENS = (
+    "SELECT DISTINCT s.guid, s.refresh_token, s.refresh_token_expires_at, "
+    "a.app_id, a.access_token, a.access_token_expires_at, a.last_active_at "
+    "FROM app_sessions t JOIN sessions s ON s.guid = t.guid JOIN app_sessions a ON a.guid = s.guid "
+    "WHERE t.access_token IN ({})"
+)
+_TOKEN_CHUNK = 500
+
+
+def _app_from_row(row: tuple) -> AppSession:
+    return AppSession(access_token=row[0], access_token_expires_at=_from_us(row[1]), last_active_at=_from_us(row[2]))
+
+
+class SqliteSessionStore:
+    """Session 持久化：sessions 存 refresh 信息，app_sessions 存各 app 的 access token。
+
+    access_token 上有唯一索引，find_by_access_token 为一次索引查询。
+    `update_app` 在一个 BEGIN IMMEDIATE 事务内重读会话并只 UPSERT/DELETE 该 app 的一行，
+    同一个库上的多个进程（pre-fork worker）之间也是原子的。
+    """
+
+    def __init__(self, db: SqliteDatabase) -> None:
+        self._db = db
+
+    def put(self, session: Session) -> None:
+        apps = dict(session.apps)
+        with self._db.batch() as conn:
+            conn.execute(
+                _SQL_SESSION_UPSERT,
+                (session.guid, session.refresh_token, _to_us(session.refresh_token_expires_at)),
+            )
+            conn.execute(_SQL_APPS_DELETE, (session.guid,))
+            conn.executemany(
+                _SQL_APPS_INSERT,
+                [
+                    (session.guid, app_id, a.access_token, _to_us(a.access_token_expires_at), _to_us(a.last_active_at))
+                    for app_id, a in apps.items()
+                ],
+            )
+
+    def update_app(self, guid: str, app_id: str, fn: Callable[[Optional[Session]], _T]) -> _T:
+        """语义同 InMemorySessionStore.update_app；`fn` 抛异常时事务回滚，不写入任何内容。"""
+
+        with self._db.batch() as conn:
+            session = self._load(conn, guid)
+            result = fn(session)
+            if session is not None:
+                a = session.apps.get(app_id)
+                if a is None:
+                    conn.execute(_SQL_APP_DELETE, (guid, app_id))
+                else:
+                    conn.execute(
+                        _SQL_APP_UPSERT,
+                        (guid, app_id, a.access_token, _to_us(a.access_token_expires_at), _to_us(a.last_active_at)),
+                    )
+        return result
+
+    def get(self, guid: str) -> Optional[Session]:
+        with self._db.reading() as conn:
+            return self._load(conn, guid)
+
+    def delete(self, guid: str) -> None:
+        with self._db.batch() as conn:
+            conn.execute(_SQL_APPS_DELETE, (guid,))
+            conn.execute(_SQL_SESSION_DELETE, (guid,))
+
+    @staticmethod
+    def _load(conn: sqlite3.Connection, guid: str) -> Optional[Session]:
+        row = conn.execute(_SQL_SESSION_GET, (guid,)).fetchone()
+        if row is None:
+            return None
+        apps = conn.execute(_SQL_APPS_BY_GUID, (guid,)).fetchall()
+        return Session(
+            guid=row[0],
+            refresh_token=row[1],
+            refresh_token_expires_at=_from_us(row[2]),
+            apps={a[0]: _app_from_row(a[1:]) for a in apps},
+        )
+
+    def items(self) -> list[tuple[str, Session]]:
+        with self._db.reading() as conn:
+            rows = conn.execute(_SQL_SESSION_ALL).fetchall()
+            app_rows = conn.execute(_SQL_APPS_ALL).fetchall()
+        sessions = {
+            row[0]: Session(guid=row[0], refresh_token=row[1], refresh_token_expires_at=_from_us(row[2]), apps={})
+            for row in rows
+        }
+        for a in app_rows:
+            session = sessions.get(a[0])
+            if session is not None:
+                session.apps[a[1]] = _app_from_row(a[2:])
+        return list(sessions.items())
+
+    def find_by_access_token(self, access_token: str) -> Optional[tuple[Session, str]]:
+        with self._db.reading() as conn:
+            ref = conn.execute(_SQL_APP_BY_TOKEN, (access_token,)).fetchone()
+        if ref is None:
+            return None
+        session = self.get(ref[0])
+        if session is None or ref[1] not in session.apps:
+            return None
+        return session, ref[1]
+
+    def find_many_by_access_token(self, access_tokens: list[str]) -> list[Optional[tuple[Session, str]]]:
+        """批量反查，每 _TOKEN_CHUNK 个 token 一次查询；结果与输入一一对应。"""
+
+        sessions: Dict[str, Session] = {}
+        owner: Dict[str, tuple[str, str]] = {}
+        with self._db.reading() as conn:
+            for i in range(0, len(access_tokens), _TOKEN_CHUNK):
+                chunk = access_tokens[i : i + _TOKEN_CHUNK]
+                sql = _SQL_SESSIONS_BY_TOKENS.format(",".join("?" * len(chunk)))
+                for row in conn.execute(sql, chunk):
+                    session = sessions.get(row[0])
+                    if session is None:
+                        session = Session(guid=row[0], refresh_token=row[1], refresh_token_expires_at=_from_us(row[2]), apps={})
+                        sessions[row[0]] = session
+                    session.apps[row[3]] = _app_from_row(row[4:])
+                    owner[row[4]] = (row[0], row[3])
+        out: list[Optional[tuple[Session, str]]] = []
+        for token in access_tokens:
+            ref = owner.get(token)
+            out.append((sessions[ref[0]], ref[1]) if ref is not None else None)
+        return out
+
+
+# --- Login logs ---
+
+_LOG_COLUMNS = "id, guid, phone, login_at, logout_at, channel, ip, success, error_code"
+_SQL_LOG_INSERT = (
+    "INSERT INTO login_logs (guid, phone, login_at, logout_at, channel, ip, success, error_code) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_LOG_ALL = f"SELECT {_LOG_COLUMNS} FROM login_logs ORDER BY id"
+_SQL_LOG_LOGOUT = "UPDATE login_logs SET logout_at = ?, channel = ?, ip = ? WHERE id = ?"
+_SQL_LOG_OPEN_BY_GUID = (
+    f"SELECT {_LOG_COLUMNS} FROM login_logs WHERE guid = ? AND logout_at IS NULL ORDER BY id DESC LIMIT 1"
+)
+_SQL_LOG_OPEN_BY_GUID_PHONE = (
+    f"SELECT {_LOG_COLUMNS} FROM login_logs "
+    "WHERE guid = ? AND phone = ? AND logout_at IS NULL ORDER BY id DESC LIMIT 1"
+)
+
+
+def _log_from_row(row: tuple) -> LoginLog:
+    return LoginLog(
+        id=row[0],
+        guid=row[1],
+        phone=row[2],
+        login_at=_from_us(row[3]),
+        logout_at=_from_us(row[4]),
+        channel=row[5],
+        ip=row[6],
+        success=bool(row[7]),
+        error_code=row[8],
+    )
+
+
+class SqliteLoginLogRepo:
+    def __init__(self, db: SqliteDatabase) -> None:
+        self._db = db
+
+    def append(self, log: LoginLog) -> None:
+        with self._db.batch() as conn:
+            cur = conn.execute(
+                _SQL_LOG_INSERT,
+                (
+                    log.guid,
+                    log.phone,
+                    _to_us(log.login_at),
+                    _to_us(log.logout_at) if log.logout_at is not None else None,
+                    log.channel,
+                    log.ip,
+                    int(log.success),
+                    log.error_code,
+                ),
+            )
+            log.id = cur.lastrowid
+
+    def all(self) -> list[LoginLog]:
+        with self._db.reading() as conn:
+            rows = conn.execute(_SQL_LOG_ALL).fetchall()
+        return [_log_from_row(row) for row in rows]
+
+    def find_open(self, guid: str, phone: Optional[str] = None) -> Optional[LoginLog]:
+        with self._db.reading() as conn:
+            if phone is None:
+                row = conn.execute(_SQL_LOG_OPEN_BY_GUID, (guid,)).fetchone()
+            else:
+                row = conn.execute(_SQL_LOG_OPEN_BY_GUID_PHONE, (guid, phone)).fetchone()
+        return _log_from_row(row) if row else None
+
+    def mark_logout(
+        self,
+        log: LoginLog,
+        when: datetime,
+        *,
+        channel: Optional[str] = None,
+        ip: Optional[str] = None,
+    ) -> None:
+        if log.id is None:
+            raise ValueError("login log has not been persisted")
+        log.logout_at = when
+        if channel:
+            log.channel = channel
+        if ip is not None:
+            log.ip = ip
+        with self._db.batch() as conn:
+            conn.execute(_SQL_LOG_LOGOUT, (_to_us(when), log.channel, log.ip, log.id))
+
+    def query(
+        self,
+        phone: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        channel: Optional[str] = None,
+    ) -> list[LoginLog]:
+        where, params = [], []
+        if phone is not None:
+            where.append("phone = ?")
+            params.append(phone)
+        if start is not None:
+            where.append("login_at >= ?")
+            params.append(_to_us(start))
+        if end is not None:
+            where.append("login_at <= ?")
+            params.append(_to_us(end))
+        if channel is not None:
+            where.append("channel = ?")
+            params.append(channel)
+        sql = f"SELECT {_LOG_COLUMNS} FROM login_logs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY login_at, id"
+        with self._db.reading() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [_log_from_row(row) for row in rows]
+
+
+# --- Verification codes ---
+
+_SQL_CODE_UPSERT = (
+    "INSERT INTO verification_codes (phone, code, expires_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(phone) DO UPDATE SET code=excluded.code, expires_at=excluded.expires_at"
+)
+_SQL_CODE_GET = "SELECT code, expires_at FROM verification_codes WHERE phone = ?"
+_SQL_CODE_DELETE = "DELETE FROM verification_codes WHERE phone = ?"
+_SQL_CODE_PURGE = "DELETE FROM verification_codes WHERE expires_at <= ?"
+
+
+class SqliteVerificationCodeStore:
+    def __init__(self, db: SqliteDatabase) -> None:
+        self._db = db
+
+    def save(self, phone: str, code: str, expires_at: datetime) -> None:
+        with self._db.batch() as conn:
+            conn.execute(_SQL_CODE_UPSERT, (phone, code, _to_us(expires_at)))
+
+    def get(self, phone: str) -> Optional[tuple[str, datetime]]:
+        with self._db.reading() as conn:
+            row = conn.execute(_SQL_CODE_GET, (phone,)).fetchone()
+        return (row[0], _from_us(row[1])) if row else None
+
+    def delete(self, phone: str) -> None:
+        with self._db.batch() as conn:
+            conn.execute(_SQL_CODE_DELETE, (phone,))
+
+    def purge_expired(self, now: datetime) -> int:
+        """删除所有已过期验证码，返回删除条数。"""
+
+        with self._db.batch() as conn:
+            return conn.execute(_SQL_CODE_PURGE, (_to_us(now),)).rowcount
+
+
+# --- Rate limits ---
+
+_SQL_LIMIT_GET = "SELECT s0, s1, s2 FROM rate_limits WHERE key = ? AND expires_at > ?"
+_SQL_LIMIT_UPSERT = (
+    "INSERT INTO rate_limits (key, s0, s1, s2, expires_at) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET s0=excluded.s0, s1=excluded.s1, s2=excluded.s2, expires_at=excluded.expires_at"
+)
+_SQL_LIMIT_PURGE = "DELETE FROM rate_limits WHERE expires_at <= ?"
+_LIMIT_PURGE_EVERY = 1024
+
+
+class SqliteCodeRateLimiter:
+    """验证码发送频控，规则与 `CodeRateLimiter` 相同，但每个 key 的状态存在 `rate_limits` 表里。
+
+    pre-fork 下每个 worker 各自打开同一个库文件：一次 `check()` 在一个 `BEGIN IMMEDIATE` 事务里读出并
+    写回三项状态，跨进程串行，额度不会随 worker 数放大。状态的推进复用 TokenBucketLimiter /
+    SlidingWindowLimiter 的 `initial` / `advance`；超过 idle 时间的行视为新 key，定期批量删除。
+
+    时钟默认 `time.time`（单调时钟不保证跨进程可比），可注入以便测试。
+    """
+
+    def __init__(
+        self,
+        db: SqliteDatabase,
+        limits: CodeIssueLimits = CodeIssueLimits(),
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.limits = limits
+        self._db = db
+        self._clock = clock
+        self._ip = SlidingWindowLimiter(limits.ip_limit, limits.ip_window_seconds, clock=clock)
+        self._cooldown = TokenBucketLimiter(1, 1.0 / limits.phone_cooldown_seconds, clock=clock)
+        self._daily = SlidingWindowLimiter(limits.phone_daily_limit, 24 * 3600, clock=clock)
+        self._checks = 0
+
+    def check(self, phone: str, ip: Optional[str] = None, now: Optional[float] = None) -> None:
+        now = self._clock() if now is None else now
+        # 与 CodeRateLimiter 相同的顺序；被拦截前已推进的状态照常提交，因此在事务外抛出。
+        message = None
+        with self._db.batch() as conn:
+            if ip and not self._step(conn, "ip:" + ip, self._ip, now):
+                message = "too many requests from this ip"
+            elif not self._step(conn, "cd:" + phone, self._cooldown, now):
+                message = "too frequent"
+            elif not self._step(conn, "day:" + phone, self._daily, now):
+                message = "too frequent today"
+            self._checks += 1
+            if self._checks % _LIMIT_PURGE_EVERY == 0:
+                conn.execute(_SQL_LIMIT_PURGE, (now,))
+        if message is not None:
+            raise AuthError(ERR_CODE_TOO_FREQUENT, message)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """删除所有已回到初始状态的 key，返回删除条数。"""
+
+        with self._db.batch() as conn:
+            return conn.execute(_SQL_LIMIT_PURGE, (self._clock() if now is None else now,)).rowcount
+
+    @staticmethod
+    def _step(
+        conn: sqlite3.Connection,
+        key: str,
+        limiter: Union[TokenBucketLimiter, SlidingWindowLimiter],
+        now: float,
+    ) -> bool:
+        row = conn.execute(_SQL_LIMIT_GET, (key, now)).fetchone()
+        if row is None:
+            allowed, state = True, limiter.initial(now)
+        else:
+            state = list(row)
+            allowed = limiter.advance(state, now)
+        s2 = state[2] if len(state) > 2 else None
+        conn.execute(_SQL_LIMIT_UPSERT, (key, state[0], state[1], s2, now + limiter.idle_seconds))
+        return allowed
+
+
+__all__ = [
+    "SqliteDatabase",
+    "SqliteUserRepo",
+    "SqliteSessionStore",
+    "SqliteLoginLogRepo",
+    "SqliteVerificationCodeStore",
+    "SqliteCodeRateLimiter",
+]
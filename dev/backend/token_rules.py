@@ -0,0 +1,69 @@
+"""Access Token 判定规则：同步 `TokenValidator` 与异步 `AsyncTokenValidator` 共用。
+
+这里的函数只做判定、不做 I/O：调用方负责查存储 / 持有签名器与吊销过滤器，
+结果为 `ValidationResult` 或错误码字符串（`MESSAGES` 给出对应的错误信息）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Union
+
+from .domain import ERR_ACCESS_EXPIRED, ERR_ACCESS_INVALID, ERR_APP_ID_MISMATCH
+from .signed_tokens import AccessTokenSigner, RevocationFilter
+
+
+MESSAGES = {
+    ERR_ACCESS_INVALID: "access token invalid",
+    ERR_ACCESS_EXPIRED: "access token expired",
+    ERR_APP_ID_MISMATCH: "app id mismatch",
+}
+
+
+@dataclass
+class ValidationResult:
+    guid: str
+    app_id: str
+    expires_at: datetime
+
+
+def evaluate_signed(
+    signer: AccessTokenSigner,
+    revocations: Optional[RevocationFilter],
+    access_token: str,
+    app_id: str,
+    now: datetime,
+) -> Union[ValidationResult, str]:
+    """签名 token：本地验签 + 查吊销过滤器，不访问会话存储。"""
+
+    claims = signer.decode(access_token)
+    if claims is None:
+        return ERR_ACCESS_INVALID
+    if revocations is not None and revocations.is_revoked(access_token):
+        return ERR_ACCESS_INVALID
+    if claims.expires_at <= now:
+        return ERR_ACCESS_EXPIRED
+    if claims.app_id != app_id:
+        return ERR_APP_ID_MISMATCH
+    return ValidationResult(guid=claims.guid, app_id=claims.app_id, expires_at=claims.expires_at)
+
+
+def evaluate_lookup(found, app_id: str, now: datetime) -> Union[ValidationResult, str]:
+    """不透明 token：`found` 为存储反查结果 (session, app_id) 或 None。"""
+
+    if found is None:
+        return ERR_ACCESS_INVALID
+    found_session, found_app_id = found
+
+    app_session = found_session.apps[found_app_id]
+    if app_session.access_token_expires_at <= now:
+        return ERR_ACCESS_EXPIRED
+
+    if found_app_id != app_id:
+        return ERR_APP_ID_MISMATCH
+
+    return ValidationResult(guid=found_session.guid, app_id=found_app_id, expires_at=app_session.access_token_expires_at)
+
+
+__all__ = ["MESSAGES", "ValidationResult", "evaluate_lookup", "evaluate_signed"]
@@ -1,52 +1,71 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Sequence, Union
 
-from .domain import (
-    AuthError,
-    ERR_ACCESS_EXPIRED,
-    ERR_ACCESS_INVALID,
-    ERR_APP_ID_MISMATCH,
-    InMemorySessionStore,
-    now_utc,
-)
+from .domain import AuthError, ERR_ACCESS_INVALID, InMemorySessionStore, now_utc
+from .signed_tokens import AccessTokenSigner, RevocationFilter, is_signed_token
+from .token_rules import MESSAGES, ValidationResult, evaluate_lookup, evaluate_signed
 
 
-@dataclass
-class ValidationResult:
-    guid: str
-    app_id: str
-    expires_at: datetime
+class TokenValidator:
+    """Access Token 校验。
 
+    配置 `signer` 后，签名 token（`S.` 前缀）在本地验签、查吊销过滤器，不访问会话存储；
+    不透明 token 仍走存储反查。下游服务可以只传 signer/revocations、不传存储。
+    """
 
-class TokenValidator:
-    def __init__(self, session_store: InMemorySessionStore) -> None:
+    def __init__(
+        self,
+        session_store: Optional[InMemorySessionStore],
+        *,
+        signer: Optional[AccessTokenSigner] = None,
+        revocations: Optional[RevocationFilter] = None,
+    ) -> None:
         self._sessions = session_store
+        self._signer = signer
+        self._revocations = revocations
 
     def validate_access_token(self, access_token: str, app_id: str, now: Optional[datetime] = None) -> ValidationResult:
         now = now or now_utc()
-        found_session = None
-        found_app_id = None
-
-        for guid, session in self._sessions.items():
-            for aid, app_session in session.apps.items():
-                if app_session.access_token == access_token:
-                    found_session = session
-                    found_app_id = aid
-                    break
-            if found_session is not None:
-                break
+        if self._signer is not None and is_signed_token(access_token):
+            outcome = evaluate_signed(self._signer, self._revocations, access_token, app_id, now)
+        elif self._sessions is None:
+            outcome = ERR_ACCESS_INVALID
+        else:
+            outcome = evaluate_lookup(self._sessions.find_by_access_token(access_token), app_id, now)
+        if isinstance(outcome, str):
+            raise AuthError(outcome, MESSAGES[outcome])
+        return outcome
 
-        if found_session is None or found_app_id is None:
-            raise AuthError(ERR_ACCESS_INVALID, "access token invalid")
+    def validate_many(
+        self,
+        access_tokens: Sequence[str],
+        app_id: str,
+        now: Optional[datetime] = None,
+    ) -> list[Union[ValidationResult, str]]:
+        """批量校验，按输入顺序逐个返回 ValidationResult 或错误码（不抛异常）。
 
-        app_session = found_session.apps[found_app_id]
-        if app_session.access_token_expires_at <= now:
-            raise AuthError(ERR_ACCESS_EXPIRED, "access token expired")
+        时钟只读一次；重复 token 只查一次；存储实现了 find_many_by_access_token 时
+        （SQLite/Redis）整批一次查询，否则逐个反查。
+        """
 
-        if found_app_id != app_id:
-            raise AuthError(ERR_APP_ID_MISMATCH, "app id mismatch")
-
-        return ValidationResult(guid=found_session.guid, app_id=found_app_id, expires_at=app_session.access_token_expires_at)
+        now = now or now_utc()
+        unique = list(dict.fromkeys(access_tokens))
+        outcomes: dict[str, Union[ValidationResult, str]] = {}
+        if self._signer is not None:
+            for token in unique:
+                if is_signed_token(token):
+                    outcomes[token] = evaluate_signed(self._signer, self._revocations, token, app_id, now)
+            unique = [token for token in unique if token not in outcomes]
+        if self._sessions is None:
+            found = [None] * len(unique)
+        else:
+            find_many = getattr(self._sessions, "find_many_by_access_token", None)
+            if find_many is not None:
+                found = find_many(unique) if unique else []
+            else:
+                found = [self._sessions.find_by_access_token(token) for token in unique]
+        for token, f in zip(unique, found):
+            outcomes[token] = evaluate_lookup(f, app_id, now)
+        return [outcomes[token] for token in access_tokens]
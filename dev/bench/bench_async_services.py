@@ -0,0 +1,147 @@
+"""异步服务层并发基准：N 个并发客户端对 Redis 会话存储做 刷新 + 校验。
+
+用法：python dev/bench/bench_async_services.py [--sessions 2000] [--ops 20000]
+                                             [--concurrency 1000] [--connections 16]
+
+两种模式都是闭环压测：`--concurrency` 个客户端各自串行发请求，共享 `--connections` 条 RESP 连接。
+
+- threads：同步 TokenService/TokenValidator，每个客户端一个线程（线程在存储往返期间阻塞）；
+- asyncio：AsyncTokenService/AsyncTokenValidator，每个客户端一个协程，单线程事件循环。
+
+存储为进程内 RESP 替身服务器（与被测代码同进程，会分走部分 CPU）。输出 ops/s、p99 延迟
+（含等待连接的时间，不设超时）与压测期间进程的峰值线程数。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.async_services import AsyncTokenService, AsyncTokenValidator  # type: ignore  # noqa: E402
+from backend.domain import AppSession, Session, calc_access_expires, calc_refresh_expires, now_utc  # type: ignore  # noqa: E402
+from backend.redis_store import AsyncRedisSessionStore, RedisSessionStore  # type: ignore  # noqa: E402
+from backend.resp import AsyncRespClient, RespClient  # type: ignore  # noqa: E402
+from backend.resp_standin import RespStandInServer  # type: ignore  # noqa: E402
+from backend.services import TokenService  # type: ignore  # noqa: E402
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+def _seed(store: RedisSessionStore, n: int) -> list[Session]:
+    now = now_utc()
+    sessions = []
+    for i in range(n):
+        session = Session(
+            guid=f"G{i:010d}",
+            refresh_token=f"R.{i:032x}",
+            refresh_token_expires_at=calc_refresh_expires(now),
+            apps={"jiuweihu": AppSession(access_token=f"A.{i:032x}", access_token_expires_at=calc_access_expires(now), last_active_at=now)},
+        )
+        store.put(session)
+        sessions.append(session)
+    return sessions
+
+
+def _plan(sessions: list[Session], ops: int) -> list[tuple[str, Session]]:
+    rnd = random.Random(5)
+    # 校验：刷新 ≈ 9:1，接近线上比例。
+    return [("refresh" if rnd.random() < 0.1 else "verify", rnd.choice(sessions)) for _ in range(ops)]
+
+
+def _report(name: str, elapsed: float, latencies: list[float], threads: int) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:>8}  {len(latencies) / elapsed:>10.0f}  {p99:>9.2f}  {threads:>8}")
+
+
+def run_threads(address, sessions: list[Session], plan, concurrency: int, connections: int) -> None:
+    client = RespClient(*address, max_connections=connections, timeout=None)
+    store = RedisSessionStore(client)
+    tokens = TokenService(store)
+    validator = TokenValidator(store)
+
+    latencies: list[float] = []
+    queue = iter(plan)
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                item = next(queue, None)
+            if item is None:
+                return
+            op, session = item
+            start = time.perf_counter()
+            if op == "refresh":
+                tokens.refresh_access_token(session.guid, session.refresh_token, "youlishe")
+            else:
+                validator.validate_access_token(session.apps["jiuweihu"].access_token, "jiuweihu")
+            latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    peak_threads = threading.active_count()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    client.close()
+    _report("threads", elapsed, latencies, peak_threads)
+
+
+async def run_asyncio(address, sessions: list[Session], plan, concurrency: int, connections: int) -> None:
+    client = AsyncRespClient(*address, max_connections=connections, timeout=None)
+    store = AsyncRedisSessionStore(client)
+    tokens = AsyncTokenService(store)
+    validator = AsyncTokenValidator(store)
+    latencies: list[float] = []
+    queue = iter(plan)
+
+    async def worker() -> None:
+        for op, session in queue:
+            start = time.perf_counter()
+            if op == "refresh":
+                await tokens.refresh_access_token(session.guid, session.refresh_token, "youlishe")
+            else:
+                await validator.validate_access_token(session.apps["jiuweihu"].access_token, "jiuweihu")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+    _report("asyncio", elapsed, latencies, threading.active_count())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--ops", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=16)
+    args = parser.parse_args()
+
+    with RespStandInServer() as server:
+        seed_client = RespClient(*server.address)
+        sessions = _seed(RedisSessionStore(seed_client), args.sessions)
+        seed_client.close()
+        plan = _plan(sessions, args.ops)
+
+        print(f"concurrency={args.concurrency} connections={args.connections} ops={args.ops}")
+        print(f"{'mode':>8}  {'ops/s':>10}  {'p99 ms':>9}  {'threads':>8}")
+        run_threads(server.address, sessions, plan, args.concurrency, args.connections)
+        asyncio.run(run_asyncio(server.address, sessions, plan, args.concurrency, args.connections))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+"""HTTP 接口基准：子进程里跑 `backend.http_api`（内存存储），本进程用 asyncio 客户端压 verify-token。
+
+用法：python dev/bench/bench_http_server.py [--users 1000] [--requests 20000]
+                                           [--connections 64] [--pipeline 8] [--workers 256]
+
+服务端与压测客户端分属两个进程，各占一个核。对比三种客户端行为（都是闭环）：
+
+- close：每个请求新建连接并带 `Connection: close`（旧客户端的做法）；
+- keep-alive：`--connections` 条长连接，每条一次一个请求；
+- pipeline：同样的长连接，每条连续写 `--pipeline` 个请求再按序读回。
+
+输出 req/s 与单请求 p99 延迟（pipeline 模式下为整批往返时间）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.http_api import build_api  # type: ignore  # noqa: E402
+from backend.http_server import HttpServer  # type: ignore  # noqa: E402
+
+
+def _serve(conn, users: int, workers: int) -> None:
+    async def run() -> None:
+        codes: dict[str, str] = {}
+
+        async def capture(phone: str, code: str) -> None:
+            codes[phone] = code
+
+        api = build_api("memory", code_sender=capture, rate_limit=False)
+        tokens = []
+        for i in range(users):
+            phone = f"139{i:08d}"
+            await api._codes.send_code(phone)
+            tokens.append((await api._auth.login_with_phone(phone, codes[phone], "jiuweihu")).access_token)
+
+        server = await HttpServer(api, port=0, max_workers=workers, max_pipeline=64).start()
+        conn.send((server.address, tokens))
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        await server.shutdown(1.0)
+        await api.aclose()
+
+    asyncio.run(run())
+
+
+def _request(token: str, close: bool) -> bytes:
+    body = json.dumps({"access_token": token, "app_id": "jiuweihu"}).encode()
+    head = (
+        "POST /api/passport/verify-token HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n" + ("Connection: close\r\n" if close else "") + "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line[:15].lower() == b"content-length:":
+            length = int(line[15:])
+    await reader.readexactly(length)
+    return int(head[9:12])
+
+
+async def run_close(address, payloads: list[bytes], connections: int) -> tuple[float, list[float]]:
+    queue = iter(payloads)
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        for payload in queue:
+            start = time.perf_counter()
+            reader, writer = await asyncio.open_connection(*address)
+            writer.write(payload)
+            assert await _read_response(reader) == 200
+            writer.close()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    return time.perf_counter() - start, latencies
+
+
+async def run_keep_alive(address, payloads: list[bytes], connections: int, depth: int) -> tuple[float, list[float]]:
+    batches = iter([b"".join(payloads[i : i + depth]) for i in range(0, len(payloads), depth)])
+    latencies: list[float] = []
+
+    async def worker() -> None:
+        reader, writer = await asyncio.open_connection(*address)
+        for batch in batches:
+            count = batch.count(b"POST ")
+            start = time.perf_counter()
+            writer.write(batch)
+            for _ in range(count):
+                assert await _read_response(reader) == 200
+            elapsed = time.perf_counter() - start
+            latencies.extend([elapsed] * count)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    return time.perf_counter() - start, latencies
+
+
+def _report(name: str, elapsed: float, latencies: list[float]) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:>10}  {len(latencies) / elapsed:>10.0f}  {p99:>9.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--pipeline", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=256)
+    args = parser.parse_args()
+
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(target=_serve, args=(child, args.users, args.workers), daemon=True)
+    proc.start()
+    address, tokens = parent.recv()
+
+    rnd = random.Random(13)
+    picks = [rnd.choice(tokens) for _ in range(args.requests)]
+
+    print(f"requests={args.requests} connections={args.connections} pipeline={args.pipeline}")
+    print(f"{'mode':>10}  {'req/s':>10}  {'p99 ms':>9}")
+    _report("close", *asyncio.run(run_close(address, [_request(t, True) for t in picks], args.connections)))
+    keep = [_request(t, False) for t in picks]
+    _report("keep-alive", *asyncio.run(run_keep_alive(address, keep, args.connections, 1)))
+    _report("pipeline", *asyncio.run(run_keep_alive(address, keep, args.connections, args.pipeline)))
+
+    parent.send("stop")
+    proc.join(5)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
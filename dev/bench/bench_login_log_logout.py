@@ -0,0 +1,71 @@
+"""record_logout 回放基准：未登出索引 vs 旧的全表倒序扫描。
+
+用法：python dev/bench/bench_login_log_logout.py [--events 10000000] [--users 100000] [--baseline-events 20000]
+
+回放 events 条登录/登出交替事件（约一半为登出），输出平均每个事件耗时（µs）。
+旧实现每次登出都要拷贝并倒序扫描全部日志（O(总日志数)），因此只在 baseline-events 规模上运行作对照。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import InMemoryLoginLogRepo  # type: ignore  # noqa: E402
+from backend.services import LoginLogService  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class _ScanLogoutService(LoginLogService):
+    """复刻旧版 record_logout（all() 拷贝 + 倒序扫描），仅用于对照。"""
+
+    def record_logout(self, guid, phone=None, *, channel="pc", ip=None, when=None):  # type: ignore[override]
+        for log in reversed(self._repo.all()):
+            if log.guid != guid or (phone is not None and log.phone != phone) or log.logout_at is not None:
+                continue
+            self._repo.mark_logout(log, when, channel=channel, ip=ip)
+            break
+
+
+def replay(service: LoginLogService, events: int, users: int) -> float:
+    rnd = random.Random(5)
+    base = datetime(2025, 1, 1, tzinfo=UTC)
+    start = time.perf_counter()
+    for i in range(events):
+        u = rnd.randrange(users)
+        when = base + timedelta(seconds=i)
+        if i % 2 == 0:
+            service.record_login(f"G{u}", f"138{u:08d}", True, when=when)
+        else:
+            service.record_logout(f"G{u}", f"138{u:08d}", when=when)
+    return (time.perf_counter() - start) / events * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--baseline-events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'impl':>12}  {'events':>10}  {'µs/event':>9}")
+    scan = replay(_ScanLogoutService(InMemoryLoginLogRepo()), args.baseline_events, args.users)
+    print(f"{'scan':>12}  {args.baseline_events:>10}  {scan:>9.2f}")
+    for n in sorted({args.baseline_events, args.events}):
+        indexed = replay(LoginLogService(InMemoryLoginLogRepo()), n, args.users)
+        print(f"{'open-index':>12}  {n:>10}  {indexed:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""登录日志查询基准：InMemoryLoginLogRepo vs TimeIndexedLoginLogRepo。
+
+用法：python dev/bench/bench_login_log_query.py [--rows 1000000] [--queries 200]
+
+预填 rows 条登录记录（按时间递增写入），执行手机号/时间窗/渠道组合查询，输出平均耗时（ms）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import InMemoryLoginLogRepo, LoginLog, TimeIndexedLoginLogRepo  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+CHANNELS = ("pc", "mobile", "web")
+
+
+def _populate(repo, rows: int, phones: int, base: datetime) -> None:
+    rnd = random.Random(1)
+    for i in range(rows):
+        p = rnd.randrange(phones)
+        repo.append(LoginLog(guid=f"G{p}", phone=f"138{p:08d}", login_at=base + timedelta(seconds=i), channel=rnd.choice(CHANNELS)))
+
+
+def run(repo, queries: list[dict]) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        repo.query(**q)
+    return (time.perf_counter() - start) / len(queries) * 1e3
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--phones", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    base = datetime(2025, 1, 1, tzinfo=UTC)
+    rnd = random.Random(2)
+    queries = []
+    for _ in range(args.queries):
+        start = base + timedelta(seconds=rnd.randrange(args.rows))
+        queries.append(
+            {
+                "phone": f"138{rnd.randrange(args.phones):08d}" if rnd.random() < 0.5 else None,
+                "channel": rnd.choice(CHANNELS) if rnd.random() < 0.3 else None,
+                "start": start,
+                "end": start + timedelta(minutes=30),
+            }
+        )
+
+    print(f"{'repo':>24}  {'ms/query':>9}")
+    for name, factory in (("InMemoryLoginLogRepo", InMemoryLoginLogRepo), ("TimeIndexedLoginLogRepo", TimeIndexedLoginLogRepo)):
+        repo = factory()
+        _populate(repo, args.rows, args.phones, base)
+        print(f"{name:>24}  {run(repo, queries):>9.3f}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,174 @@
+"""预派生多进程模式的扩展性基准：worker 数从 1 增加到 N 时 登录 + 刷新 + 校验 的吞吐。
+
+用法：python dev/bench/bench_prefork.py [--workers 1,2,4] [--store redis|sqlite] [--users 2000]
+                                       [--verifies 3] [--clients 2] [--connections 32]
+
+每个用户走一遍完整流程：login-by-phone → refresh-token → verify-token × `--verifies`。
+验证码在压测前直接写入共享存储（不经 send-code，避免频控与短信回调）。
+
+- redis：会话与验证码在独立进程的 RESP 替身服务器中，用户与登录记录在临时 SQLite 文件；
+- sqlite：全部在临时 SQLite 文件（WAL），worker 之间靠文件锁串行写入。
+
+压测客户端是 `--clients` 个独立进程，各持 `--connections` 条 keep-alive 长连接。客户端、存储与
+worker 共用本机 CPU，worker 数超过空闲核数后吞吐不会再涨；输出 flows/s、req/s 与相对 1 个
+worker 的加速比。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import now_utc  # type: ignore  # noqa: E402
+from backend.http_api import build_api  # type: ignore  # noqa: E402
+from backend.prefork import PreforkServer  # type: ignore  # noqa: E402
+from backend.redis_store import RedisVerificationCodeStore  # type: ignore  # noqa: E402
+from backend.resp import RespClient  # type: ignore  # noqa: E402
+from backend.resp_standin import RespStandInServer  # type: ignore  # noqa: E402
+from backend.services import CODE_TTL  # type: ignore  # noqa: E402
+from backend.sqlite_repos import SqliteDatabase, SqliteVerificationCodeStore  # type: ignore  # noqa: E402
+
+CODE = "246810"
+_ctx = multiprocessing.get_context("fork")
+
+
+def _run_standin(conn) -> None:
+    with RespStandInServer() as server:
+        conn.send(server.address)
+        conn.recv()
+
+
+def _seed_codes(store, phones: list[str]) -> None:
+    expires = now_utc() + CODE_TTL
+    for phone in phones:
+        store.save(phone, CODE, expires)
+
+
+def _request(path: str, body: dict) -> bytes:
+    data = json.dumps(body).encode()
+    head = f"POST {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n"
+    return head.encode("latin-1") + data
+
+
+async def _call(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str, body: dict) -> dict:
+    writer.write(_request(path, body))
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line[:15].lower() == b"content-length:":
+            length = int(line[15:])
+    payload = json.loads(await reader.readexactly(length))
+    if head[9:12] != b"200":
+        raise RuntimeError(f"{path}: {payload}")
+    return payload
+
+
+def _client(conn, address, phones: list[str], connections: int, verifies: int) -> None:
+    async def run() -> int:
+        queue = iter(phones)
+        requests = 0
+
+        async def worker() -> None:
+            nonlocal requests
+            reader, writer = await asyncio.open_connection(*address)
+            for phone in queue:
+                login = await _call(reader, writer, "/api/passport/login-by-phone", {"phone": phone, "code": CODE, "app_id": "jiuweihu"})
+                refreshed = await _call(
+                    reader,
+                    writer,
+                    "/api/passport/refresh-token",
+                    {"guid": login["guid"], "refresh_token": login["refresh_token"], "app_id": "jiuweihu"},
+                )
+                for _ in range(verifies):
+                    await _call(reader, writer, "/api/passport/verify-token", {"access_token": refreshed["access_token"], "app_id": "jiuweihu"})
+                requests += 2 + verifies
+            writer.close()
+
+        await asyncio.gather(*(worker() for _ in range(connections)))
+        return requests
+
+    conn.recv()
+    conn.send(asyncio.run(run()))
+
+
+def run_once(args, workers: int) -> tuple[float, int]:
+    phones = [f"137{workers:02d}{i:06d}" for i in range(args.users)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "passport.db")
+        db = SqliteDatabase(path)
+        standin = None
+        if args.store == "redis":
+            parent, child = _ctx.Pipe()
+            standin = (_ctx.Process(target=_run_standin, args=(child,), daemon=True), parent)
+            standin[0].start()
+            redis_address = parent.recv()
+            seed_client = RespClient(*redis_address)
+            _seed_codes(RedisVerificationCodeStore(seed_client), phones)
+            seed_client.close()
+        else:
+            redis_address = None
+            _seed_codes(SqliteVerificationCodeStore(db), phones)
+        db.close()
+
+        factory = functools.partial(build_api, args.store, sqlite_path=path, redis_address=redis_address, rate_limit=False)
+        with PreforkServer(factory, workers=workers, port=0, grace=2.0) as server:
+            clients = []
+            for i in range(args.clients):
+                parent, child = _ctx.Pipe()
+                proc = _ctx.Process(
+                    target=_client,
+                    args=(child, server.address, phones[i :: args.clients], args.connections, args.verifies),
+                    daemon=True,
+                )
+                proc.start()
+                clients.append((proc, parent))
+            time.sleep(0.5)  # 等 worker 装配完成
+            start = time.perf_counter()
+            for _, parent in clients:
+                parent.send("go")
+            requests = sum(parent.recv() for _, parent in clients)
+            elapsed = time.perf_counter() - start
+            for proc, _ in clients:
+                proc.join()
+
+        if standin is not None:
+            standin[1].send("stop")
+            standin[0].join(5)
+    return elapsed, requests
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_workers = ",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= max(1, os.cpu_count() or 1)) or "1"
+    parser.add_argument("--workers", default=default_workers, help="逗号分隔的 worker 数")
+    parser.add_argument("--store", choices=["redis", "sqlite"], default="redis")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--verifies", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--connections", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"store={args.store} users={args.users} verifies={args.verifies} cpus={os.cpu_count()}")
+    print(f"{'workers':>7}  {'flows/s':>9}  {'req/s':>9}  {'speedup':>7}")
+    baseline = None
+    for workers in (int(n) for n in args.workers.split(",")):
+        elapsed, requests = run_once(args, workers)
+        flows = args.users / elapsed
+        baseline = baseline or flows
+        print(f"{workers:>7}  {flows:>9.0f}  {requests / elapsed:>9.0f}  {flows / baseline:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
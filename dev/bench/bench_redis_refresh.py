@@ -0,0 +1,105 @@
+"""Redis 会话存储：管道 vs 逐条发送的刷新吞吐基准。
+
+用法：python dev/bench/bench_redis_refresh.py [--sessions 2000] [--apps 4] [--refreshes 20000]
+                                            [--threads 8] [--host H --port P]
+
+每个会话挂 `--apps` 个 app 子会话，因此一次 put 需写入 1 + apps 个键。
+`TokenService.refresh_access_token` 在多线程下并发执行，分别使用 pipelined=True / False 的
+RedisSessionStore，输出 refresh/s 与平均每次刷新的往返数。未指定 --port 时启动进程内
+RESP 替身服务器；也可指向真实 Redis 对比。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import AppSession, Session, calc_access_expires, calc_refresh_expires, now_utc  # type: ignore  # noqa: E402
+from backend.redis_store import RedisSessionStore  # type: ignore  # noqa: E402
+from backend.resp import RespClient  # type: ignore  # noqa: E402
+from backend.resp_standin import RespStandInServer  # type: ignore  # noqa: E402
+from backend.services import TokenService  # type: ignore  # noqa: E402
+
+
+APP_IDS = ["jiuweihu", "youlishe", "mall", "forum", "video", "music", "news", "games"]
+
+
+def _seed(store: RedisSessionStore, n: int, apps: int) -> list[Session]:
+    now = now_utc()
+    sessions = []
+    for i in range(n):
+        session = Session(
+            guid=f"G{i:010d}",
+            refresh_token=f"R.{i:032x}",
+            refresh_token_expires_at=calc_refresh_expires(now),
+            apps={
+                app_id: AppSession(access_token=f"A.{i:028x}.{j}", access_token_expires_at=calc_access_expires(now), last_active_at=now)
+                for j, app_id in enumerate(APP_IDS[:apps])
+            },
+        )
+        store.put(session)
+        sessions.append(session)
+    return sessions
+
+
+def run(name: str, client: RespClient, args, pipelined: bool) -> None:
+    client.execute("FLUSHALL")
+    store = RedisSessionStore(client, pipelined=pipelined)
+    sessions = _seed(store, args.sessions, args.apps)
+    service = TokenService(store)
+    per_thread = args.refreshes // args.threads
+    app_ids = APP_IDS[: args.apps]
+
+    def worker(t: int) -> None:
+        for i in range(per_thread):
+            session = sessions[(t * per_thread + i) % len(sessions)]
+            service.refresh_access_token(session.guid, session.refresh_token, app_ids[i % len(app_ids)])
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    total = per_thread * args.threads
+    # 每次刷新：get 1 次往返；put 管道 1 次，逐条 1 + apps 次。
+    round_trips = 1 + (1 if pipelined else 1 + args.apps)
+    print(f"{name:>12}  {total / elapsed:>12.0f}  {round_trips:>12}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2_000)
+    parser.add_argument("--apps", type=int, default=4, choices=range(1, len(APP_IDS) + 1))
+    parser.add_argument("--refreshes", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    server = None
+    if args.port is None:
+        server = RespStandInServer(args.host).start()
+        args.port = server.address[1]
+    client = RespClient(args.host, args.port, max_connections=args.threads)
+    try:
+        print(f"{'mode':>12}  {'refresh/s':>12}  {'RTT/refresh':>12}")
+        run("unpipelined", client, args, pipelined=False)
+        run("pipelined", client, args, pipelined=True)
+    finally:
+        client.close()
+        if server is not None:
+            server.stop()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""同机多客户端刷新协调：每个刷新周期打到后端的 refresh 次数。
+
+用法：python dev/bench/bench_refresh_coordination.py [--clients 2] [--cycles 20] [--jitter-ms 50]
+
+启动 `--clients` 个独立进程（各自的 AuthController / HttpClient / SessionFileManager），共用同一个
+session.dat，对本机 stub 后端执行 `--cycles` 轮刷新。每轮所有进程在屏障处对齐后各自随机等待
+0~`--jitter-ms` 毫秒再刷新，模拟各自的 RefreshScheduler 在同一窗口内触发。
+
+分别在关闭 / 开启跨进程协调（`AuthController(coordinate_refresh=...)`）下运行，输出后端收到的
+refresh 总数与每轮平均值：无协调时约等于客户端数，有协调时约为 1。
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from shell.session_file_manager import SessionFileManager  # type: ignore  # noqa: E402
+from shell.stub_backend import StubHandler, ThreadingHTTPServer  # type: ignore  # noqa: E402
+
+
+class _CountingHandler(StubHandler):
+    refreshes = 0
+
+    def _handle_refresh(self):
+        type(self).refreshes += 1
+        return super()._handle_refresh()
+
+
+def _client(base_url: str, session_path: str, app_id: str, cycles: int, jitter: float, coordinate: bool, barrier) -> None:
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from shell.auth_controller import AuthController
+    from shell.http_client import HttpClient
+    from shell.logout_handler import LogoutHandler
+    from shell.refresh_scheduler import RefreshScheduler
+
+    file_mgr = SessionFileManager(path=session_path)
+    http = HttpClient(base_url, app_id, on_logout=lambda: None, on_broadcast=lambda s: None)
+    ctrl = AuthController(
+        http=http,
+        file_mgr=file_mgr,
+        refresh_scheduler=RefreshScheduler(on_refresh=lambda: True),
+        logout_handler=LogoutHandler(api_logout=lambda: None, delete_session_file=lambda: None, broadcast_status=lambda s: None),
+        broadcast_status=lambda s: None,
+        coordinate_refresh=coordinate,
+    )
+    for _ in range(cycles):
+        barrier.wait()
+        time.sleep(random.uniform(0, jitter))
+        session = file_mgr.read()
+        ctrl.refresh(session["guid"], session["refresh_token"])
+    http.close()
+
+
+def _run(base_url: str, clients: int, cycles: int, jitter: float, coordinate: bool) -> int:
+    _CountingHandler.refreshes = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        session_path = os.path.join(tmp, "session.dat")
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        SessionFileManager(path=session_path).write(
+            {"guid": "G-STUB", "phone": "", "user_type": "user", "refresh_token": "R-STUB", "created_at": now, "expires_at": now}
+        )
+        barrier = mp.Barrier(clients)
+        procs = [
+            mp.Process(target=_client, args=(base_url, session_path, f"app{i}", cycles, jitter, coordinate, barrier))
+            for i in range(clients)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+    return _CountingHandler.refreshes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"{'mode':>14}  {'clients':>7}  {'cycles':>6}  {'refreshes':>9}  {'per cycle':>9}")
+    for coordinate in (False, True):
+        total = _run(base_url, args.clients, args.cycles, args.jitter_ms / 1000, coordinate)
+        label = "coordinated" if coordinate else "uncoordinated"
+        print(f"{label:>14}  {args.clients:>7}  {args.cycles:>6}  {total:>9}  {total / args.cycles:>9.2f}")
+    server.shutdown()
+    server.server_close()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
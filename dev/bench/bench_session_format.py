@@ -0,0 +1,93 @@
+"""session.dat 格式对比：旧 JSON vs 紧凑二进制（`shell.session_codec`）的冷读取延迟与文件大小。
+
+用法：python dev/bench/bench_session_format.py [--iterations 5000]
+
+每次读取前清空 `SessionFileManager` 的解析缓存，测的是文件变化后（或新进程启动时）的完整读取：
+open + read + 解码 + 校验。四种组合：
+
+- json：明文 JSON（json.loads + 两次 ISO8601 解析），明文文件的默认格式。
+- json+b64：旧 DPAPI 路径的形态——DPAPI 输出再 base64 成字符串落盘；非 Windows 上 DPAPI 本身是
+  直通，这里用 base64 编解码模拟额外的文本包装开销。
+- binary：二进制明文（struct 解包，时间为 epoch 微秒）。
+- binary+protect：二进制 + 字节级保护钩子（直通），DPAPI 输出直接落盘，无 base64；给了 `protect` 时的默认格式。
+
+输出 p50 / p99（微秒）与文件字节数。
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from shell import session_file_manager  # type: ignore  # noqa: E402
+from shell.session_file_manager import SessionFileManager  # type: ignore  # noqa: E402
+
+
+def _b64_encode(s: str) -> str:
+    return base64.b64encode(s.encode("utf-8")).decode("ascii")
+
+
+def _b64_decode(s: str) -> str:
+    return base64.b64decode(s.encode("ascii"), validate=True).decode("utf-8")
+
+
+MODES = {
+    "json": dict(),
+    "json+b64": dict(encoder=_b64_encode, decoder=_b64_decode),
+    "binary": dict(file_format="binary"),
+    "binary+protect": dict(protect=bytes, unprotect=bytes),
+}
+
+
+def _measure(managers: dict[str, SessionFileManager], iterations: int) -> dict[str, list[float]]:
+    # 各格式交替读取，避免机器负载漂移只落在某一种格式上
+    samples: dict[str, list[float]] = {name: [] for name in managers}
+    for _ in range(iterations):
+        for name, fm in managers.items():
+            session_file_manager._parsed_cache.clear()
+            start = time.perf_counter()
+            fm.read()
+            samples[name].append(time.perf_counter() - start)
+    for values in samples.values():
+        values.sort()
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    payload = {
+        "guid": "G-" + "0" * 32,
+        "phone": "13800138000",
+        "user_type": "user",
+        "refresh_token": "R-" + "x" * 64,
+        "created_at": now.isoformat(),
+        "expires_at": (now + timedelta(days=2)).isoformat(),
+    }
+
+    print(f"{'format':>16}  {'p50 us':>9}  {'p99 us':>9}  {'bytes':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        managers = {name: SessionFileManager(path=os.path.join(tmp, f"{name}.dat"), **kwargs) for name, kwargs in MODES.items()}
+        for fm in managers.values():
+            fm.write(payload)
+        for name, samples in _measure(managers, args.iterations).items():
+            p50 = samples[len(samples) // 2] * 1e6
+            p99 = samples[int(len(samples) * 0.99) - 1] * 1e6
+            print(f"{name:>16}  {p50:>9.1f}  {p99:>9.1f}  {os.path.getsize(managers[name].path):>6}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""SessionFileManager.read() 延迟：解析缓存命中 vs 每次完整读取/解密/解析/校验。
+
+用法：python dev/bench/bench_session_read.py [--iterations 2000] [--dpapi]
+
+- startup：`ShellApp.startup_flow` 的读取模式——同一文件连读两次（startup_flow 一次、
+  SsoStartupHandler.handle_startup 一次）。uncached 在每次读取前清空缓存，等价于旧实现；
+  cached 只在每轮开始时清空，第二次读取命中缓存。
+- repeat：文件未变时的重复读取（GUI 监听/自动登录路径），uncached vs cached。
+
+`--dpapi` 使用 `shell.dpapi_adapter` 的 protect/unprotect 作为 encoder/decoder（仅 Windows 上有实际
+加解密开销，其他平台为直通）。输出 p50 / p99（微秒）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from shell import session_file_manager  # type: ignore  # noqa: E402
+from shell.session_file_manager import SessionFileManager  # type: ignore  # noqa: E402
+
+
+def _measure(fm: SessionFileManager, iterations: int, reads: int, clear_every_read: bool) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        session_file_manager._parsed_cache.clear()
+        start = time.perf_counter()
+        for _ in range(reads):
+            if clear_every_read:
+                session_file_manager._parsed_cache.clear()
+            fm.read()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples
+
+
+def _measure_repeat(fm: SessionFileManager, iterations: int, clear_every_read: bool) -> list[float]:
+    fm.read()
+    samples = []
+    for _ in range(iterations):
+        if clear_every_read:
+            session_file_manager._parsed_cache.clear()
+        start = time.perf_counter()
+        fm.read()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples
+
+
+def _row(label: str, samples: list[float]) -> None:
+    p50 = samples[len(samples) // 2] * 1e6
+    p99 = samples[int(len(samples) * 0.99) - 1] * 1e6
+    print(f"{label:>20}  {p50:>9.1f}  {p99:>9.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--dpapi", action="store_true")
+    args = parser.parse_args()
+
+    encoder = decoder = None
+    if args.dpapi:
+        from shell.dpapi_adapter import protect, unprotect  # type: ignore
+
+        encoder, decoder = protect, unprotect
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fm = SessionFileManager(path=os.path.join(tmp, "session.dat"), encoder=encoder, decoder=decoder)
+        now = datetime.now(timezone.utc)
+        fm.write(
+            {
+                "guid": "G-" + "0" * 32,
+                "phone": "13800138000",
+                "user_type": "user",
+                "refresh_token": "R-" + "x" * 64,
+                "created_at": now.isoformat(),
+                "expires_at": (now + timedelta(days=2)).isoformat(),
+            }
+        )
+
+        print(f"{'mode':>20}  {'p50 us':>9}  {'p99 us':>9}")
+        _row("startup uncached", _measure(fm, args.iterations, 2, True))
+        _row("startup cached", _measure(fm, args.iterations, 2, False))
+        _row("repeat uncached", _measure_repeat(fm, args.iterations, True))
+        _row("repeat cached", _measure_repeat(fm, args.iterations, False))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
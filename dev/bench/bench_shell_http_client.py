@@ -0,0 +1,91 @@
+"""壳层 HttpClient 刷新延迟：keep-alive 连接池 vs 每次 `Connection: close`。
+
+用法：python dev/bench/bench_shell_http_client.py [--requests 500] [--setup-ms 0,30]
+                                                 [--url https://passport.example.com/api]
+
+默认对本机 stub 后端（HTTP/1.1）连续调用 refresh_token。回环上 TCP 建连几乎免费，
+`--setup-ms` 在 stub 每条新连接上额外等待若干毫秒，模拟云端的 TCP + TLS 握手往返
+（如 RTT 10ms、TLS 1.2 约 3 个 RTT ≈ 30ms）。给出 `--url` 时改为请求真实后端
+（需要有效的 guid/refresh_token，见 --guid/--refresh-token），此时忽略 `--setup-ms`。
+
+输出每种模式的 p50 / p99 延迟（毫秒）与新建连接数（仅 stub）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from shell.http_client import HttpClient  # type: ignore  # noqa: E402
+from shell.stub_backend import StubHandler, ThreadingHTTPServer  # type: ignore  # noqa: E402
+
+
+class _SetupDelayHandler(StubHandler):
+    setup_delay = 0.0
+    connections = 0
+
+    def setup(self) -> None:
+        type(self).connections += 1
+        time.sleep(self.setup_delay)
+        super().setup()
+
+
+def _measure(base_url: str, keep_alive: bool, n: int, guid: str, refresh_token: str) -> list[float]:
+    client = HttpClient(base_url, "jiuweihu", on_logout=lambda: None, on_broadcast=lambda s: None, keep_alive=keep_alive)
+    client.refresh_token(guid, refresh_token)  # 预热
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        client.refresh_token(guid, refresh_token)
+        latencies.append(time.perf_counter() - start)
+    client.close()
+    latencies.sort()
+    return latencies
+
+
+def _row(label: str, latencies: list[float], connections: str) -> None:
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{label:>18}  {p50:>8.2f}  {p99:>8.2f}  {connections:>6}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--setup-ms", default="0,30", help="逗号分隔的模拟建连开销（毫秒）")
+    parser.add_argument("--url", default="", help="真实后端基地址（含 /api 前缀）")
+    parser.add_argument("--guid", default="G-STUB")
+    parser.add_argument("--refresh-token", default="R-STUB")
+    args = parser.parse_args()
+
+    print(f"{'mode':>18}  {'p50 ms':>8}  {'p99 ms':>8}  {'conns':>6}")
+    if args.url:
+        for keep_alive in (False, True):
+            latencies = _measure(args.url, keep_alive, args.requests, args.guid, args.refresh_token)
+            _row("keep-alive" if keep_alive else "close", latencies, "-")
+        return 0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SetupDelayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    for setup_ms in (float(x) for x in args.setup_ms.split(",")):
+        _SetupDelayHandler.setup_delay = setup_ms / 1000
+        for keep_alive in (False, True):
+            _SetupDelayHandler.connections = 0
+            latencies = _measure(base_url, keep_alive, args.requests, args.guid, args.refresh_token)
+            label = f"{'keep-alive' if keep_alive else 'close'} +{setup_ms:g}ms"
+            _row(label, latencies, str(_SetupDelayHandler.connections))
+    server.shutdown()
+    server.server_close()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+"""SQLite 仓储 vs 内存仓储吞吐基准。
+
+用法：python dev/bench/bench_sqlite_repos.py [--users 1000000] [--ops 50000] [--db PATH]
+
+分别测量：批量写入用户（SQLite 侧使用 save_many + 单事务）、按手机号查询用户、
+写入会话（put）以及按 access_token 校验（find_by_access_token），输出 ops/s。
+默认数据库文件建在临时目录中，结束后删除。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    AppSession,
+    InMemorySessionStore,
+    InMemoryUserRepo,
+    Session,
+    User,
+    calc_access_expires,
+    calc_refresh_expires,
+    now_utc,
+)
+from backend.sqlite_repos import SqliteDatabase, SqliteSessionStore, SqliteUserRepo  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+def _rate(n: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def _users(n: int) -> list[User]:
+    created = datetime(2025, 1, 1, tzinfo=UTC)
+    return [User(guid=f"G{i:010d}", phone=f"138{i:08d}", created_at=created) for i in range(n)]
+
+
+def _session(i: int) -> Session:
+    now = now_utc()
+    return Session(
+        guid=f"G{i:010d}",
+        refresh_token=f"R.{i:032x}",
+        refresh_token_expires_at=calc_refresh_expires(now),
+        apps={"jiuweihu": AppSession(access_token=f"A.{i:032x}", access_token_expires_at=calc_access_expires(now), last_active_at=now)},
+    )
+
+
+def run(name: str, users_repo, session_store, n_users: int, ops: int, bulk_insert) -> None:
+    rnd = random.Random(4)
+    users = _users(n_users)
+    insert = _rate(n_users, lambda: bulk_insert(users))
+    phones = [f"138{rnd.randrange(n_users):08d}" for _ in range(ops)]
+    lookup = _rate(ops, lambda: [users_repo.find_by_phone(p) for p in phones])
+    sessions = [_session(i) for i in range(ops)]
+    put = _rate(ops, lambda: [session_store.put(s) for s in sessions])
+    tokens = [f"A.{rnd.randrange(ops):032x}" for _ in range(ops)]
+    verify = _rate(ops, lambda: [session_store.find_by_access_token(t) for t in tokens])
+    print(f"{name:>8}  {insert:>14.0f}  {lookup:>14.0f}  {put:>14.0f}  {verify:>14.0f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=50_000)
+    parser.add_argument("--db", default=None)
+    args = parser.parse_args()
+
+    print(f"{'repo':>8}  {'user insert/s':>14}  {'find_by_phone/s':>14}  {'session put/s':>14}  {'verify/s':>14}")
+
+    memory_users = InMemoryUserRepo()
+    run("memory", memory_users, InMemorySessionStore(), args.users, args.ops, lambda us: [memory_users.save(u) for u in us])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SqliteDatabase(args.db or os.path.join(tmp, "bench.db"))
+        sqlite_users = SqliteUserRepo(db)
+        store = SqliteSessionStore(db)
+        run("sqlite", sqlite_users, store, args.users, args.ops, sqlite_users.save_many)
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+"""会话校验中的时间戳解析：旧写法 vs `shell.timestamp_codec`。
+
+用法：python dev/bench/bench_timestamp_parse.py [--iterations 20000]
+
+对同一份会话调用一次 `LocalSessionValidator.validate` 的耗时（微秒）：
+
+- legacy：旧实现——`fromisoformat(s.replace("Z", "+00:00")).astimezone(UTC)` 得到 datetime 再比较。
+- codec cold：`timestamp_codec` 且每次调用前清空解析缓存（等价于首次见到这份会话）。
+- codec warm：缓存命中（同一份会话被启动/监听/自动登录反复校验的常见情况）。
+
+分别测 canonical `...Z` 形式（后端下发）与 `+00:00` 形式（`isoformat()` 写入），两者都走 UTC 快路径。输出 p50 / p99。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from native.local_session import LocalSessionValidator  # type: ignore  # noqa: E402
+from shell import timestamp_codec  # type: ignore  # noqa: E402
+
+UTC = timezone.utc
+
+
+def _legacy_parse(value: str) -> datetime:
+    s = value.strip()
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    return datetime.fromisoformat(s).astimezone(UTC)
+
+
+def _legacy_validate(struct: dict, now: datetime) -> str:
+    """改造前 LocalSessionValidator.validate / validate_local_session 的时间处理。"""
+
+    if not LocalSessionValidator.REQUIRED_FIELDS.issubset(struct.keys()):
+        return "CORRUPTED"
+    try:
+        created_at = _legacy_parse(struct["created_at"])
+        expires_at = _legacy_parse(struct["expires_at"])
+    except Exception:  # noqa: BLE001
+        return "CORRUPTED"
+    if expires_at < created_at or now > expires_at:
+        return "CORRUPTED"
+    if now - created_at > timedelta(hours=2):
+        return "EXPIRED_LOCAL"
+    return "VALID"
+
+
+def _measure(fn, iterations: int, clear: bool) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        if clear:
+            timestamp_codec._parsed.clear()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples
+
+
+def _row(label: str, samples: list[float]) -> None:
+    p50 = samples[len(samples) // 2] * 1e6
+    p99 = samples[int(len(samples) * 0.99) - 1] * 1e6
+    print(f"{label:>22}  {p50:>9.2f}  {p99:>9.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    now = datetime.now(UTC)
+    validator = LocalSessionValidator(parse_time=timestamp_codec.parse_epoch_us)
+    print(f"{'path':>22}  {'p50 us':>9}  {'p99 us':>9}")
+    for form, fmt in (("Z", lambda dt: dt.isoformat().replace("+00:00", "Z")), ("+00:00", datetime.isoformat)):
+        struct = {
+            "guid": "G",
+            "phone": "13800138000",
+            "refresh_token": "R",
+            "created_at": fmt(now - timedelta(minutes=5)),
+            "expires_at": fmt(now + timedelta(days=2)),
+        }
+        _row(f"legacy {form}", _measure(lambda: _legacy_validate(struct, now), args.iterations, False))
+        _row(f"codec cold {form}", _measure(lambda: validator.validate(struct, now), args.iterations, True))
+        _row(f"codec warm {form}", _measure(lambda: validator.validate(struct, now), args.iterations, False))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
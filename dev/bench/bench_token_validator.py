@@ -0,0 +1,79 @@
+"""TokenValidator.validate_access_token 延迟基准。
+
+用法：python dev/bench/bench_token_validator.py [--sizes 1000,10000,100000,1000000] [--lookups 20000]
+
+按不同会话规模预填 InMemorySessionStore，随机抽取 access_token 进行校验，
+输出每次校验的平均耗时（µs）。反向索引生效时各规模下的耗时应基本持平。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    AppSession,
+    InMemorySessionStore,
+    Session,
+    calc_access_expires,
+    calc_refresh_expires,
+    now_utc,
+)
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+def _populate(store: InMemorySessionStore, size: int) -> list[str]:
+    now = now_utc()
+    at_exp = calc_access_expires(now)
+    rt_exp = calc_refresh_expires(now)
+    tokens = []
+    for i in range(size):
+        guid = f"G{i:010d}"
+        token = f"A.{i:032x}"
+        store.put(
+            Session(
+                guid=guid,
+                refresh_token=f"R.{i:032x}",
+                refresh_token_expires_at=rt_exp,
+                apps={"jiuweihu": AppSession(access_token=token, access_token_expires_at=at_exp, last_active_at=now)},
+            )
+        )
+        tokens.append(token)
+    return tokens
+
+
+def run(size: int, lookups: int) -> float:
+    store = InMemorySessionStore()
+    tokens = _populate(store, size)
+    validator = TokenValidator(store)
+    sample = [random.choice(tokens) for _ in range(lookups)]
+    now = now_utc()
+
+    start = time.perf_counter()
+    for token in sample:
+        validator.validate_access_token(token, "jiuweihu", now=now)
+    elapsed = time.perf_counter() - start
+    return elapsed / lookups * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10}  {'verify µs/op':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"{size:>10}  {run(size, args.lookups):>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
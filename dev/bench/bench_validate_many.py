@@ -0,0 +1,84 @@
+"""TokenValidator：逐个校验 vs validate_many 批量校验吞吐基准。
+
+用法：python dev/bench/bench_validate_many.py [--sessions 20000] [--batch 200] [--batches 50]
+
+分别在内存、SQLite 与 RESP 替身服务器（RedisSessionStore）上预填会话，
+每批随机抽取 `--batch` 个 token（含少量无效 token），对比逐个 validate_access_token
+与一次 validate_many 的 tokens/s。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import AuthError, InMemorySessionStore  # type: ignore  # noqa: E402
+from backend.redis_store import RedisSessionStore  # type: ignore  # noqa: E402
+from backend.resp import RespClient  # type: ignore  # noqa: E402
+from backend.resp_standin import RespStandInServer  # type: ignore  # noqa: E402
+from backend.sqlite_repos import SqliteDatabase, SqliteSessionStore  # type: ignore  # noqa: E402
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+from bench_token_validator import _populate  # type: ignore  # noqa: E402
+
+
+def _one_by_one(validator: TokenValidator, batch: list[str]) -> None:
+    for token in batch:
+        try:
+            validator.validate_access_token(token, "jiuweihu")
+        except AuthError:
+            pass
+
+
+def run(name: str, store, args) -> None:
+    tokens = _populate(store, args.sessions)
+    validator = TokenValidator(store)
+    rnd = random.Random(7)
+    batches = [
+        [rnd.choice(tokens) if rnd.random() > 0.05 else f"A.bogus{rnd.random()}" for _ in range(args.batch)]
+        for _ in range(args.batches)
+    ]
+    total = args.batch * args.batches
+
+    start = time.perf_counter()
+    for batch in batches:
+        _one_by_one(validator, batch)
+    single = total / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in batches:
+        validator.validate_many(batch, "jiuweihu")
+    many = total / (time.perf_counter() - start)
+    print(f"{name:>8}  {single:>14.0f}  {many:>14.0f}  {many / single:>8.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--batches", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'store':>8}  {'single tok/s':>14}  {'batch tok/s':>14}  {'speedup':>9}")
+    run("memory", InMemorySessionStore(), args)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SqliteDatabase(os.path.join(tmp, "bench.db"))
+        run("sqlite", SqliteSessionStore(db), args)
+        db.close()
+    with RespStandInServer() as server:
+        client = RespClient(*server.address)
+        run("redis", RedisSessionStore(client), args)
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -10,10 +10,14 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Callable, Dict, Optional, Protocol, Union
 
 
 UTC = timezone.utc
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+TWO_HOURS_US = 2 * 3600 * 1_000_000
+
+_MICROSECOND = timedelta(microseconds=1)
 
 
 logger = logging.getLogger(__name__)
@@ -34,7 +38,7 @@ class LocalSessionCrypto:
     """
 
     @staticmethod
-    def _protect(raw: bytes) -> bytes:
+    def protect_bytes(raw: bytes) -> bytes:
         if os.name != "nt":  # 非 Windows 平台退化为 base64
             return base64.b64encode(raw)
 
@@ -74,7 +78,7 @@ class LocalSessionCrypto:
         return protected
 
     @staticmethod
-    def _unprotect(cipher: bytes) -> bytes:
+    def unprotect_bytes(cipher: bytes) -> bytes:
         if os.name != "nt":
             return base64.b64decode(cipher)
 
@@ -116,12 +120,12 @@ class LocalSessionCrypto:
     @staticmethod
     def encrypt(payload: Dict[str, Any]) -> bytes:
         raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-        return LocalSessionCrypto._protect(raw)
+        return LocalSessionCrypto.protect_bytes(raw)
 
     @staticmethod
     def decrypt(cipher: bytes) -> Dict[str, Any]:
         try:
-            raw = LocalSessionCrypto._unprotect(cipher)
+            raw = LocalSessionCrypto.unprotect_bytes(cipher)
             return json.loads(raw.decode("utf-8"))
         except Exception as exc:  # noqa: BLE001
             raise ValueError("failed to decrypt local session") from exc
@@ -139,32 +143,61 @@ class LocalSession:
     device_id: Optional[str] = None
 
 
+def epoch_us(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return (dt - EPOCH) // _MICROSECOND
+
+
+def parse_epoch_us(value: Any) -> int:
+    """ISO8601 字符串 / datetime / epoch 秒 -> UTC epoch 微秒；不带时区按 UTC 解释。"""
+
+    if isinstance(value, str):
+        s = value.strip()
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        return epoch_us(datetime.fromisoformat(s))
+    if isinstance(value, datetime):
+        return epoch_us(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(value * 1_000_000)
+    raise ValueError("unsupported datetime format")
+
+
 class LocalSessionValidator:
-    """根据 BR-06/C-03 对 LocalSession 结构与时间进行校验。"""
+    """根据 BR-06/C-03 对 LocalSession 结构与时间进行校验。
+
+    时间字段的解析函数 `parse_time` 可注入（如壳层带缓存的 `timestamp_codec.parse_epoch_us`），
+    默认使用本模块不带缓存的 `parse_epoch_us`。
+    """
 
     # 为兼容历史会话文件，仅将核心时间相关字段设为必选字段；
     # user_type/device_id 若存在会在后续逐步校验，但缺失不会直接视为损坏。
     REQUIRED_FIELDS = {"guid", "phone", "created_at", "expires_at", "refresh_token"}
 
+    def __init__(self, parse_time: Optional[Callable[[Any], int]] = None) -> None:
+        self._parse = parse_time or parse_epoch_us
+
     def validate(self, struct: Dict[str, Any], now: datetime) -> ValidationStatus:
         if not self.REQUIRED_FIELDS.issubset(struct.keys()):
             return ValidationStatus.CORRUPTED
 
         try:
-            created_at = datetime.fromisoformat(struct["created_at"]).astimezone(UTC)
-            expires_at = datetime.fromisoformat(struct["expires_at"]).astimezone(UTC)
+            created_at = self._parse(struct["created_at"])
+            expires_at = self._parse(struct["expires_at"])
         except Exception:  # noqa: BLE001
             return ValidationStatus.CORRUPTED
 
+        now_us = epoch_us(now)
         if expires_at < created_at:
             return ValidationStatus.CORRUPTED
 
-        if now > expires_at:
+        if now_us > expires_at:
             # 超过 Refresh 生命周期，属于“远端也失效”的场景，视为损坏/过期
             return ValidationStatus.CORRUPTED
 
         # 2 小时阈值逻辑（C-03）：超过 2 小时但未超过 refresh 生命周期时，本地 SSO 失效
-        if now - created_at > timedelta(hours=2):
+        if now_us - created_at > TWO_HOURS_US:
             return ValidationStatus.EXPIRED_LOCAL
 
         return ValidationStatus.VALID
@@ -173,8 +206,28 @@ class LocalSessionValidator:
 PathLike = Union[str, "Path"]
 
 
-def write_session_file(path: PathLike, payload: Dict[str, Any]) -> None:
-    cipher = LocalSessionCrypto.encrypt(payload)
+class SessionCodec(Protocol):
+    """session.dat 二进制编解码（如壳层的 `session_codec` 模块），由调用方注入。"""
+
+    def encode(self, payload: Dict[str, Any], *, protect: Optional[Callable[[bytes], bytes]] = None) -> bytes: ...
+
+    def decode(self, blob: bytes, *, unprotect: Optional[Callable[[bytes], bytes]] = None) -> Any: ...
+
+    def is_binary(self, blob: bytes) -> bool: ...
+
+
+def write_session_file(path: PathLike, payload: Dict[str, Any], *, codec: Optional[SessionCodec] = None) -> None:
+    """写入会话文件。
+
+    未注入 `codec` 时写旧格式（整段 JSON 经 DPAPI/base64 保护）；注入时写 codec 的二进制格式，
+    Windows 上 body 经 DPAPI 保护。
+    """
+
+    if codec is None:
+        cipher = LocalSessionCrypto.encrypt(payload)
+    else:
+        protect = LocalSessionCrypto.protect_bytes if os.name == "nt" else None
+        cipher = codec.encode(payload, protect=protect)
     try:
         Path(path).write_bytes(cipher)
     except OSError as exc:  # noqa: PERF203
@@ -183,9 +236,17 @@ def write_session_file(path: PathLike, payload: Dict[str, Any]) -> None:
         raise
 
 
-def read_session_file(path: PathLike) -> Dict[str, Any]:
+def read_session_file(path: PathLike, *, codec: Optional[SessionCodec] = None) -> Dict[str, Any]:
+    """读取会话文件；注入 `codec` 时识别其二进制格式，其余按旧格式解密。"""
+
     cipher = Path(path).read_bytes()
-    return LocalSessionCrypto.decrypt(cipher)
+    if codec is None or not codec.is_binary(cipher):
+        # 旧格式：整段 JSON 经 DPAPI/base64 保护
+        return LocalSessionCrypto.decrypt(cipher)
+    try:
+        return codec.decode(cipher, unprotect=LocalSessionCrypto.unprotect_bytes).to_dict()
+    except ValueError as exc:
+        raise ValueError("failed to decrypt local session") from exc
 
 
 def delete_session_file(path: PathLike) -> None:
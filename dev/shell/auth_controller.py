@@ -3,25 +3,37 @@
 职责：
 - 封装 login/refresh/logout 流程，处理错误码并更新本地会话文件。
 - 依赖 SessionFileManager + HttpClient + RefreshScheduler + LogoutHandler。
+- 同一 (guid, refresh_token) 的并发刷新经 SingleFlight 合并：只发一次请求、写一次 session.dat，
+  所有调用者得到同一个结果。
+- 跨进程：同机多个客户端共用一个 session.dat。刷新在 `file_mgr.lock()` 内进行，拿到锁后先读文件，
+  若其他进程已在本控制器上次观察之后刷新过（created_at 更新或 refresh_token 已轮换），直接采用
+  文件中的会话而不再请求后端；于是每个刷新周期整台机器只有一次后端刷新。
 """
 
 from __future__ import annotations
 
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 from datetime import datetime, timezone
 
 try:
     from .session_file_manager import SessionFileManager
-    from .http_client import HttpClient
     from .refresh_scheduler import RefreshScheduler, now_utc
     from .logout_handler import LogoutHandler
+    from .single_flight import SingleFlight
+    from .timestamp_codec import parse_datetime
 except ImportError:  # pragma: no cover - allow direct execution
     from session_file_manager import SessionFileManager
-    from http_client import HttpClient
     from refresh_scheduler import RefreshScheduler, now_utc
     from logout_handler import LogoutHandler
+    from single_flight import SingleFlight
+    from timestamp_codec import parse_datetime
+
+if TYPE_CHECKING:  # http_client 会引入 requests，仅用于类型标注
+    from .http_client import HttpClient
 
 
+REFRESH_LOCK_TIMEOUT = 15.0  # 等待其他进程完成刷新的上限（秒），约为 HttpClient 一次请求加一次重试
+
 class AuthController:
     def __init__(
         self,
@@ -31,12 +43,19 @@ class AuthController:
         logout_handler: LogoutHandler,
         *,
         broadcast_status: Callable[[str], None],
+        coordinate_refresh: bool = True,
+        session_mark: Optional[datetime] = None,
     ) -> None:
         self.http = http
         self.file_mgr = file_mgr
         self.scheduler = refresh_scheduler
         self.logout_handler = logout_handler
         self.broadcast = broadcast_status
+        self._refresh_flight = SingleFlight()
+        self.coordinate_refresh = coordinate_refresh
+        # 本控制器最近一次写入/采用的会话时间；文件中比它新的会话来自其他进程。
+        # 懒建控制器的宿主应传入自身的启动时间，否则启动到首次刷新之间的对端刷新会被忽略。
+        self._session_mark = session_mark or now_utc()
 
     def login(self, phone: str, code: str) -> None:
         data = self.http.login_by_phone(phone, code)
@@ -45,6 +64,33 @@ class AuthController:
         self.broadcast("active")
 
     def refresh(self, guid: str, refresh_token: str) -> bool:
+        return self._refresh_flight.do((guid, refresh_token), lambda: self._refresh(guid, refresh_token))
+
+    def _refresh(self, guid: str, refresh_token: str) -> bool:
+        if not self.coordinate_refresh:
+            return self._refresh_remote(guid, refresh_token)
+        # 超时拿不到锁时仍然刷新：宁可重复一次请求，也不让刷新失败。
+        with self.file_mgr.lock(timeout=REFRESH_LOCK_TIMEOUT):
+            if self._adopt_peer_session(guid, refresh_token):
+                return True
+            return self._refresh_remote(guid, refresh_token)
+
+    def _adopt_peer_session(self, guid: str, refresh_token: str) -> bool:
+        try:
+            data = self.file_mgr.read()
+            created_at = parse_datetime(data["created_at"])
+        except (FileNotFoundError, ValueError):
+            return False
+        if data.get("guid") != guid:
+            return False
+        if data.get("refresh_token") == refresh_token and created_at <= self._session_mark:
+            return False
+        self._session_mark = created_at
+        self.scheduler.start(login_time=created_at)
+        self.broadcast("active")
+        return True
+
+    def _refresh_remote(self, guid: str, refresh_token: str) -> bool:
         try:
             data = self.http.refresh_token(guid, refresh_token)
             self._persist_session(data)
@@ -63,15 +109,17 @@ class AuthController:
 
     def _persist_session(self, data: dict) -> None:
         # 简化：直接写 session.dat，字段按契约，时间戳用 ISO8601
+        created_at = datetime.now(timezone.utc)
         payload = {
             "guid": data["guid"],
             "phone": data.get("phone", ""),
             "user_type": data.get("user_type", "user"),
             "refresh_token": data["refresh_token"],
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": created_at.isoformat(),
             "expires_at": data.get("refresh_token_expires_at") or data.get("refresh_expires_at") or data.get("expires_at"),
         }
         self.file_mgr.write(payload)
+        self._session_mark = created_at
 
 
 __all__ = ["AuthController"]
@@ -4,7 +4,9 @@
   只能被当前用户解密；
 - 非 Windows 或 DPAPI 调用失败：回退为原样字符串（仅用于开发/测试）。
 
-注意：这里的 protect/unprotect 以 **字符串** 形式对外（便于与 SessionFileManager 的 encoder/decoder 对接）。
+注意：这里的 protect/unprotect 以 **字符串** 形式对外（便于与 SessionFileManager 的 encoder/decoder 对接，
+用于读取旧 JSON 格式的 session.dat）；二进制格式使用字节版 protect_bytes/unprotect_bytes，
+DPAPI 输出直接落盘，不再经过 base64。
 """
 
 from __future__ import annotations
@@ -50,6 +52,27 @@ def unprotect(cipher_hex: str) -> str:
         return cipher_hex
 
 
+def protect_bytes(raw: bytes) -> bytes:
+    try:
+        if os.name != "nt" or sys.platform.startswith("win") is False:
+            return raw
+        return _crypt_protect(raw)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("DPAPI protect failed, falling back to plaintext: %s", exc)
+        return raw
+
+
+def unprotect_bytes(cipher: bytes) -> bytes:
+    try:
+        if os.name != "nt" or sys.platform.startswith("win") is False:
+            return cipher
+        return _crypt_unprotect(cipher)
+    except Exception as exc:  # noqa: BLE001
+        # 与 protect_bytes 的回退对称：保护失败时落盘的是明文
+        logger.warning("DPAPI unprotect failed, returning original bytes: %s", exc)
+        return cipher
+
+
 class _DATA_BLOB(ctypes.Structure):  # type: ignore[misc]
     _fields_ = [
         ("cbData", wintypes.DWORD),
@@ -113,4 +136,4 @@ def _crypt_unprotect(cipher: bytes) -> bytes:
         kernel32.LocalFree(out_blob.pbData)  # type: ignore[arg-type]
 
 
-__all__ = ["protect", "unprotect"]
+__all__ = ["protect", "protect_bytes", "unprotect", "unprotect_bytes"]
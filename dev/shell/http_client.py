@@ -4,12 +4,17 @@
 - 统一基地址、app_id 头。
 - 对错误码进行解析，调用 error_handling 映射动作；由上层决定是否继续刷新/登出。
 - 仅提供最小 login/refresh/logout 能力，便于 Phase 1 自测。
+- 默认复用 keep-alive 连接（`requests.Session` + 有界连接池），见 `PooledAdapter`；
+  `keep_alive=False` 退回每次请求 `Connection: close` 的短连接模式。
 """
 
 from __future__ import annotations
 
+import threading
+import time
 from typing import Any, Dict, Optional, Callable
 import requests
+from requests.adapters import HTTPAdapter
 
 try:
     from .error_handling import map_error_to_action, handle_error_action
@@ -17,6 +22,39 @@ except ImportError:  # pragma: no cover
     from error_handling import map_error_to_action, handle_error_action
 
 
+class PooledAdapter(HTTPAdapter):
+    """有界 keep-alive 连接池，附带陈旧连接检测。
+
+    服务端会关闭空闲的长连接（Node 默认 keepAliveTimeout 5s），客户端若恰好在关闭后复用该连接，
+    Windows 上表现为 10053/ConnectionAborted。两层检测：
+    - 对端已关闭（已收到 FIN/RST）：urllib3 取出连接时用零超时 poll 检查，直接换新连接；
+    - 空闲超过 `max_idle` 秒：连接可能正被服务端关闭，发请求前整体清空连接池，不去赌时序。
+    仍漏网的（检测后、发送前被关闭）由 `HttpClient._request` 在新连接上重试一次。
+    `pool_block=True`：并发请求超过 `pool_size` 时排队等连接，而不是临时新建。
+    """
+
+    def __init__(self, *, pool_size: int = 4, max_idle: float = 4.0) -> None:
+        self.max_idle = max_idle
+        self._last_used: Optional[float] = None
+        self._idle_lock = threading.Lock()
+        super().__init__(pool_connections=1, pool_maxsize=pool_size, pool_block=True, max_retries=0)
+
+    def send(self, request, **kwargs):  # type: ignore[override]
+        with self._idle_lock:
+            if self._last_used is not None and time.monotonic() - self._last_used > self.max_idle:
+                self.reset()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            with self._idle_lock:
+                self._last_used = time.monotonic()
+
+    def reset(self) -> None:
+        """关闭池中所有空闲连接；进行中的请求结束后其连接随旧池一起丢弃。"""
+
+        self.poolmanager.clear()
+
+
 class HttpClient:
     def __init__(
         self,
@@ -26,35 +64,42 @@ class HttpClient:
         on_logout: Callable[[], None],
         on_broadcast: Callable[[str], None],
         timeout: int = 5,
+        keep_alive: bool = True,
+        pool_size: int = 4,
+        max_idle: float = 4.0,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.app_id = app_id
         self.timeout = timeout
         self.on_logout = on_logout
         self.on_broadcast = on_broadcast
+        self.keep_alive = keep_alive
+        self._adapter = PooledAdapter(pool_size=pool_size, max_idle=max_idle)
+        self._session = requests.Session()
+        self._session.mount("http://", self._adapter)
+        self._session.mount("https://", self._adapter)
+
+    def close(self) -> None:
+        self._session.close()
 
     def _headers(self) -> Dict[str, str]:
-        return {"Content-Type": "application/json", "x-app-id": self.app_id}
+        headers = {"Content-Type": "application/json", "x-app-id": self.app_id}
+        if not self.keep_alive:
+            headers["Connection"] = "close"
+        return headers
+
+    def _send(self, method: str, url: str, json_body: Optional[Dict[str, Any]]) -> requests.Response:
+        return self._session.request(method, url, headers=self._headers(), json=json_body, timeout=self.timeout)
 
     def _request(self, method: str, path: str, json_body: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         url = f"{self.base_url}{path}"
-        # Windows + 本地 HTTPServer 在高频短连接下偶发 10053/abort，做一次轻量重试以提升稳定性。
+        # 复用的连接可能在检测之后、发送之前被对端关闭（Windows 上为 10053/abort）：
+        # 清空连接池后在新连接上重试一次。
         try:
-            resp = requests.request(
-                method,
-                url,
-                headers={**self._headers(), "Connection": "close"},
-                json=json_body,
-                timeout=self.timeout,
-            )
+            resp = self._send(method, url, json_body)
         except requests.exceptions.ConnectionError:
-            resp = requests.request(
-                method,
-                url,
-                headers={**self._headers(), "Connection": "close"},
-                json=json_body,
-                timeout=self.timeout,
-            )
+            self._adapter.reset()
+            resp = self._send(method, url, json_body)
 
         if resp.status_code >= 400:
             data = {}
@@ -105,4 +150,4 @@ class HttpClient:
         self._request("POST", "/passport/logout", body)
 
 
-__all__ = ["HttpClient"]
+__all__ = ["HttpClient", "PooledAdapter"]
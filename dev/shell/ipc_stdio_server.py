@@ -3,7 +3,7 @@
 协议：一行一个 JSON。
 
 请求：
-{ "id": "uuid", "cmd": "login|refresh|logout|startup", "params": {...} }
+{ "id": "uuid", "cmd": "login|refresh|logout|startup|get_session", "params": {...} }
 
 响应：
 { "id": "uuid", "ok": true, "result": {...} }
@@ -13,6 +13,18 @@
 事件：
 { "event": "sessionStatus", "payload": {"status": "active", "payload": ...} }
 
+冷启动：模块级只加载标准库（json/threading/concurrent.futures）；`ShellApp`（会话文件、SSO 启动校验）在第一条指令到达时才导入，
+`requests` 等网络栈再推迟到第一条需要联网的指令（login/refresh/logout）。Electron 启动时等待本进程
+就绪，`startup`/`get_session` 因此不必为用不到的 HTTP 客户端付导入开销。
+
+并发：指令按 `COMMAND_LANES` 分到两条执行道，读 stdin 的主循环从不等待指令完成。
+- session 道（startup/login/refresh/logout）：单线程，严格按到达顺序执行。这些指令都会改写
+  session.dat 并广播状态，乱序完成会出错（例如 refresh 在 logout 之后落盘，把已退出的用户重新登录）。
+- read 道（get_session）：只读，多线程并发，不排在 session 道后面。一次慢的 login/refresh
+  （HttpClient 5 秒超时再加一次重试，约 10 秒）不会再挡住 `get_session`。
+响应按完成先后写出、两道之间可能乱序，调用方按 `id` 对应；stdout 写入（含事件）串行化，
+保证每行完整。stdin 关闭后等所有在途指令完成再退出。
+
 注意：这里不实现任何 Electron 代码，仅提供可复用 IPC 服务。
 """
 
@@ -21,66 +33,139 @@ from __future__ import annotations
 import json
 import os
 import sys
-from typing import Any, Dict
-
-import os
-import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 
 # ensure dev/shell is importable when running as a script
 ROOT = os.path.abspath(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from ipc_adapter import bind_sender
-from shell_entry import ShellApp
+if TYPE_CHECKING:
+    from shell_entry import ShellApp
+
+# 指令 -> 执行道。改写会话的指令共用一条有序道；只读的 get_session 单独一道。
+COMMAND_LANES: Dict[str, str] = {
+    "startup": "session",
+    "login": "session",
+    "refresh": "session",
+    "logout": "session",
+    "get_session": "read",
+}
+# 各道的并发上限。session 道必须为 1 才能保持到达顺序；get_session 只读本地文件（多数命中解析缓存），给足并发。
+LANE_LIMITS: Dict[str, int] = {"session": 1, "read": 4}
+
+_app: Optional[ShellApp] = None
+_app_lock = threading.Lock()
+_send_lock = threading.Lock()
 
 
 def _send(obj: Dict[str, Any]) -> None:
-    sys.stdout.write(json.dumps(obj, ensure_ascii=False) + "\n")
-    sys.stdout.flush()
+    line = json.dumps(obj, ensure_ascii=False) + "\n"
+    with _send_lock:
+        sys.stdout.write(line)
+        sys.stdout.flush()
 
 
-def main() -> int:
-    base_url = os.getenv("PASSPORT_BASE_URL", "http://127.0.0.1:8091")
-    app_id = os.getenv("PASSPORT_APP_ID", "jiuweihu")
-    app = ShellApp(base_url=base_url, app_id=app_id)
+def _get_app() -> ShellApp:
+    global _app
+    with _app_lock:
+        if _app is None:
+            from ipc_adapter import bind_sender
+            from shell_entry import ShellApp
 
-    # sender：将 sessionStatus 事件写回 stdout
-    bind_sender(lambda event, payload: _send({"event": event, "payload": payload}))
+            base_url = os.getenv("PASSPORT_BASE_URL", "http://127.0.0.1:8091")
+            app_id = os.getenv("PASSPORT_APP_ID", "jiuweihu")
+            _app = ShellApp(base_url=base_url, app_id=app_id)
+            # sender：将 sessionStatus 事件写回 stdout
+            bind_sender(lambda event, payload: _send({"event": event, "payload": payload}))
+        return _app
+
+
+def _startup(params: Dict[str, Any]) -> Dict[str, Any]:
+    _get_app().startup_flow()
+    return {}
+
+
+def _login(params: Dict[str, Any]) -> Dict[str, Any]:
+    _get_app().login(params.get("phone"), params.get("code"))
+    return {}
 
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            req = json.loads(line)
-            req_id = req.get("id")
-            cmd = req.get("cmd")
-            params = req.get("params") or {}
-
-            if cmd == "startup":
-                app.startup_flow()
-                _send({"id": req_id, "ok": True, "result": {}})
-                continue
-            if cmd == "login":
-                app.login(params.get("phone"), params.get("code"))
-                _send({"id": req_id, "ok": True, "result": {}})
-                continue
-            if cmd == "refresh":
-                ok = app.refresh(params.get("guid"), params.get("refresh_token"))
-                _send({"id": req_id, "ok": True, "result": {"ok": ok}})
-                continue
-            if cmd == "logout":
-                app.logout(params.get("access_token"))
-                _send({"id": req_id, "ok": True, "result": {}})
-                continue
-            if cmd == "get_session":
-                _send({"id": req_id, "ok": True, "result": {"session": app._read_as_dict()}})
-                continue
 
-            _send({"id": req_id, "ok": False, "error": f"unknown cmd: {cmd}"})
+def _refresh(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {"ok": _get_app().refresh(params.get("guid"), params.get("refresh_token"))}
+
+
+def _logout(params: Dict[str, Any]) -> Dict[str, Any]:
+    _get_app().logout(params.get("access_token"))
+    return {}
+
+
+def _get_session(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {"session": _get_app()._read_as_dict()}
+
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    "startup": _startup,
+    "login": _login,
+    "refresh": _refresh,
+    "logout": _logout,
+    "get_session": _get_session,
+}
+
+
+class Dispatcher:
+    """分道的并发执行器：每条执行道一个线程池（按需创建），互不占用对方的工作线程。"""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None) -> None:
+        self.limits = dict(LANE_LIMITS if limits is None else limits)
+        self._lanes: Dict[str, ThreadPoolExecutor] = {}
+
+    def submit(self, req_id: Any, cmd: str, params: Dict[str, Any]) -> None:
+        name = COMMAND_LANES[cmd]
+        lane = self._lanes.get(name)
+        if lane is None:
+            lane = ThreadPoolExecutor(max_workers=self.limits.get(name, 1), thread_name_prefix=f"ipc-{name}")
+            self._lanes[name] = lane
+        lane.submit(self._run, req_id, HANDLERS[cmd], params)
+
+    def close(self) -> None:
+        """等待所有在途指令完成。"""
+
+        for lane in self._lanes.values():
+            lane.shutdown(wait=True)
+        self._lanes.clear()
+
+    @staticmethod
+    def _run(req_id: Any, handler: Callable[[Dict[str, Any]], Dict[str, Any]], params: Dict[str, Any]) -> None:
+        try:
+            result = handler(params)
         except Exception as exc:  # noqa: BLE001
-            _send({"id": req.get("id"), "ok": False, "error": str(exc)})
+            _send({"id": req_id, "ok": False, "error": str(exc)})
+            return
+        _send({"id": req_id, "ok": True, "result": result})
+
+
+def main() -> int:
+    dispatcher = Dispatcher()
+    try:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            req: Dict[str, Any] = {}
+            try:
+                req = json.loads(line)
+                cmd = req.get("cmd")
+                if cmd not in HANDLERS:
+                    _send({"id": req.get("id"), "ok": False, "error": f"unknown cmd: {cmd}"})
+                    continue
+                dispatcher.submit(req.get("id"), cmd, req.get("params") or {})
+            except Exception as exc:  # noqa: BLE001
+                _send({"id": req.get("id") if isinstance(req, dict) else None, "ok": False, "error": str(exc)})
+    finally:
+        dispatcher.close()
 
     return 0
 
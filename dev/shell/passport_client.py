@@ -0,0 +1,324 @@
+"""三个 GUI（passport_client_gui_lib / passport_shell_gui / star_coins_client）共用的 Passport HTTP 客户端。
+
+- 连接：`get_client(base_url)` 按基地址返回进程内共享实例，底层为带有界 keep-alive 连接池的
+  `requests.Session`（复用 `http_client.PooledAdapter` 的陈旧连接检测），可被多个线程同时调用；
+- 超时：按接口设定总预算（`ENDPOINT_POLICIES`），单次尝试的读超时取剩余预算，重试与退避也在预算内；
+- 重试：仅网络错误（连接失败/超时）重试，HTTP 4xx/5xx 直接返回；send-code、login 不是幂等的，
+  只在连接阶段失败（请求未发出）时重试，避免重复发短信或重复消费验证码；
+- 去重：同一 (guid, refresh_token, app_id) 的并发 refresh_token 只发一次请求（`single_flight`）；
+- 退避：指数退避 + full jitter。传入 `on_done` 时为异步调用：每次尝试在共享线程池执行，
+  退避由单个定时线程调度，调用方线程（Tk 事件循环）不阻塞也不 sleep；结果经 `dispatch`
+  回到调用方线程（Tk 用 `tk_dispatch(widget)`）。不传 `on_done` 时为同步调用，退避在调用线程
+  上等待，只应在后台线程或 mainloop 之前使用。
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+try:
+    from .http_client import PooledAdapter
+    from .single_flight import SingleFlight
+except ImportError:  # pragma: no cover
+    from http_client import PooledAdapter
+    from single_flight import SingleFlight
+
+
+@dataclass
+class HttpResult:
+    ok: bool
+    status_code: int
+    data: Any = None
+    error: Optional[str] = None
+    error_code: Optional[str] = None
+    message: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    budget: float  # 总超时预算（秒），含全部重试与退避
+    retries: int = 2
+    idempotent: bool = True
+    connect_timeout: float = 3.0
+
+
+ENDPOINT_POLICIES: Dict[str, EndpointPolicy] = {
+    "/passport/send-code": EndpointPolicy(10.0, idempotent=False),
+    "/passport/login-by-phone": EndpointPolicy(10.0, idempotent=False),
+    "/passport/refresh-token": EndpointPolicy(8.0),
+    "/passport/verify-token": EndpointPolicy(5.0),
+    "/passport/logout": EndpointPolicy(5.0, retries=1),
+}
+DEFAULT_POLICY = EndpointPolicy(10.0, retries=0)
+
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 2.0
+
+
+def ensure_api_base(url: str) -> str:
+    u = (url or "").strip().rstrip("/")
+    if not u:
+        return ""
+    return u if u.endswith("/api") else f"{u}/api"
+
+
+def backoff_delay(attempt: int, *, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """第 attempt 次重试前的等待（full jitter）：[0, min(cap, base * 2^attempt)) 内均匀随机。"""
+
+    return random.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+def tk_dispatch(widget: Any) -> Callable[[Callable[[], None]], None]:
+    """把回调投递到 Tk 事件循环；窗口已销毁时静默丢弃。"""
+
+    import tkinter as tk
+
+    def dispatch(fn: Callable[[], None]) -> None:
+        try:
+            widget.after(0, fn)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    return dispatch
+
+
+class _Timers:
+    """单个守护线程维护的定时队列，用于调度退避后的下一次尝试。"""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def call_later(self, delay: float, fn: Callable[[], None]) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), fn))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="passport-http-timers", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, fn = heapq.heappop(self._heap)
+            try:
+                fn()
+            except Exception:  # noqa: BLE001  # pragma: no cover - 回调自身负责处理异常
+                pass
+
+
+_timers = _Timers()
+
+
+class PassportClient:
+    def __init__(self, base_api: str, *, pool_size: int = 4, policies: Optional[Dict[str, EndpointPolicy]] = None) -> None:
+        self.base_api = ensure_api_base(base_api)
+        self.policies = {**ENDPOINT_POLICIES, **(policies or {})}
+        self._adapter = PooledAdapter(pool_size=pool_size)
+        self._session = requests.Session()
+        self._session.mount("http://", self._adapter)
+        self._session.mount("https://", self._adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="passport-http")
+        self._refresh_flight = SingleFlight()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._session.close()
+
+    # --- API ---
+
+    def send_code(self, phone: str, **kw: Any) -> Optional[HttpResult]:
+        return self.post("/passport/send-code", {"phone": phone}, **kw)
+
+    def login_by_phone(self, phone: str, code: str, app_id: str, **kw: Any) -> Optional[HttpResult]:
+        return self.post("/passport/login-by-phone", {"phone": phone, "code": code, "app_id": app_id}, **kw)
+
+    def refresh_token(
+        self,
+        guid: str,
+        refresh_token: str,
+        app_id: str,
+        *,
+        on_done: Optional[Callable[[HttpResult], None]] = None,
+        dispatch: Optional[Callable[[Callable[[], None]], None]] = None,
+    ) -> Optional[HttpResult]:
+        """同一 (guid, refresh_token, app_id) 的并发刷新合并为一次请求，调用者共享结果。"""
+
+        path = "/passport/refresh-token"
+        payload = {"guid": guid, "refresh_token": refresh_token, "app_id": app_id}
+        key = (guid, refresh_token, app_id)
+        if on_done is None:
+            return self._refresh_flight.do(key, lambda: self.post(path, payload))
+        self._refresh_flight.do_async(
+            key,
+            lambda finish: self.post(path, payload, on_done=finish),
+            lambda result: (dispatch or _call)(lambda: on_done(result)),
+        )
+        return None
+
+    def verify_token(self, access_token: str, app_id: str, **kw: Any) -> Optional[HttpResult]:
+        return self.post("/passport/verify-token", {"access_token": access_token, "app_id": app_id}, **kw)
+
+    def logout(self, access_token: Optional[str], **kw: Any) -> Optional[HttpResult]:
+        payload: Dict[str, Any] = {}
+        if access_token:
+            payload["access_token"] = access_token
+        return self.post("/passport/logout", payload, **kw)
+
+    def post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        *,
+        on_done: Optional[Callable[[HttpResult], None]] = None,
+        dispatch: Optional[Callable[[Callable[[], None]], None]] = None,
+    ) -> Optional[HttpResult]:
+        """同步调用返回 HttpResult；传入 `on_done` 时立即返回 None，结果经 `dispatch` 回调。"""
+
+        if not self.base_api:
+            result = HttpResult(False, 0, error="Base URL 为空")
+            if on_done is None:
+                return result
+            (dispatch or _call)(lambda: on_done(result))
+            return None
+
+        policy = self.policies.get(path, DEFAULT_POLICY)
+        deadline = time.monotonic() + policy.budget
+        if on_done is None:
+            attempt = 0
+            while True:
+                result, retry_in = self._attempt(path, payload, policy, deadline, attempt)
+                if retry_in is None:
+                    return result
+                time.sleep(retry_in)
+                attempt += 1
+
+        def finish(result: HttpResult) -> None:
+            (dispatch or _call)(lambda: on_done(result))
+
+        def run(attempt: int) -> None:
+            try:
+                result, retry_in = self._attempt(path, payload, policy, deadline, attempt)
+            except Exception as exc:  # noqa: BLE001
+                result, retry_in = HttpResult(False, 0, error=str(exc)), None
+            if retry_in is None:
+                finish(result)
+            else:
+                _timers.call_later(retry_in, lambda: self._submit(run, attempt + 1, finish))
+
+        self._submit(run, 0, finish)
+        return None
+
+    # --- internals ---
+
+    def _submit(self, run: Callable[[int], None], attempt: int, finish: Callable[[HttpResult], None]) -> None:
+        try:
+            self._executor.submit(run, attempt)
+        except RuntimeError:  # 已 close()
+            finish(HttpResult(False, 0, error="client closed"))
+
+    def _attempt(
+        self, path: str, payload: Dict[str, Any], policy: EndpointPolicy, deadline: float, attempt: int
+    ) -> tuple[HttpResult, Optional[float]]:
+        """执行一次请求；返回 (结果, 下次重试前的等待秒数或 None)。"""
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return HttpResult(False, 0, error="网络超时，请检查网络连接"), None
+        try:
+            resp = self._session.post(
+                f"{self.base_api}{path}",
+                json=payload,
+                timeout=(min(policy.connect_timeout, remaining), remaining),
+            )
+        except requests.exceptions.ConnectTimeout:
+            return self._retry(HttpResult(False, 0, error="无法连接服务器，请检查网络"), policy, deadline, attempt, True)
+        except requests.exceptions.Timeout:
+            return self._retry(HttpResult(False, 0, error="网络超时，请检查网络连接"), policy, deadline, attempt, False)
+        except requests.exceptions.ConnectionError as exc:
+            return self._retry(HttpResult(False, 0, error="无法连接服务器，请检查网络"), policy, deadline, attempt, _not_sent(exc))
+        except Exception as exc:  # noqa: BLE001
+            return HttpResult(False, 0, error=str(exc)), None
+        return _to_result(resp), None
+
+    def _retry(
+        self, result: HttpResult, policy: EndpointPolicy, deadline: float, attempt: int, not_sent: bool
+    ) -> tuple[HttpResult, Optional[float]]:
+        if attempt >= policy.retries or not (policy.idempotent or not_sent):
+            return result, None
+        delay = backoff_delay(attempt)
+        if time.monotonic() + delay >= deadline:
+            return result, None
+        return result, delay
+
+
+def _not_sent(exc: requests.exceptions.ConnectionError) -> bool:
+    """建连阶段失败（拒绝连接、DNS 失败）时请求一定没有发出，非幂等接口也可以安全重试。"""
+
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _call(fn: Callable[[], None]) -> None:
+    fn()
+
+
+def _to_result(resp: requests.Response) -> HttpResult:
+    data: Any = None
+    if resp.content:
+        try:
+            data = resp.json()
+        except Exception:  # noqa: BLE001
+            data = resp.text
+    if resp.status_code < 400:
+        return HttpResult(True, resp.status_code, data=data)
+    code = message = None
+    if isinstance(data, dict):
+        code = data.get("error_code") or data.get("code")
+        message = data.get("message")
+    err = f"HTTP {resp.status_code}"
+    if code:
+        err += f" ({code})"
+    return HttpResult(False, resp.status_code, data=data, error=err, error_code=code, message=message)
+
+
+_clients: Dict[str, PassportClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str) -> PassportClient:
+    """按规范化后的基地址返回共享实例（首次调用时创建）。"""
+
+    base_api = ensure_api_base(base_url)
+    with _clients_lock:
+        client = _clients.get(base_api)
+        if client is None:
+            client = _clients[base_api] = PassportClient(base_api)
+        return client
+
+
+__all__ = [
+    "DEFAULT_POLICY",
+    "ENDPOINT_POLICIES",
+    "EndpointPolicy",
+    "HttpResult",
+    "PassportClient",
+    "backoff_delay",
+    "ensure_api_base",
+    "get_client",
+    "tk_dispatch",
+]
@@ -7,7 +7,7 @@ Passport Windows 客户端（GUI，支持启动自动 SSO）
 
 依赖：
 - `shell.session_file_manager.SessionFileManager`：session.dat 读写
-- `shell.dpapi_adapter`：可选 DPAPI 加解密（写入为 base64 字符串；读取兼容明文）
+- `shell.dpapi_adapter`：可选 DPAPI 加解密（二进制 session.dat 的 body 直接存 DPAPI 输出；旧 JSON 文件为 base64 字符串，读取兼容明文）
 """
 
 from __future__ import annotations
@@ -16,18 +16,17 @@ import os
 import re
 import sys
 import threading
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Tuple
 
-import requests
 import tkinter as tk
 from tkinter import ttk, messagebox
 
 
 UTC = timezone.utc
 PHONE_RE = re.compile(r"^1[3-9][0-9]{9}$")
-TWO_HOURS = timedelta(hours=2)
+# Web 端 saveSession 可能在短时间内连续调用：合并为一次落盘（秒）
+SAVE_SESSION_COALESCE_WINDOW = 0.2
 
 
 def _ensure_dev_on_syspath() -> None:
@@ -40,12 +39,19 @@ def _ensure_dev_on_syspath() -> None:
 def _import_shell_modules():
     _ensure_dev_on_syspath()
     from shell.session_file_manager import SessionFileManager, default_session_path  # type: ignore
-    from shell.dpapi_adapter import protect, unprotect  # type: ignore
+    from shell.dpapi_adapter import protect, protect_bytes, unprotect, unprotect_bytes  # type: ignore
 
-    return SessionFileManager, default_session_path, protect, unprotect
+    return SessionFileManager, default_session_path, protect, unprotect, protect_bytes, unprotect_bytes
 
 
-SessionFileManager, default_session_path, dpapi_protect, dpapi_unprotect = _import_shell_modules()
+(
+    SessionFileManager,
+    default_session_path,
+    dpapi_protect,
+    dpapi_unprotect,
+    dpapi_protect_bytes,
+    dpapi_unprotect_bytes,
+) = _import_shell_modules()
 
 
 def _import_client_config():
@@ -58,103 +64,56 @@ def _import_client_config():
 default_config_path, load_client_config, save_client_config = _import_client_config()
 
 
-def now_utc() -> datetime:
-    return datetime.now(UTC)
+def _import_passport_client():
+    _ensure_dev_on_syspath()
+    from shell.passport_client import HttpResult, PassportClient, get_client, tk_dispatch  # type: ignore
 
+    return HttpResult, PassportClient, get_client, tk_dispatch
 
-def now_iso() -> str:
-    return now_utc().isoformat()
 
+HttpResult, PassportClient, get_client, tk_dispatch = _import_passport_client()
 
-def parse_iso_dt(value: Any) -> datetime:
-    if isinstance(value, datetime):
-        return value.astimezone(UTC)
-    if isinstance(value, (int, float)):
-        return datetime.fromtimestamp(float(value), UTC)
-    if not isinstance(value, str):
-        raise ValueError("invalid datetime")
-    s = value.strip()
-    if s.endswith("Z"):
-        s = s[:-1] + "+00:00"
-    return datetime.fromisoformat(s).astimezone(UTC)
 
+def _import_session_watcher():
+    _ensure_dev_on_syspath()
+    from shell.session_watcher import watch_session_file  # type: ignore
 
-def ensure_api_base(url: str) -> str:
-    u = (url or "").strip().rstrip("/")
-    if not u:
-        return ""
-    return u if u.endswith("/api") else f"{u}/api"
+    return watch_session_file
 
 
-def normalize_session_path(path: str) -> str:
-    p = (path or "").strip()
-    return p if p else default_session_path()
+watch_session_file = _import_session_watcher()
 
 
-def mask_token(token: Optional[str]) -> str:
-    if not token:
-        return ""
-    s = str(token)
-    if len(s) <= 18:
-        return s
-    return f"{s[:12]}...{s[-4:]}"
+def _import_timestamp_codec():
+    _ensure_dev_on_syspath()
+    from shell.timestamp_codec import TWO_HOURS_US, epoch_us, parse_epoch_us  # type: ignore
 
+    return TWO_HOURS_US, epoch_us, parse_epoch_us
 
-@dataclass
-class HttpResult:
-    ok: bool
-    status_code: int
-    data: Any = None
-    error: Optional[str] = None
-    error_code: Optional[str] = None
 
+TWO_HOURS_US, epoch_us, parse_epoch_us = _import_timestamp_codec()
 
-class PassportClient:
-    def __init__(self, base_api: str, timeout_sec: int = 10) -> None:
-        self.base_api = ensure_api_base(base_api)
-        self.timeout_sec = timeout_sec
 
-    def _post(self, path: str, payload: Dict[str, Any]) -> HttpResult:
-        if not self.base_api:
-            return HttpResult(False, 0, error="Base URL 为空")
-        url = f"{self.base_api}{path}"
-        try:
-            resp = requests.post(url, json=payload, timeout=self.timeout_sec)
-            data = None
-            if resp.content:
-                try:
-                    data = resp.json()
-                except Exception:
-                    data = resp.text
-            if resp.status_code >= 400:
-                code = None
-                if isinstance(data, dict):
-                    code = data.get("error_code") or data.get("code")
-                err = f"HTTP {resp.status_code}"
-                if code:
-                    err += f" ({code})"
-                return HttpResult(False, resp.status_code, data=data, error=err, error_code=code)
-            return HttpResult(True, resp.status_code, data=data)
-        except Exception as exc:  # noqa: BLE001
-            return HttpResult(False, 0, error=str(exc))
+def now_utc() -> datetime:
+    return datetime.now(UTC)
 
-    def send_code(self, phone: str) -> HttpResult:
-        return self._post("/passport/send-code", {"phone": phone})
 
-    def login_by_phone(self, phone: str, code: str, app_id: str) -> HttpResult:
-        return self._post("/passport/login-by-phone", {"phone": phone, "code": code, "app_id": app_id})
+def now_iso() -> str:
+    return now_utc().isoformat()
 
-    def refresh_token(self, guid: str, refresh_token: str, app_id: str) -> HttpResult:
-        return self._post("/passport/refresh-token", {"guid": guid, "refresh_token": refresh_token, "app_id": app_id})
 
-    def verify_token(self, access_token: str, app_id: str) -> HttpResult:
-        return self._post("/passport/verify-token", {"access_token": access_token, "app_id": app_id})
+def normalize_session_path(path: str) -> str:
+    p = (path or "").strip()
+    return p if p else default_session_path()
+
 
-    def logout(self, access_token: Optional[str]) -> HttpResult:
-        payload: Dict[str, Any] = {}
-        if access_token:
-            payload["access_token"] = access_token
-        return self._post("/passport/logout", payload)
+def mask_token(token: Optional[str]) -> str:
+    if not token:
+        return ""
+    s = str(token)
+    if len(s) <= 18:
+        return s
+    return f"{s[:12]}...{s[-4:]}"
 
 
 class SessionStore:
@@ -162,10 +121,17 @@ class SessionStore:
         self.path = normalize_session_path(path)
         self.use_dpapi = use_dpapi
 
-    def _manager(self) -> Any:
+    def _manager(self, coalesce_window: float = 0.0) -> Any:
         if self.use_dpapi:
-            return SessionFileManager(path=self.path, encoder=dpapi_protect, decoder=dpapi_unprotect)
-        return SessionFileManager(path=self.path, encoder=None, decoder=None)
+            return SessionFileManager(
+                path=self.path,
+                encoder=dpapi_protect,
+                decoder=dpapi_unprotect,
+                coalesce_window=coalesce_window,
+                protect=dpapi_protect_bytes,
+                unprotect=dpapi_unprotect_bytes,
+            )
+        return SessionFileManager(path=self.path, encoder=None, decoder=None, coalesce_window=coalesce_window)
 
     def read(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         mgr = self._manager()
@@ -176,8 +142,8 @@ class SessionStore:
         except Exception as exc:  # noqa: BLE001
             return None, f"读取 session 失败：{exc}"
 
-    def write(self, payload: Dict[str, Any]) -> Optional[str]:
-        mgr = self._manager()
+    def write(self, payload: Dict[str, Any], *, coalesce_window: float = 0.0) -> Optional[str]:
+        mgr = self._manager(coalesce_window)
         try:
             mgr.write(payload)
             return None
@@ -204,18 +170,19 @@ def validate_local_session(struct: Dict[str, Any], now: datetime) -> Tuple[bool,
         return False, "session 字段缺失"
 
     try:
-        created_at = parse_iso_dt(struct.get("created_at"))
-        expires_at = parse_iso_dt(struct.get("expires_at"))
+        created_at = parse_epoch_us(struct.get("created_at"))
+        expires_at = parse_epoch_us(struct.get("expires_at"))
     except Exception:  # noqa: BLE001
         return False, "session 时间字段非法"
 
+    now_us = epoch_us(now)
     if expires_at < created_at:
         return False, "session 时间范围非法"
 
-    if now > expires_at:
+    if now_us > expires_at:
         return False, "session 已过期（refresh 失效）"
 
-    if now - created_at > TWO_HOURS:
+    if now_us - created_at > TWO_HOURS_US:
         return False, "session 超过 2 小时阈值（本地 SSO 失效）"
 
     return True, "ok"
@@ -269,8 +236,8 @@ class PassportClientGui(tk.Tk):
 
         self._auto_login_inflight = False
         self._auto_login_pending = False
-        self._last_session_path: Optional[str] = None
-        self._last_session_mtime: Optional[float] = None
+        self._session_watcher: Optional[Any] = None
+        self._session_seen = False
         self._closing = False
 
         self._build_ui()
@@ -279,7 +246,9 @@ class PassportClientGui(tk.Tk):
         # 启动自动登录（SSO）
         self.after(200, self.auto_startup_login)
         # 监听 session.dat 变化：任一端写入/删除都会触发本端刷新（双向 SSO）
-        self.after(1200, self._poll_session_changes)
+        self.after(1200, self._restart_session_watcher)
+        self.watch_session.trace_add("write", lambda *_: self._restart_session_watcher())
+        self.session_path.trace_add("write", lambda *_: self._restart_session_watcher())
 
     # --- UI helpers ---
     def _append(self, line: str) -> None:
@@ -290,7 +259,7 @@ class PassportClientGui(tk.Tk):
         self.status.set(s)
 
     def _client(self) -> PassportClient:
-        return PassportClient(self.base_url.get())
+        return get_client(self.base_url.get())
 
     def _store(self) -> SessionStore:
         return SessionStore(self.session_path.get(), self.use_dpapi.get())
@@ -376,49 +345,46 @@ class PassportClientGui(tk.Tk):
         self._append(f"{reason} -> auto-login start")
         self.auto_startup_login()
 
-    def _poll_session_changes(self) -> None:
+    def _restart_session_watcher(self) -> None:
+        if self._session_watcher is not None:
+            self._session_watcher.stop()
+            self._session_watcher = None
+        if self._closing or not self.watch_session.get():
+            return
+
+        path = normalize_session_path(self.session_path.get())
+        self._session_seen = False
+        dispatch = tk_dispatch(self)
         try:
-            if not self.watch_session.get():
-                return
+            self._session_watcher = watch_session_file(path, lambda exists: dispatch(lambda: self._on_session_event(exists)))
+        except Exception as exc:  # noqa: BLE001
+            self._append(f"[watch] start failed: {exc}")
+            return
+        self._on_session_event(os.path.exists(path))
 
-            path = normalize_session_path(self.session_path.get())
-            if path != self._last_session_path:
-                self._last_session_path = path
-                self._last_session_mtime = None
+    def _on_session_event(self, exists: bool) -> None:
+        if self._closing:
+            return
+        if not exists:
+            if self._session_seen:
+                self._session_seen = False
+                self._reset_current_session()
+                self._append("[watch] session removed -> local cleared")
+                self._set_status("无可用 session（请登录）")
+            return
 
-            try:
-                stat = os.stat(path)
-            except FileNotFoundError:
-                if self._last_session_mtime is not None:
-                    self._last_session_mtime = None
-                    self._reset_current_session()
-                    self._append("[watch] session removed -> local cleared")
-                    self._set_status("无可用 session（请登录）")
-                return
-            except Exception as exc:  # noqa: BLE001
-                self._append(f"[watch] stat failed: {exc}")
-                return
+        if not self._session_seen:
+            self._session_seen = True
+            if not self.current_access_token:
+                self._queue_auto_login("[watch] session found")
+            return
 
-            mtime = float(stat.st_mtime)
-            if self._last_session_mtime is None:
-                self._last_session_mtime = mtime
-                if not self.current_access_token:
-                    self._queue_auto_login("[watch] session found")
-                return
-
-            if abs(mtime - self._last_session_mtime) > 1e-6:
-                self._last_session_mtime = mtime
-                self._queue_auto_login("[watch] session changed")
-        finally:
-            if self._closing:
-                return
-            try:
-                self.after(1500, self._poll_session_changes)
-            except tk.TclError:  # pragma: no cover
-                return
+        self._queue_auto_login("[watch] session changed")
 
     def _on_close(self) -> None:
         self._closing = True
+        if self._session_watcher is not None:
+            self._session_watcher.stop()
         try:
             self.save_config(silent=True)
         finally:
@@ -547,16 +513,17 @@ class PassportClientGui(tk.Tk):
 
                 self._append(f"  access_token={mask_token(access_token)} expires_at={at_exp}")
 
-                v = (
-                    self._client().verify_token(access_token, self.fixed_app_id)
-                    if access_token
-                    else HttpResult(False, 0, error="missing access_token")
-                )
-                self._append(f"[verify-token] ok={v.ok} status={v.status_code} err={v.error or ''}")
-                if v.ok and isinstance(v.data, dict):
-                    self._append(
-                        f"  verified: guid={v.data.get('guid')} app_id={v.data.get('app_id')} expires_at={v.data.get('expires_at')}"
-                    )
+                def verified(v: HttpResult) -> None:
+                    self._append(f"[verify-token] ok={v.ok} status={v.status_code} err={v.error or ''}")
+                    if v.ok and isinstance(v.data, dict):
+                        self._append(
+                            f"  verified: guid={v.data.get('guid')} app_id={v.data.get('app_id')} expires_at={v.data.get('expires_at')}"
+                        )
+
+                if access_token:
+                    self._client().verify_token(access_token, self.fixed_app_id, on_done=verified, dispatch=tk_dispatch(self))
+                else:
+                    verified(HttpResult(False, 0, error="missing access_token"))
 
                 self._set_status("自动登录成功")
             finally:
@@ -579,9 +546,6 @@ class PassportClientGui(tk.Tk):
 
         self._set_status("发送验证码…")
 
-        def work():
-            return self._client().send_code(phone)
-
         def done(res: Optional[HttpResult], exc: Optional[Exception]):
             if exc or not res:
                 self._append(f"[send-code] exception: {exc}")
@@ -596,7 +560,7 @@ class PassportClientGui(tk.Tk):
             self._set_status("验证码已发送")
             messagebox.showinfo("已发送", "验证码已发送（请查看手机短信）")
 
-        self._run_async(work, done)
+        self._client().send_code(phone, on_done=lambda res: done(res, None), dispatch=tk_dispatch(self))
 
     def on_login_and_write(self) -> None:
         phone = (self.phone.get() or "").strip()
@@ -610,9 +574,6 @@ class PassportClientGui(tk.Tk):
 
         self._set_status("登录中…")
 
-        def work():
-            return self._client().login_by_phone(phone, code, self.fixed_app_id)
-
         def done(res: Optional[HttpResult], exc: Optional[Exception]):
             if exc or not res:
                 self._append(f"[login] exception: {exc}")
@@ -660,7 +621,9 @@ class PassportClientGui(tk.Tk):
             self._set_status("登录成功（已写入 session.dat）")
             messagebox.showinfo("成功", "登录成功，已写入 session.dat；将自动尝试登录")
 
-        self._run_async(work, done)
+        self._client().login_by_phone(
+            phone, code, self.fixed_app_id, on_done=lambda res: done(res, None), dispatch=tk_dispatch(self)
+        )
 
     def logout_and_clear(self) -> None:
         if not self.current_access_token:
@@ -676,9 +639,6 @@ class PassportClientGui(tk.Tk):
 
         self._set_status("退出中…")
 
-        def work():
-            return self._client().logout(self.current_access_token)
-
         def done(res: Optional[HttpResult], exc: Optional[Exception]):
             if exc:
                 self._append(f"[logout] exception: {exc}")
@@ -694,7 +654,7 @@ class PassportClientGui(tk.Tk):
             self._set_status("已退出（本地已清理）")
             messagebox.showinfo("已退出", "已退出登录（本地 session.dat 已清理）")
 
-        self._run_async(work, done)
+        self._client().logout(self.current_access_token, on_done=lambda res: done(res, None), dispatch=tk_dispatch(self))
 
     def open_star_coins(self) -> None:
         """打开星币商城 H5 页面（WebView）"""
@@ -740,7 +700,7 @@ class PassportClientGui(tk.Tk):
                         "created_at": now_iso(),
                         "expires_at": expires_at,
                     }
-                    gui_self._store().write(payload)
+                    gui_self._store().write(payload, coalesce_window=SAVE_SESSION_COALESCE_WINDOW)
                     gui_self._append(f"[saveSession] Session saved for {phone}")
                     # 刷新主窗口状态
                     gui_self.after(100, gui_self.auto_startup_login)
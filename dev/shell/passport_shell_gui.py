@@ -17,11 +17,9 @@ import json
 import os
 import re
 import sys
-from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Tuple
 
-import requests
 import tkinter as tk
 from tkinter import ttk, messagebox
 
@@ -29,9 +27,9 @@ from tkinter import ttk, messagebox
 def _try_import_shell_modules():
     try:
         from shell.session_file_manager import SessionFileManager, default_session_path  # type: ignore
-        from shell.dpapi_adapter import protect, unprotect  # type: ignore
+        from shell.dpapi_adapter import protect, protect_bytes, unprotect, unprotect_bytes  # type: ignore
 
-        return SessionFileManager, default_session_path, protect, unprotect
+        return SessionFileManager, default_session_path, protect, unprotect, protect_bytes, unprotect_bytes
     except Exception:
         # 允许从 dev/shell 目录直接运行：把 dev 加入 sys.path
         here = os.path.abspath(os.path.dirname(__file__))
@@ -39,12 +37,19 @@ def _try_import_shell_modules():
         if dev_root not in sys.path:
             sys.path.insert(0, dev_root)
         from shell.session_file_manager import SessionFileManager, default_session_path  # type: ignore
-        from shell.dpapi_adapter import protect, unprotect  # type: ignore
+        from shell.dpapi_adapter import protect, protect_bytes, unprotect, unprotect_bytes  # type: ignore
 
-        return SessionFileManager, default_session_path, protect, unprotect
+        return SessionFileManager, default_session_path, protect, unprotect, protect_bytes, unprotect_bytes
 
 
-SessionFileManager, default_session_path, dpapi_protect, dpapi_unprotect = _try_import_shell_modules()
+(
+    SessionFileManager,
+    default_session_path,
+    dpapi_protect,
+    dpapi_unprotect,
+    dpapi_protect_bytes,
+    dpapi_unprotect_bytes,
+) = _try_import_shell_modules()
 
 
 def _try_import_client_config():
@@ -66,6 +71,23 @@ def _try_import_client_config():
 default_config_path, load_client_config, save_client_config = _try_import_client_config()
 
 
+def _try_import_passport_client():
+    try:
+        from shell.passport_client import HttpResult, PassportClient, get_client, tk_dispatch  # type: ignore
+    except Exception:
+        # 允许从 dev/shell 目录直接运行：把 dev 加入 sys.path
+        here = os.path.abspath(os.path.dirname(__file__))
+        dev_root = os.path.abspath(os.path.join(here, ".."))
+        if dev_root not in sys.path:
+            sys.path.insert(0, dev_root)
+        from shell.passport_client import HttpResult, PassportClient, get_client, tk_dispatch  # type: ignore
+
+    return HttpResult, PassportClient, get_client, tk_dispatch
+
+
+HttpResult, PassportClient, get_client, tk_dispatch = _try_import_passport_client()
+
+
 UTC = timezone.utc
 PHONE_RE = re.compile(r"^1[3-9][0-9]{9}$")
 
@@ -83,68 +105,11 @@ def mask_token(token: Optional[str]) -> str:
     return f"{s[:12]}...{s[-4:]}"
 
 
-def ensure_api_base(url: str) -> str:
-    u = (url or "").strip().rstrip("/")
-    if not u:
-        return ""
-    return u if u.endswith("/api") else f"{u}/api"
-
-
 def normalize_session_path(path: str) -> str:
     p = (path or "").strip()
     return p if p else default_session_path()
 
 
-@dataclass
-class HttpResult:
-    ok: bool
-    status_code: int
-    data: Any = None
-    error: Optional[str] = None
-
-
-class PassportClient:
-    def __init__(self, base_api: str, timeout_sec: int = 10) -> None:
-        self.base_api = ensure_api_base(base_api)
-        self.timeout_sec = timeout_sec
-
-    def _post(self, path: str, payload: Dict[str, Any]) -> HttpResult:
-        if not self.base_api:
-            return HttpResult(False, 0, error="Base URL 为空")
-        url = f"{self.base_api}{path}"
-        try:
-            resp = requests.post(url, json=payload, timeout=self.timeout_sec)
-            data = None
-            if resp.content:
-                try:
-                    data = resp.json()
-                except Exception:
-                    data = resp.text
-            if resp.status_code >= 400:
-                code = None
-                if isinstance(data, dict):
-                    code = data.get("error_code") or data.get("code")
-                err = f"HTTP {resp.status_code}"
-                if code:
-                    err += f" ({code})"
-                return HttpResult(False, resp.status_code, data=data, error=err)
-            return HttpResult(True, resp.status_code, data=data)
-        except Exception as exc:  # noqa: BLE001
-            return HttpResult(False, 0, error=str(exc))
-
-    def send_code(self, phone: str) -> HttpResult:
-        return self._post("/passport/send-code", {"phone": phone})
-
-    def login_by_phone(self, phone: str, code: str, app_id: str) -> HttpResult:
-        return self._post("/passport/login-by-phone", {"phone": phone, "code": code, "app_id": app_id})
-
-    def refresh_token(self, guid: str, refresh_token: str, app_id: str) -> HttpResult:
-        return self._post("/passport/refresh-token", {"guid": guid, "refresh_token": refresh_token, "app_id": app_id})
-
-    def verify_token(self, access_token: str, app_id: str) -> HttpResult:
-        return self._post("/passport/verify-token", {"access_token": access_token, "app_id": app_id})
-
-
 class SessionStore:
     def __init__(self, path: str, use_dpapi: bool) -> None:
         self.path = normalize_session_path(path)
@@ -152,7 +117,13 @@ class SessionStore:
 
     def _manager(self) -> Any:
         if self.use_dpapi:
-            return SessionFileManager(path=self.path, encoder=dpapi_protect, decoder=dpapi_unprotect)
+            return SessionFileManager(
+                path=self.path,
+                encoder=dpapi_protect,
+                decoder=dpapi_unprotect,
+                protect=dpapi_protect_bytes,
+                unprotect=dpapi_unprotect_bytes,
+            )
         return SessionFileManager(path=self.path, encoder=None, decoder=None)
 
     def read(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
@@ -284,7 +255,7 @@ class App(tk.Tk):
         ttk.Button(btns, text="清空输出", command=lambda: self._set_output("")).pack(side="right")
 
     def _client(self) -> PassportClient:
-        return PassportClient(self.base_url.get())
+        return get_client(self.base_url.get())
 
     def _store(self) -> SessionStore:
         return SessionStore(self.session_path.get(), self.use_dpapi.get())
@@ -331,12 +302,15 @@ class App(tk.Tk):
         if not phone:
             messagebox.showerror("参数错误", "手机号格式不正确")
             return
-        r = self._client().send_code(phone)
-        self._append(f"[send-code] phone={phone} ok={r.ok} status={r.status_code} err={r.error or ''}")
-        if not r.ok:
-            messagebox.showerror("发送失败", r.error or "发送失败")
-        else:
-            messagebox.showinfo("已发送", "验证码已发送（请查看手机短信）")
+
+        def done(r: HttpResult) -> None:
+            self._append(f"[send-code] phone={phone} ok={r.ok} status={r.status_code} err={r.error or ''}")
+            if not r.ok:
+                messagebox.showerror("发送失败", r.error or "发送失败")
+            else:
+                messagebox.showinfo("已发送", "验证码已发送（请查看手机短信）")
+
+        self._client().send_code(phone, on_done=done, dispatch=tk_dispatch(self))
 
     def on_login_and_write(self) -> None:
         phone = self._validate_phone()
@@ -352,40 +326,42 @@ class App(tk.Tk):
             messagebox.showerror("参数错误", "app_id 不能为空")
             return
 
-        r = self._client().login_by_phone(phone, code, app_id)
-        self._append(f"[login] app_id={app_id} ok={r.ok} status={r.status_code} err={r.error or ''}")
-        if not r.ok or not isinstance(r.data, dict):
-            messagebox.showerror("登录失败", r.error or "登录失败")
-            return
-
-        data = r.data
-        guid = str(data.get("guid") or "").strip()
-        refresh_token = str(data.get("refresh_token") or "").strip()
-        refresh_expires_at = str(data.get("refresh_token_expires_at") or "").strip()
-        user_type = str(data.get("user_type") or "user")
-
-        if not guid or not refresh_token or not refresh_expires_at:
-            messagebox.showerror("响应异常", "后端响应缺少 guid/refresh_token/refresh_token_expires_at")
-            return
-
-        payload = {
-            "guid": guid,
-            "phone": phone,
-            "user_type": user_type,
-            "refresh_token": refresh_token,
-            "created_at": now_iso(),
-            "expires_at": refresh_expires_at,
-        }
-
-        err = self._store().write(payload)
-        if err:
-            self._append(f"[session.write] path={normalize_session_path(self.session_path.get())} err={err}")
-            messagebox.showerror("写入失败", err)
-            return
-
-        self._append(f"[session.write] ok path={normalize_session_path(self.session_path.get())} guid={guid}")
-        self._append(f"  refresh_token={mask_token(refresh_token)} expires_at={refresh_expires_at}")
-        messagebox.showinfo("成功", "登录成功，session.dat 已写入，可在端 B 验证 SSO")
+        def done(r: HttpResult) -> None:
+            self._append(f"[login] app_id={app_id} ok={r.ok} status={r.status_code} err={r.error or ''}")
+            if not r.ok or not isinstance(r.data, dict):
+                messagebox.showerror("登录失败", r.error or "登录失败")
+                return
+
+            data = r.data
+            guid = str(data.get("guid") or "").strip()
+            refresh_token = str(data.get("refresh_token") or "").strip()
+            refresh_expires_at = str(data.get("refresh_token_expires_at") or "").strip()
+            user_type = str(data.get("user_type") or "user")
+
+            if not guid or not refresh_token or not refresh_expires_at:
+                messagebox.showerror("响应异常", "后端响应缺少 guid/refresh_token/refresh_token_expires_at")
+                return
+
+            payload = {
+                "guid": guid,
+                "phone": phone,
+                "user_type": user_type,
+                "refresh_token": refresh_token,
+                "created_at": now_iso(),
+                "expires_at": refresh_expires_at,
+            }
+
+            err = self._store().write(payload)
+            if err:
+                self._append(f"[session.write] path={normalize_session_path(self.session_path.get())} err={err}")
+                messagebox.showerror("写入失败", err)
+                return
+
+            self._append(f"[session.write] ok path={normalize_session_path(self.session_path.get())} guid={guid}")
+            self._append(f"  refresh_token={mask_token(refresh_token)} expires_at={refresh_expires_at}")
+            messagebox.showinfo("成功", "登录成功，session.dat 已写入，可在端 B 验证 SSO")
+
+        self._client().login_by_phone(phone, code, app_id, on_done=done, dispatch=tk_dispatch(self))
 
     def on_read_session(self) -> None:
         data, err = self._store().read()
@@ -419,26 +395,33 @@ class App(tk.Tk):
             messagebox.showerror("session 异常", "session.dat 缺少 guid/refresh_token")
             return
 
-        r = self._client().refresh_token(guid, refresh_token, app_id)
-        self._append(f"[refresh-token] app_id={app_id} ok={r.ok} status={r.status_code} err={r.error or ''}")
-        if not r.ok or not isinstance(r.data, dict):
-            messagebox.showerror("SSO 刷新失败", r.error or "SSO 刷新失败")
-            return
+        def verified(v: HttpResult) -> None:
+            self._append(f"[verify-token] ok={v.ok} status={v.status_code} err={v.error or ''}")
+            if v.ok and isinstance(v.data, dict):
+                self._append(f"  verified: guid={v.data.get('guid')} app_id={v.data.get('app_id')} expires_at={v.data.get('expires_at')}")
 
-        access_token = str(r.data.get("access_token") or "")
-        at_exp = str(r.data.get("access_token_expires_at") or "")
-        self._append(f"  access_token={mask_token(access_token)} expires_at={at_exp}")
+            if not v.ok:
+                messagebox.showwarning("SSO 部分成功", "refresh-token 成功，但 verify-token 失败，请查看输出")
+                return
 
-        v = self._client().verify_token(access_token, app_id) if access_token else HttpResult(False, 0, error="missing access_token")
-        self._append(f"[verify-token] ok={v.ok} status={v.status_code} err={v.error or ''}")
-        if v.ok and isinstance(v.data, dict):
-            self._append(f"  verified: guid={v.data.get('guid')} app_id={v.data.get('app_id')} expires_at={v.data.get('expires_at')}")
+            messagebox.showinfo("SSO 成功", f"端 B（app_id={app_id}）已通过 refresh_token 获取 access_token，SSO OK")
 
-        if not v.ok:
-            messagebox.showwarning("SSO 部分成功", "refresh-token 成功，但 verify-token 失败，请查看输出")
-            return
+        def refreshed(r: HttpResult) -> None:
+            self._append(f"[refresh-token] app_id={app_id} ok={r.ok} status={r.status_code} err={r.error or ''}")
+            if not r.ok or not isinstance(r.data, dict):
+                messagebox.showerror("SSO 刷新失败", r.error or "SSO 刷新失败")
+                return
+
+            access_token = str(r.data.get("access_token") or "")
+            at_exp = str(r.data.get("access_token_expires_at") or "")
+            self._append(f"  access_token={mask_token(access_token)} expires_at={at_exp}")
+
+            if not access_token:
+                verified(HttpResult(False, 0, error="missing access_token"))
+                return
+            self._client().verify_token(access_token, app_id, on_done=verified, dispatch=tk_dispatch(self))
 
-        messagebox.showinfo("SSO 成功", f"端 B（app_id={app_id}）已通过 refresh_token 获取 access_token，SSO OK")
+        self._client().refresh_token(guid, refresh_token, app_id, on_done=refreshed, dispatch=tk_dispatch(self))
 
     def on_delete_session(self) -> None:
         err = self._store().delete()
@@ -0,0 +1,252 @@
+"""session.dat 紧凑二进制格式（v1）。
+
+布局（小端）：
+
+    header  magic "PSES" | version u8 | flags u8 | reserved u16
+    body    created_at i64 | expires_at i64                  -- UTC epoch 微秒
+            (tag u8, len u16) * 4 | 4 个值的数据依次拼接     -- guid, phone, user_type, refresh_token
+            extra_count u8, (key_len u16, key, tag u8, len u16, 数据) * extra_count
+
+    tag     's' UTF-8 字符串 | 'i' i64 | 'j' JSON 文本（其余 JSON 值，如 bool/float/null/对象）
+            | 'n' 字段缺失（长度为 0；仅用于可选的 user_type）
+
+固定部分（时间 + 四个核心字段的 tag/长度）一次 `struct.unpack_from` 取出，之后只做切片。
+flags 置 `FLAG_PROTECTED` 时 body 经过字节级保护钩子（如 DPAPI），读取时先解保护再解析。
+读取只做 struct 解包与 UTF-8 解码，不涉及 JSON 与 ISO 时间解析；`SessionRecord.to_dict()`
+按旧 JSON 的字段形态返回（时间为 UTC ISO8601 字符串，同时记入 `timestamp_codec` 的解析缓存）。文件不以 magic 开头即为旧 JSON 格式。
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .timestamp_codec import format_epoch_us, parse_epoch_us
+except ImportError:  # pragma: no cover - allow direct execution
+    from timestamp_codec import format_epoch_us, parse_epoch_us
+
+MAGIC = b"PSES"
+VERSION = 1
+FLAG_PROTECTED = 0x01
+
+_HEADER = struct.Struct("<4sBBH")
+_FIXED = struct.Struct("<qq" + "BH" * 4)
+_LEN = struct.Struct("<H")
+_COUNT = struct.Struct("<B")
+_VALUE = struct.Struct("<BH")
+_INT = struct.Struct("<q")
+_TAG_STR = ord("s")
+_TAG_INT = ord("i")
+_TAG_JSON = ord("j")
+_TAG_ABSENT = ord("n")
+
+CORE_FIELDS = ("guid", "phone", "user_type", "refresh_token")
+OPTIONAL_FIELDS = frozenset({"user_type"})  # 旧会话文件可能没有；缺失时原样保留为缺失，不补默认值
+TIME_FIELDS = ("created_at", "expires_at")
+
+ByteHook = Callable[[bytes], bytes]
+
+
+class SessionRecord:
+    """解码后的会话；`user_type` 为 None 表示文件中没有该字段，`to_dict()` 也不会输出它。"""
+
+    __slots__ = ("guid", "phone", "user_type", "refresh_token", "created_at_us", "expires_at_us", "extras")
+
+    def __init__(
+        self,
+        guid: Any,
+        phone: Any,
+        user_type: Any,
+        refresh_token: Any,
+        created_at_us: int,
+        expires_at_us: int,
+        extras: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.guid = guid
+        self.phone = phone
+        self.user_type = user_type
+        self.refresh_token = refresh_token
+        self.created_at_us = created_at_us
+        self.expires_at_us = expires_at_us
+        self.extras = extras or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "guid": self.guid,
+            "phone": self.phone,
+            "user_type": self.user_type,
+            "refresh_token": self.refresh_token,
+            "created_at": format_epoch_us(self.created_at_us),
+            "expires_at": format_epoch_us(self.expires_at_us),
+        }
+        if self.user_type is None:
+            del data["user_type"]
+        data.update(self.extras)
+        return data
+
+
+def is_binary(blob: bytes) -> bool:
+    return blob[:4] == MAGIC
+
+
+def is_protected(blob: bytes) -> bool:
+    return len(blob) >= _HEADER.size and bool(blob[5] & FLAG_PROTECTED)
+
+
+def pack(payload: Dict[str, Any]) -> bytes:
+    """把会话 dict 编码为 body（不含 header、未保护）。"""
+
+    try:
+        created_at_us, expires_at_us = (parse_epoch_us(payload[k]) for k in TIME_FIELDS)
+    except KeyError as exc:
+        raise ValueError(f"missing field: {exc.args[0]}") from None
+    descriptors = []
+    data = []
+    for key in CORE_FIELDS:
+        value = payload.get(key)
+        if value is not None:
+            tag, raw = _encode_value(value, key)
+        elif key in OPTIONAL_FIELDS:
+            tag, raw = _TAG_ABSENT, b""
+        else:
+            raise ValueError(f"missing field: {key}")
+        descriptors += (tag, len(raw))
+        data.append(raw)
+    try:
+        parts = [_FIXED.pack(created_at_us, expires_at_us, *descriptors), *data]
+    except struct.error as exc:
+        raise ValueError("timestamp out of range") from exc
+    extras = [(k, v) for k, v in payload.items() if k not in CORE_FIELDS and k not in TIME_FIELDS]
+    if len(extras) > 255:
+        raise ValueError("too many fields")
+    parts.append(_COUNT.pack(len(extras)))
+    for key, value in extras:
+        raw_key = _check_len(key.encode("utf-8"), key)
+        tag, raw = _encode_value(value, key)
+        parts += (_LEN.pack(len(raw_key)), raw_key, _VALUE.pack(tag, len(raw)), raw)
+    return b"".join(parts)
+
+
+def seal(body: bytes, *, protect: Optional[ByteHook] = None) -> bytes:
+    """加上 header；给出 `protect` 时先对 body 做字节级保护并置 FLAG_PROTECTED。"""
+
+    flags = 0
+    if protect is not None:
+        body = protect(body)
+        flags |= FLAG_PROTECTED
+    return _HEADER.pack(MAGIC, VERSION, flags, 0) + body
+
+
+def encode(payload: Dict[str, Any], *, protect: Optional[ByteHook] = None) -> bytes:
+    return seal(pack(payload), protect=protect)
+
+
+def unseal(blob: bytes, *, unprotect: Optional[ByteHook] = None) -> bytes:
+    """校验 header 并返回（解保护后的）body；格式不符或无法解保护时抛 ValueError。"""
+
+    if len(blob) < _HEADER.size:
+        raise ValueError("truncated session header")
+    magic, version, flags, _ = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("not a binary session file")
+    if version != VERSION:
+        raise ValueError(f"unsupported session format version: {version}")
+    body = blob[_HEADER.size :]
+    if flags & FLAG_PROTECTED:
+        if unprotect is None:
+            raise ValueError("session file is protected but no unprotect hook given")
+        try:
+            body = unprotect(body)
+        except Exception as exc:  # noqa: BLE001
+            raise ValueError("failed to unprotect session file") from exc
+    return body
+
+
+def unpack(body: bytes) -> SessionRecord:
+    try:
+        created_at_us, expires_at_us, t0, n0, t1, n1, t2, n2, t3, n3 = _FIXED.unpack_from(body)
+        # 核心字段展开处理：这是启动路径上最热的一段
+        a = _FIXED.size
+        b = a + n0
+        c = b + n1
+        d = c + n2
+        offset = d + n3
+        if t0 == t1 == t2 == t3 == _TAG_STR:
+            # 常见情况：四个核心字段都是字符串，省去逐个 _decode_value 调用
+            core = [body[a:b].decode("utf-8"), body[b:c].decode("utf-8"), body[c:d].decode("utf-8"), body[d:offset].decode("utf-8")]
+        else:
+            core = [_decode_value(t0, body[a:b]), _decode_value(t1, body[b:c]), _decode_value(t2, body[c:d]), _decode_value(t3, body[d:offset])]
+        (count,) = _COUNT.unpack_from(body, offset)
+        offset += _COUNT.size
+        extras = {}
+        for _ in range(count):
+            (key_len,) = _LEN.unpack_from(body, offset)
+            offset += _LEN.size
+            key = body[offset : offset + key_len].decode("utf-8")
+            tag, length = _VALUE.unpack_from(body, offset + key_len)
+            offset += key_len + _VALUE.size
+            extras[key] = _decode_value(tag, body[offset : offset + length])
+            offset += length
+    except (struct.error, UnicodeDecodeError) as exc:
+        raise ValueError("corrupted session body") from exc
+    if offset > len(body):
+        raise ValueError("truncated session body")
+    if offset < len(body):
+        raise ValueError("trailing bytes in session body")
+    return SessionRecord(*core, created_at_us, expires_at_us, extras)
+
+
+def decode(blob: bytes, *, unprotect: Optional[ByteHook] = None) -> SessionRecord:
+    return unpack(unseal(blob, unprotect=unprotect))
+
+
+def _check_len(raw: bytes, field: str) -> bytes:
+    if len(raw) > 0xFFFF:
+        raise ValueError(f"field too long: {field}")
+    return raw
+
+
+def _encode_value(value: Any, field: str) -> tuple[int, bytes]:
+    if isinstance(value, str):
+        return _TAG_STR, _check_len(value.encode("utf-8"), field)
+    if type(value) is int and -(2**63) <= value < 2**63:
+        return _TAG_INT, _INT.pack(value)
+    try:
+        text = json.dumps(value, ensure_ascii=False)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"unsupported value type for field: {field}") from exc
+    return _TAG_JSON, _check_len(text.encode("utf-8"), field)
+
+
+def _decode_value(tag: int, raw: bytes) -> Any:
+    # 切片越界不会报错，长度不符即说明数据被截断
+    if tag == _TAG_STR:
+        return raw.decode("utf-8")
+    if tag == _TAG_INT and len(raw) == _INT.size:
+        return _INT.unpack(raw)[0]
+    if tag == _TAG_ABSENT and not raw:
+        return None
+    if tag == _TAG_JSON:
+        try:
+            return json.loads(raw)
+        except ValueError as exc:
+            raise ValueError("corrupted session body") from exc
+    raise ValueError(f"corrupted session body: bad value tag {tag}")
+
+
+__all__ = [
+    "FLAG_PROTECTED",
+    "MAGIC",
+    "VERSION",
+    "SessionRecord",
+    "decode",
+    "encode",
+    "is_binary",
+    "is_protected",
+    "pack",
+    "seal",
+    "unpack",
+    "unseal",
+]
@@ -4,24 +4,71 @@
   `%LOCALAPPDATA%\\Passport\\session.dat`（可通过初始化参数覆盖）。
 - 字段校验：guid, phone, user_type, refresh_token, created_at, expires_at 必填；expires_at >= created_at。
 - 时间阈值：文件创建时间超过 2 小时视为残留，读取时直接删除并抛 FileNotFoundError（等价“无可用会话”）。
+- 文件格式：给了字节级 `protect` 钩子（DPAPI）时默认写紧凑二进制格式（`session_codec`，DPAPI 输出
+  直接落盘，省去 hex/base64 文本包装）；明文文件默认写 JSON——明文下二进制的冷读取并不比 JSON 快
+  （见 `dev/bench/bench_session_format.py`）。两种格式都照常读取，旧 JSON 文件在下一次以二进制写入时迁移。
+  只给了 str 版 encoder、没给 `protect` 的调用方一律写 JSON，避免加密被静默丢掉。
 - 兼容现有调用方式：
   - 文件不存在 → FileNotFoundError
   - 解密/解析/校验失败 → ValueError（视为损坏）
+- 跨进程协调：`lock()` 在 `session.dat.lock` 上加机器级咨询锁（POSIX flock / Windows msvcrt），
+  同一台机器上的多个壳层客户端据此串行化“读-刷新-写”，避免重复刷新与写竞争。
+- 解析缓存：`read()` 的校验结果按 (路径, 解码钩子) 在进程内共享缓存，以 (st_mtime_ns, st_size, st_ino)
+  失效；文件未变时重复读取只需一次 stat（仍做 2 小时残留判断），不再读文件、解密、解析与校验。
+- 写入去重：记录本进程最近写入/读取的明文与文件标识，内容未变时 `write()` 直接跳过，
+  不再 mkstemp + fsync + replace（加密输出每次不同，因此按明文比较）。
+- 写入合并：`coalesce_window > 0` 时，窗口内的一串写入只在窗口结束时落盘最后一次（仍为原子写入）；
+  同进程内的 `read()` 立即可见待写内容，`flush()` / 进程退出时强制落盘。
+- 变化监听：`watch(on_change)` 返回已启动的 `session_watcher.SessionWatcher`（inotify / 自适应轮询）。
 """
 
 from __future__ import annotations
 
+import atexit
 import json
 import os
-import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, Dict, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+try:
+    from . import session_codec
+    from .timestamp_codec import parse_epoch_us
+except ImportError:  # pragma: no cover - allow direct execution
+    import session_codec  # type: ignore[no-redef]
+    from timestamp_codec import parse_epoch_us
+
+if TYPE_CHECKING:  # session_watcher 会引入 ctypes/subprocess，只在 watch() 时加载
+    from .session_watcher import SessionWatcher
 
 UTC = timezone.utc
 TWO_HOURS = timedelta(hours=2)
+LOCK_SUFFIX = ".lock"
+LOCK_POLL_INTERVAL = 0.05
+
+_FileKey = Tuple[int, int, int]
+# (path, decoder, unprotect) -> (文件标识, 已校验的会话)。GUI 每次操作都会新建 SessionFileManager，因此缓存放在模块级。
+_parsed_cache: Dict[Tuple[str, Any, Any], Tuple[_FileKey, Dict[str, Any]]] = {}
+# path -> (文件标识, 明文, 编码方式)：本进程最近一次写入或读到的内容，用于跳过相同内容的重写。
+# 会话明文只有一两百字节，直接保存原文比较，不必为算摘要加载 hashlib。
+# 记下编码方式 (格式, encoder/protect)：同样的明文以不同方式落盘（JSON vs 二进制、明文 vs DPAPI）不能视为相同。
+_written: Dict[str, Tuple[_FileKey, bytes, Tuple[str, Any]]] = {}
+_pending: Dict[str, "_PendingWrite"] = {}
+_pending_lock = threading.Lock()
+_commit_lock = threading.Lock()
 
 
 def _dir_writable(path: str) -> bool:
+    import tempfile
+
     try:
         os.makedirs(path, exist_ok=True)
         with tempfile.NamedTemporaryFile(
@@ -49,6 +96,126 @@ def default_session_path() -> str:
     return preferred if _dir_writable(preferred_dir) else fallback
 
 
+class SessionLock:
+    """机器级咨询锁：对锁文件加排他锁，进程退出（含崩溃）时由操作系统自动释放。
+
+    锁文件只作为锁的载体，不写内容也不删除（删除会让并发进程锁在不同的 inode 上）。
+    同一进程内的不同实例之间同样互斥。
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self, timeout: float) -> bool:
+        """在 timeout 秒内尝试加锁，成功返回 True；超时或锁文件不可用返回 False。"""
+
+        if self._fd is not None:
+            raise RuntimeError("lock already held")
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError:
+            return False
+        deadline = time.monotonic() + timeout
+        while True:
+            if _try_lock(fd):
+                self._fd = fd
+                return True
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                return False
+            time.sleep(LOCK_POLL_INTERVAL)
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _file_key(stat: os.stat_result) -> _FileKey:
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class _Encoded:
+    """一次写入的编码结果：raw 为未加密的文件内容（用于去重），content 为实际落盘的字节，data 为之后 read() 的返回值。"""
+
+    __slots__ = ("raw", "content", "data")
+
+    def __init__(self, raw: bytes, content: bytes, data: Dict[str, Any]) -> None:
+        self.raw = raw
+        self.content = content
+        self.data = data
+
+
+class _PendingWrite:
+    __slots__ = ("manager", "encoded", "timer", "flushing")
+
+    def __init__(self, manager: "SessionFileManager", encoded: _Encoded, timer: threading.Timer) -> None:
+        self.manager = manager
+        self.encoded = encoded
+        self.timer = timer
+        self.flushing = False
+
+
+def _cancel_pending(path: str) -> None:
+    with _pending_lock:
+        pending = _pending.pop(path, None)
+    if pending is not None:
+        pending.timer.cancel()
+
+
+def _flush_path(path: str) -> None:
+    with _commit_lock:
+        with _pending_lock:
+            pending = _pending.get(path)
+            if pending is None:
+                return
+            # 落盘完成前保留在表中，同进程 read() 不会看到旧文件；此后的写入另起一轮合并。
+            pending.flushing = True
+        pending.timer.cancel()
+        try:
+            pending.manager._commit(pending.encoded)
+        except Exception:  # noqa: BLE001  # pragma: no cover - 后台落盘失败只能放弃，下次写入会重试
+            pass
+        finally:
+            with _pending_lock:
+                if _pending.get(path) is pending:
+                    del _pending[path]
+
+
+@atexit.register
+def flush_pending() -> None:
+    """落盘所有合并窗口内的待写内容；进程退出时自动调用。"""
+
+    for path in list(_pending):
+        _flush_path(path)
+
+
 class SessionFileManager:
     def __init__(
         self,
@@ -56,23 +223,44 @@ class SessionFileManager:
         now_provider=lambda: datetime.now(UTC),
         encoder: Optional[Callable[[str], str]] = None,
         decoder: Optional[Callable[[str], str]] = None,
+        coalesce_window: float = 0.0,
+        *,
+        protect: Optional[Callable[[bytes], bytes]] = None,
+        unprotect: Optional[Callable[[bytes], bytes]] = None,
+        file_format: Optional[str] = None,
     ) -> None:
         """
-        encoder/decoder：可选的加密/解密钩子，签名 str -> str。
+        encoder/decoder：可选的加密/解密钩子，签名 str -> str，作用于 JSON 格式（含读取旧文件）。
+        protect/unprotect：二进制格式的字节级加密/解密钩子（如 `dpapi_adapter.protect_bytes`）。
         默认明文保存；可在实际落地时替换为 DPAPI 等实现。
+        coalesce_window：大于 0 时启用写入合并（秒），适合短时间内会重复保存的调用方。
+        file_format："binary" 或 "json"；默认给了 `protect` 时为 "binary"，否则为 "json"。
         """
 
+        if file_format is None:
+            file_format = "binary" if protect is not None else "json"
+        elif file_format not in ("binary", "json"):
+            raise ValueError(f"unknown session file format: {file_format}")
         self.path = path or default_session_path()
         self.now = now_provider
         self.encoder = encoder
         self.decoder = decoder
+        self.coalesce_window = coalesce_window
+        self.protect = protect
+        self.unprotect = unprotect
+        self.file_format = "json" if encoder is not None and protect is None else file_format
 
     # --- Public API ---
     def read(self) -> Dict[str, Any]:
-        if not os.path.exists(self.path):
-            raise FileNotFoundError(self.path)
+        pending = _pending.get(self.path)
+        if pending is not None:
+            return dict(pending.encoded.data)
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            raise FileNotFoundError(self.path) from None
 
-        stat = os.stat(self.path)
         # 在部分平台上 utime 仅更新 mtime，st_ctime 不可控；使用 mtime 作为“最近写入时间”来判断残留。
         created_at_fs = datetime.fromtimestamp(stat.st_mtime, UTC)
         if self._is_stale(created_at_fs):
@@ -80,12 +268,95 @@ class SessionFileManager:
             self.delete()
             raise FileNotFoundError(self.path)
 
+        cache_key = (self.path, self.decoder, self.unprotect)
+        cached = _parsed_cache.get(cache_key)
+        if cached is not None and cached[0] == _file_key(stat):
+            return dict(cached[1])
+
         try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                content = f.read()
+            with open(self.path, "rb") as f:
+                # 以实际读到的文件为准：stat 与 open 之间文件可能已被原子替换。
+                key = _file_key(os.fstat(f.fileno()))
+                blob = f.read()
         except Exception as exc:  # noqa: BLE001
             raise ValueError(f"failed to read session file: {exc}") from exc
 
+        if session_codec.is_binary(blob):
+            data = self._read_binary(blob, key)
+        else:
+            data = self._read_json(blob, key)
+        _parsed_cache[cache_key] = (key, data)
+        return dict(data)
+
+    def write(self, payload: Dict[str, Any]) -> None:
+        self._validate_payload(payload)
+        encoded = self._encode(payload)
+        if self.coalesce_window > 0:
+            self._schedule(encoded)
+            return
+        with _commit_lock:
+            _cancel_pending(self.path)
+            self._commit(encoded)
+
+    def flush(self) -> None:
+        """立即落盘合并窗口内尚未写入的内容（没有待写内容时什么也不做）。"""
+
+        _flush_path(self.path)
+
+    def delete(self) -> None:
+        # 与后台落盘互斥：否则刚删除的会话可能被进行中的合并写入重新写回。
+        with _commit_lock:
+            _cancel_pending(self.path)
+            # 退出登录后不在内存里保留 refresh_token。
+            for key in [k for k in _parsed_cache if k[0] == self.path]:
+                _parsed_cache.pop(key, None)
+            _written.pop(self.path, None)
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                return
+
+    def watch(self, on_change: Callable[[bool], None], **kwargs: Any) -> SessionWatcher:
+        """监听会话文件的写入/删除，去抖后在监听线程上回调 `on_change(exists)`；用完调用 `stop()`。"""
+
+        try:
+            from .session_watcher import watch_session_file
+        except ImportError:  # pragma: no cover - allow direct execution
+            from session_watcher import watch_session_file
+
+        return watch_session_file(self.path, on_change, **kwargs)
+
+    @contextmanager
+    def lock(self, timeout: float) -> Iterator[bool]:
+        """持有 `<path>.lock` 上的机器级锁执行 with 块；产出是否拿到了锁。
+
+        超时不抛异常：调用方可以选择不加锁继续（退化为无协调），而不是让刷新整体失败。
+        """
+
+        lock = SessionLock(self.path + LOCK_SUFFIX)
+        acquired = lock.acquire(timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release()
+
+    # --- Internal ---
+    def _read_binary(self, blob: bytes, key: _FileKey) -> Dict[str, Any]:
+        body = session_codec.unseal(blob, unprotect=self.unprotect)
+        record = session_codec.unpack(body)
+        if record.expires_at_us < record.created_at_us:
+            raise ValueError("expires_at earlier than created_at")
+        if not session_codec.is_protected(blob):
+            _written[self.path] = (key, body, ("binary", None))
+        return record.to_dict()
+
+    def _read_json(self, blob: bytes, key: _FileKey) -> Dict[str, Any]:
+        try:
+            content = blob.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise ValueError(f"failed to read session file: {exc}") from exc
+
         if self.decoder:
             try:
                 content = self.decoder(content)
@@ -98,41 +369,80 @@ class SessionFileManager:
             raise ValueError("session file is not valid JSON") from exc
 
         self._validate_payload(data)
+        if self.decoder is None:
+            # 明文文件：磁盘字节即明文，可以与 encoder=None 的 JSON 写入比较。
+            _written[self.path] = (key, blob, ("json", None))
         return data
 
-    def write(self, payload: Dict[str, Any]) -> None:
-        self._validate_payload(payload)
-        parent = os.path.dirname(self.path) or "."
-        os.makedirs(parent, exist_ok=True)
-        content = json.dumps(payload, ensure_ascii=False)
+    def _encode(self, payload: Dict[str, Any]) -> _Encoded:
+        if self.file_format == "binary":
+            raw = session_codec.pack(payload)
+            try:
+                content = session_codec.seal(raw, protect=self.protect)
+            except Exception as exc:  # noqa: BLE001
+                raise ValueError("failed to encode session file") from exc
+            return _Encoded(raw, content, session_codec.unpack(raw).to_dict())
+
+        plaintext = json.dumps(payload, ensure_ascii=False)
+        content = plaintext
         if self.encoder:
             try:
-                content = self.encoder(content)
+                content = self.encoder(plaintext)
             except Exception as exc:  # noqa: BLE001
                 raise ValueError("failed to encode session file") from exc
+        return _Encoded(plaintext.encode("utf-8"), content.encode("utf-8"), json.loads(plaintext))
+
+    def _encoding(self) -> Tuple[str, Any]:
+        return (self.file_format, self.protect if self.file_format == "binary" else self.encoder)
+
+    def _schedule(self, encoded: _Encoded) -> None:
+        with _pending_lock:
+            pending = _pending.get(self.path)
+            if pending is not None and not pending.flushing:
+                pending.manager, pending.encoded = self, encoded
+                return
+            timer = threading.Timer(self.coalesce_window, _flush_path, (self.path,))
+            timer.daemon = True
+            _pending[self.path] = _PendingWrite(self, encoded, timer)
+            timer.start()
+
+    def _commit(self, encoded: _Encoded) -> bool:
+        """原子写入；内容与磁盘上一致时跳过并返回 False。调用方持有 `_commit_lock`。"""
+
+        encoding = self._encoding()
+        known = _written.get(self.path)
+        if known is not None and known[1:] == (encoded.raw, encoding):
+            try:
+                if _file_key(os.stat(self.path)) == known[0]:
+                    return False
+            except OSError:
+                pass
+
+        parent = os.path.dirname(self.path) or "."
+        os.makedirs(parent, exist_ok=True)
+        import tempfile
 
-        # 原子写入：避免另一个进程读到“被截断的半截 JSON”导致误判损坏。
+        # 原子写入：避免另一个进程读到被截断的半个文件导致误判损坏。
         tmp_fd, tmp_path = tempfile.mkstemp(prefix=".passport_session_", suffix=".tmp", dir=parent)
+        replaced = False
         try:
-            with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
-                f.write(content)
+            with os.fdopen(tmp_fd, "wb") as f:
+                f.write(encoded.content)
                 f.flush()
                 os.fsync(f.fileno())
+                key = _file_key(os.fstat(f.fileno()))  # rename 不改变 mtime/size/inode
             os.replace(tmp_path, self.path)
+            replaced = True
         finally:
-            try:
-                if os.path.exists(tmp_path):
+            if not replaced:
+                try:
                     os.remove(tmp_path)
-            except Exception:
-                pass
-
-    def delete(self) -> None:
-        try:
-            os.remove(self.path)
-        except FileNotFoundError:
-            return
+                except Exception:
+                    pass
+        _written[self.path] = (key, encoded.raw, encoding)
+        _parsed_cache[(self.path, self.decoder, self.unprotect)] = (key, encoded.data)
+        return True
 
-    # --- Internal ---
     def _is_stale(self, created_at_fs: datetime) -> bool:
         return self.now() - created_at_fs > TWO_HOURS
 
@@ -150,24 +460,13 @@ class SessionFileManager:
                 raise ValueError(f"missing field: {key}")
 
         try:
-            created_at = self._parse_ts(data["created_at"])
-            expires_at = self._parse_ts(data["expires_at"])
+            created_at = parse_epoch_us(data["created_at"])
+            expires_at = parse_epoch_us(data["expires_at"])
         except Exception as exc:  # noqa: BLE001
             raise ValueError("invalid timestamp fields") from exc
 
         if expires_at < created_at:
             raise ValueError("expires_at earlier than created_at")
 
-    def _parse_ts(self, value: Any) -> datetime:
-        if isinstance(value, (int, float)):
-            return datetime.fromtimestamp(float(value), UTC)
-        if isinstance(value, str):
-            # 支持 ISO8601
-            try:
-                return datetime.fromisoformat(value.replace("Z", "+00:00"))
-            except Exception as exc:  # noqa: BLE001
-                raise ValueError("invalid datetime string") from exc
-        raise ValueError("unsupported datetime format")
-
 
-__all__ = ["SessionFileManager", "default_session_path", "TWO_HOURS"]
+__all__ = ["SessionFileManager", "SessionLock", "default_session_path", "flush_pending", "TWO_HOURS"]
@@ -0,0 +1,244 @@
+"""session.dat 变化监听：替代 GUI 中固定 1.5s 的 `os.stat` 轮询。
+
+- `InotifyWatcher`（Linux）：在 session.dat 所在目录上注册 inotify，线程阻塞在 select 上，
+  空闲时零唤醒，变化在毫秒级送达。监听目录而不是文件本身，因为 `SessionFileManager.write`
+  以 tmp + `os.replace` 原子替换，文件 inode 每次都会变化。
+- `PollingWatcher`（其他平台/inotify 不可用时的回退）：比较 (st_mtime_ns, st_size, st_ino)，
+  间隔自适应——检测到变化后回到 `min_interval`，之后每次无变化翻倍，直到 `max_interval`。
+- 去抖：事件到达后等待 `debounce` 秒无新事件再回调一次，一次原子写入产生的多个事件只通知一次；
+  回调前再比较文件快照，内容元数据未变时不通知。
+
+`on_change(exists)` 在监听线程上调用，GUI 需自行投递到事件循环（如 `passport_client.tk_dispatch`）。
+一般通过 `watch_session_file()` 或 `SessionFileManager.watch()` 创建并启动。
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+Snapshot = Optional[Tuple[int, int, int]]
+
+DEFAULT_DEBOUNCE = 0.05
+POLL_MIN_INTERVAL = 0.1
+POLL_MAX_INTERVAL = 2.0
+
+# <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+def snapshot(path: str) -> Snapshot:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class SessionWatcher:
+    """监听线程骨架：子类实现 `_wait(timeout)`，返回期间是否观察到可能的变化。"""
+
+    def __init__(self, path: str, on_change: Callable[[bool], None], *, debounce: float = DEFAULT_DEBOUNCE) -> None:
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.wakeups = 0  # `_wait` 返回次数，用于观测空闲唤醒
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reported: Snapshot = None
+
+    def start(self) -> "SessionWatcher":
+        self._reported = snapshot(self.path)
+        self._thread = threading.Thread(target=self._run, name=f"session-watch:{os.path.basename(self.path)}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._close()
+
+    def _run(self) -> None:
+        due: Optional[float] = None
+        while not self._stopped.is_set():
+            timeout = None if due is None else max(0.0, due - time.monotonic())
+            changed = self._wait(timeout)
+            self.wakeups += 1
+            if self._stopped.is_set():
+                return
+            if changed:
+                due = time.monotonic() + self.debounce
+            elif due is not None and time.monotonic() >= due:
+                due = None
+                current = snapshot(self.path)
+                if current != self._reported:
+                    self._reported = current
+                    try:
+                        self.on_change(current is not None)
+                    except Exception:  # noqa: BLE001  # pragma: no cover - 回调自身负责处理异常
+                        pass
+
+    def _wait(self, timeout: Optional[float]) -> bool:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def _wake(self) -> None:
+        pass
+
+    def _close(self) -> None:
+        pass
+
+
+class PollingWatcher(SessionWatcher):
+    def __init__(
+        self,
+        path: str,
+        on_change: Callable[[bool], None],
+        *,
+        debounce: float = DEFAULT_DEBOUNCE,
+        min_interval: float = POLL_MIN_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+    ) -> None:
+        super().__init__(path, on_change, debounce=debounce)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._polled: Snapshot = None
+
+    def start(self) -> "SessionWatcher":
+        self._polled = snapshot(self.path)
+        return super().start()
+
+    def _wait(self, timeout: Optional[float]) -> bool:
+        delay = self.interval if timeout is None else min(timeout, self.interval)
+        if self._stopped.wait(delay):
+            return False
+        current = snapshot(self.path)
+        if current != self._polled:
+            self._polled = current
+            self.interval = self.min_interval
+            return True
+        if timeout is None or delay < timeout:
+            self.interval = min(self.interval * 2, self.max_interval)
+        return False
+
+
+class InotifyWatcher(PollingWatcher):
+    """inotify 监听；目录被删除/移走导致监听失效时，退化为轮询继续工作。"""
+
+    def __init__(self, path: str, on_change: Callable[[bool], None], *, debounce: float = DEFAULT_DEBOUNCE) -> None:
+        super().__init__(path, on_change, debounce=debounce)
+        libc = _libc()
+        if libc is None:
+            raise OSError("inotify unavailable")
+        self._name = os.fsencode(os.path.basename(self.path))
+        self._fd: Optional[int] = None
+        self._wake_r, self._wake_w = os.pipe()
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            self._close()
+            raise OSError(err, "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(os.path.dirname(self.path)), _WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            self._close()
+            raise OSError(err, "inotify_add_watch failed")
+        self._fd = fd
+
+    def _wait(self, timeout: Optional[float]) -> bool:
+        if self._fd is None:
+            return super()._wait(timeout)
+        readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        if self._fd not in readable:
+            return False
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        changed = False
+        offset = 0
+        while offset < len(buf):
+            _, mask, _, length = _EVENT.unpack_from(buf, offset)
+            name = buf[offset + _EVENT.size : offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & _IN_IGNORED:
+                os.close(self._fd)
+                self._fd = None
+                self._polled = snapshot(self.path)
+                changed = True
+            elif mask & _IN_Q_OVERFLOW or name == self._name:
+                changed = True
+        return changed
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def _close(self) -> None:
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = self._wake_r = self._wake_w = None  # type: ignore[assignment]
+
+
+_libc_handle: Optional[ctypes.CDLL] = None
+
+
+def _libc() -> Optional[ctypes.CDLL]:
+    global _libc_handle
+    if not sys.platform.startswith("linux"):
+        return None
+    if _libc_handle is None:
+        try:
+            lib = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            lib.inotify_init1.argtypes = [ctypes.c_int]
+            lib.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        except (OSError, AttributeError):
+            return None
+        _libc_handle = lib
+    return _libc_handle
+
+
+def watch_session_file(path: str, on_change: Callable[[bool], None], *, debounce: float = DEFAULT_DEBOUNCE) -> SessionWatcher:
+    """创建并启动当前平台最合适的监听器：优先 inotify，失败则回退为自适应轮询。"""
+
+    try:
+        watcher: SessionWatcher = InotifyWatcher(path, on_change, debounce=debounce)
+    except OSError:
+        watcher = PollingWatcher(path, on_change, debounce=debounce)
+    return watcher.start()
+
+
+__all__ = [
+    "InotifyWatcher",
+    "PollingWatcher",
+    "SessionWatcher",
+    "snapshot",
+    "watch_session_file",
+]
@@ -4,24 +4,29 @@
 提供最小可用的登录/刷新/退出与启动流程。
 
 使用方式：在集成测试或脚本中直接调用 ShellApp 的方法，无需 IPC。
+
+冷启动：HttpClient（连带 requests）与 AuthController 在第一次用到时才创建，`startup_flow` 与读取
+会话不会加载网络栈（stdio IPC 服务端以子进程方式随 Electron 启动，等的就是这段时间）。
 """
 
 from __future__ import annotations
 
 import os
-from typing import Optional, Dict, Any
+import threading
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from datetime import datetime
 
 # DPAPI hooks default to None; may be set by optional imports
 protect = None
 unprotect = None
+protect_bytes = None
+unprotect_bytes = None
 
 # 优先绝对导入，便于作为脚本或包使用
 try:  # pragma: no cover
     from ipc_adapter import emit_session_status, register_command
     from sso_startup import SsoStartupHandler
     from session_file_manager import SessionFileManager
-    from http_client import HttpClient
     from refresh_scheduler import RefreshScheduler, now_utc
     from logout_handler import LogoutHandler
     from auth_controller import AuthController
@@ -29,18 +34,19 @@ except Exception:  # pragma: no cover
     from ipc_adapter import emit_session_status, register_command
     from sso_startup import SsoStartupHandler
     from session_file_manager import SessionFileManager
-    from http_client import HttpClient
     from refresh_scheduler import RefreshScheduler, now_utc
     from logout_handler import LogoutHandler
     from auth_controller import AuthController
-    from .http_client import HttpClient
     from .refresh_scheduler import RefreshScheduler, now_utc
     from .logout_handler import LogoutHandler
     from .auth_controller import AuthController
     try:
-        from .dpapi_adapter import protect, unprotect
+        from .dpapi_adapter import protect, protect_bytes, unprotect, unprotect_bytes
     except Exception:  # pragma: no cover
-        protect = unprotect = None
+        protect = unprotect = protect_bytes = unprotect_bytes = None
+
+if TYPE_CHECKING:
+    from http_client import HttpClient
 
 
 class ShellApp:
@@ -61,6 +67,8 @@ class ShellApp:
             path=session_path,
             encoder=protect if protect else None,
             decoder=unprotect if unprotect else None,
+            protect=protect_bytes if protect_bytes else None,
+            unprotect=unprotect_bytes if unprotect_bytes else None,
         )
 
         self.logout_handler = logout_handler or LogoutHandler(
@@ -69,23 +77,19 @@ class ShellApp:
             broadcast_status=self._broadcast,
         )
 
-        self.http = http_client or HttpClient(
-            base_url=base_url,
-            app_id=app_id,
-            on_logout=lambda: self.logout_handler.logout(),
-            on_broadcast=lambda status: self._broadcast(status),
-        )
+        self.base_url = base_url
+        self.app_id = app_id
+        self._http = http_client
+        self._auth: Optional[AuthController] = None
+        # 在构造时定下会话基准：AuthController 懒建，若由它取时间，启动后、首次刷新前
+        # 其他客户端写入的会话会被当成“自己的旧会话”，从而多发一次后端刷新。
+        self._session_mark = now_utc()
+        # 懒加载的 http/auth 会被 IPC 工作线程与刷新定时器并发首次访问；建出两份 AuthController
+        # 会得到两个 SingleFlight，刷新合并随之失效。auth 内部会取 http，因此用可重入锁。
+        self._lazy_lock = threading.RLock()
 
         self.scheduler = scheduler or RefreshScheduler(on_refresh=self._on_refresh_tick)
 
-        self.auth = AuthController(
-            http=self.http,
-            file_mgr=self.file_mgr,
-            refresh_scheduler=self.scheduler,
-            logout_handler=self.logout_handler,
-            broadcast_status=self._broadcast,
-        )
-
         self.startup = SsoStartupHandler(
             read_session_file=lambda: self._read_as_dict(),
             delete_session_file=lambda: self.file_mgr.delete(),
@@ -97,6 +101,38 @@ class ShellApp:
         register_command("refresh", lambda p: self.refresh(p.get("guid"), p.get("refresh_token")))
         register_command("logout", lambda p: self.logout(p.get("access_token")))
 
+    @property
+    def http(self) -> HttpClient:
+        if self._http is None:
+            with self._lazy_lock:
+                if self._http is None:
+                    try:  # pragma: no cover
+                        from http_client import HttpClient
+                    except Exception:  # pragma: no cover
+                        from .http_client import HttpClient
+                    self._http = HttpClient(
+                        base_url=self.base_url,
+                        app_id=self.app_id,
+                        on_logout=lambda: self.logout_handler.logout(),
+                        on_broadcast=lambda status: self._broadcast(status),
+                    )
+        return self._http
+
+    @property
+    def auth(self) -> AuthController:
+        if self._auth is None:
+            with self._lazy_lock:
+                if self._auth is None:
+                    self._auth = AuthController(
+                        http=self.http,
+                        file_mgr=self.file_mgr,
+                        refresh_scheduler=self.scheduler,
+                        logout_handler=self.logout_handler,
+                        broadcast_status=self._broadcast,
+                        session_mark=self._session_mark,
+                    )
+        return self._auth
+
     # --- Public API ---
     def startup_flow(self, now: Optional[datetime] = None) -> None:
         # 先广播 none，若后续有有效会话会被 sso_available 覆盖
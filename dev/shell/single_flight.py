@@ -0,0 +1,90 @@
+"""Single-flight：同一个 key 的并发调用只执行一次，其余调用者等待并共享同一结果（或异常）。
+
+用于刷新去重：定时刷新、IPC refresh、GUI 自动登录可能同时对同一 (guid, refresh_token) 发起刷新，
+合并后只有一次后端往返和一次 session.dat 写入。执行结束即从表中移除，不缓存结果——之后的调用
+会重新执行。
+
+- `do(key, fn)`：同步调用，首个调用者在自己的线程上执行 `fn`，其余调用者阻塞等待；
+- `do_async(key, start, on_done)`：首个调用者执行 `start(finish)` 发起异步工作，
+  所有调用者的 `on_done(result)` 在 `finish(result)` 被调用的线程上依次回调。
+同步与异步调用者可以加入同一次执行。
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "callbacks", "joined")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.callbacks: List[Callable[[Any], None]] = []
+        self.joined = 1
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        call, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as exc:
+                self._finish(key, call, None, exc)
+                raise
+            self._finish(key, call, result, None)
+            return result
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do_async(self, key: Hashable, start: Callable[[Callable[[Any], None]], None], on_done: Callable[[Any], None]) -> None:
+        call, leader = self._join(key, on_done)
+        if not leader:
+            return
+        try:
+            start(lambda result: self._finish(key, call, result, None))
+        except BaseException as exc:
+            self._finish(key, call, None, exc)
+            raise
+
+    def pending(self, key: Hashable) -> int:
+        """当前共享该 key 进行中调用的调用者数（含执行者），无进行中调用时为 0。"""
+
+        with self._lock:
+            call = self._calls.get(key)
+            return call.joined if call is not None else 0
+
+    def _join(self, key: Hashable, callback: Optional[Callable[[Any], None]] = None) -> tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.joined += 1
+            if callback is not None:
+                call.callbacks.append(callback)
+            return call, leader
+
+    def _finish(self, key: Hashable, call: _Call, result: Any, error: Optional[BaseException]) -> None:
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result, call.error = result, error
+        call.done.set()
+        if error is None:
+            for callback in call.callbacks:
+                callback(result)
+
+
+__all__ = ["SingleFlight"]
@@ -8,11 +8,15 @@ try:  # pragma: no cover
 except Exception:  # pragma: no cover
     from .error_handling import map_error_to_action, handle_error_action
 
+try:
+    from .timestamp_codec import epoch_us, parse_epoch_us
+except ImportError:  # pragma: no cover - allow direct execution
+    from timestamp_codec import epoch_us, parse_epoch_us
+
 try:
     from native.local_session import LocalSessionValidator, ValidationStatus
 except Exception:  # pragma: no cover
     from enum import Enum
-    from datetime import datetime, timezone
 
     class ValidationStatus(str, Enum):
         VALID = "valid"
@@ -21,18 +25,17 @@ except Exception:  # pragma: no cover
         UNKNOWN = "unknown"
 
     class LocalSessionValidator:  # type: ignore
+        def __init__(self, parse_time=parse_epoch_us) -> None:
+            self._parse = parse_time
+
         def validate(self, struct, now: datetime):
             try:
                 if not all(k in struct for k in ("guid", "refresh_token", "expires_at")):
                     return ValidationStatus.CORRUPTED
-                exp = struct["expires_at"]
-                if isinstance(exp, (int, float)):
-                    exp_dt = datetime.fromtimestamp(float(exp), timezone.utc)
-                else:
-                    exp_dt = datetime.fromisoformat(str(exp).replace("Z", "+00:00"))
+                expires_at = self._parse(struct["expires_at"])
             except Exception:
                 return ValidationStatus.CORRUPTED
-            if exp_dt < now:
+            if expires_at < epoch_us(now):
                 return ValidationStatus.EXPIRED_LOCAL
             return ValidationStatus.VALID
 
@@ -59,7 +62,8 @@ class SsoStartupHandler:
         self._read = read_session_file
         self._delete = delete_session_file
         self._broadcast = broadcast_status
-        self._validator = validator or LocalSessionValidator()
+        # 注入壳层带缓存的时间解析，与启动/监听/自动登录共用同一份解析缓存
+        self._validator = validator or LocalSessionValidator(parse_time=parse_epoch_us)
 
     def handle_error_code(self, code: str) -> None:
         """在壳层收到后端错误码时按契约处理（SSO 启动/刷新场景）。"""
@@ -12,11 +12,9 @@ from __future__ import annotations
 import os
 import re
 import sys
-import threading
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Tuple
 
-import requests
 import tkinter as tk
 from tkinter import ttk, messagebox
 
@@ -30,14 +28,22 @@ def _ensure_dev_on_syspath() -> None:
 _ensure_dev_on_syspath()
 
 from shell.session_file_manager import SessionFileManager, default_session_path
-from shell.dpapi_adapter import protect as dpapi_protect, unprotect as dpapi_unprotect
+from shell.dpapi_adapter import (
+    protect as dpapi_protect,
+    protect_bytes as dpapi_protect_bytes,
+    unprotect as dpapi_unprotect,
+    unprotect_bytes as dpapi_unprotect_bytes,
+)
 from shell.client_config import default_config_path, load_config, save_config
+from shell.passport_client import HttpResult, get_client, tk_dispatch
+from shell.timestamp_codec import TWO_HOURS_US, epoch_us, parse_epoch_us
 
 # 常量
 UTC = timezone.utc
 PHONE_RE = re.compile(r"^1[3-9][0-9]{9}$")
-TWO_HOURS = timedelta(hours=2)
 APP_ID = "youlishe"
+# Web 端 saveSession 可能在短时间内连续调用：合并为一次落盘（秒）
+SAVE_SESSION_COALESCE_WINDOW = 0.2
 
 def now_utc() -> datetime:
     return datetime.now(UTC)
@@ -45,91 +51,28 @@ def now_utc() -> datetime:
 def now_iso() -> str:
     return now_utc().isoformat()
 
-def parse_iso_dt(value: Any) -> datetime:
-    if isinstance(value, datetime):
-        return value.astimezone(UTC)
-    if isinstance(value, (int, float)):
-        return datetime.fromtimestamp(float(value), UTC)
-    if not isinstance(value, str):
-        raise ValueError("invalid datetime")
-    s = value.strip()
-    if s.endswith("Z"):
-        s = s[:-1] + "+00:00"
-    return datetime.fromisoformat(s).astimezone(UTC)
-
-def ensure_api_base(url: str) -> str:
-    u = (url or "").strip().rstrip("/")
-    if not u:
-        return ""
-    return u if u.endswith("/api") else f"{u}/api"
-
 def normalize_session_path(path: str) -> str:
     p = (path or "").strip()
     return p if p else default_session_path()
 
 
-class PassportClient:
-    """Passport API 客户端"""
-    def __init__(self, base_api: str, timeout_sec: int = 15) -> None:
-        self.base_api = ensure_api_base(base_api)
-        self.timeout_sec = timeout_sec
-
-    def _post(self, path: str, payload: Dict[str, Any], retries: int = 2) -> Tuple[bool, int, Any, Optional[str]]:
-        if not self.base_api:
-            return False, 0, None, "Base URL 为空"
-        url = f"{self.base_api}{path}"
-        
-        last_err = None
-        for attempt in range(retries + 1):
-            try:
-                resp = requests.post(url, json=payload, timeout=self.timeout_sec)
-                data = None
-                if resp.content:
-                    try:
-                        data = resp.json()
-                    except Exception:
-                        data = resp.text
-                if resp.status_code >= 400:
-                    err_msg = data.get("message") if isinstance(data, dict) else None
-                    return False, resp.status_code, data, err_msg or f"HTTP {resp.status_code}"
-                return True, resp.status_code, data, None
-            except requests.exceptions.Timeout:
-                last_err = "网络超时，请检查网络连接"
-            except requests.exceptions.ConnectionError:
-                last_err = "无法连接服务器，请检查网络"
-            except Exception as exc:
-                last_err = str(exc)
-            
-            if attempt < retries:
-                import time
-                time.sleep(0.5 * (attempt + 1))
-        
-        return False, 0, None, last_err
-
-    def send_code(self, phone: str):
-        return self._post("/passport/send-code", {"phone": phone})
-
-    def login_by_phone(self, phone: str, code: str):
-        return self._post("/passport/login-by-phone", {"phone": phone, "code": code, "app_id": APP_ID})
-
-    def refresh_token(self, guid: str, refresh_token: str):
-        return self._post("/passport/refresh-token", {"guid": guid, "refresh_token": refresh_token, "app_id": APP_ID})
-
-    def logout(self, access_token: Optional[str]):
-        payload = {"access_token": access_token} if access_token else {}
-        return self._post("/passport/logout", payload)
-
-
 class SessionStore:
     """Session 存储管理"""
     def __init__(self, path: str, use_dpapi: bool = True) -> None:
         self.path = normalize_session_path(path)
         self.use_dpapi = use_dpapi
 
-    def _manager(self):
+    def _manager(self, coalesce_window: float = 0.0):
         if self.use_dpapi:
-            return SessionFileManager(path=self.path, encoder=dpapi_protect, decoder=dpapi_unprotect)
-        return SessionFileManager(path=self.path, encoder=None, decoder=None)
+            return SessionFileManager(
+                path=self.path,
+                encoder=dpapi_protect,
+                decoder=dpapi_unprotect,
+                coalesce_window=coalesce_window,
+                protect=dpapi_protect_bytes,
+                unprotect=dpapi_unprotect_bytes,
+            )
+        return SessionFileManager(path=self.path, encoder=None, decoder=None, coalesce_window=coalesce_window)
 
     def read(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         try:
@@ -139,9 +82,9 @@ class SessionStore:
         except Exception as exc:
             return None, f"读取 session 失败：{exc}"
 
-    def write(self, payload: Dict[str, Any]) -> Optional[str]:
+    def write(self, payload: Dict[str, Any], *, coalesce_window: float = 0.0) -> Optional[str]:
         try:
-            self._manager().write(payload)
+            self._manager(coalesce_window).write(payload)
             return None
         except Exception as exc:
             return f"写入 session 失败：{exc}"
@@ -160,15 +103,16 @@ def validate_session(sess: Dict[str, Any], now: datetime) -> Tuple[bool, str]:
     if not required.issubset(sess.keys()):
         return False, "session 字段缺失"
     try:
-        created_at = parse_iso_dt(sess.get("created_at"))
-        expires_at = parse_iso_dt(sess.get("expires_at"))
+        created_at = parse_epoch_us(sess.get("created_at"))
+        expires_at = parse_epoch_us(sess.get("expires_at"))
     except Exception:
         return False, "session 时间字段非法"
+    now_us = epoch_us(now)
     if expires_at < created_at:
         return False, "session 时间范围非法"
-    if now > expires_at:
+    if now_us > expires_at:
         return False, "session 已过期"
-    if now - created_at > TWO_HOURS:
+    if now_us - created_at > TWO_HOURS_US:
         return False, "session 超过 2 小时阈值"
     return True, "ok"
 
@@ -270,29 +214,17 @@ class LoginWindow(tk.Tk):
         self.send_btn.config(state="disabled")
         self._set_status("正在发送验证码...")
         
-        def work():
-            client = PassportClient(self.config["base_url"])
-            return client.send_code(phone)
-        
-        def done(result):
+        def done(result: HttpResult):
             self._sending_code = False
             self.send_btn.config(state="normal")
-            ok, status, data, err = result
-            if ok:
+            if result.ok:
                 self._set_status("验证码已发送，请查看手机")
                 messagebox.showinfo("成功", "验证码已发送")
             else:
                 self._set_status("")
-                messagebox.showerror("发送失败", err or "发送失败，请稍后重试")
+                messagebox.showerror("发送失败", result.message or result.error or "发送失败，请稍后重试")
         
-        def run():
-            result = work()
-            try:
-                self.after(0, lambda: done(result))
-            except tk.TclError:
-                pass
-        
-        threading.Thread(target=run, daemon=True).start()
+        get_client(self.config["base_url"]).send_code(phone, on_done=done, dispatch=tk_dispatch(self))
         
     def _login(self):
         if self._logging_in:
@@ -312,18 +244,14 @@ class LoginWindow(tk.Tk):
         self.login_btn.config(state="disabled")
         self._set_status("正在登录...")
         
-        def work():
-            client = PassportClient(self.config["base_url"])
-            return client.login_by_phone(phone, code)
-        
-        def done(result):
+        def done(result: HttpResult):
             self._logging_in = False
             self.login_btn.config(state="normal")
-            ok, status, data, err = result
+            data = result.data
             
-            if not ok or not isinstance(data, dict):
+            if not result.ok or not isinstance(data, dict):
                 self._set_status("")
-                messagebox.showerror("登录失败", err or "登录失败，请检查验证码")
+                messagebox.showerror("登录失败", result.message or result.error or "登录失败，请检查验证码")
                 return
             
             # 保存 session
@@ -355,14 +283,7 @@ class LoginWindow(tk.Tk):
             self.destroy()
             self.on_success(self.access_token)
         
-        def run():
-            result = work()
-            try:
-                self.after(0, lambda: done(result))
-            except tk.TclError:
-                pass
-        
-        threading.Thread(target=run, daemon=True).start()
+        get_client(self.config["base_url"]).login_by_phone(phone, code, APP_ID, on_done=done, dispatch=tk_dispatch(self))
 
 
 class StarCoinsApp:
@@ -405,10 +326,10 @@ class StarCoinsApp:
                 store.delete()
                 return None
             
-            client = PassportClient(self.config["base_url"])
-            ok, status, data, err = client.refresh_token(guid, rt)
-            if not ok or not isinstance(data, dict):
-                print(f"[DEBUG] Token refresh failed: {err}")
+            result = get_client(self.config["base_url"]).refresh_token(guid, rt, APP_ID)
+            data = result.data
+            if not result.ok or not isinstance(data, dict):
+                print(f"[DEBUG] Token refresh failed: {result.message or result.error}")
                 return None
             
             token = data.get("access_token", "")
@@ -498,14 +419,17 @@ class StarCoinsApp:
                         return
                     
                     store = SessionStore(self._app.config["session_path"], self._app.config["use_dpapi"])
-                    store.write({
-                        "guid": guid,
-                        "phone": phone,
-                        "user_type": "user",
-                        "refresh_token": refresh_token,
-                        "created_at": now_iso(),
-                        "expires_at": expires_at,
-                    })
+                    store.write(
+                        {
+                            "guid": guid,
+                            "phone": phone,
+                            "user_type": "user",
+                            "refresh_token": refresh_token,
+                            "created_at": now_iso(),
+                            "expires_at": expires_at,
+                        },
+                        coalesce_window=SAVE_SESSION_COALESCE_WINDOW,
+                    )
                     print(f"[Api.saveSession] Session saved for {phone}")
                 except Exception as e:
                     print(f"[Api.saveSession] Error: {e}")
@@ -535,8 +459,7 @@ class StarCoinsApp:
         """退出登录"""
         try:
             # 调用后端登出
-            client = PassportClient(self.config["base_url"])
-            client.logout(self.access_token)
+            get_client(self.config["base_url"]).logout(self.access_token)
         except Exception:
             pass
         
@@ -32,7 +32,14 @@ def _send_json(handler: BaseHTTPRequestHandler, code: int, payload: Dict[str, An
 
 
 class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1：同一连接上可连续处理多个请求（keep-alive），响应均带 Content-Length。
+    protocol_version = "HTTP/1.1"
+    # 响应头与响应体分两次写出；不关 Nagle 的话长连接上每个响应都会被延迟 ACK 卡约 40ms。
+    disable_nagle_algorithm = True
+
     def do_POST(self):  # noqa: N802
+        # 读掉请求体，否则残留字节会被当作下一个请求行。
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
         try:
             if self.path.endswith("/login-by-phone"):
                 return self._handle_login()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from shell.http_client import HttpClient
+from shell.stub_backend import StubHandler, ThreadingHTTPServer, state
+
+
+class CountingHandler(StubHandler):
+    connections = 0
+    # 服务端空闲 0.2s 即关闭长连接，模拟后端 keepAliveTimeout。
+    timeout = 0.2
+
+    def setup(self) -> None:
+        type(self).connections += 1
+        super().setup()
+
+
+class PooledHttpClientTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=1)
+
+    def setUp(self) -> None:
+        state.mode = "ok"
+        CountingHandler.connections = 0
+
+    def _client(self, **kwargs) -> HttpClient:
+        client = HttpClient(self.base_url, "jiuweihu", on_logout=lambda: None, on_broadcast=lambda s: None, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_keep_alive_reuses_one_connection(self) -> None:
+        client = self._client()
+        for _ in range(5):
+            self.assertEqual(client.refresh_token("G-STUB", "R-STUB")["guid"], "G-STUB")
+        self.assertEqual(CountingHandler.connections, 1)
+
+    def test_close_mode_opens_a_connection_per_request(self) -> None:
+        client = self._client(keep_alive=False)
+        for _ in range(3):
+            client.refresh_token("G-STUB", "R-STUB")
+        self.assertEqual(CountingHandler.connections, 3)
+
+    def test_connection_closed_by_server_is_replaced(self) -> None:
+        client = self._client(max_idle=60.0)
+        client.refresh_token("G-STUB", "R-STUB")
+        time.sleep(0.4)  # 服务端已关闭空闲连接
+        self.assertEqual(client.refresh_token("G-STUB", "R-STUB")["guid"], "G-STUB")
+        self.assertEqual(CountingHandler.connections, 2)
+
+    def test_idle_connection_is_dropped_before_reuse(self) -> None:
+        client = self._client(max_idle=0.05)
+        client.refresh_token("G-STUB", "R-STUB")
+        time.sleep(0.1)  # 客户端视角已超过 max_idle，服务端尚未关闭
+        client.refresh_token("G-STUB", "R-STUB")
+        self.assertEqual(CountingHandler.connections, 2)
+
+    def test_concurrent_requests_bounded_by_pool_size(self) -> None:
+        client = self._client(pool_size=2)
+        threads = [threading.Thread(target=client.refresh_token, args=("G-STUB", "R-STUB")) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(CountingHandler.connections, 2)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -4,12 +4,37 @@ import json
 import os
 import subprocess
 import sys
+import tempfile
 import threading
 import time
 import unittest
+from unittest import mock
+
+import ipc_stdio_server
 
 from stub_backend import create_server
 
+SERVER = os.path.join(os.path.dirname(__file__), "ipc_stdio_server.py")
+
+# 冷启动预算：startup + get_session 期间、在解释器自身启动之外新导入的模块。
+# 当前约 45 个模块 / 40ms；改造前（启动即导入 requests）约 177 个模块 / 170ms。
+# 时间预算放宽到约 3 倍以容忍机器抖动，模块数与禁止列表是确定性的回归信号。
+IMPORT_BUDGET_US = 120_000
+IMPORT_COUNT_BUDGET = 80
+FORBIDDEN_AT_STARTUP = ("requests", "urllib3", "http.client", "http_client", "ssl", "socket")
+
+
+def _parse_importtime(stderr: str) -> dict:
+    """解析 `-X importtime` 输出：模块名 -> 自身导入耗时（微秒）。"""
+
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line.split(":", 1)[1].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules
+
 
 class IpcStdioServerTests(unittest.TestCase):
     def test_startup_and_login_emits_session_status(self):
@@ -75,5 +100,173 @@ class IpcStdioServerTests(unittest.TestCase):
         t.join(timeout=1)
 
 
+class IpcStdioColdStartTests(unittest.TestCase):
+    def test_startup_and_get_session_stay_within_import_budget(self):
+        baseline = _parse_importtime(
+            subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True).stderr
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env["PASSPORT_SESSION_PATH"] = os.path.join(tmp, "session.dat")
+            requests_in = "".join(
+                json.dumps(req) + "\n" for req in ({"id": "1", "cmd": "startup"}, {"id": "2", "cmd": "get_session"})
+            )
+            proc = subprocess.run(
+                [sys.executable, "-X", "importtime", SERVER],
+                input=requests_in,
+                capture_output=True,
+                text=True,
+                env=env,
+                timeout=30,
+            )
+
+        responses = {obj["id"]: obj for obj in map(json.loads, proc.stdout.splitlines()) if "id" in obj}
+        self.assertTrue(responses["1"]["ok"])
+        self.assertEqual(responses["2"]["result"], {"session": None})
+
+        imported = {name: us for name, us in _parse_importtime(proc.stderr).items() if name not in baseline}
+        for name in FORBIDDEN_AT_STARTUP:
+            self.assertNotIn(name, imported)
+        self.assertLessEqual(len(imported), IMPORT_COUNT_BUDGET, sorted(imported))
+        self.assertLessEqual(sum(imported.values()), IMPORT_BUDGET_US, sorted(imported.items(), key=lambda kv: -kv[1])[:10])
+
+
+class _SlowRefreshApp:
+    """refresh 阻塞到 release 被置位，模拟卡在 HttpClient 超时上的刷新；calls 记录各指令的完成顺序。"""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.refreshing = 0
+        self.calls: list = []
+
+    def refresh(self, guid, refresh_token):
+        self.refreshing += 1
+        self.release.wait(10)
+        self.calls.append("refresh")
+        return True
+
+    def logout(self, access_token):
+        self.calls.append("logout")
+
+    def _read_as_dict(self):
+        return {"guid": "G1"}
+
+
+class IpcStdioConcurrencyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.app = _SlowRefreshApp()
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+        self.stdin_w = os.fdopen(in_w, "w", buffering=1)
+        self.stdout_r = os.fdopen(out_r, "r")
+        stdin_r = os.fdopen(in_r, "r")
+        stdout_w = os.fdopen(out_w, "w")
+        patches = [
+            mock.patch.object(ipc_stdio_server, "_get_app", lambda: self.app),
+            mock.patch.object(sys, "stdin", stdin_r),
+            mock.patch.object(sys, "stdout", stdout_w),
+        ]
+        for p in patches:
+            p.start()
+
+        self.responses: dict = {}
+        self.arrived = threading.Condition()
+        self.order: list = []
+
+        def reader() -> None:
+            for line in self.stdout_r:
+                obj = json.loads(line)
+                with self.arrived:
+                    self.responses[obj["id"]] = (time.perf_counter(), obj)
+                    self.order.append(obj["id"])
+                    self.arrived.notify_all()
+
+        self.server = threading.Thread(target=ipc_stdio_server.main, daemon=True)
+        self.reader = threading.Thread(target=reader, daemon=True)
+        self.server.start()
+        self.reader.start()
+
+        def cleanup() -> None:
+            self.app.release.set()
+            self.stdin_w.close()
+            self.server.join(timeout=5)
+            for p in reversed(patches):
+                p.stop()
+            stdin_r.close()
+            stdout_w.close()
+            self.reader.join(timeout=5)
+            self.stdout_r.close()
+
+        self.addCleanup(cleanup)
+
+    def _send(self, req_id: str, cmd: str) -> float:
+        start = time.perf_counter()
+        self.stdin_w.write(json.dumps({"id": req_id, "cmd": cmd, "params": {}}) + "\n")
+        return start
+
+    def _wait(self, req_id: str, timeout: float = 5.0):
+        with self.arrived:
+            self.assertTrue(self.arrived.wait_for(lambda: req_id in self.responses, timeout), req_id)
+            return self.responses[req_id]
+
+    def _get_session_p99(self, prefix: str, n: int = 200) -> float:
+        samples = []
+        for i in range(n):
+            req_id = f"{prefix}{i}"
+            start = self._send(req_id, "get_session")
+            arrived, obj = self._wait(req_id)
+            self.assertEqual(obj["result"], {"session": {"guid": "G1"}})
+            samples.append(arrived - start)
+        samples.sort()
+        return samples[int(n * 0.99) - 1]
+
+    def test_get_session_p99_stays_flat_while_refreshes_in_flight(self):
+        idle_p99 = self._get_session_p99("idle-")
+
+        for i in range(3):  # session 道一次只跑一个，其余在队列里排队
+            self._send(f"refresh-{i}", "refresh")
+        deadline = time.time() + 5
+        while self.app.refreshing < 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+        busy_p99 = self._get_session_p99("busy-")
+        self.assertFalse(any(k.startswith("refresh-") for k in self.responses))  # 测量期间刷新一直在途
+
+        # 串行实现下 get_session 会等满整个刷新（这里是无限期）；并发后与空闲时处于同一量级。
+        # 绝对余量放宽以容忍单核、负载不稳的测试机。
+        self.assertLess(busy_p99, idle_p99 * 5 + 0.05, (idle_p99, busy_p99))
+
+        self.app.release.set()
+        for i in range(3):
+            self.assertEqual(self._wait(f"refresh-{i}")[1], {"id": f"refresh-{i}", "ok": True, "result": {"ok": True}})
+        # 响应乱序：先发出的 refresh 在后发出的 get_session 之后才返回
+        self.assertLess(self.order.index("busy-0"), self.order.index("refresh-0"))
+
+    def test_logout_waits_for_refresh_that_arrived_first(self):
+        # refresh 在 logout 之后落盘会把已退出的用户重新登录，因此两者必须按到达顺序完成
+        self._send("refresh", "refresh")
+        self._send("logout", "logout")
+        self._send("read", "get_session")
+        self._wait("read")  # 只读指令不排在 session 道后面
+        time.sleep(0.05)
+        self.assertEqual(self.app.calls, [])  # logout 仍在排队
+
+        self.app.release.set()
+        self._wait("logout")
+        self.assertEqual(self.app.calls, ["refresh", "logout"])
+        self.assertLess(self.order.index("refresh"), self.order.index("logout"))
+
+    def test_unknown_and_malformed_requests_get_error_responses(self):
+        self._send("x", "nope")
+        self.assertEqual(self._wait("x")[1], {"id": "x", "ok": False, "error": "unknown cmd: nope"})
+        self.stdin_w.write("not json\n")
+        self._send("y", "get_session")
+        self.assertTrue(self._wait("y")[1]["ok"])
+        with self.arrived:
+            self.assertTrue(self.arrived.wait_for(lambda: None in self.responses, 5))
+        self.assertFalse(self.responses[None][1]["ok"])
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from shell.passport_client import EndpointPolicy, PassportClient, get_client
+from shell.stub_backend import StubHandler, ThreadingHTTPServer, state
+
+
+class FlakyHandler(StubHandler):
+    """前 `drops` 个请求读完请求体后不回响应直接断开；`delay` 秒后才处理请求。"""
+
+    drops = 0
+    delay = 0.0
+    requests = 0
+    connections = 0
+
+    def setup(self) -> None:
+        type(self).connections += 1
+        super().setup()
+
+    def do_POST(self):  # noqa: N802
+        cls = type(self)
+        cls.requests += 1
+        if cls.drops > 0:
+            cls.drops -= 1
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.close_connection = True
+            return
+        time.sleep(cls.delay)
+        return super().do_POST()
+
+
+class PassportClientTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=1)
+
+    def setUp(self) -> None:
+        state.mode = "ok"
+        FlakyHandler.drops = 0
+        FlakyHandler.delay = 0.0
+        FlakyHandler.requests = 0
+        FlakyHandler.connections = 0
+
+    def _client(self, **kwargs) -> PassportClient:
+        client = PassportClient(self.base_url, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_get_client_shares_one_instance_per_base_api(self) -> None:
+        self.assertIs(get_client(self.base_url), get_client(self.base_url + "/api/"))
+        self.assertIsNot(get_client(self.base_url), get_client("http://127.0.0.1:1"))
+
+    def test_threads_share_a_bounded_keep_alive_pool(self) -> None:
+        client = self._client(pool_size=2)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(client.refresh_token("G-STUB", "R-STUB", "jiuweihu")))
+            for _ in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(len(results), 10)
+        self.assertLessEqual(FlakyHandler.connections, 2)
+
+    def test_idempotent_call_retries_dropped_connection(self) -> None:
+        FlakyHandler.drops = 2
+        result = self._client().refresh_token("G-STUB", "R-STUB", "jiuweihu")
+        self.assertTrue(result.ok)
+        self.assertEqual(FlakyHandler.requests, 3)
+
+    def test_non_idempotent_call_is_not_replayed_after_send(self) -> None:
+        FlakyHandler.drops = 1
+        result = self._client().login_by_phone("13800138000", "123456", "jiuweihu")
+        self.assertFalse(result.ok)
+        self.assertEqual(FlakyHandler.requests, 1)
+
+    def test_http_errors_carry_code_and_are_not_retried(self) -> None:
+        state.mode = "refresh_expired"
+        result = self._client().refresh_token("G-STUB", "R-STUB", "jiuweihu")
+        self.assertEqual((result.ok, result.status_code, result.error_code), (False, 401, "ERR_REFRESH_EXPIRED"))
+        self.assertEqual(FlakyHandler.requests, 1)
+
+    def test_async_call_returns_immediately_and_retries_off_thread(self) -> None:
+        FlakyHandler.drops = 1
+        done = threading.Event()
+        seen = {}
+
+        def on_done(result) -> None:
+            seen["result"] = result
+            seen["thread"] = threading.current_thread()
+            done.set()
+
+        caller = threading.current_thread()
+        start = time.perf_counter()
+        self.assertIsNone(self._client().verify_token("A.x", "jiuweihu", on_done=on_done))
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertTrue(done.wait(5))
+        self.assertIsNot(seen["thread"], caller)
+        self.assertEqual(FlakyHandler.requests, 2)
+
+    def test_dispatch_delivers_result_on_caller_loop(self) -> None:
+        queued = []
+        done = threading.Event()
+        client = self._client()
+        client.refresh_token("G-STUB", "R-STUB", "jiuweihu", on_done=lambda r: done.set(), dispatch=queued.append)
+        deadline = time.monotonic() + 5
+        while not queued and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(done.is_set())
+        queued[0]()  # 模拟 Tk 事件循环执行 after(0, fn)
+        self.assertTrue(done.is_set())
+
+    def test_endpoint_budget_bounds_total_time(self) -> None:
+        FlakyHandler.delay = 1.0
+        client = self._client(policies={"/passport/verify-token": EndpointPolicy(0.3)})
+        start = time.perf_counter()
+        result = client.verify_token("A.x", "jiuweihu")
+        self.assertFalse(result.ok)
+        self.assertLess(time.perf_counter() - start, 0.8)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
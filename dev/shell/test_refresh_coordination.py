@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+
+from shell.auth_controller import AuthController
+from shell.http_client import HttpClient
+from shell.logout_handler import LogoutHandler
+from shell.refresh_scheduler import RefreshScheduler
+from shell.session_file_manager import SessionFileManager, SessionLock
+from shell.stub_backend import StubHandler, ThreadingHTTPServer, state
+
+SHELL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class CountingHandler(StubHandler):
+    """统计 refresh 次数；`gate` 未置位时 refresh 阻塞，用于制造并发窗口。"""
+
+    gate = threading.Event()
+    refreshes = 0
+
+    def _handle_refresh(self):
+        type(self).refreshes += 1
+        self.gate.wait(10)
+        return super()._handle_refresh()
+
+
+class SessionLockTests(unittest.TestCase):
+    def test_lock_is_exclusive_across_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "session.dat.lock")
+            script = textwrap.dedent(
+                f"""
+                import sys
+                sys.path.insert(0, {SHELL_DIR!r})
+                from session_file_manager import SessionLock
+                lock = SessionLock({path!r})
+                assert lock.acquire(5)
+                print("locked", flush=True)
+                sys.stdin.read()
+                """
+            )
+            child = subprocess.Popen([sys.executable, "-c", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            try:
+                self.assertEqual(child.stdout.readline().strip(), "locked")
+                lock = SessionLock(path)
+                self.assertFalse(lock.acquire(0.2))
+                child.stdin.close()  # 子进程退出，操作系统释放锁
+                child.wait(5)
+                self.assertTrue(lock.acquire(5))
+                lock.release()
+            finally:
+                child.kill()
+                child.wait()
+                child.stdout.close()
+
+
+class RefreshCoordinationTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=1)
+
+    def setUp(self) -> None:
+        state.mode = "ok"
+        CountingHandler.refreshes = 0
+        CountingHandler.gate.set()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.session_path = os.path.join(tmp.name, "session.dat")
+
+    def _controller(self, app_id: str, **kwargs) -> AuthController:
+        """每个控制器各自持有 HttpClient / SessionFileManager，相当于同机上的一个独立客户端。"""
+
+        http = HttpClient(self.base_url, app_id, on_logout=lambda: None, on_broadcast=lambda s: None)
+        self.addCleanup(http.close)
+        return AuthController(
+            http=http,
+            file_mgr=SessionFileManager(path=self.session_path),
+            refresh_scheduler=RefreshScheduler(on_refresh=lambda: True),
+            logout_handler=LogoutHandler(api_logout=lambda: None, delete_session_file=lambda: None, broadcast_status=lambda s: None),
+            broadcast_status=lambda s: None,
+            **kwargs,
+        )
+
+    def test_concurrent_clients_refresh_once(self) -> None:
+        a, b = self._controller("jiuweihu"), self._controller("youlishe")
+        CountingHandler.gate.clear()
+        results = []
+        threads = [threading.Thread(target=lambda c=c: results.append(c.refresh("G-STUB", "R-STUB"))) for c in (a, b)]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + 5
+        while CountingHandler.refreshes < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)  # 给另一个客户端时间撞上锁
+        CountingHandler.gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [True, True])
+        self.assertEqual(CountingHandler.refreshes, 1)
+
+    def test_later_client_adopts_peer_refresh(self) -> None:
+        a, b = self._controller("jiuweihu"), self._controller("youlishe")
+        self.assertTrue(a.refresh("G-STUB", "R-STUB"))
+        self.assertTrue(b.refresh("G-STUB", "R-STUB"))  # 下一个周期的 b：文件已被 a 刷新
+        self.assertEqual(CountingHandler.refreshes, 1)
+
+        # b 采用后，自己的下一次刷新会走后端；a 随后采用 b 的结果。
+        self.assertTrue(b.refresh("G-STUB", "R-STUB"))
+        self.assertTrue(a.refresh("G-STUB", "R-STUB"))
+        self.assertEqual(CountingHandler.refreshes, 2)
+
+    def test_rotated_refresh_token_is_adopted(self) -> None:
+        a = self._controller("jiuweihu")
+        self.assertTrue(a.refresh("G-STUB", "R-STUB"))
+        fm = SessionFileManager(path=self.session_path)
+        session = fm.read()
+        fm.write({**session, "refresh_token": "R-ROTATED", "created_at": "2000-01-01T00:00:00Z"})
+        self.assertTrue(a.refresh("G-STUB", "R-STUB"))
+        self.assertEqual(CountingHandler.refreshes, 1)
+
+    def test_uncoordinated_clients_each_refresh(self) -> None:
+        a = self._controller("jiuweihu", coordinate_refresh=False)
+        b = self._controller("youlishe", coordinate_refresh=False)
+        self.assertTrue(a.refresh("G-STUB", "R-STUB"))
+        self.assertTrue(b.refresh("G-STUB", "R-STUB"))
+        self.assertEqual(CountingHandler.refreshes, 2)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+import struct
+import unittest
+
+from shell import session_codec
+
+PAYLOAD = {
+    "guid": "G1",
+    "phone": "13800138000",
+    "user_type": "user",
+    "refresh_token": "R.token",
+    "created_at": "2025-01-01T00:00:00+00:00",
+    "expires_at": "2025-01-03T00:00:00.123456+00:00",
+}
+
+
+class SessionCodecTests(unittest.TestCase):
+    def test_roundtrip(self) -> None:
+        blob = session_codec.encode(PAYLOAD)
+        self.assertTrue(session_codec.is_binary(blob))
+        self.assertFalse(session_codec.is_protected(blob))
+        self.assertEqual(session_codec.decode(blob).to_dict(), PAYLOAD)
+
+    def test_timestamps_are_normalized_to_utc(self) -> None:
+        record = session_codec.decode(
+            session_codec.encode({**PAYLOAD, "created_at": "2025-01-01T08:00:00+08:00", "expires_at": "2025-01-03T00:00:00Z"})
+        )
+        self.assertEqual(record.created_at_us, 1735689600 * 1_000_000)
+        self.assertEqual(record.to_dict()["created_at"], "2025-01-01T00:00:00+00:00")
+        self.assertEqual(record.to_dict()["expires_at"], "2025-01-03T00:00:00+00:00")
+
+    def test_typed_values_and_extras(self) -> None:
+        payload = {**PAYLOAD, "user_type": 1, "device_id": "D1", "flags": {"beta": True}, "note": None}
+        self.assertEqual(session_codec.decode(session_codec.encode(payload)).to_dict(), payload)
+
+    def test_missing_user_type_stays_missing(self) -> None:
+        payload = {k: v for k, v in PAYLOAD.items() if k != "user_type"}
+        record = session_codec.decode(session_codec.encode(payload))
+        self.assertIsNone(record.user_type)
+        self.assertEqual(record.to_dict(), payload)
+
+    def test_invalid_payload_raises(self) -> None:
+        for bad in ({**PAYLOAD, "created_at": "not-a-date"}, {k: v for k, v in PAYLOAD.items() if k != "guid"}, {**PAYLOAD, "x": object()}):
+            with self.assertRaises(ValueError):
+                session_codec.encode(bad)
+
+    def test_protected_body(self) -> None:
+        protect = lambda b: bytes(x ^ 0x5A for x in b)  # noqa: E731
+        blob = session_codec.encode(PAYLOAD, protect=protect)
+        self.assertTrue(session_codec.is_protected(blob))
+        self.assertNotIn(b"13800138000", blob)
+        self.assertEqual(session_codec.decode(blob, unprotect=protect).to_dict(), PAYLOAD)
+        with self.assertRaises(ValueError):
+            session_codec.decode(blob)
+
+    def test_rejects_bad_header_and_corruption(self) -> None:
+        blob = session_codec.encode(PAYLOAD)
+        future = blob[:4] + struct.pack("<B", session_codec.VERSION + 1) + blob[5:]
+        for bad in (b"PSE", b"{}" + blob, future, blob[:-1], blob + b"\0"):
+            with self.assertRaises(ValueError):
+                session_codec.decode(bad)
+
+    def test_smaller_than_json(self) -> None:
+        self.assertLess(len(session_codec.encode(PAYLOAD)), len(json.dumps(PAYLOAD)))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import os
+import time
 from tempfile import TemporaryDirectory
 import unittest
 from datetime import datetime, timedelta, timezone
+from unittest import mock
 
+import session_codec
+import session_file_manager
 from session_file_manager import SessionFileManager, TWO_HOURS
 
 UTC = timezone.utc
@@ -82,6 +86,173 @@ class SessionFileManagerTests(unittest.TestCase):
         data = fm.read()
         self.assertEqual(data["guid"], "G1")
 
+    def test_unchanged_file_is_parsed_once(self):
+        calls = []
+
+        def unprotect(b: bytes) -> bytes:
+            calls.append(b)
+            return b
+
+        path = os.path.join(self.tmpdir.name, "session-cache.dat")
+        writer = SessionFileManager(path=path, now_provider=lambda: self.now, protect=bytes)
+        writer.write(self._payload())
+        session_file_manager._parsed_cache.clear()
+        for _ in range(3):
+            # 新建实例也命中缓存（GUI 每次操作都会新建 SessionFileManager）
+            data = SessionFileManager(path=path, now_provider=lambda: self.now, unprotect=unprotect).read()
+            data["guid"] = "mutated"
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(SessionFileManager(path=path, unprotect=unprotect).read()["guid"], "G1")
+
+        payload = self._payload()
+        payload["guid"] = "G2"
+        writer.write(payload)
+        session_file_manager._parsed_cache.clear()
+        self.assertEqual(SessionFileManager(path=path, now_provider=lambda: self.now, unprotect=unprotect).read()["guid"], "G2")
+        self.assertEqual(len(calls), 2)
+
+    def test_writes_binary_format(self):
+        fm = SessionFileManager(path=self.fm.path, now_provider=lambda: self.now, file_format="binary")
+        fm.write(self._payload())
+        with open(fm.path, "rb") as f:
+            blob = f.read()
+        self.assertTrue(session_codec.is_binary(blob))
+        self.assertNotIn(b"{", blob)
+        self.assertEqual(self.fm.read()["guid"], "G1")  # 默认 JSON 的实例照常读取二进制文件
+
+    def test_default_format_follows_protect_hook(self):
+        # 明文默认 JSON（二进制冷读取不比 JSON 快）；有字节级保护钩子时默认二进制
+        self.assertEqual(self.fm.file_format, "json")
+        self.fm.write(self._payload())
+        with open(self.fm.path, "rb") as f:
+            self.assertFalse(session_codec.is_binary(f.read()))
+        protected = SessionFileManager(path=self.fm.path, protect=bytes, unprotect=bytes)
+        self.assertEqual(protected.file_format, "binary")
+
+    def test_legacy_json_file_is_read_and_migrated(self):
+        def enc(s: str) -> str:
+            return s[::-1]
+
+        path = os.path.join(self.tmpdir.name, "session-legacy.dat")
+        legacy = SessionFileManager(path=path, now_provider=lambda: self.now, encoder=enc, file_format="json")
+        legacy.write(self._payload())
+        session_file_manager._parsed_cache.clear()
+
+        fm = SessionFileManager(path=path, now_provider=lambda: self.now, decoder=enc, protect=bytes, unprotect=bytes)
+        data = fm.read()
+        self.assertEqual(data["guid"], "G1")
+        fm.write(data)
+        with open(path, "rb") as f:
+            self.assertTrue(session_codec.is_protected(f.read()))
+        session_file_manager._parsed_cache.clear()
+        self.assertEqual(fm.read(), data)
+
+    def test_str_encoder_without_protect_keeps_json(self):
+        path = os.path.join(self.tmpdir.name, "session-enc-only.dat")
+        SessionFileManager(path=path, encoder=lambda s: s[::-1]).write(self._payload())
+        with open(path, "rb") as f:
+            self.assertFalse(session_codec.is_binary(f.read()))
+
+    def test_delete_drops_cached_session(self):
+        self.fm.write(self._payload())
+        self.fm.read()
+        self.fm.delete()
+        with self.assertRaises(FileNotFoundError):
+            self.fm.read()
+
+
+class SessionFileWriteSyscallTests(unittest.TestCase):
+    """统计每次写入触发的 mkstemp / fsync / replace 次数。"""
+
+    def setUp(self) -> None:
+        self.tmpdir = TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "session.dat")
+        self.calls = {"mkstemp": 0, "fsync": 0, "replace": 0}
+        for target, name in ((os, "fsync"), (os, "replace"), (__import__("tempfile"), "mkstemp")):
+            real = getattr(target, name)
+            patcher = mock.patch.object(target, name, side_effect=self._counting(name, real))
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _counting(self, name, real):
+        def call(*args, **kwargs):
+            self.calls[name] += 1
+            return real(*args, **kwargs)
+
+        return call
+
+    def _payload(self, guid: str = "G1") -> dict:
+        now = datetime.now(UTC)
+        return {
+            "guid": guid,
+            "phone": "13800138000",
+            "user_type": "user",
+            "refresh_token": "R",
+            "created_at": iso(now),
+            "expires_at": iso(now + timedelta(days=2)),
+        }
+
+    def test_identical_rewrites_are_skipped(self):
+        payload = self._payload()
+        fm = SessionFileManager(path=self.path)
+        for _ in range(10):
+            fm.write(payload)
+        self.assertEqual(self.calls, {"mkstemp": 1, "fsync": 1, "replace": 1})
+
+        fm.write(self._payload("G2"))
+        self.assertEqual(self.calls["fsync"], 2)
+        self.assertEqual(fm.read()["guid"], "G2")
+
+    def test_identical_rewrites_are_skipped_with_encoder(self):
+        enc = dec = lambda s: s[::-1]  # noqa: E731
+        payload = self._payload()
+        for _ in range(5):
+            SessionFileManager(path=self.path, encoder=enc, decoder=dec).write(payload)
+        self.assertEqual(self.calls["fsync"], 1)
+        # 同样的明文但编码方式不同：必须重写
+        SessionFileManager(path=self.path).write(payload)
+        self.assertEqual(self.calls["fsync"], 2)
+
+    def test_file_changed_by_another_writer_is_rewritten(self):
+        payload = self._payload()
+        fm = SessionFileManager(path=self.path)
+        fm.write(payload)
+        with open(self.path, "w", encoding="utf-8") as f:  # 模拟其他进程写入
+            f.write("{}")
+        fm.write(payload)
+        self.assertEqual(self.calls["fsync"], 2)
+        self.assertEqual(fm.read()["guid"], "G1")
+
+    def test_burst_is_coalesced_into_one_durable_write(self):
+        fm = SessionFileManager(path=self.path, coalesce_window=0.05)
+        for i in range(20):
+            fm.write(self._payload(f"G{i}"))
+            self.assertEqual(fm.read()["guid"], f"G{i}")  # 同进程立即可见
+        self.assertEqual(self.calls["fsync"], 0)
+        self.assertFalse(os.path.exists(self.path))
+
+        deadline = time.monotonic() + 5
+        while self.calls["replace"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.calls, {"mkstemp": 1, "fsync": 1, "replace": 1})
+        self.assertEqual(SessionFileManager(path=self.path).read()["guid"], "G19")
+
+    def test_flush_and_delete_settle_pending_writes(self):
+        fm = SessionFileManager(path=self.path, coalesce_window=10)
+        fm.write(self._payload("G1"))
+        fm.flush()
+        self.assertEqual(self.calls["fsync"], 1)
+        fm.flush()
+        self.assertEqual(self.calls["fsync"], 1)
+
+        fm.write(self._payload("G2"))
+        fm.delete()
+        time.sleep(0.05)
+        self.assertEqual(self.calls["fsync"], 1)
+        with self.assertRaises(FileNotFoundError):
+            fm.read()
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
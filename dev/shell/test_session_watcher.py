@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import queue
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from shell.session_file_manager import SessionFileManager
+from shell.session_watcher import InotifyWatcher, PollingWatcher, watch_session_file
+
+
+def _payload() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "guid": "G",
+        "phone": "13800138000",
+        "user_type": "user",
+        "refresh_token": "R",
+        "created_at": now.isoformat(),
+        "expires_at": (now + timedelta(days=2)).isoformat(),
+    }
+
+
+class _WatcherCase(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.fm = SessionFileManager(path=os.path.join(tmp.name, "session.dat"))
+        self.events: "queue.Queue[tuple[bool, float]]" = queue.Queue()
+
+    def _on_change(self, exists: bool) -> None:
+        self.events.put((exists, time.perf_counter()))
+
+    def _assert_event(self, exists: bool, since: float, within: float) -> None:
+        got, at = self.events.get(timeout=5)
+        self.assertEqual(got, exists)
+        self.assertLess(at - since, within)
+
+    def _assert_quiet(self, seconds: float) -> None:
+        with self.assertRaises(queue.Empty):
+            self.events.get(timeout=seconds)
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class InotifyWatcherTests(_WatcherCase):
+    def test_write_and_delete_are_reported_within_milliseconds(self) -> None:
+        watcher = self.fm.watch(self._on_change, debounce=0.02)
+        self.addCleanup(watcher.stop)
+        self.assertIsInstance(watcher, InotifyWatcher)
+
+        start = time.perf_counter()
+        self.fm.write(_payload())
+        self._assert_event(True, start, 0.2)
+        self._assert_quiet(0.1)  # 一次原子写入的多个事件只回调一次
+
+        start = time.perf_counter()
+        self.fm.delete()
+        self._assert_event(False, start, 0.2)
+
+    def test_idle_watcher_does_not_wake_up(self) -> None:
+        watcher = self.fm.watch(self._on_change)
+        self.addCleanup(watcher.stop)
+        time.sleep(0.5)
+        self.assertEqual(watcher.wakeups, 0)
+
+    def test_burst_of_writes_is_debounced(self) -> None:
+        watcher = self.fm.watch(self._on_change, debounce=0.1)
+        self.addCleanup(watcher.stop)
+        for _ in range(5):
+            self.fm.write(_payload())
+            time.sleep(0.01)
+        self.assertTrue(self.events.get(timeout=5)[0])
+        self._assert_quiet(0.3)
+
+    def test_unrelated_files_in_directory_are_ignored(self) -> None:
+        watcher = self.fm.watch(self._on_change, debounce=0.02)
+        self.addCleanup(watcher.stop)
+        with open(self.fm.path + ".lock", "w") as f:
+            f.write("x")
+        self._assert_quiet(0.2)
+
+
+class PollingWatcherTests(_WatcherCase):
+    def _polling(self, **kwargs) -> PollingWatcher:
+        watcher = PollingWatcher(self.fm.path, self._on_change, **kwargs)
+        watcher.start()
+        self.addCleanup(watcher.stop)
+        return watcher
+
+    def test_interval_backs_off_when_idle_and_resets_on_change(self) -> None:
+        watcher = self._polling(debounce=0.01, min_interval=0.01, max_interval=0.08)
+        time.sleep(0.4)
+        self.assertEqual(watcher.interval, 0.08)
+        idle_wakeups = watcher.wakeups
+        self.assertLess(idle_wakeups, 12)  # 固定 10ms 轮询约 40 次
+
+        self.fm.write(_payload())
+        self.assertTrue(self.events.get(timeout=5)[0])
+        self.assertLess(watcher.interval, 0.08)
+
+        self.fm.delete()
+        self.assertFalse(self.events.get(timeout=5)[0])
+
+    def test_missing_directory_falls_back_to_polling(self) -> None:
+        path = os.path.join(os.path.dirname(self.fm.path), "missing", "session.dat")
+        watcher = watch_session_file(path, self._on_change)
+        self.addCleanup(watcher.stop)
+        self.assertIs(type(watcher), PollingWatcher)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
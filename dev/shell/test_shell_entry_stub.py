@@ -2,13 +2,19 @@ from __future__ import annotations
 
 import sys
 import os
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 from typing import Any, Dict
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
+from shell import shell_entry
+from shell.session_file_manager import SessionFileManager
 from shell.shell_entry import ShellApp
 
 
@@ -71,6 +77,67 @@ class ShellEntryTests(unittest.TestCase):
         app.startup_flow()
         self.assertTrue(any(e["status"] == "none" for e in app.events))
 
+    def test_concurrent_first_access_builds_one_auth_controller(self):
+        built = []
+
+        def slow_controller(**kwargs):
+            time.sleep(0.05)  # 放大首次构造的竞争窗口
+            built.append(object())
+            return built[-1]
+
+        app = ShellApp(base_url="http://stub", app_id="jiuweihu", http_client=object())
+        start = threading.Barrier(4)
+        seen = []
+
+        def worker():
+            start.wait()
+            seen.append(app.auth)
+
+        with mock.patch.object(shell_entry, "AuthController", slow_controller):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(built), 1)
+        self.assertTrue(all(a is built[0] for a in seen))
+
+    def test_peer_refresh_before_first_tick_is_adopted(self):
+        from datetime import timedelta
+        from shell.refresh_scheduler import now_utc
+
+        calls = []
+
+        class CountingHttp:
+            def refresh_token(self, guid, refresh_token):
+                calls.append((guid, refresh_token))
+                raise AssertionError("peer session should have been adopted")
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "session.dat")
+        app = ShellApp(
+            base_url="http://stub", app_id="jiuweihu", http_client=CountingHttp(), file_mgr=SessionFileManager(path=path)
+        )
+
+        # ShellApp 建好之后、第一次刷新定时器触发之前，另一个客户端刷新并写入了 session.dat。
+        time.sleep(0.01)
+        created_at = now_utc()
+        SessionFileManager(path=path).write(
+            {
+                "guid": "G-STUB",
+                "phone": "13800138000",
+                "user_type": "user",
+                "refresh_token": "R-STUB",
+                "created_at": created_at.isoformat(),
+                "expires_at": (created_at + timedelta(days=2)).isoformat(),
+            }
+        )
+        time.sleep(0.01)
+        self.assertTrue(app._on_refresh_tick())
+        self.assertEqual(calls, [])
+        self.assertTrue(any(e["status"] == "active" for e in app.events))
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from shell.auth_controller import AuthController
+from shell.http_client import HttpClient
+from shell.logout_handler import LogoutHandler
+from shell.passport_client import PassportClient
+from shell.refresh_scheduler import RefreshScheduler
+from shell.session_file_manager import SessionFileManager
+from shell.single_flight import SingleFlight
+from shell.stub_backend import StubHandler, ThreadingHTTPServer, state
+
+
+class GatedHandler(StubHandler):
+    """refresh 请求在 `release` 置位前阻塞，便于让所有调用者先汇合。"""
+
+    release = threading.Event()
+    refreshes = 0
+
+    def _handle_refresh(self):
+        type(self).refreshes += 1
+        self.release.wait(10)
+        return super()._handle_refresh()
+
+
+def _wait_for(predicate, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.005)
+
+
+class SingleFlightRefreshTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), GatedHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=1)
+
+    def setUp(self) -> None:
+        state.mode = "ok"
+        GatedHandler.refreshes = 0
+        GatedHandler.release.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.session_path = os.path.join(tmp.name, "session.dat")
+
+    def _fire(self, n: int, call, pending) -> list:
+        results: list = []
+        threads = [threading.Thread(target=lambda: results.append(call())) for _ in range(n)]
+        for t in threads:
+            t.start()
+        _wait_for(lambda: pending() == n)
+        GatedHandler.release.set()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_100_concurrent_controller_refreshes_make_one_network_call(self) -> None:
+        events: list[str] = []
+        http = HttpClient(self.base_url, "jiuweihu", on_logout=lambda: None, on_broadcast=events.append)
+        self.addCleanup(http.close)
+        file_mgr = SessionFileManager(path=self.session_path)
+        writes = []
+        write = file_mgr.write
+        file_mgr.write = lambda payload: (writes.append(payload), write(payload))[1]  # type: ignore[method-assign]
+        ctrl = AuthController(
+            http=http,
+            file_mgr=file_mgr,
+            refresh_scheduler=RefreshScheduler(on_refresh=lambda: True),
+            logout_handler=LogoutHandler(api_logout=lambda: None, delete_session_file=lambda: None, broadcast_status=events.append),
+            broadcast_status=events.append,
+        )
+
+        results = self._fire(
+            100,
+            lambda: ctrl.refresh("G-STUB", "R-STUB"),
+            lambda: ctrl._refresh_flight.pending(("G-STUB", "R-STUB")),
+        )
+
+        self.assertEqual(results, [True] * 100)
+        self.assertEqual(GatedHandler.refreshes, 1)
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(events, ["active"])
+        self.assertEqual(ctrl._refresh_flight.pending(("G-STUB", "R-STUB")), 0)
+
+    def test_passport_client_coalesces_sync_and_async_callers(self) -> None:
+        client = PassportClient(self.base_url)
+        self.addCleanup(client.close)
+        key = ("G-STUB", "R-STUB", "youlishe")
+        async_results: list = []
+        for _ in range(10):
+            client.refresh_token(*key, on_done=async_results.append)
+
+        results = self._fire(
+            50,
+            lambda: client.refresh_token(*key),
+            lambda: client._refresh_flight.pending(key) - 10,
+        )
+
+        _wait_for(lambda: len(async_results) == 10)
+        self.assertTrue(all(r.ok for r in results + async_results))
+        self.assertEqual(GatedHandler.refreshes, 1)
+
+        # 不缓存：上一次结束后再调用会重新请求。
+        self.assertTrue(client.refresh_token(*key).ok)
+        self.assertEqual(GatedHandler.refreshes, 2)
+
+
+class SingleFlightTests(unittest.TestCase):
+    def test_error_is_shared_and_key_is_released(self) -> None:
+        flight = SingleFlight()
+        gate = threading.Event()
+        calls = []
+
+        def boom():
+            calls.append(1)
+            gate.wait(5)
+            raise RuntimeError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("k", boom)
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for t in threads:
+            t.start()
+        _wait_for(lambda: flight.pending("k") == 5)
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual((len(calls), len(errors)), (1, 5))
+        self.assertEqual(flight.pending("k"), 0)
+        self.assertEqual(flight.do("k", lambda: 42), 42)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
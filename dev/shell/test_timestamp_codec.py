@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from shell import session_codec, timestamp_codec
+from shell.timestamp_codec import epoch_us, format_epoch_us, parse_datetime, parse_epoch_us
+
+UTC = timezone.utc
+
+
+class TimestampCodecTests(unittest.TestCase):
+    def setUp(self) -> None:
+        timestamp_codec._parsed.clear()
+        timestamp_codec._formatted.clear()
+
+    def test_accepted_forms_agree(self) -> None:
+        dt = datetime(2025, 1, 1, 8, 30, 15, 123456, tzinfo=UTC)
+        expected = epoch_us(dt)
+        for value in (
+            "2025-01-01T08:30:15.123456Z",
+            "2025-01-01T08:30:15.123456+00:00",
+            "2025-01-01T16:30:15.123456+08:00",
+            " 2025-01-01T08:30:15.123456Z ",
+            "2025-01-01T08:30:15.123456",  # 无时区按 UTC
+            dt,
+            dt.timestamp(),
+        ):
+            self.assertEqual(parse_epoch_us(value), expected, value)
+        self.assertEqual(parse_epoch_us("2025-01-01T08:30:15.123Z"), expected - 456)
+        self.assertEqual(parse_datetime("2025-01-01T08:30:15.123456Z"), dt)
+
+    def test_invalid_values_raise(self) -> None:
+        for value in ("not-a-date", "", "2025-02-30T00:00:00Z", "2025-01-01T00:00:00+08:00Z", "2025-01-01T00:00:00Z+00:00", None, True, object()):
+            with self.assertRaises(ValueError, msg=repr(value)):
+                parse_epoch_us(value)
+
+    def test_utc_suffixes_take_fast_path(self) -> None:
+        calls = []
+        real = timestamp_codec.epoch_us
+
+        def spy(dt):
+            calls.append(dt)
+            return real(dt)
+
+        timestamp_codec.epoch_us = spy
+        self.addCleanup(setattr, timestamp_codec, "epoch_us", real)
+        us = parse_epoch_us("2025-01-01T00:00:00.5+00:00")
+        self.assertEqual(parse_epoch_us("2025-01-01T00:00:00.5Z"), us)
+        self.assertEqual(calls, [])  # 两种 UTC 后缀都不经过时区换算
+        self.assertEqual(parse_epoch_us("2025-01-01T08:00:00.5+08:00"), us)
+        self.assertEqual(len(calls), 1)
+
+    def test_parsed_strings_are_cached(self) -> None:
+        value = "2025-01-01T00:00:00Z"
+        first = parse_epoch_us(value)
+        timestamp_codec._parsed[value] = first + 1  # 命中缓存时不会再解析
+        self.assertEqual(parse_epoch_us(value), first + 1)
+
+    def test_formatted_strings_are_primed(self) -> None:
+        us = epoch_us(datetime(2025, 1, 1, tzinfo=UTC) + timedelta(microseconds=7))
+        text = format_epoch_us(us)
+        self.assertEqual(text, "2025-01-01T00:00:00.000007+00:00")
+        self.assertEqual(timestamp_codec._parsed[text], us)
+        timestamp_codec._parsed.clear()
+        self.assertIs(format_epoch_us(us), text)  # 再次格式化命中缓存，且重新记入解析缓存
+        self.assertEqual(timestamp_codec._parsed[text], us)
+
+        payload = {"guid": "G", "phone": "P", "refresh_token": "R", "created_at": text, "expires_at": us / 1e6 + 60}
+        record = session_codec.decode(session_codec.encode(payload))
+        timestamp_codec._parsed.clear()
+        data = record.to_dict()
+        self.assertEqual(timestamp_codec._parsed[data["expires_at"]], us + 60_000_000)
+
+    def test_cache_is_bounded(self) -> None:
+        for i in range(timestamp_codec._CACHE_LIMIT * 2):
+            parse_epoch_us(i * 1.0)  # 数值不进缓存
+            format_epoch_us(i)
+        self.assertLessEqual(len(timestamp_codec._parsed), timestamp_codec._CACHE_LIMIT)
+        self.assertLessEqual(len(timestamp_codec._formatted), timestamp_codec._CACHE_LIMIT)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,109 @@
+"""会话时间戳编解码：所有会话校验共用，统一以 UTC epoch 微秒（int）比较。
+
+- `parse_epoch_us(value)`：ISO8601 字符串 / epoch 秒 / datetime -> epoch 微秒。
+  UTC 后缀 `...Z`（后端下发）与 `...+00:00`（本地 `isoformat()` / `format_epoch_us` 写入）都走快路径：
+  去掉后缀按 naive 解析后直接减 epoch，不再 `.replace("Z", "+00:00")` 再做时区换算。
+- 字符串解析结果按原文缓存：同一份会话在启动、监听、自动登录各处被反复校验时只解析一次。
+  `format_epoch_us` 与 `session_codec` 在生成字符串时顺带写入缓存，二进制 session.dat 读出的
+  时间字段之后校验无需再解析；生成的字符串也按 epoch 微秒缓存，文件重写后时间字段未变时
+  再次读取不必重新格式化。
+- 不带时区的字符串/datetime 一律按 UTC 解释（与 `SessionFileManager` 的既有行为一致）。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+UTC = timezone.utc
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+US_PER_SECOND = 1_000_000
+TWO_HOURS_US = 2 * 3600 * US_PER_SECOND
+
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_CACHE_LIMIT = 256
+
+# 原文 -> epoch 微秒；满了整体清空，会话时间字段只有寥寥几个，不需要 LRU。
+_parsed: Dict[str, int] = {}
+# epoch 微秒 -> `format_epoch_us` 的结果；同样满了整体清空。
+_formatted: Dict[int, str] = {}
+
+
+def parse_epoch_us(value: Any) -> int:
+    """解析为 UTC epoch 微秒；无法解析时抛 ValueError。"""
+
+    if isinstance(value, str):
+        us = _parsed.get(value)
+        if us is None:
+            us = _parse_str(value)
+            _remember(value, us)
+        return us
+    if isinstance(value, datetime):
+        return epoch_us(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(value * US_PER_SECOND)
+    raise ValueError("unsupported datetime format")
+
+
+def epoch_us(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return (dt - EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=us)
+
+
+def format_epoch_us(us: int) -> str:
+    """与 `from_epoch_us(us).isoformat()` 相同（`+00:00` 结尾），结果缓存并记入解析缓存。"""
+
+    text = _formatted.get(us)
+    if text is None:
+        text = from_epoch_us(us).isoformat()
+        if len(_formatted) >= _CACHE_LIMIT:
+            _formatted.clear()
+        _formatted[us] = text
+    _remember(text, us)
+    return text
+
+
+def parse_datetime(value: Any) -> datetime:
+    return from_epoch_us(parse_epoch_us(value))
+
+
+def _remember(text: str, us: int) -> None:
+    if len(_parsed) >= _CACHE_LIMIT:
+        _parsed.clear()
+    _parsed[text] = us
+
+
+def _parse_str(text: str) -> int:
+    s = text.strip()
+    try:
+        if s[-1:] == "Z":
+            naive = s[:-1]
+        elif s[-6:] == "+00:00":
+            naive = s[:-6]
+        else:
+            return epoch_us(datetime.fromisoformat(s))
+        # UTC 后缀：去掉后缀按 naive 解析即为 UTC，省去替换字符串与时区换算
+        dt = datetime.fromisoformat(naive)
+        if dt.tzinfo is None:
+            return (dt - _NAIVE_EPOCH) // _MICROSECOND
+        raise ValueError("timezone given twice")
+    except ValueError as exc:
+        raise ValueError(f"invalid datetime string: {text!r}") from exc
+
+
+__all__ = [
+    "TWO_HOURS_US",
+    "US_PER_SECOND",
+    "epoch_us",
+    "format_epoch_us",
+    "from_epoch_us",
+    "parse_datetime",
+    "parse_epoch_us",
+]
@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import InMemoryUserRepo, User, UserStatus  # type: ignore  # noqa: E402
+from backend.services import BanService, UserQueryService  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class AdminUserPaginationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.user_repo = InMemoryUserRepo()
+        self.query = UserQueryService(self.user_repo)
+        self.base = datetime(2025, 1, 1, tzinfo=UTC)
+        rnd = random.Random(11)
+        statuses = [UserStatus.ACTIVE, UserStatus.BANNED, UserStatus.DELETED]
+        for i in range(230):
+            # 故意让部分用户 created_at 相同，验证 phone 作为次级排序键。
+            created = self.base + timedelta(seconds=rnd.randint(0, 100))
+            self.user_repo.save(User(guid=f"G{i}", phone=f"138{i:08d}", status=rnd.choice(statuses), created_at=created))
+
+    def _reference(self, status=None) -> list[str]:
+        users = [u for u in self.user_repo.all().values() if status is None or u.status == status]
+        users.sort(key=lambda u: (u.created_at, u.phone))
+        return [u.guid for u in users]
+
+    def _walk_pages(self, status=None, limit=50) -> list[str]:
+        guids, cursor = [], None
+        while True:
+            page = self.query.list_users_page(status, limit=limit, cursor=cursor)
+            self.assertLessEqual(len(page.items), limit)
+            guids.extend(u.guid for u in page.items)
+            if page.next_cursor is None:
+                return guids
+            cursor = page.next_cursor
+
+    def test_pages_and_stream_match_sorted_listing(self) -> None:
+        for status in (None, UserStatus.ACTIVE, UserStatus.BANNED):
+            expected = self._reference(status)
+            self.assertEqual([u.guid for u in self.query.list_users(status)], expected)
+            self.assertEqual(self._walk_pages(status, limit=17), expected)
+            self.assertEqual([u.guid for u in self.query.iter_users(status)], expected)
+
+    def test_stream_spans_multiple_chunks(self) -> None:
+        self.query.STREAM_CHUNK = 7
+        self.assertEqual([u.guid for u in self.query.iter_users()], self._reference())
+
+    def test_ban_moves_user_between_status_indexes(self) -> None:
+        user = self.query.list_users(UserStatus.ACTIVE)[0]
+        BanService(self.user_repo, None).ban_by_phone(user.phone)  # type: ignore[arg-type]
+
+        self.assertNotIn(user.guid, self._walk_pages(UserStatus.ACTIVE))
+        self.assertIn(user.guid, self._walk_pages(UserStatus.BANNED))
+        self.assertEqual(self._walk_pages(UserStatus.BANNED), self._reference(UserStatus.BANNED))
+
+    def test_replacing_user_for_same_phone_drops_old_entry(self) -> None:
+        old = self.query.list_users()[0]
+        self.user_repo.save(User(guid="G-NEW", phone=old.phone, created_at=self.base + timedelta(days=1)))
+
+        guids = [u.guid for u in self.query.iter_users()]
+        self.assertEqual(len(guids), 230)
+        self.assertEqual(guids[-1], "G-NEW")
+
+    def test_exact_multiple_of_limit_has_no_trailing_cursor(self) -> None:
+        repo = InMemoryUserRepo()
+        for i in range(4):
+            repo.save(User(guid=f"G{i}", phone=f"138{i:08d}", created_at=self.base + timedelta(seconds=i)))
+        query = UserQueryService(repo)
+        first = query.list_users_page(limit=2)
+        second = query.list_users_page(limit=2, cursor=first.next_cursor)
+        self.assertEqual([u.guid for u in second.items], ["G2", "G3"])
+        self.assertIsNone(second.next_cursor)
+
+    def test_invalid_arguments_raise_value_error(self) -> None:
+        with self.assertRaises(ValueError):
+            self.query.list_users_page(cursor="not-a-cursor")
+        with self.assertRaises(ValueError):
+            self.query.list_users_page(limit=0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,222 @@
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.async_services import (  # type: ignore  # noqa: E402
+    AsyncAuthService,
+    AsyncBanService,
+    AsyncCodeStoreAdapter,
+    AsyncLogoutService,
+    AsyncSessionStoreAdapter,
+    AsyncTokenService,
+    AsyncTokenValidator,
+    AsyncUserRepoAdapter,
+    AsyncVerificationCodeService,
+)
+from backend.domain import (  # type: ignore  # noqa: E402
+    ERR_ACCESS_INVALID,
+    ERR_APP_ID_MISMATCH,
+    ERR_CODE_INVALID,
+    ERR_REFRESH_MISMATCH,
+    ERR_USER_BANNED,
+    InMemorySessionStore,
+    InMemoryUserRepo,
+    VerificationCodeStore,
+)
+from backend.redis_store import AsyncRedisSessionStore, AsyncRedisVerificationCodeStore, RedisSessionStore  # type: ignore  # noqa: E402
+from backend.resp import AsyncRespClient, RespClient  # type: ignore  # noqa: E402
+from backend.resp_standin import RespStandInServer  # type: ignore  # noqa: E402
+from backend.services import AuthError, GuidGenerator  # type: ignore  # noqa: E402
+from backend.signed_tokens import AccessTokenSigner, RevocationFilter, SigningKey  # type: ignore  # noqa: E402
+from backend.sqlite_repos import (  # type: ignore  # noqa: E402
+    SqliteDatabase,
+    SqliteSessionStore,
+    SqliteUserRepo,
+    SqliteVerificationCodeStore,
+)
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class AsyncServiceCases:
+    """各存储实现共用的异步服务用例；子类在 _make_stores 中提供 (users, sessions, codes)。"""
+
+    async def _make_stores(self):  # pragma: no cover - 由子类实现
+        raise NotImplementedError
+
+    async def asyncSetUp(self) -> None:
+        self.users, self.sessions, self.codes = await self._make_stores()
+        self.revocations = RevocationFilter(capacity=1000)
+        self.auth = AsyncAuthService(self.users, self.sessions, AsyncVerificationCodeService(self.codes), GuidGenerator())
+        self.tokens = AsyncTokenService(self.sessions)
+        self.validator = AsyncTokenValidator(self.sessions)
+
+    async def _login(self, phone: str, app_id: str = "jiuweihu"):
+        await self.codes.save(phone, "123456", datetime.now(UTC) + timedelta(minutes=5))
+        return await self.auth.login_with_phone(phone, "123456", app_id)
+
+    async def _code(self, coro) -> str:
+        with self.assertRaises(AuthError) as ctx:
+            await coro
+        return ctx.exception.code
+
+    async def test_login_refresh_validate_logout(self) -> None:
+        login = await self._login("13800139000")
+        refreshed = await self.tokens.refresh_access_token(login.guid, login.refresh_token, "youlishe")
+
+        self.assertEqual((await self.validator.validate_access_token(login.access_token, "jiuweihu")).guid, login.guid)
+        self.assertEqual((await self.validator.validate_access_token(refreshed.access_token, "youlishe")).guid, login.guid)
+        self.assertEqual(
+            await self._code(self.validator.validate_access_token(refreshed.access_token, "jiuweihu")), ERR_APP_ID_MISMATCH
+        )
+        self.assertEqual(await self._code(self.tokens.refresh_access_token(login.guid, "R.bad", "jiuweihu")), ERR_REFRESH_MISMATCH)
+
+        await AsyncLogoutService(self.sessions).logout(login.guid)
+        self.assertEqual(await self._code(self.validator.validate_access_token(login.access_token, "jiuweihu")), ERR_ACCESS_INVALID)
+
+    async def test_wrong_code_and_ban(self) -> None:
+        await self.codes.save("13800139001", "123456", datetime.now(UTC) + timedelta(minutes=5))
+        self.assertEqual(await self._code(self.auth.login_with_phone("13800139001", "000000", "jiuweihu")), ERR_CODE_INVALID)
+
+        login = await self._login("13800139001")
+        await AsyncBanService(self.users, self.sessions).ban_by_phone("13800139001")
+        self.assertEqual(await self._code(self.validator.validate_access_token(login.access_token, "jiuweihu")), ERR_ACCESS_INVALID)
+        self.assertEqual(await self._code(self._login("13800139001")), ERR_USER_BANNED)
+
+    async def test_concurrent_logins_and_batch_validation(self) -> None:
+        logins = await asyncio.gather(*(self._login(f"1380014{i:04d}") for i in range(100)))
+        self.assertEqual(len({login.guid for login in logins}), 100)
+
+        tokens = [login.access_token for login in logins] + ["A.missing"]
+        results = await self.validator.validate_many(tokens, "jiuweihu")
+        self.assertEqual([r.guid for r in results[:-1]], [login.guid for login in logins])  # type: ignore[union-attr]
+        self.assertEqual(results[-1], ERR_ACCESS_INVALID)
+
+        singles = await asyncio.gather(*(self.validator.validate_access_token(t, "jiuweihu") for t in tokens[:-1]))
+        self.assertEqual(list(singles), results[:-1])
+
+    async def test_concurrent_refresh_of_different_apps_keeps_every_token(self) -> None:
+        login = await self._login("13800139010")
+        app_ids = ["jiuweihu", "youlishe", "jiuweihu-admin"]
+        refreshed = await asyncio.gather(
+            *(self.tokens.refresh_access_token(login.guid, login.refresh_token, app_id) for app_id in app_ids)
+        )
+
+        # 整份会话读改写时，后写回的刷新会覆盖先完成的那个 app，其新 token 校验得到 ERR_ACCESS_INVALID。
+        for app_id, result in zip(app_ids, refreshed):
+            self.assertEqual((await self.validator.validate_access_token(result.access_token, app_id)).guid, login.guid)
+        self.assertEqual(sorted((await self.sessions.get(login.guid)).apps), sorted(app_ids))  # type: ignore[union-attr]
+        self.assertEqual(await self.validator.validate_many([login.access_token], "jiuweihu"), [ERR_ACCESS_INVALID])
+
+
+class InMemoryAsyncServiceTests(AsyncServiceCases, unittest.IsolatedAsyncioTestCase):
+    async def _make_stores(self):
+        return (
+            AsyncUserRepoAdapter(InMemoryUserRepo()),
+            AsyncSessionStoreAdapter(InMemorySessionStore()),
+            AsyncCodeStoreAdapter(VerificationCodeStore()),
+        )
+
+    async def test_signed_tokens_validate_without_store_and_revoke_on_logout(self) -> None:
+        signer = AccessTokenSigner([SigningKey.generate("k1")])
+        auth = AsyncAuthService(self.users, self.sessions, AsyncVerificationCodeService(self.codes), GuidGenerator(), token_signer=signer)
+        await self.codes.save("13800139002", "123456", datetime.now(UTC) + timedelta(minutes=5))
+        login = await auth.login_with_phone("13800139002", "123456", "jiuweihu")
+
+        downstream = AsyncTokenValidator(None, signer=signer, revocations=self.revocations)
+        self.assertEqual((await downstream.validate_access_token(login.access_token, "jiuweihu")).guid, login.guid)
+        await AsyncLogoutService(self.sessions, revocations=self.revocations).logout(login.guid)
+        self.assertEqual(await downstream.validate_many([login.access_token, "A.opaque"], "jiuweihu"), [ERR_ACCESS_INVALID] * 2)
+
+    async def test_refresh_then_logout_revokes_pre_refresh_signed_token(self) -> None:
+        signer = AccessTokenSigner([SigningKey.generate("k1")])
+        auth = AsyncAuthService(self.users, self.sessions, AsyncVerificationCodeService(self.codes), GuidGenerator(), token_signer=signer)
+        await self.codes.save("13800139003", "123456", datetime.now(UTC) + timedelta(minutes=5))
+        login = await auth.login_with_phone("13800139003", "123456", "jiuweihu")
+
+        tokens = AsyncTokenService(self.sessions, signer, revocations=self.revocations)
+        refreshed = await tokens.refresh_access_token(login.guid, login.refresh_token, "jiuweihu")
+        await AsyncLogoutService(self.sessions, revocations=self.revocations).logout(login.guid)
+
+        downstream = AsyncTokenValidator(None, signer=signer, revocations=self.revocations)
+        self.assertEqual(
+            await downstream.validate_many([login.access_token, refreshed.access_token], "jiuweihu"), [ERR_ACCESS_INVALID] * 2
+        )
+
+    async def test_send_code_awaits_sender(self) -> None:
+        sent = []
+
+        async def sender(phone: str, code: str) -> None:
+            sent.append((phone, code))
+
+        service = AsyncVerificationCodeService(self.codes, sender=sender)
+        await service.send_code("13800139003")
+        await service.validate_code("13800139003", sent[0][1])
+
+
+class SqliteAsyncServiceTests(AsyncServiceCases, unittest.IsolatedAsyncioTestCase):
+    async def _make_stores(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        db = SqliteDatabase(os.path.join(tmp.name, "passport.db"))
+        self.addCleanup(db.close)
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        self.sync_sessions = SqliteSessionStore(db)
+        return (
+            AsyncUserRepoAdapter(SqliteUserRepo(db), executor),
+            AsyncSessionStoreAdapter(self.sync_sessions, executor),
+            AsyncCodeStoreAdapter(SqliteVerificationCodeStore(db), executor),
+        )
+
+    async def test_state_visible_to_sync_services(self) -> None:
+        login = await self._login("13800139004")
+        self.assertEqual(TokenValidator(self.sync_sessions).validate_access_token(login.access_token, "jiuweihu").guid, login.guid)
+
+
+class RedisAsyncServiceTests(AsyncServiceCases, unittest.IsolatedAsyncioTestCase):
+    async def _make_stores(self):
+        self.server = RespStandInServer().start()
+        self.addCleanup(self.server.stop)
+        self.client = AsyncRespClient(*self.server.address, max_connections=8)
+        self.addAsyncCleanup(self.client.close)
+        return (
+            AsyncUserRepoAdapter(InMemoryUserRepo()),
+            AsyncRedisSessionStore(self.client),
+            AsyncRedisVerificationCodeStore(self.client),
+        )
+
+    async def test_interoperates_with_sync_store(self) -> None:
+        login = await self._login("13800139005")
+        sync_client = RespClient(*self.server.address)
+        self.addCleanup(sync_client.close)
+        sync_store = RedisSessionStore(sync_client)
+
+        self.assertEqual(TokenValidator(sync_store).validate_access_token(login.access_token, "jiuweihu").guid, login.guid)
+        self.assertEqual(await self.sessions.get(login.guid), sync_store.get(login.guid))
+
+    async def test_pipeline_and_cancelled_roundtrip_discard_connection(self) -> None:
+        pipe = self.client.pipeline().command("SET", "k", "v").command("GET", "k")
+        self.assertEqual(await pipe.execute(), ["OK", b"v"])
+
+        self.client.timeout = 0.000001
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.execute("GET", "k")
+        self.client.timeout = 5.0
+        # 超时的连接可能残留未读回复，已被丢弃；后续请求拿到的是干净连接。
+        self.assertEqual(await self.client.execute("GET", "k"), b"v")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -56,6 +56,7 @@ class AuthCycle1And2Tests(unittest.TestCase):
         user = self.user_repo.find_by_phone("13800138000")
         self.assertIsNotNone(user)
         self.assertEqual(user.guid, result.guid)  # type: ignore[attr-defined]
+        self.assertIs(self.user_repo.find_by_guid(result.guid), user)
         # 会话已创建
         session = self.session_store.get(result.guid)
         self.assertIsNotNone(session)
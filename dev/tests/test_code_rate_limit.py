@@ -0,0 +1,146 @@
+import os
+import sys
+import tempfile
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import ERR_CODE_TOO_FREQUENT, ERR_PHONE_INVALID, VerificationCodeStore  # type: ignore  # noqa: E402
+from backend.rate_limit import (  # type: ignore  # noqa: E402
+    CodeIssueLimits,
+    CodeRateLimiter,
+    SlidingWindowLimiter,
+    TokenBucketLimiter,
+)
+from backend.services import AuthError, VerificationCodeService  # type: ignore  # noqa: E402
+from backend.sqlite_repos import SqliteCodeRateLimiter, SqliteDatabase  # type: ignore  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_token_bucket_refills_over_time(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucketLimiter(2, 1.0, clock=clock)
+
+        self.assertEqual([bucket.allow("k") for _ in range(3)], [True, True, False])
+        clock.now += 0.5
+        self.assertFalse(bucket.allow("k"))
+        clock.now += 0.5
+        self.assertTrue(bucket.allow("k"))
+
+    def test_sliding_window_weights_previous_window(self) -> None:
+        clock = FakeClock()
+        clock.now = 600.0
+        window = SlidingWindowLimiter(10, 60, clock=clock)
+
+        self.assertEqual(sum(window.allow("ip") for _ in range(12)), 10)
+        # 进入下一窗口 30 秒：上一窗口按 50% 计入，仍有 5 个额度。
+        clock.now += 90
+        self.assertEqual(sum(window.allow("ip") for _ in range(10)), 5)
+        # 两个窗口之后完全清空。
+        clock.now += 120
+        self.assertEqual(sum(window.allow("ip") for _ in range(12)), 10)
+
+    def test_idle_keys_are_evicted_without_changing_decisions(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucketLimiter(1, 1 / 60, clock=clock)
+        for i in range(1000):
+            bucket.allow(f"138{i:08d}")
+        self.assertEqual(len(bucket), 1000)
+
+        clock.now += 61
+        self.assertTrue(bucket.allow("13900000000"))
+        clock.now += 61
+        self.assertTrue(bucket.allow("13900000001"))
+        self.assertEqual(len(bucket), 2)
+        self.assertTrue(bucket.allow("13800000000"))
+
+
+class SendCodeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.store = VerificationCodeStore()
+        self.sent: list[tuple[str, str]] = []
+        self.service = VerificationCodeService(
+            self.store,
+            limiter=CodeRateLimiter(CodeIssueLimits(ip_limit=3), clock=self.clock),
+            sender=lambda phone, code: self.sent.append((phone, code)),
+        )
+
+    def _code(self, phone: str, ip: str) -> str:
+        with self.assertRaises(AuthError) as ctx:
+            self.service.send_code(phone, ip)
+        return ctx.exception.code
+
+    def test_issued_code_validates(self) -> None:
+        self.service.send_code("13800138900", "1.1.1.1")
+        phone, code = self.sent[0]
+        self.assertEqual(self.store.get(phone)[0], code)  # type: ignore[index]
+        self.service.validate_code(phone, code)
+
+    def test_phone_cooldown_and_daily_limit(self) -> None:
+        self.service.send_code("13800138901", None)
+        self.assertEqual(self._code("13800138901", None), ERR_CODE_TOO_FREQUENT)
+        for _ in range(9):
+            self.clock.now += 61
+            self.service.send_code("13800138901", None)
+        self.clock.now += 61
+        self.assertEqual(self._code("13800138901", None), ERR_CODE_TOO_FREQUENT)
+        self.assertEqual(len(self.sent), 10)
+
+    def test_ip_limit_does_not_consume_phone_quota(self) -> None:
+        for i in range(3):
+            self.service.send_code(f"1380013891{i}", "6.6.6.6")
+        self.assertEqual(self._code("13800138919", "6.6.6.6"), ERR_CODE_TOO_FREQUENT)
+        self.service.send_code("13800138919", "7.7.7.7")
+
+    def test_invalid_phone_rejected_before_rate_limit(self) -> None:
+        self.assertEqual(self._code("12345", "1.1.1.1"), ERR_PHONE_INVALID)
+
+
+class SqliteSendCodeTests(SendCodeTests):
+    """同一组规则，状态放在 SQLite 里；另开一个连接模拟 pre-fork 的另一个 worker。"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "passport.db")
+        self.db = SqliteDatabase(self.path)
+        self.addCleanup(self.db.close)
+        self.limits = CodeIssueLimits(ip_limit=3)
+        self.service._limiter = SqliteCodeRateLimiter(self.db, self.limits, clock=self.clock)
+
+    def _other_worker(self) -> SqliteCodeRateLimiter:
+        db = SqliteDatabase(self.path)
+        self.addCleanup(db.close)
+        return SqliteCodeRateLimiter(db, self.limits, clock=self.clock)
+
+    def test_quota_is_shared_between_workers(self) -> None:
+        other = self._other_worker()
+        self.service.send_code("13800138930", "8.8.8.8")
+        with self.assertRaises(AuthError):
+            other.check("13800138930", "9.9.9.9")  # 冷却期内，换 worker 也不行
+        other.check("13800138931", "8.8.8.8")
+        other.check("13800138932", "8.8.8.8")
+        self.assertEqual(self._code("13800138933", "8.8.8.8"), ERR_CODE_TOO_FREQUENT)  # IP 额度已被两边用完
+
+    def test_idle_keys_expire_and_are_purged(self) -> None:
+        self.service.send_code("13800138940", None)
+        self.clock.now += 24 * 3600 * 2
+        self.assertEqual(self.service._limiter.purge_expired(), 2)  # 冷却 + 每日计数
+        self.service.send_code("13800138940", None)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
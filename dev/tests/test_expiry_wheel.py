@@ -0,0 +1,194 @@
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    ERR_ACCESS_INVALID,
+    AppSession,
+    InMemorySessionStore,
+    Session,
+    ShardedSessionStore,
+    VerificationCodeStore,
+)
+from backend.expiry import ExpiringCodeStore, ExpiringSessionStore, TimingWheel  # type: ignore  # noqa: E402
+from backend.services import AuthError, TokenService  # type: ignore  # noqa: E402
+from backend.sqlite_repos import SqliteDatabase, SqliteSessionStore  # type: ignore  # noqa: E402
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class TimingWheelTests(unittest.TestCase):
+    def test_fires_each_key_once_at_or_after_deadline(self) -> None:
+        rnd = random.Random(7)
+        wheel = TimingWheel(tick=1.0, slots=8, levels=3, start=0.0)
+        deadlines = {}
+        for i in range(500):
+            # 覆盖多个层级以及超过最高层跨度（8**3 = 512）的溢出条目。
+            deadlines[i] = rnd.randint(1, 2000)
+            wheel.schedule(i, deadlines[i])
+        cancelled = set(rnd.sample(range(500), 50))
+        for key in cancelled:
+            wheel.cancel(key)
+
+        fired_at = {}
+        now = 0
+        while now < 2100:
+            now += rnd.randint(1, 40)
+            for key in wheel.advance(now):
+                self.assertNotIn(key, fired_at)
+                fired_at[key] = now
+
+        self.assertEqual(set(fired_at), set(deadlines) - cancelled)
+        for key, at in fired_at.items():
+            self.assertGreaterEqual(at, deadlines[key])
+        self.assertEqual(len(wheel), 0)
+
+    def test_single_level_wheel_holds_entries_beyond_its_span(self) -> None:
+        wheel = TimingWheel(tick=1.0, slots=8, levels=1, start=0.0)
+        wheel.schedule("long", 20)  # 超过单层跨度 8 个 tick
+        wheel.schedule("short", 3)
+        fired_at = {}
+        for now in range(1, 30):
+            for key in wheel.advance(now):
+                fired_at[key] = now
+        self.assertEqual(fired_at, {"short": 3, "long": 20})
+        self.assertEqual(len(wheel), 0)
+
+    def test_reschedule_overrides_previous_deadline(self) -> None:
+        wheel = TimingWheel(start=0.0)
+        wheel.schedule("k", 10)
+        wheel.schedule("k", 100)
+        self.assertEqual(wheel.advance(50), [])
+        self.assertEqual(wheel.advance(100), ["k"])
+
+    def test_rejects_non_power_of_two_slots(self) -> None:
+        with self.assertRaises(ValueError):
+            TimingWheel(slots=60)
+
+
+class _InterleavedSqliteStore(SqliteSessionStore):
+    """`race` 在读会话之后、写回之前执行一次，模拟另一个 worker 的写入恰好落在中间。"""
+
+    race = None
+
+    def _run_race(self) -> None:
+        race, self.race = self.race, None
+        if race is not None:
+            race()
+
+    def get(self, guid):
+        session = super().get(guid)
+        self._run_race()
+        return session
+
+    def update_app(self, guid, app_id, fn):
+        self._run_race()  # 原子更新内无法插入写入，另一个 worker 只能排在它前面
+        return super().update_app(guid, app_id, fn)
+
+
+class ExpiringStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = datetime(2025, 1, 1, 12, 0, tzinfo=UTC)
+
+    def _session(self, guid: str, *, refresh_in: timedelta, apps: dict[str, timedelta]) -> Session:
+        return Session(
+            guid=guid,
+            refresh_token=f"R.{guid}",
+            refresh_token_expires_at=self.now + refresh_in,
+            apps={
+                app_id: AppSession(access_token=f"A.{guid}.{app_id}", access_token_expires_at=self.now + ttl, last_active_at=self.now)
+                for app_id, ttl in apps.items()
+            },
+        )
+
+    def test_sessions_and_access_tokens_are_evicted_at_expiry(self) -> None:
+        for inner in (InMemorySessionStore(), ShardedSessionStore()):
+            store = ExpiringSessionStore(inner, now_provider=lambda: self.now)
+            store.put(self._session("G1", refresh_in=timedelta(days=2), apps={"jiuweihu": timedelta(hours=4), "youlishe": timedelta(hours=8)}))
+            store.put(self._session("G2", refresh_in=timedelta(hours=1), apps={"jiuweihu": timedelta(minutes=30)}))
+            validator = TokenValidator(store)
+
+            self.assertEqual(store.sweep(self.now + timedelta(minutes=29)), 0)
+            self.assertEqual(store.sweep(self.now + timedelta(hours=1)), 2)  # G2 的 access + 会话
+            self.assertIsNone(store.get("G2"))
+
+            self.assertEqual(store.sweep(self.now + timedelta(hours=4)), 1)
+            session = store.get("G1")
+            assert session is not None
+            self.assertEqual(set(session.apps), {"youlishe"})
+            with self.assertRaises(AuthError) as ctx:
+                validator.validate_access_token("A.G1.jiuweihu", "jiuweihu", now=self.now + timedelta(hours=4))
+            self.assertEqual(ctx.exception.code, ERR_ACCESS_INVALID)
+
+            metrics = store.metrics()
+            self.assertEqual((metrics["sessions"].live, metrics["sessions"].evicted), (1, 1))
+            self.assertEqual((metrics["access_tokens"].live, metrics["access_tokens"].evicted), (1, 2))
+
+    def test_refresh_reschedules_and_delete_cancels(self) -> None:
+        store = ExpiringSessionStore(InMemorySessionStore(), now_provider=lambda: self.now)
+        session = self._session("G1", refresh_in=timedelta(days=2), apps={"jiuweihu": timedelta(hours=4)})
+        store.put(session)
+
+        # 模拟刷新：access 过期时间后延，原到期时刻不应驱逐。
+        session.apps = {"jiuweihu": AppSession("A.new", self.now + timedelta(hours=7), self.now)}
+        store.put(session)
+        self.assertEqual(store.sweep(self.now + timedelta(hours=5)), 0)
+        self.assertEqual(store.sweep(self.now + timedelta(hours=7)), 1)
+
+        store.delete("G1")
+        self.assertEqual(store.sweep(self.now + timedelta(days=3)), 0)
+        self.assertEqual(store.metrics()["sessions"].live, 0)
+        self.assertEqual(store.metrics()["access_tokens"].live, 0)
+
+    def test_eviction_keeps_concurrent_refresh_of_another_app(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "passport.db")
+        db, other = SqliteDatabase(path), SqliteDatabase(path)
+        self.addCleanup(db.close)
+        self.addCleanup(other.close)
+        inner = _InterleavedSqliteStore(db)
+        now = self.now = datetime.now(UTC).replace(microsecond=0)  # 刷新按真实时间校验 Refresh Token
+        store = ExpiringSessionStore(inner, now_provider=lambda: now)
+        store.put(self._session("G1", refresh_in=timedelta(days=2), apps={"jiuweihu": timedelta(hours=4)}))
+
+        refreshed = []
+        inner.race = lambda: refreshed.append(
+            TokenService(SqliteSessionStore(other)).refresh_access_token("G1", "R.G1", "youlishe")
+        )
+        self.assertEqual(store.sweep(now + timedelta(hours=4)), 1)
+
+        session = store.get("G1")
+        assert session is not None
+        self.assertEqual(list(session.apps), ["youlishe"])
+        self.assertEqual(session.apps["youlishe"].access_token, refreshed[0].access_token)
+
+    def test_codes_are_evicted_at_expiry(self) -> None:
+        inner = VerificationCodeStore()
+        codes = ExpiringCodeStore(inner, now_provider=lambda: self.now)
+        codes.save("13800138000", "123456", self.now + timedelta(minutes=5))
+        codes.save("13800138001", "654321", self.now + timedelta(minutes=10))
+
+        self.assertEqual(codes.sweep(self.now + timedelta(minutes=5)), 1)
+        self.assertIsNone(inner.get("13800138000"))
+        self.assertIsNotNone(codes.get("13800138001"))
+        self.assertEqual((codes.metrics()["codes"].live, codes.metrics()["codes"].evicted), (1, 1))
+
+        # 重新下发验证码会覆盖旧的到期时间。
+        codes.save("13800138001", "111111", self.now + timedelta(minutes=20))
+        self.assertEqual(codes.sweep(self.now + timedelta(minutes=15)), 0)
+        self.assertEqual(codes.sweep(self.now + timedelta(minutes=20)), 1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
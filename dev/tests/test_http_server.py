@@ -0,0 +1,318 @@
+import asyncio
+import json
+import os
+import sys
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import ERR_ACCESS_INVALID, ERR_APP_ID_MISMATCH, ERR_REFRESH_MISMATCH  # type: ignore  # noqa: E402
+from backend.http_api import build_api  # type: ignore  # noqa: E402
+from backend.http_server import HttpError, HttpServer, Router  # type: ignore  # noqa: E402
+
+
+def _encode(method: str, path: str, body=None, headers=None) -> bytes:
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    lines = [f"{method} {path} HTTP/1.1", "Host: test", f"Content-Length: {len(data)}"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data
+
+
+async def _read_response(reader: asyncio.StreamReader) -> tuple[int, dict, object]:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {k.lower(): v.strip() for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+    body = await reader.readexactly(int(headers["content-length"]))
+    return status, headers, json.loads(body) if body else None
+
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, address) -> "Client":
+        return cls(*await asyncio.open_connection(*address))
+
+    async def request(self, method: str, path: str, body=None, headers=None):
+        self.writer.write(_encode(method, path, body, headers))
+        return await _read_response(self.reader)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class HttpServerTransportTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.router = Router()
+        self.release = asyncio.Event()
+        self.started = 0
+
+        @self.router.post("/echo")
+        async def echo(request):
+            return {"body": request.json(), "query": request.query}
+
+        @self.router.get("/sleep/{ms}")
+        async def sleep(request):
+            await asyncio.sleep(int(request.params["ms"]) / 1000)
+            return {"slept": int(request.params["ms"])}
+
+        @self.router.get("/block")
+        async def block(request):
+            self.started += 1
+            await self.release.wait()
+            return {"ok": True}
+
+        @self.router.get("/fail")
+        async def fail(request):
+            raise HttpError(409, "ERR_CONFLICT", "nope")
+
+        @self.router.get("/crash")
+        async def crash(request):
+            raise RuntimeError("boom")
+
+        self.server = await HttpServer(self.router, port=0, max_workers=4, max_body_bytes=1024, keep_alive_timeout=5).start()
+        self.addAsyncCleanup(self.server.shutdown, 1.0)
+
+    async def test_keep_alive_reuses_connection(self) -> None:
+        client = await Client.connect(self.server.address)
+        for i in range(3):
+            status, headers, body = await client.request("POST", f"/echo?i={i}", {"n": i})
+            self.assertEqual((status, headers["connection"]), (200, "keep-alive"))
+            self.assertEqual(body, {"body": {"n": i}, "query": {"i": str(i)}})
+        self.assertEqual(self.server.connection_count, 1)
+        client.close()
+
+    async def test_pipelined_requests_answered_in_order(self) -> None:
+        client = await Client.connect(self.server.address)
+        client.writer.write(b"".join(_encode("GET", f"/sleep/{ms}") for ms in (60, 10, 30)))
+        replies = [await _read_response(client.reader) for _ in range(3)]
+        self.assertEqual([body["slept"] for _, _, body in replies], [60, 10, 30])
+        client.close()
+
+    async def test_connection_close_and_errors(self) -> None:
+        client = await Client.connect(self.server.address)
+        self.assertEqual((await client.request("GET", "/missing"))[0], 404)
+        self.assertEqual((await client.request("POST", "/sleep/1"))[0], 405)
+        self.assertEqual((await client.request("GET", "/fail"))[2], {"code": "ERR_CONFLICT", "message": "nope"})
+        with self.assertLogs("backend.http_server", "ERROR"):
+            self.assertEqual((await client.request("GET", "/crash"))[0], 500)
+        status, headers, _ = await client.request("POST", "/echo", {"x": "y" * 2000})
+        self.assertEqual((status, headers["connection"]), (413, "close"))
+        self.assertEqual(await client.reader.read(), b"")
+        client.close()
+
+        client = await Client.connect(self.server.address)
+        status, headers, _ = await client.request("POST", "/echo", {}, {"Connection": "close"})
+        self.assertEqual((status, headers["connection"]), (200, "close"))
+        self.assertEqual(await client.reader.read(), b"")
+        client.close()
+
+    async def test_worker_pool_bounds_concurrent_handlers(self) -> None:
+        clients = [await Client.connect(self.server.address) for _ in range(6)]
+        for client in clients:
+            client.writer.write(_encode("GET", "/block"))
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.started, 4)
+        self.release.set()
+        for client in clients:
+            self.assertEqual((await _read_response(client.reader))[0], 200)
+            client.close()
+        self.assertEqual(self.started, 6)
+
+    async def test_graceful_shutdown_finishes_in_flight_requests(self) -> None:
+        address = self.server.address
+        idle = await Client.connect(address)
+        await idle.request("POST", "/echo", {})
+        busy = await Client.connect(self.server.address)
+        busy.writer.write(_encode("GET", "/sleep/100"))
+        await asyncio.sleep(0.02)
+
+        await self.server.shutdown(grace=2.0)
+
+        status, headers, body = await _read_response(busy.reader)
+        self.assertEqual((status, headers["connection"], body), (200, "close", {"slept": 100}))
+        self.assertEqual(await busy.reader.read(), b"")
+        self.assertEqual(await idle.reader.read(), b"")
+        busy.close()
+        idle.close()
+        with self.assertRaises(OSError):
+            await Client.connect(address)
+
+
+class PassportHttpApiTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.sent: dict[str, str] = {}
+
+        async def sender(phone: str, code: str) -> None:
+            self.sent[phone] = code
+
+        self.api = build_api("memory", code_sender=sender)
+        self.server = await HttpServer(self.api, port=0).start()
+        self.client = await Client.connect(self.server.address)
+
+    async def asyncTearDown(self) -> None:
+        self.client.close()
+        await self.server.shutdown(1.0)
+        await self.api.aclose()
+
+    async def _login(self, phone: str, app_id: str = "jiuweihu") -> dict:
+        self.assertEqual((await self.client.request("POST", "/api/passport/send-code", {"phone": phone}))[0], 200)
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/login-by-phone", {"phone": phone, "code": self.sent[phone], "app_id": app_id}
+        )
+        self.assertEqual(status, 200, body)
+        return body  # type: ignore[return-value]
+
+    async def test_login_refresh_verify_logout(self) -> None:
+        login = await self._login("13800139100")
+        self.assertTrue(login["access_token_expires_at"].endswith("Z"))
+        self.assertGreater(login["expires_in"], 0)
+
+        status, _, refreshed = await self.client.request(
+            "POST", f"/api/passport/{login['guid']}/refresh-token", {"refresh_token": login["refresh_token"], "app_id": "youlishe"}
+        )
+        self.assertEqual(status, 200)
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/refresh-token", {"guid": login["guid"], "refresh_token": "R.bad", "app_id": "youlishe"}
+        )
+        self.assertEqual((status, body["code"]), (401, ERR_REFRESH_MISMATCH))
+
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/verify-token", {"access_token": refreshed["access_token"], "app_id": "youlishe"}
+        )
+        self.assertEqual((status, body["guid"]), (200, login["guid"]))
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/verify-token", {"access_token": refreshed["access_token"], "app_id": "jiuweihu"}
+        )
+        self.assertEqual((status, body["code"]), (403, ERR_APP_ID_MISMATCH))
+
+        status, _, body = await self.client.request(
+            "POST",
+            "/api/passport/verify-tokens",
+            {"access_tokens": [login["access_token"], "A.nope"], "app_id": "jiuweihu"},
+        )
+        self.assertEqual(body["results"][0]["ok"], True)
+        self.assertEqual(body["results"][1], {"ok": False, "code": ERR_ACCESS_INVALID})
+
+        headers = {"Authorization": f"Bearer {login['access_token']}"}
+        self.assertEqual((await self.client.request("POST", "/api/passport/logout", {}, headers))[2], {"success": True})
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/verify-token", {"access_token": refreshed["access_token"], "app_id": "youlishe"}
+        )
+        self.assertEqual((status, body["code"]), (401, ERR_ACCESS_INVALID))
+
+    async def test_validation_and_rate_limit_errors(self) -> None:
+        status, _, body = await self.client.request("POST", "/api/passport/login-by-phone", {"phone": "13800139101"})
+        self.assertEqual((status, body["code"]), (400, "ERR_BAD_REQUEST"))
+        status, _, body = await self.client.request("POST", "/api/passport/verify-tokens", {"access_tokens": [], "app_id": "a"})
+        self.assertEqual(status, 400)
+
+        await self.client.request("POST", "/api/passport/send-code", {"phone": "13800139101"})
+        status, _, body = await self.client.request("POST", "/api/passport/send-code", {"phone": "13800139101"})
+        self.assertEqual((status, body["code"]), (429, "ERR_CODE_TOO_FREQUENT"))
+
+    async def _login_admin(self, phone: str) -> dict:
+        await self._login(phone)  # 先以普通用户注册，再提升为后台账号
+        user = await self.api._users.find_by_phone(phone)
+        user.user_type = 9
+        await self.api._users.save(user)
+        await self.client.request("POST", "/api/passport/send-code", {"phone": phone})
+        status, _, body = await self.client.request("POST", "/api/admin/login-by-phone", {"phone": phone, "code": self.sent[phone]})
+        self.assertEqual(status, 200, body)
+        return body  # type: ignore[return-value]
+
+    async def test_admin_endpoints_require_admin_app(self) -> None:
+        self.api._codes._limiter = None  # 同一手机号需要两次验证码
+        user = await self._login("13800139102")
+        admin = await self._login_admin("13800139103")
+        as_admin = {"Authorization": f"Bearer {admin['access_token']}", "x-app-id": "admin"}
+
+        self.assertEqual((await self.client.request("GET", "/api/admin/users"))[0], 401)
+        as_user = {"Authorization": f"Bearer {user['access_token']}", "x-app-id": "jiuweihu"}
+        self.assertEqual((await self.client.request("GET", "/api/admin/users", headers=as_user))[0], 403)
+
+        status, _, body = await self.client.request("GET", "/api/admin/users?limit=1", headers=as_admin)
+        self.assertEqual((status, len(body["users"])), (200, 1))
+        status, _, page2 = await self.client.request("GET", f"/api/admin/users?limit=1&cursor={body['next_cursor']}", headers=as_admin)
+        self.assertEqual({body["users"][0]["phone"], page2["users"][0]["phone"]}, {"13800139102", "13800139103"})
+
+        await self.client.request("POST", "/api/admin/users/ban", {"phone": "13800139102"}, as_admin)
+        status, _, body = await self.client.request("GET", "/api/admin/users?status=BANNED", headers=as_admin)
+        self.assertEqual([u["phone"] for u in body["users"]], ["13800139102"])
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/verify-token", {"access_token": user["access_token"], "app_id": "jiuweihu"}
+        )
+        self.assertEqual(status, 401)
+
+        status, _, body = await self.client.request("GET", "/api/admin/activity?phone=13800139103", headers=as_admin)
+        self.assertEqual(sorted({a["phone"] for a in body["activities"]}), ["13800139103"])
+
+        status, _, refreshed = await self.client.request(
+            "POST", "/api/admin/refresh-token", {"guid": admin["guid"], "refresh_token": admin["refresh_token"]}
+        )
+        self.assertEqual(status, 200)
+        as_admin = {"Authorization": f"Bearer {refreshed['access_token']}", "x-app-id": "admin"}
+        self.assertEqual((await self.client.request("GET", "/api/admin/users", headers=as_admin))[0], 200)
+
+        # 降级立即生效：已签发的后台 token 不再可用
+        demoted = await self.api._users.find_by_phone("13800139103")
+        demoted.user_type = 1
+        await self.api._users.save(demoted)
+        self.assertEqual((await self.client.request("GET", "/api/admin/users", headers=as_admin))[0], 403)
+
+    async def test_admin_logout_records_logout(self) -> None:
+        self.api._codes._limiter = None
+        user = await self._login("13800139104")
+        admin = await self._login_admin("13800139105")
+        as_admin = {"Authorization": f"Bearer {admin['access_token']}", "x-app-id": "admin"}
+
+        status, _, body = await self.client.request("POST", f"/api/admin/users/{user['guid']}/logout", {}, as_admin)
+        self.assertEqual((status, body), (200, {"success": True}))
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/verify-token", {"access_token": user["access_token"], "app_id": "jiuweihu"}
+        )
+        self.assertEqual(status, 401)
+
+        status, _, body = await self.client.request("GET", "/api/admin/activity?phone=13800139104", headers=as_admin)
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body["activities"]), 1)
+        self.assertIsNotNone(body["activities"][0]["logout_at"])
+
+    async def test_ordinary_user_cannot_obtain_admin_access(self) -> None:
+        self.api._codes._limiter = None
+        phone = "13800139104"
+        await self.client.request("POST", "/api/passport/send-code", {"phone": phone})
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/login-by-phone", {"phone": phone, "code": self.sent[phone], "app_id": "admin"}
+        )
+        self.assertEqual((status, body["code"]), (403, "ERR_FORBIDDEN"))
+
+        login = await self._login(phone)
+        status, _, body = await self.client.request(
+            "POST", "/api/passport/refresh-token", {"guid": login["guid"], "refresh_token": login["refresh_token"], "app_id": "admin"}
+        )
+        self.assertEqual((status, body["code"]), (403, "ERR_FORBIDDEN"))
+        status, _, body = await self.client.request(
+            "POST", "/api/admin/refresh-token", {"guid": login["guid"], "refresh_token": login["refresh_token"]}
+        )
+        self.assertEqual((status, body["code"]), (403, "ERR_FORBIDDEN"))
+
+        await self.client.request("POST", "/api/passport/send-code", {"phone": phone})
+        status, _, body = await self.client.request("POST", "/api/admin/login-by-phone", {"phone": phone, "code": self.sent[phone]})
+        self.assertEqual((status, body["code"]), (403, "ERR_FORBIDDEN"))
+        status, _, body = await self.client.request("POST", "/api/admin/login-by-phone", {"phone": phone, "code": "wrong"})
+        self.assertEqual(status, 400)  # 验证码错误先于角色检查
+
+        as_user = {"Authorization": f"Bearer {login['access_token']}", "x-app-id": "admin"}
+        self.assertEqual((await self.client.request("GET", "/api/admin/users", headers=as_user))[0], 403)
+        status, _, _ = await self.client.request("POST", "/api/admin/users/ban", {"phone": phone}, as_user)
+        self.assertEqual(status, 403)
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -17,6 +17,7 @@ from native.local_session import (  # type: ignore  # noqa: E402
     read_session_file,
     write_session_file,
 )
+from shell import session_codec, timestamp_codec  # type: ignore  # noqa: E402
 
 
 UTC = timezone.utc
@@ -83,15 +84,57 @@ class LocalSessionCycle13Tests(unittest.TestCase):
         }
         with tempfile.TemporaryDirectory() as tmpdir:
             path = os.path.join(tmpdir, "session.dat")
-            write_session_file(path, payload)
-            loaded = read_session_file(path)
+            write_session_file(path, payload, codec=session_codec)
+            loaded = read_session_file(path, codec=session_codec)
             self.assertEqual(loaded["guid"], payload["guid"])
             self.assertEqual(loaded["phone"], payload["phone"])
+            self.assertNotIn("user_type", loaded)  # 缺失的可选字段不被补成默认值
+
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(4), b"PSES")
 
             # 删除应幂等
             delete_session_file(path)
             delete_session_file(path)
 
+    def test_read_legacy_session_file(self) -> None:
+        payload = {
+            "guid": "G1",
+            "phone": "13800138000",
+            "created_at": datetime(2025, 1, 1, tzinfo=UTC).isoformat(),
+            "expires_at": datetime(2025, 1, 3, tzinfo=UTC).isoformat(),
+            "refresh_token": "R.token",
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "session.dat")
+            with open(path, "wb") as f:
+                f.write(LocalSessionCrypto.encrypt(payload))
+            self.assertEqual(read_session_file(path), payload)
+            self.assertEqual(read_session_file(path, codec=session_codec), payload)
+
+    def test_without_codec_writes_legacy_format(self) -> None:
+        payload = {"guid": "G1", "phone": "13800138000", "refresh_token": "R.token"}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "session.dat")
+            write_session_file(path, payload)
+            with open(path, "rb") as f:
+                self.assertEqual(LocalSessionCrypto.decrypt(f.read()), payload)
+            self.assertEqual(read_session_file(path), payload)
+
+    def test_validator_uses_injected_time_parser(self) -> None:
+        now = datetime(2025, 1, 1, 1, tzinfo=UTC)
+        struct = {
+            "guid": "G1",
+            "phone": "13800138000",
+            "created_at": datetime(2025, 1, 1, tzinfo=UTC).isoformat(),
+            "expires_at": datetime(2025, 1, 3, tzinfo=UTC).isoformat(),
+            "refresh_token": "R.token",
+        }
+        timestamp_codec._parsed.clear()
+        validator = LocalSessionValidator(parse_time=timestamp_codec.parse_epoch_us)
+        self.assertEqual(validator.validate(struct, now), ValidationStatus.VALID)
+        self.assertIn(struct["created_at"], timestamp_codec._parsed)
+        self.assertEqual(LocalSessionValidator().validate(struct, now), ValidationStatus.VALID)
 
 
 if __name__ == "__main__":  # pragma: no cover
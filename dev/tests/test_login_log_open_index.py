@@ -0,0 +1,66 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import InMemoryLoginLogRepo, LoginLog, TimeIndexedLoginLogRepo  # type: ignore  # noqa: E402
+from backend.services import LoginLogService  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+def _scan_latest_open(logs: list[LoginLog], guid: str, phone: Optional[str]) -> Optional[LoginLog]:
+    """旧实现的全表倒序扫描，作为 find_open 的参照。"""
+
+    for log in reversed(logs):
+        if log.guid == guid and (phone is None or log.phone == phone) and log.logout_at is None:
+            return log
+    return None
+
+
+class OpenLoginIndexTests(unittest.TestCase):
+    def test_find_open_matches_reverse_scan(self) -> None:
+        base = datetime(2025, 1, 1, tzinfo=UTC)
+        for factory in (InMemoryLoginLogRepo, TimeIndexedLoginLogRepo):
+            rnd = random.Random(3)
+            repo = factory()
+            service = LoginLogService(repo)
+            guids = [f"G{i}" for i in range(8)]
+            phones = ["13800138000", "13800138001", "13800138002"]
+            for i in range(2000):
+                guid = rnd.choice(guids)
+                phone = rnd.choice(phones)
+                when = base + timedelta(seconds=i)
+                if rnd.random() < 0.55:
+                    service.record_login(guid, phone, rnd.random() > 0.2, when=when)
+                    continue
+                query_phone = phone if rnd.random() < 0.5 else None
+                expected = _scan_latest_open(repo.all(), guid, query_phone)
+                self.assertIs(repo.find_open(guid, query_phone), expected)
+                service.record_logout(guid, query_phone, when=when)
+                if expected is not None:
+                    self.assertEqual(expected.logout_at, when)
+
+    def test_logout_without_open_login_is_noop(self) -> None:
+        repo = InMemoryLoginLogRepo()
+        service = LoginLogService(repo)
+        service.record_logout("GX", "13800138000")
+        self.assertEqual(repo.all(), [])
+
+    def test_rows_appended_already_closed_are_not_indexed(self) -> None:
+        now = datetime(2025, 1, 1, tzinfo=UTC)
+        repo = InMemoryLoginLogRepo()
+        repo.append(LoginLog(guid="GA", phone="13800138000", login_at=now, logout_at=now))
+        self.assertIsNone(repo.find_open("GA"))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
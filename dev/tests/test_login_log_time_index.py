@@ -0,0 +1,83 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import InMemoryLoginLogRepo, TimeIndexedLoginLogRepo  # type: ignore  # noqa: E402
+from backend.services import LoginLogService  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class TimeIndexedLoginLogRepoTests(unittest.TestCase):
+    """TimeIndexedLoginLogRepo 需与 InMemoryLoginLogRepo 的查询结果（含顺序）完全一致。"""
+
+    def setUp(self) -> None:
+        self.base = datetime(2025, 1, 1, tzinfo=UTC)
+        self.old = LoginLogService(InMemoryLoginLogRepo())
+        self.new = LoginLogService(TimeIndexedLoginLogRepo())
+
+    def _both(self, method: str, *args, **kwargs) -> None:
+        getattr(self.old, method)(*args, **kwargs)
+        getattr(self.new, method)(*args, **kwargs)
+
+    def _key(self, rows):
+        return [(r.guid, r.phone, r.login_at, r.logout_at, r.channel, r.ip) for r in rows]
+
+    def test_random_workload_matches_reference_repo(self) -> None:
+        rnd = random.Random(42)
+        phones = [f"1380013{i:04d}" for i in range(15)]
+        channels = ["pc", "mobile", "web"]
+        for i in range(600):
+            phone = rnd.choice(phones)
+            guid = f"G{phones.index(phone)}"
+            # 约 1/5 的记录乱序写入（补录），并刻意制造相同时间戳。
+            offset = i if rnd.random() > 0.2 else rnd.randint(0, i)
+            when = self.base + timedelta(minutes=offset)
+            if rnd.random() < 0.7:
+                self._both("record_login", guid, phone, rnd.random() > 0.1, channel=rnd.choice(channels), when=when)
+            else:
+                self._both("record_logout", guid, phone if rnd.random() < 0.5 else None, channel=rnd.choice(channels + [""]), when=when)
+
+        for _ in range(200):
+            start = self.base + timedelta(minutes=rnd.randint(-10, 600)) if rnd.random() < 0.6 else None
+            end = start + timedelta(minutes=rnd.randint(0, 300)) if start is not None and rnd.random() < 0.7 else None
+            kwargs = {
+                "phone": rnd.choice(phones + ["13900000000"]) if rnd.random() < 0.5 else None,
+                "channel": rnd.choice(channels + ["ios"]) if rnd.random() < 0.5 else None,
+                "start": start,
+                "end": end,
+            }
+            self.assertEqual(self._key(self.new.query_logs(**kwargs)), self._key(self.old.query_logs(**kwargs)), kwargs)
+
+    def test_logout_moves_row_between_channel_indexes(self) -> None:
+        self._both("record_login", "GA", "13800138000", True, channel="mobile", when=self.base)
+        self._both("record_logout", "GA", "13800138000", channel="pc", when=self.base + timedelta(hours=1))
+
+        self.assertEqual(self.new.query_logs(channel="mobile"), [])
+        rows = self.new.query_logs(channel="pc")
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].logout_at, self.base + timedelta(hours=1))
+
+    def test_out_of_order_insert_keeps_login_order(self) -> None:
+        repo = TimeIndexedLoginLogRepo()
+        service = LoginLogService(repo)
+        for minutes in (30, 10, 20, 10):
+            service.record_login("GA", "13800138000", True, when=self.base + timedelta(minutes=minutes))
+
+        rows = service.query_logs()
+        self.assertEqual([r.login_at for r in rows], sorted(r.login_at for r in rows))
+        # all() 保持写入顺序。
+        self.assertEqual([r.login_at.minute for r in repo.all()], [30, 10, 20, 10])
+        self.assertEqual(len(service.query_logs(start=self.base + timedelta(minutes=10), end=self.base + timedelta(minutes=20))), 3)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,117 @@
+import functools
+import http.client
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.http_api import build_api  # type: ignore  # noqa: E402
+from backend.prefork import PreforkServer  # type: ignore  # noqa: E402
+from backend.sqlite_repos import SqliteDatabase, SqliteVerificationCodeStore  # type: ignore  # noqa: E402
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "pre-fork mode needs os.fork")
+class PreforkServerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "passport.db")
+        SqliteDatabase(self.path).close()
+        factory = functools.partial(build_api, "sqlite", sqlite_path=self.path)
+        self.server = PreforkServer(factory, workers=2, port=0, grace=2.0).start()
+        self.addCleanup(self.server.stop)
+
+    def _post(self, path: str, body: dict) -> tuple[int, dict]:
+        # 每个请求新建连接，让请求分散到不同 worker。
+        conn = http.client.HTTPConnection(*self.server.address, timeout=10)
+        try:
+            conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json", "Connection": "close"})
+            resp = conn.getresponse()
+            return resp.status, json.loads(resp.read())
+        finally:
+            conn.close()
+
+    def _login(self, phone: str) -> dict:
+        self.assertEqual(self._post("/api/passport/send-code", {"phone": phone})[0], 200)
+        db = SqliteDatabase(self.path)
+        code, _ = SqliteVerificationCodeStore(db).get(phone)
+        db.close()
+        status, body = self._post("/api/passport/login-by-phone", {"phone": phone, "code": code, "app_id": "jiuweihu"})
+        self.assertEqual(status, 200, body)
+        return body
+
+    def test_state_is_shared_between_workers(self) -> None:
+        self.assertEqual(len(self.server.pids), 2)
+        login = self._login("13800139200")
+        for _ in range(10):
+            status, body = self._post(
+                "/api/passport/verify-token", {"access_token": login["access_token"], "app_id": "jiuweihu"}
+            )
+            self.assertEqual((status, body["guid"]), (200, login["guid"]))
+
+        status, refreshed = self._post(
+            "/api/passport/refresh-token",
+            {"guid": login["guid"], "refresh_token": login["refresh_token"], "app_id": "youlishe"},
+        )
+        self.assertEqual(status, 200)
+        for _ in range(10):
+            status, _ = self._post(
+                "/api/passport/verify-token", {"access_token": refreshed["access_token"], "app_id": "youlishe"}
+            )
+            self.assertEqual(status, 200)
+
+    def test_concurrent_refresh_of_different_apps_across_workers(self) -> None:
+        login = self._login("13800139203")
+        app_ids = ["jiuweihu", "youlishe", "xiaoyu"]
+        latest: dict[str, str] = {}
+        errors: list[BaseException] = []
+        start = threading.Barrier(len(app_ids))
+
+        def refresh(app_id: str) -> None:
+            try:
+                start.wait()
+                for _ in range(15):
+                    status, body = self._post(
+                        "/api/passport/refresh-token",
+                        {"guid": login["guid"], "refresh_token": login["refresh_token"], "app_id": app_id},
+                    )
+                    self.assertEqual(status, 200, body)
+                    latest[app_id] = body["access_token"]
+            except BaseException as exc:  # pragma: no cover - 失败时回传到主线程
+                errors.append(exc)
+
+        threads = [threading.Thread(target=refresh, args=(app_id,)) for app_id in app_ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 两个 worker 交错刷新同一 guid 的不同 app：每个 app 最后拿到的 token 都必须仍然有效。
+        self.assertEqual(errors, [])
+        for app_id, token in latest.items():
+            status, body = self._post("/api/passport/verify-token", {"access_token": token, "app_id": app_id})
+            self.assertEqual((status, body.get("guid")), (200, login["guid"]), body)
+
+    def test_code_rate_limit_is_shared_between_workers(self) -> None:
+        # 每次新建连接，请求分散到两个 worker；进程内频控时每个 worker 各放行一次
+        statuses = [self._post("/api/passport/send-code", {"phone": "13800139202"})[0] for _ in range(6)]
+        self.assertEqual(sorted(statuses), [200] + [429] * 5)
+
+    def test_dead_worker_is_replaced(self) -> None:
+        victim = self.server.pids[0]
+        os.kill(victim, signal.SIGKILL)
+        self.assertEqual(self.server.supervise(timeout=5.0), 1)
+        self.assertNotIn(victim, self.server.pids)
+        self.assertEqual(len(self.server.pids), 2)
+        self._login("13800139201")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
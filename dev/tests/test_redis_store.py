@@ -0,0 +1,188 @@
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import ERR_ACCESS_INVALID, ERR_CODE_EXPIRED, InMemoryUserRepo  # type: ignore  # noqa: E402
+from backend.redis_store import RedisSessionStore, RedisVerificationCodeStore  # type: ignore  # noqa: E402
+from backend.resp import RespClient, RespError  # type: ignore  # noqa: E402
+from backend.resp_standin import RespKeyspace, RespStandInServer  # type: ignore  # noqa: E402
+from backend.services import (  # type: ignore  # noqa: E402
+    AuthError,
+    AuthService,
+    GuidGenerator,
+    LogoutService,
+    TokenService,
+    VerificationCodeService,
+)
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class RedisStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock_ms = [int(datetime.now(UTC).timestamp() * 1000)]
+        self.server = RespStandInServer(keyspace=RespKeyspace(clock_ms=lambda: self.clock_ms[0])).start()
+        host, port = self.server.address
+        self.client = RespClient(host, port, max_connections=4)
+        self.sessions = RedisSessionStore(self.client)
+        self.codes = RedisVerificationCodeStore(self.client)
+        self.auth = AuthService(InMemoryUserRepo(), self.sessions, VerificationCodeService(self.codes), GuidGenerator())
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+
+    def _login(self, phone: str, app_id: str = "jiuweihu"):
+        self.codes.save(phone, "123456", datetime.now(UTC) + timedelta(minutes=5))
+        return self.auth.login_with_phone(phone, "123456", app_id)
+
+    def test_sessions_shared_between_clients(self) -> None:
+        login = self._login("13800138600")
+        other = RespClient(*self.server.address)
+        self.addCleanup(other.close)
+        store = RedisSessionStore(other)
+
+        refreshed = TokenService(store).refresh_access_token(login.guid, login.refresh_token, "youlishe")
+        validator = TokenValidator(self.sessions)
+        self.assertEqual(validator.validate_access_token(login.access_token, "jiuweihu").guid, login.guid)
+        self.assertEqual(validator.validate_access_token(refreshed.access_token, "youlishe").guid, login.guid)
+        self.assertEqual([guid for guid, _ in store.items()], [login.guid])
+
+        LogoutService(store).logout(login.guid)
+        with self.assertRaises(AuthError) as ctx:
+            validator.validate_access_token(login.access_token, "jiuweihu")
+        self.assertEqual(ctx.exception.code, ERR_ACCESS_INVALID)
+
+    def test_refreshed_token_invalidates_previous_one(self) -> None:
+        login = self._login("13800138601")
+        refreshed = TokenService(self.sessions).refresh_access_token(login.guid, login.refresh_token, "jiuweihu")
+
+        self.assertIsNone(self.sessions.find_by_access_token(login.access_token))
+        self.assertEqual(self.sessions.find_by_access_token(refreshed.access_token)[1], "jiuweihu")  # type: ignore[index]
+
+    def test_concurrent_refresh_from_separate_clients_keeps_every_app(self) -> None:
+        login = self._login("13800138604")
+        services = {"jiuweihu": TokenService(self.sessions)}
+        for app_id in ("youlishe", "jiuweihu-admin"):
+            client = RespClient(*self.server.address)
+            self.addCleanup(client.close)
+            services[app_id] = TokenService(RedisSessionStore(client))
+        latest: dict[str, str] = {}
+        errors: list[BaseException] = []
+        start = threading.Barrier(len(services))
+
+        def worker(app_id: str) -> None:
+            try:
+                start.wait()
+                for _ in range(30):
+                    latest[app_id] = services[app_id].refresh_access_token(login.guid, login.refresh_token, app_id).access_token
+            except BaseException as exc:  # pragma: no cover - 失败时回传到主线程
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(app_id,)) for app_id in services]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        validator = TokenValidator(self.sessions)
+        for app_id, token in latest.items():
+            self.assertEqual(validator.validate_access_token(token, app_id).guid, login.guid)
+
+    def test_exec_aborts_after_watched_key_changes(self) -> None:
+        with self.client.watch("w") as tx:
+            self.assertIsNone(tx.execute("GET", "w"))
+            self.client.execute("SET", "w", "other")
+            self.assertIsNone(tx.commit([("SET", "w", "mine"), ("SET", "w2", "mine")]))
+        self.assertEqual(self.client.execute("GET", "w"), b"other")
+        self.assertIsNone(self.client.execute("GET", "w2"))
+
+        with self.client.watch("w") as tx:
+            self.assertEqual(tx.execute("GET", "w"), b"other")
+            self.assertEqual(tx.commit([("SET", "w", "mine"), ("GET", "w")]), ["OK", b"mine"])
+
+    def test_native_ttl_expires_session_and_code(self) -> None:
+        login = self._login("13800138602")
+        now = datetime.now(UTC)
+        self.codes.save("13800138603", "654321", now + timedelta(minutes=5))
+
+        # 验证码过期后的宽限期内仍可读到记录，从而返回 ERR_CODE_EXPIRED 而不是“不存在”。
+        self.clock_ms[0] += 6 * 60 * 1000
+        with self.assertRaises(AuthError) as ctx:
+            VerificationCodeService(self.codes).validate_code("13800138603", "654321", now + timedelta(minutes=6))
+        self.assertEqual(ctx.exception.code, ERR_CODE_EXPIRED)
+
+        self.clock_ms[0] += 31 * 24 * 3600 * 1000
+        self.assertIsNone(self.codes.get("13800138603"))
+        self.assertIsNone(self.sessions.get(login.guid))
+        self.assertIsNone(self.sessions.find_by_access_token(login.access_token))
+        # 过期键（含刷新遗留的 Access Token 反查键）全部由原生 TTL 回收。
+        self.server.keyspace.purge_expired()
+        self.assertEqual(self.client.execute("DBSIZE"), 0)
+
+    def test_purge_expired_samples_beyond_the_first_keys(self) -> None:
+        keyspace = self.server.keyspace
+        pipe = self.client.pipeline()
+        for i in range(500):
+            pipe.command("SET", f"live:{i}", "v", "PX", 3_600_000)
+        for i in range(500):
+            pipe.command("SET", f"dead:{i}", "v", "PX", 1000)
+        pipe.execute()
+        self.clock_ms[0] += 2000
+
+        # 按插入顺序只看前 sample 个键时，前面都是未过期的键，永远清理不到后面的过期键。
+        self.assertGreater(keyspace.purge_expired(sample=100), 0)
+        for _ in range(200):
+            keyspace.purge_expired(sample=100)
+        self.assertEqual(len(keyspace), 500)
+        self.assertEqual(keyspace.purge_expired(sample=1000), 0)
+
+    def test_pipeline_and_pool_under_concurrency(self) -> None:
+        errors: list[BaseException] = []
+
+        def worker(n: int) -> None:
+            try:
+                for i in range(50):
+                    pipe = self.client.pipeline()
+                    pipe.command("SET", f"k:{n}:{i}", str(i)).command("GET", f"k:{n}:{i}")
+                    self.assertEqual(pipe.execute(), ["OK", str(i).encode()])
+            except BaseException as exc:  # pragma: no cover - 失败时回传到主线程
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.client.execute("DBSIZE"), 400)
+
+    def test_error_reply_raises(self) -> None:
+        with self.assertRaises(RespError):
+            self.client.execute("NOPE")
+        self.assertEqual(self.client.execute("PING"), "PONG")
+
+    def test_connection_left_by_any_exception_is_discarded(self) -> None:
+        # 比连接上限多几次：泄漏名额时后面的 _acquire 会卡在等待空闲连接上。
+        for i in range(6):
+            with self.assertRaises(ValueError):
+                with self.client.pool.connection() as conn:
+                    conn.send(b"*3\r\n$3\r\nSET\r\n$1\r\nk\r\n$1\r\nv\r\n")
+                    raise ValueError("bad reply")  # 回复未读，连接状态未知
+        self.assertEqual(self.client.pool._created, 0)
+        # 若脏连接被归还，这里会先读到上一次残留的 +OK。
+        self.assertEqual(self.client.execute("GET", "k"), b"v")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
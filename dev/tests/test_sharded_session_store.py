@@ -0,0 +1,119 @@
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    ERR_ACCESS_INVALID,
+    InMemoryUserRepo,
+    ShardedSessionStore,
+    VerificationCodeStore,
+)
+from backend.services import (  # type: ignore  # noqa: E402
+    AuthError,
+    AuthService,
+    BanService,
+    GuidGenerator,
+    LogoutService,
+    TokenService,
+    VerificationCodeService,
+)
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class ShardedSessionStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.user_repo = InMemoryUserRepo()
+        self.session_store = ShardedSessionStore(shard_count=4)
+        self.vc_store = VerificationCodeStore()
+        self.auth = AuthService(self.user_repo, self.session_store, VerificationCodeService(self.vc_store), GuidGenerator())
+        self.token_service = TokenService(self.session_store)
+        self.validator = TokenValidator(self.session_store)
+
+    def _login_user(self, phone: str, app_id: str = "jiuweihu"):
+        self.vc_store.save(phone, "123456", datetime.now(UTC) + timedelta(minutes=5))
+        return self.auth.login_with_phone(phone, "123456", app_id)
+
+    def test_services_work_against_sharded_store(self) -> None:
+        login = self._login_user("13800138300")
+        refreshed = self.token_service.refresh_access_token(login.guid, login.refresh_token, "youlishe")
+
+        self.assertEqual(self.validator.validate_access_token(login.access_token, "jiuweihu").guid, login.guid)
+        self.assertEqual(self.validator.validate_access_token(refreshed.access_token, "youlishe").guid, login.guid)
+        self.assertEqual([guid for guid, _ in self.session_store.items()], [login.guid])
+
+        LogoutService(self.session_store).logout(login.guid)
+        self.assertIsNone(self.session_store.get(login.guid))
+        with self.assertRaises(AuthError) as ctx:
+            self.validator.validate_access_token(refreshed.access_token, "youlishe")
+        self.assertEqual(ctx.exception.code, ERR_ACCESS_INVALID)
+
+    def test_ban_removes_session_and_tokens(self) -> None:
+        login = self._login_user("13800138301")
+        BanService(self.user_repo, self.session_store).ban_by_phone("13800138301")
+
+        self.assertIsNone(self.session_store.get(login.guid))
+        self.assertIsNone(self.session_store.find_by_access_token(login.access_token))
+
+    def test_rejects_non_positive_shard_count(self) -> None:
+        with self.assertRaises(ValueError):
+            ShardedSessionStore(shard_count=0)
+
+    def test_concurrent_refresh_verify_and_iteration(self) -> None:
+        logins = [self._login_user(f"138001384{i:02d}") for i in range(20)]
+        errors: list[BaseException] = []
+        stop = threading.Event()
+
+        def refresher(idx: int) -> None:
+            login = logins[idx % len(logins)]
+            app_id = "jiuweihu" if idx % 2 else "youlishe"
+            try:
+                for _ in range(300):
+                    res = self.token_service.refresh_access_token(login.guid, login.refresh_token, app_id)
+                    try:
+                        self.validator.validate_access_token(res.access_token, app_id)
+                    except AuthError as exc:
+                        # 同一 guid/app 被其它线程刷新后旧 token 失效属正常现象。
+                        if exc.code != ERR_ACCESS_INVALID:
+                            raise
+            except BaseException as exc:  # noqa: BLE001
+                errors.append(exc)
+
+        def iterator() -> None:
+            try:
+                while not stop.is_set():
+                    for _, session in self.session_store.items():
+                        for _ in session.apps.items():
+                            pass
+            except BaseException as exc:  # noqa: BLE001
+                errors.append(exc)
+
+        scanner = threading.Thread(target=iterator)
+        scanner.start()
+        workers = [threading.Thread(target=refresher, args=(i,)) for i in range(8)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        stop.set()
+        scanner.join()
+
+        self.assertEqual(errors, [])
+        for login in logins:
+            session = self.session_store.get(login.guid)
+            assert session is not None
+            for app_id, app_session in session.apps.items():
+                self.assertEqual(self.session_store.find_by_access_token(app_session.access_token), (session, app_id))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
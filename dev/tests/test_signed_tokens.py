@@ -0,0 +1,153 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    ERR_ACCESS_EXPIRED,
+    ERR_ACCESS_INVALID,
+    ERR_APP_ID_MISMATCH,
+    InMemorySessionStore,
+    InMemoryUserRepo,
+    VerificationCodeStore,
+)
+from backend.services import (  # type: ignore  # noqa: E402
+    AuthError,
+    AuthService,
+    BanService,
+    GuidGenerator,
+    LogoutService,
+    TokenService,
+    VerificationCodeService,
+)
+from backend.signed_tokens import AccessTokenSigner, RevocationFilter, SigningKey  # type: ignore  # noqa: E402
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class _NoLookupStore(InMemorySessionStore):
+    """记录反查次数，用于断言签名 token 的校验不访问会话存储。"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.lookups = 0
+
+    def find_by_access_token(self, access_token):
+        self.lookups += 1
+        return super().find_by_access_token(access_token)
+
+
+class SignedTokenTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.signer = AccessTokenSigner([SigningKey.generate("k1")])
+        self.revocations = RevocationFilter(capacity=1000)
+        self.user_repo = InMemoryUserRepo()
+        self.session_store = _NoLookupStore()
+        self.vc_store = VerificationCodeStore()
+        self.auth = AuthService(
+            self.user_repo, self.session_store, VerificationCodeService(self.vc_store), GuidGenerator(), token_signer=self.signer
+        )
+        self.validator = TokenValidator(self.session_store, signer=self.signer, revocations=self.revocations)
+
+    def _login_user(self, phone: str, app_id: str = "jiuweihu"):
+        self.vc_store.save(phone, "123456", datetime.now(UTC) + timedelta(minutes=5))
+        return self.auth.login_with_phone(phone, "123456", app_id)
+
+    def _code(self, validator: TokenValidator, token: str, app_id: str = "jiuweihu", now=None) -> str:
+        with self.assertRaises(AuthError) as ctx:
+            validator.validate_access_token(token, app_id, now=now)
+        return ctx.exception.code
+
+    def test_signed_token_validates_locally_without_store(self) -> None:
+        login = self._login_user("13800138800")
+        self.assertTrue(login.access_token.startswith("S.k1."))
+
+        downstream = TokenValidator(None, signer=self.signer)
+        result = downstream.validate_access_token(login.access_token, "jiuweihu")
+        self.assertEqual(result.guid, login.guid)
+        self.assertEqual(result.expires_at, login.access_token_expires_at.replace(microsecond=0))
+        self.assertEqual(self.validator.validate_access_token(login.access_token, "jiuweihu").guid, login.guid)
+        self.assertEqual(self.session_store.lookups, 0)
+
+    def test_error_codes_match_opaque_mode(self) -> None:
+        login = self._login_user("13800138801")
+        later = datetime.now(UTC) + timedelta(hours=5)
+
+        self.assertEqual(self._code(self.validator, login.access_token, now=later), ERR_ACCESS_EXPIRED)
+        self.assertEqual(self._code(self.validator, login.access_token, app_id="youlishe"), ERR_APP_ID_MISMATCH)
+        tampered = login.access_token[:-2] + ("AA" if not login.access_token.endswith("AA") else "BB")
+        self.assertEqual(self._code(self.validator, tampered), ERR_ACCESS_INVALID)
+        self.assertEqual(self._code(self.validator, "S.k1.garbage"), ERR_ACCESS_INVALID)
+        self.assertEqual(self._code(TokenValidator(None, signer=self.signer), "A.opaque"), ERR_ACCESS_INVALID)
+
+    def test_key_rotation_keeps_old_tokens_until_retired(self) -> None:
+        old = self._login_user("13800138802")
+        self.signer.rotate(SigningKey.generate("k2"))
+        new = TokenService(self.session_store, token_signer=self.signer).refresh_access_token(old.guid, old.refresh_token, "youlishe")
+
+        self.assertTrue(new.access_token.startswith("S.k2."))
+        self.assertEqual(self.validator.validate_access_token(old.access_token, "jiuweihu").guid, old.guid)
+        self.assertEqual(self.validator.validate_access_token(new.access_token, "youlishe").guid, old.guid)
+
+        self.signer.retire("k1")
+        self.assertEqual(self._code(self.validator, old.access_token), ERR_ACCESS_INVALID)
+        with self.assertRaises(ValueError):
+            self.signer.retire("k2")
+
+    def test_logout_and_ban_revoke_signed_tokens(self) -> None:
+        a = self._login_user("13800138803")
+        b = self._login_user("13800138804")
+        downstream = TokenValidator(None, signer=self.signer, revocations=self.revocations)
+
+        LogoutService(self.session_store, revocations=self.revocations).logout(a.guid)
+        BanService(self.user_repo, self.session_store, revocations=self.revocations).ban_by_phone("13800138804")
+
+        self.assertEqual(self._code(downstream, a.access_token), ERR_ACCESS_INVALID)
+        self.assertEqual(self._code(downstream, b.access_token), ERR_ACCESS_INVALID)
+        self.assertEqual(
+            self.validator.validate_many([a.access_token, b.access_token, "A.x"], "jiuweihu"),
+            [ERR_ACCESS_INVALID] * 3,
+        )
+
+    def test_refresh_revokes_replaced_token_before_logout(self) -> None:
+        login = self._login_user("13800138805")
+        other_app = TokenService(self.session_store, self.signer, revocations=self.revocations).refresh_access_token(
+            login.guid, login.refresh_token, "youlishe"
+        )
+        refreshed = TokenService(self.session_store, self.signer, revocations=self.revocations).refresh_access_token(
+            login.guid, login.refresh_token, "jiuweihu"
+        )
+        downstream = TokenValidator(None, signer=self.signer, revocations=self.revocations)
+        self.assertEqual(self._code(downstream, login.access_token), ERR_ACCESS_INVALID)  # 被换下即失效
+        self.assertEqual(downstream.validate_access_token(other_app.access_token, "youlishe").guid, login.guid)
+
+        LogoutService(self.session_store, revocations=self.revocations).logout(login.guid)
+        for token, app_id in ((login.access_token, "jiuweihu"), (refreshed.access_token, "jiuweihu"), (other_app.access_token, "youlishe")):
+            self.assertEqual(self._code(downstream, token, app_id), ERR_ACCESS_INVALID)
+
+    def test_revocation_filter_generations_expire(self) -> None:
+        clock = [datetime(2025, 1, 1, tzinfo=UTC)]
+        revocations = RevocationFilter(capacity=100, generation_ttl=timedelta(hours=4), now_provider=lambda: clock[0])
+        revocations.revoke("S.k1.a.b")
+
+        clock[0] += timedelta(hours=5)
+        self.assertTrue(revocations.is_revoked("S.k1.a.b"))
+        clock[0] += timedelta(hours=4)
+        self.assertFalse(revocations.is_revoked("S.k1.a.b"))
+
+    def test_revocation_filter_false_positive_rate(self) -> None:
+        revocations = RevocationFilter(capacity=2000, error_rate=0.01)
+        revocations.revoke_many(f"S.k1.revoked{i}.sig" for i in range(2000))
+        false_positives = sum(revocations.is_revoked(f"S.k1.live{i}.sig") for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.03)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
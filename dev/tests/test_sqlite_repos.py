@@ -0,0 +1,187 @@
+import os
+import random
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    ERR_ACCESS_INVALID,
+    ERR_USER_BANNED,
+    InMemoryLoginLogRepo,
+    User,
+    UserStatus,
+)
+from backend.services import (  # type: ignore  # noqa: E402
+    AuthError,
+    AuthService,
+    BanService,
+    GuidGenerator,
+    LoginLogService,
+    LogoutService,
+    TokenService,
+    UserQueryService,
+    VerificationCodeService,
+)
+from backend.sqlite_repos import (  # type: ignore  # noqa: E402
+    SqliteDatabase,
+    SqliteLoginLogRepo,
+    SqliteSessionStore,
+    SqliteUserRepo,
+    SqliteVerificationCodeStore,
+)
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class SqliteReposTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "passport.db")
+        self._open()
+
+    def tearDown(self) -> None:  # noqa: D401
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _open(self) -> None:
+        self.db = SqliteDatabase(self.path)
+        self.user_repo = SqliteUserRepo(self.db)
+        self.session_store = SqliteSessionStore(self.db)
+        self.vc_store = SqliteVerificationCodeStore(self.db)
+        self.auth = AuthService(self.user_repo, self.session_store, VerificationCodeService(self.vc_store), GuidGenerator())
+        self.validator = TokenValidator(self.session_store)
+
+    def _login_user(self, phone: str, app_id: str = "jiuweihu"):
+        self.vc_store.save(phone, "123456", datetime.now(UTC) + timedelta(minutes=5))
+        return self.auth.login_with_phone(phone, "123456", app_id)
+
+    def test_wal_mode_enabled(self) -> None:
+        with self.db.reading() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_login_refresh_verify_logout_flow_persists_across_reopen(self) -> None:
+        login = self._login_user("13800138500")
+        refreshed = TokenService(self.session_store).refresh_access_token(login.guid, login.refresh_token, "youlishe")
+
+        self.db.close()
+        self._open()
+
+        self.assertEqual(self.validator.validate_access_token(login.access_token, "jiuweihu").guid, login.guid)
+        self.assertEqual(self.validator.validate_access_token(refreshed.access_token, "youlishe").guid, login.guid)
+        self.assertEqual(self.user_repo.find_by_phone("13800138500").guid, login.guid)  # type: ignore[union-attr]
+        self.assertEqual(self.user_repo.find_by_guid(login.guid).phone, "13800138500")  # type: ignore[union-attr]
+
+        LogoutService(self.session_store).logout(login.guid)
+        self.assertIsNone(self.session_store.get(login.guid))
+        with self.assertRaises(AuthError) as ctx:
+            self.validator.validate_access_token(login.access_token, "jiuweihu")
+        self.assertEqual(ctx.exception.code, ERR_ACCESS_INVALID)
+
+    def test_ban_blocks_login_and_clears_session(self) -> None:
+        login = self._login_user("13800138501")
+        BanService(self.user_repo, self.session_store).ban_by_phone("13800138501")
+
+        self.assertEqual(self.session_store.items(), [])
+        with self.assertRaises(AuthError) as ctx:
+            self._login_user("13800138501")
+        self.assertEqual(ctx.exception.code, ERR_USER_BANNED)
+        self.assertEqual(self.user_repo.find_by_phone("13800138501").status, UserStatus.BANNED)  # type: ignore[union-attr]
+        self.assertIsNone(self.session_store.find_by_access_token(login.access_token))
+
+    def test_user_pagination_matches_in_memory_order(self) -> None:
+        base = datetime(2025, 1, 1, tzinfo=UTC)
+        users = [
+            User(guid=f"G{i}", phone=f"138{i:08d}", status=UserStatus.BANNED if i % 3 == 0 else UserStatus.ACTIVE, created_at=base + timedelta(seconds=i % 7))
+            for i in range(40)
+        ]
+        self.user_repo.save_many(users)
+        query = UserQueryService(self.user_repo)
+
+        expected = sorted((u for u in users if u.status == UserStatus.ACTIVE), key=lambda u: (u.created_at, u.phone))
+        paged, cursor = [], None
+        while True:
+            page = query.list_users_page(UserStatus.ACTIVE, limit=6, cursor=cursor)
+            paged.extend(u.guid for u in page.items)
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(paged, [u.guid for u in expected])
+
+    def test_login_log_service_matches_in_memory_repo(self) -> None:
+        rnd = random.Random(9)
+        base = datetime(2025, 1, 1, tzinfo=UTC)
+        sqlite_logs = LoginLogService(SqliteLoginLogRepo(self.db))
+        memory_logs = LoginLogService(InMemoryLoginLogRepo())
+        with self.db.batch():
+            for i in range(300):
+                guid = f"G{rnd.randrange(5)}"
+                phone = f"1380013800{guid[1]}"
+                when = base + timedelta(minutes=rnd.randint(0, 300))
+                channel = rnd.choice(["pc", "mobile"])
+                for service in (sqlite_logs, memory_logs):
+                    if i % 3:
+                        service.record_login(guid, phone, True, channel=channel, ip="1.1.1.1", when=when)
+                    else:
+                        service.record_logout(guid, phone, channel=channel, when=when)
+
+        def key(rows):
+            return [(r.guid, r.phone, r.login_at, r.logout_at, r.channel, r.ip, r.success) for r in rows]
+
+        for kwargs in ({}, {"phone": "13800138002"}, {"channel": "pc", "start": base + timedelta(hours=1), "end": base + timedelta(hours=3)}):
+            self.assertEqual(key(sqlite_logs.query_logs(**kwargs)), key(memory_logs.query_logs(**kwargs)))
+
+    def test_concurrent_refresh_through_separate_connections_keeps_every_app(self) -> None:
+        login = self._login_user("13800138020")
+        other = SqliteDatabase(self.path)
+        self.addCleanup(other.close)
+        services = {"jiuweihu": TokenService(self.session_store), "youlishe": TokenService(SqliteSessionStore(other))}
+        latest: dict[str, str] = {}
+        errors: list[BaseException] = []
+        start = threading.Barrier(len(services))
+
+        def worker(app_id: str) -> None:
+            try:
+                start.wait()
+                for _ in range(30):
+                    latest[app_id] = services[app_id].refresh_access_token(login.guid, login.refresh_token, app_id).access_token
+            except BaseException as exc:  # pragma: no cover - 失败时回传到主线程
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker, args=(app_id,)) for app_id in services]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        for app_id, token in latest.items():
+            self.assertEqual(self.validator.validate_access_token(token, app_id).guid, login.guid)
+
+    def test_batch_rolls_back_on_error(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self.db.batch():
+                self.vc_store.save("13800138502", "111111", datetime.now(UTC))
+                raise RuntimeError("boom")
+        self.assertIsNone(self.vc_store.get("13800138502"))
+
+    def test_code_store_purges_expired(self) -> None:
+        now = datetime(2025, 1, 1, tzinfo=UTC)
+        self.vc_store.save("13800138503", "111111", now - timedelta(seconds=1))
+        self.vc_store.save("13800138504", "222222", now + timedelta(minutes=5))
+
+        self.assertEqual(self.vc_store.purge_expired(now), 1)
+        self.assertIsNone(self.vc_store.get("13800138503"))
+        self.assertEqual(self.vc_store.get("13800138504"), ("222222", now + timedelta(minutes=5)))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    ERR_ACCESS_INVALID,
+    InMemorySessionStore,
+    InMemoryUserRepo,
+    VerificationCodeStore,
+)
+from backend.services import (  # type: ignore  # noqa: E402
+    AuthError,
+    AuthService,
+    BanService,
+    GuidGenerator,
+    LogoutService,
+    TokenService,
+    VerificationCodeService,
+)
+from backend.token_validator import TokenValidator  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class AccessTokenIndexTests(unittest.TestCase):
+    """access_token 反向索引需随 put/delete/刷新/封禁 保持同步。"""
+
+    def setUp(self) -> None:
+        self.user_repo = InMemoryUserRepo()
+        self.session_store = InMemorySessionStore()
+        self.vc_store = VerificationCodeStore()
+        self.auth = AuthService(self.user_repo, self.session_store, VerificationCodeService(self.vc_store), GuidGenerator())
+        self.token_service = TokenService(self.session_store)
+        self.validator = TokenValidator(self.session_store)
+
+    def _login_user(self, phone: str, app_id: str = "jiuweihu"):
+        self.vc_store.save(phone, "123456", datetime.now(UTC) + timedelta(minutes=5))
+        return self.auth.login_with_phone(phone, "123456", app_id)
+
+    def _assert_invalid(self, token: str, app_id: str = "jiuweihu") -> None:
+        with self.assertRaises(AuthError) as ctx:
+            self.validator.validate_access_token(token, app_id)
+        self.assertEqual(ctx.exception.code, ERR_ACCESS_INVALID)
+
+    def test_refresh_replaces_old_token_in_index(self) -> None:
+        login = self._login_user("13800138200")
+        refreshed = self.token_service.refresh_access_token(login.guid, login.refresh_token, "jiuweihu")
+
+        self._assert_invalid(login.access_token)
+        vr = self.validator.validate_access_token(refreshed.access_token, "jiuweihu")
+        self.assertEqual(vr.guid, login.guid)
+
+    def test_refresh_for_new_app_keeps_existing_app_token(self) -> None:
+        login = self._login_user("13800138201")
+        sso = self.token_service.refresh_access_token(login.guid, login.refresh_token, "youlishe")
+
+        self.assertEqual(self.validator.validate_access_token(login.access_token, "jiuweihu").app_id, "jiuweihu")
+        self.assertEqual(self.validator.validate_access_token(sso.access_token, "youlishe").app_id, "youlishe")
+
+    def test_logout_and_ban_drop_tokens_from_index(self) -> None:
+        a = self._login_user("13800138202")
+        b = self._login_user("13800138203")
+
+        LogoutService(self.session_store).logout(a.guid)
+        BanService(self.user_repo, self.session_store).ban_by_phone("13800138203")
+
+        self._assert_invalid(a.access_token)
+        self._assert_invalid(b.access_token)
+        self.assertIsNone(self.session_store.find_by_access_token(a.access_token))
+        self.assertIsNone(self.session_store.find_by_access_token(b.access_token))
+
+    def test_relogin_invalidates_previous_session_tokens(self) -> None:
+        first = self._login_user("13800138204")
+        second = self._login_user("13800138204")
+
+        self._assert_invalid(first.access_token)
+        self.assertEqual(self.validator.validate_access_token(second.access_token, "jiuweihu").guid, second.guid)
+
+    def test_in_place_token_change_without_put_is_not_trusted(self) -> None:
+        login = self._login_user("13800138205")
+        session = self.session_store.get(login.guid)
+        assert session is not None
+        session.apps["jiuweihu"].access_token = "A.replaced"
+
+        self._assert_invalid(login.access_token)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
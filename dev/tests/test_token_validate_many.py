@@ -0,0 +1,107 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.domain import (  # type: ignore  # noqa: E402
+    ERR_ACCESS_EXPIRED,
+    ERR_ACCESS_INVALID,
+    ERR_APP_ID_MISMATCH,
+    InMemorySessionStore,
+    InMemoryUserRepo,
+    VerificationCodeStore,
+)
+from backend.redis_store import RedisSessionStore  # type: ignore  # noqa: E402
+from backend.resp import RespClient  # type: ignore  # noqa: E402
+from backend.resp_standin import RespStandInServer  # type: ignore  # noqa: E402
+from backend.services import (  # type: ignore  # noqa: E402
+    AuthService,
+    GuidGenerator,
+    TokenService,
+    VerificationCodeService,
+)
+from backend.sqlite_repos import SqliteDatabase, SqliteSessionStore  # type: ignore  # noqa: E402
+from backend.token_validator import TokenValidator, ValidationResult  # type: ignore  # noqa: E402
+
+
+UTC = timezone.utc
+
+
+class ValidateManyCases:
+    """各存储实现共用的 validate_many 用例；子类在 _make_store 中提供存储。"""
+
+    def _make_store(self):  # pragma: no cover - 由子类实现
+        raise NotImplementedError
+
+    def setUp(self) -> None:
+        self.session_store = self._make_store()
+        self.vc_store = VerificationCodeStore()
+        self.auth = AuthService(InMemoryUserRepo(), self.session_store, VerificationCodeService(self.vc_store), GuidGenerator())
+        self.validator = TokenValidator(self.session_store)
+
+    def _login_user(self, phone: str, app_id: str = "jiuweihu"):
+        self.vc_store.save(phone, "123456", datetime.now(UTC) + timedelta(minutes=5))
+        return self.auth.login_with_phone(phone, "123456", app_id)
+
+    def test_results_follow_input_order_with_error_codes(self) -> None:
+        a = self._login_user("13800138700")
+        b = self._login_user("13800138701")
+        other_app = TokenService(self.session_store).refresh_access_token(b.guid, b.refresh_token, "youlishe")
+        tokens = [a.access_token, "A.missing", other_app.access_token, b.access_token, a.access_token]
+
+        results = self.validator.validate_many(tokens, "jiuweihu")
+
+        self.assertEqual(len(results), 5)
+        self.assertIsInstance(results[0], ValidationResult)
+        self.assertEqual(results[0].guid, a.guid)  # type: ignore[union-attr]
+        self.assertEqual(results[1], ERR_ACCESS_INVALID)
+        self.assertEqual(results[2], ERR_APP_ID_MISMATCH)
+        self.assertEqual(results[3].guid, b.guid)  # type: ignore[union-attr]
+        self.assertEqual(results[4], results[0])
+
+    def test_matches_single_validation_including_expiry(self) -> None:
+        logins = [self._login_user(f"1380013871{i}") for i in range(5)]
+        tokens = [login.access_token for login in logins] + ["A.nope"]
+        later = datetime.now(UTC) + timedelta(hours=5)
+
+        self.assertEqual(self.validator.validate_many(tokens, "jiuweihu", now=later), [ERR_ACCESS_EXPIRED] * 5 + [ERR_ACCESS_INVALID])
+        for token, outcome in zip(tokens, self.validator.validate_many(tokens, "jiuweihu")):
+            if isinstance(outcome, str):
+                continue
+            self.assertEqual(outcome, self.validator.validate_access_token(token, "jiuweihu"))
+
+    def test_empty_batch(self) -> None:
+        self.assertEqual(self.validator.validate_many([], "jiuweihu"), [])
+
+
+class InMemoryValidateManyTests(ValidateManyCases, unittest.TestCase):
+    def _make_store(self):
+        return InMemorySessionStore()
+
+
+class SqliteValidateManyTests(ValidateManyCases, unittest.TestCase):
+    def _make_store(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        db = SqliteDatabase(os.path.join(tmpdir.name, "passport.db"))
+        self.addCleanup(db.close)
+        return SqliteSessionStore(db)
+
+
+class RedisValidateManyTests(ValidateManyCases, unittest.TestCase):
+    def _make_store(self):
+        server = RespStandInServer().start()
+        self.addCleanup(server.stop)
+        client = RespClient(*server.address)
+        self.addCleanup(client.close)
+        return RedisSessionStore(client)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
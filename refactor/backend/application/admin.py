@@ -2,9 +2,10 @@
 
 from __future__ import annotations
 
+import base64
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, Optional
 
 from refactor.backend.domain import (
     InMemoryLoginLogRepo,
@@ -46,18 +47,64 @@ class BanUseCase:
         self._users.save(user)
 
 
+@dataclass
+class UserPage:
+    items: list[User]
+    next_cursor: Optional[str]
+
+
 class UserQueryUseCase:
-    """后台用户查询用例，提供按状态过滤与排序。"""
+    """后台用户查询用例，提供按状态过滤、排序与 keyset 分页。"""
+
+    STREAM_CHUNK = 500
 
     def __init__(self, user_repo: InMemoryUserRepo) -> None:
         self._users = user_repo
 
     def list_users(self, status: Optional[UserStatus] = None) -> list[User]:
-        users = list(self._users.all().values())
-        if status is not None:
-            users = [u for u in users if u.status == status]
-        users.sort(key=lambda u: (u.created_at, u.phone))
-        return users
+        # 仓储索引已按 (created_at, phone) 有序，无需再排序。
+        return self._users.scan(status)
+
+    def list_users_page(
+        self,
+        status: Optional[UserStatus] = None,
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> UserPage:
+        """keyset 分页：cursor 为上一页返回的 next_cursor，最后一页 next_cursor 为 None。"""
+
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        after = self._decode_cursor(cursor) if cursor else None
+        rows = self._users.scan(status, after, limit + 1)
+        items = rows[:limit]
+        next_cursor = self._encode_cursor(items[-1]) if len(rows) > limit else None
+        return UserPage(items=items, next_cursor=next_cursor)
+
+    def iter_users(self, status: Optional[UserStatus] = None) -> Iterator[User]:
+        """按排序流式产出用户，每次只从索引取一小段，不物化全量列表。"""
+
+        after = None
+        while True:
+            chunk = self._users.scan(status, after, self.STREAM_CHUNK)
+            yield from chunk
+            if len(chunk) < self.STREAM_CHUNK:
+                return
+            after = (chunk[-1].created_at, chunk[-1].phone)
+
+    @staticmethod
+    def _encode_cursor(user: User) -> str:
+        raw = f"{user.created_at.isoformat()}|{user.phone}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+        try:
+            created_at, phone = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+            return datetime.fromisoformat(created_at), phone
+        except Exception as exc:  # noqa: BLE001
+            raise ValueError("invalid cursor") from exc
 
 
 @dataclass
@@ -109,20 +156,9 @@ class LoginLogUseCase:
         """记录用户登出事件，兼容旧实现的匹配策略。"""
 
         when = when or now_utc()
-        logs = self._repo.all()
-        for log in reversed(logs):
-            if log.guid != guid:
-                continue
-            if phone is not None and log.phone != phone:
-                continue
-            if log.logout_at is not None:
-                continue
-            log.logout_at = when
-            if channel:
-                log.channel = channel
-            if ip is not None:
-                log.ip = ip
-            break
+        log = self._repo.find_open(guid, phone)
+        if log is not None:
+            self._repo.mark_logout(log, when, channel=channel, ip=ip)
 
     def query(self, query: LoginLogQuery) -> list[LoginLog]:
         return self._repo.query(
@@ -135,6 +171,7 @@ class LoginLogUseCase:
 
 __all__ = [
     "BanUseCase",
+    "UserPage",
     "UserQueryUseCase",
     "LoginLogQuery",
     "LoginLogUseCase",
@@ -182,14 +182,11 @@ class TokenRefreshUseCase:
 
         access_token = AuthUseCase._generate_token(prefix="A")
         at_exp = calc_access_expires(now)
-        app_session = session.apps.get(app_id)
-        if app_session is None:
-            app_session = AppSession(access_token=access_token, access_token_expires_at=at_exp, last_active_at=now)
-        else:
-            app_session.access_token = access_token
-            app_session.access_token_expires_at = at_exp
-            app_session.last_active_at = now
-        session.apps[app_id] = app_session
+        # copy-on-write 替换 apps：并发的读取方（校验/索引）看到的要么是旧字典要么是新字典，
+        # 不会在迭代过程中遇到原地修改。
+        apps = dict(session.apps)
+        apps[app_id] = AppSession(access_token=access_token, access_token_expires_at=at_exp, last_active_at=now)
+        session.apps = apps
         self._sessions.put(session)
 
         return LoginResult(
@@ -33,6 +33,7 @@ from refactor.backend.domain import (  # type: ignore  # noqa: E402
     InMemoryLoginLogRepo as NewLogRepo,
     InMemorySessionStore as NewSessionStore,
     InMemoryUserRepo as NewUserRepo,
+    TimeIndexedLoginLogRepo,
 )
 from refactor.backend.application.admin import (  # type: ignore  # noqa: E402
     BanUseCase,
@@ -172,6 +173,24 @@ class AdminUsecaseMirrorTests(unittest.TestCase):
         self.assertEqual(len(old_rows), len(new_rows))
         self.assertEqual([r.login_at for r in old_rows], [r.login_at for r in new_rows])
 
+    def test_time_indexed_log_repo_matches_old_service(self) -> None:
+        now = datetime(2025, 1, 1, tzinfo=UTC)
+        indexed_usecase = LoginLogUseCase(TimeIndexedLoginLogRepo())
+        # 故意乱序写入，验证查询结果仍按 login_at 有序且与旧实现一致。
+        for i, channel in ((2, "pc"), (0, "mobile"), (1, "pc")):
+            t = now + timedelta(minutes=i)
+            self.old_log_service.record_login("G1", "13800138000", True, channel=channel, when=t)
+            indexed_usecase.record_login("G1", "13800138000", True, channel=channel, when=t)
+
+        self.old_log_service.record_logout("G1", phone="13800138000", channel="pc", when=now + timedelta(minutes=10))
+        indexed_usecase.record_logout("G1", phone="13800138000", channel="pc", when=now + timedelta(minutes=10))
+
+        for channel in ("pc", "mobile"):
+            q = LoginLogQuery(start=now, end=now + timedelta(minutes=20), channel=channel)
+            old_rows = self.old_log_service.query_logs(start=q.start, end=q.end, channel=q.channel)
+            new_rows = indexed_usecase.query(q)
+            self.assertEqual([(r.login_at, r.logout_at) for r in old_rows], [(r.login_at, r.logout_at) for r in new_rows])
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()